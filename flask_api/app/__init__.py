@@ -2,24 +2,59 @@
 
 from flask import Flask
 from flask_cors import CORS
-from .utils.firebase_config import initialize_firebase_admin
+from .utils.firebase_config import initialize_firebase_admin, use_client
+from .utils.http_response import init_response_layer
+from .utils.request_cache import init_request_cache
+from .utils.firestore_metrics import init_metrics
+from .utils.async_support import init_async
+from .utils.data_versions import init_data_versions
+from .utils.job_queue import init_job_queue
+from .utils.logging_config import get_logger, init_logging
 import os
 
-def create_app():
-    # Firebase'i başlat
-    try:
-        if not initialize_firebase_admin(): 
-            print("Firebase Admin SDK zaten başlatılmış.")
-        else:
-            print("Firebase Admin SDK başlatıldı.")
-    except Exception as e:
-        print(f"KRİTİK HATA: Firebase Admin SDK başlatılamadı: {e}")
+logger = get_logger(__name__)
+
+
+def create_app(firestore_client=None):
+    # Firebase'i başlat (ya da dışarıdan verilen istemciyi kullan, ör. in-memory backend)
+    if firestore_client is not None:
+        use_client(firestore_client)
+    else:
+        try:
+            if not initialize_firebase_admin(): 
+                logger.info("Firebase Admin SDK zaten başlatılmış.")
+            else:
+                logger.info("Firebase Admin SDK başlatıldı.")
+        except Exception as e:
+            logger.error("KRİTİK HATA: Firebase Admin SDK başlatılamadı: %s", e)
 
     app = Flask(__name__)
+
+    # Yapılandırılmış loglama ve istek kimliği (X-Request-ID); diğer hook'lardan önce
+    init_logging(app)
     
     # CORS ayarları
     CORS(app, resources={r"/api/*": {"origins": "*"}}) 
 
+    # Hızlı JSON, ETag/304 ve gzip/br sıkıştırma (diğer hook'lardan sonra çalışır)
+    init_response_layer(app)
+
+    # İstek kapsamlı döküman önbelleği
+    init_request_cache(app)
+
+    # Endpoint bazında Firestore maliyet metrikleri (/metrics) ve slow request log'u
+    init_metrics(app)
+
+    # Async view'lar (ör. /api/ai/parse-text) için event loop köprüsü
+    init_async(app)
+
+    # Kullanıcı veri sürümleri: yazmalarda sürüm artışı, GET'lerde sürüm bazlı 304.
+    # Metrik hook'undan sonra kaydedilir ki flush yazması o isteğin metriklerine girsin.
+    init_data_versions(app)
+
+    # Arka plan iş kuyruğu: bakiye/kumbara etkileri, holding yeniden hesaplama, portföy değerlemesi
+    init_job_queue(app)
+
     # --- Blueprint Kayıtları ---
     from .routes.user_routes import user_bp
     from .routes.profile_routes import profile_utility_bp
@@ -32,6 +67,9 @@ def create_app():
     from .routes.ai_routes import ai_bp # AI blueprint'i import ediliyor
     from .routes.investment_routes import investment_bp
     from app.routes.finance_test_routes import finance_test_bp
+    from .routes.home_routes import home_bp
+    from .routes.sync_routes import sync_bp
+    from .routes.export_routes import export_bp
 
     # Diğer blueprint'leri olduğu gibi kaydedin (url_prefix olmadan)
     app.register_blueprint(user_bp)
@@ -44,6 +82,9 @@ def create_app():
     app.register_blueprint(analytics_bp)
     app.register_blueprint(investment_bp)
     app.register_blueprint(finance_test_bp)
+    app.register_blueprint(home_bp)
+    app.register_blueprint(sync_bp)
+    app.register_blueprint(export_bp)
     
     # DÜZELTİLMİŞ KISIM: ai_bp'yi url_prefix OLMADAN kaydedin
     app.register_blueprint(ai_bp)
@@ -52,5 +93,5 @@ def create_app():
     def hello():
         return "Hello from SIT App Flask API!"
 
-    print("Flask uygulaması oluşturuldu ve tüm blueprint'ler kaydedildi.")
+    logger.info("Flask uygulaması oluşturuldu ve tüm blueprint'ler kaydedildi.")
     return app
\ No newline at end of file
@@ -0,0 +1,72 @@
+# File: flask_api/app/jobs/compact_transactions.py
+"""
+İşlem arşivi sıkıştırması: her kullanıcının ARCHIVE_AGE_MONTHS'tan eski,
+henüz arşivlenmemiş aylarını aylık bucket dökümanlarına yazar (bkz.
+app/services/transaction_archive_service.py).
+
+Artımlıdır: kullanıcı başına sadece `archivedThrough`'dan sonraki aylar
+okunur, ilk çalıştırmadan sonra gecelik maliyet yaklaşık bir aylık işlemdir.
+`--rebuild` kullanıcının bucket'larını silip baştan üretir (bucket'lardan
+şüphe edildiğinde ya da biçim değiştiğinde).
+
+    python -m app.jobs.compact_transactions [--user UID] [--through YYYY-MM] [--rebuild]
+"""
+import argparse
+import sys
+import time
+from app.utils import firebase_config
+from app.utils.logging_config import get_logger
+
+logger = get_logger(__name__)
+
+
+def user_ids():
+    return [ref.id for ref in firebase_config.db.collection('users').list_documents()]
+
+
+def run(users=None, through_month=None, rebuild=False):
+    """Sıkıştırmayı çalıştırır ve özet istatistikleri döner."""
+    from app.services.transaction_archive_service import TransactionArchiveService, max_archivable_month
+    started = time.perf_counter()
+    users = users or user_ids()
+    buckets, failed = 0, []
+    for user_id in users:
+        try:
+            if rebuild:
+                TransactionArchiveService.reset_user(user_id)
+            buckets += TransactionArchiveService.compact_user(user_id, through_month)
+        except Exception as e:
+            logger.exception("COMPACT: Failed for user %s: %s", user_id, e)
+            failed.append(user_id)
+    elapsed = time.perf_counter() - started
+    summary = {
+        'users': len(users), 'buckets': buckets, 'failedUsers': failed,
+        'through': min(through_month or max_archivable_month(), max_archivable_month()),
+        'seconds': round(elapsed, 3),
+    }
+    logger.info("COMPACT: %d users, %d buckets written through %s in %.2fs (%d failed).",
+                len(users), buckets, summary['through'], elapsed, len(failed))
+    return summary
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Pack closed months of transactions into monthly archive buckets.")
+    parser.add_argument('--user', action='append', dest='users', help='only this user (repeatable)')
+    parser.add_argument('--through', default=None, help='last month to archive (YYYY-MM); capped by the age limit')
+    parser.add_argument('--rebuild', action='store_true', help='drop existing buckets and rebuild them')
+    args = parser.parse_args(argv)
+
+    if firebase_config.db is None:
+        firebase_config.initialize_firebase_admin()
+    summary = run(args.users, args.through, args.rebuild)
+
+    print(f"Archived {summary['users']} users through {summary['through']}: "
+          f"{summary['buckets']} buckets written in {summary['seconds']:.2f}s.")
+    if summary['failedUsers']:
+        print(f"Failed: {', '.join(summary['failedUsers'])}")
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,203 @@
+# File: flask_api/app/jobs/purge_deleted.py
+"""
+Soft-delete edilmiş kayıtların temizliği.
+
+delete_transaction `isDeleted`, delete_account / delete_category
+`isArchived` bayrağını True yapar; bu satırlar hiç silinmediği için canlı
+sorgular ve indeksler ölü kayıtları da taşır. Saklama süresinden
+(TOMBSTONE_RETENTION_DAYS, varsayılan 90 gün) önce silinmiş kayıtlar:
+
+- kullanıcı ve koleksiyon başına paketlenip soğuk arşive yazılır
+  (cold_archive/{otomatik id}: {'docs': {docId: veri}}),
+- aynı batch'te canlı koleksiyondan silinir (taşıma atomiktir),
+- hesaplar için balance_shards alt koleksiyonu da silinir; shard toplamı
+  arşivlenen `currentBalance`'a katlanır.
+
+Sorgu `bayrak == True AND updatedAt < sınır` şeklindedir ve PURGE_CHUNK_SIZE'lık
+parçalar halinde, sonuç boşalana kadar tekrarlanır. Aynı süreden eski
+sync_tombstones kayıtları da silinir. Saklama süresinden eski bir imleçle
+gelen /api/sync isteği tam senkrona döner (bkz. SyncService.get_changes),
+bu yüzden temizlenen silmelerin istemciye bildirilmesi gerekmez.
+
+    python -m app.jobs.purge_deleted [--dry-run] [--retention-days N] [--chunk-size N] [--collection NAME]
+"""
+import argparse
+import os
+import sys
+import time
+from collections import defaultdict
+from datetime import datetime, timezone
+from google.cloud.firestore_v1.base_query import FieldFilter
+from app.utils import firebase_config
+from app.utils.sync_tombstones import TOMBSTONES_COLLECTION, RETENTION_DAYS, retention_cutoff
+from app.utils.sharded_counter import ShardedCounter
+from app.utils.logging_config import get_logger
+
+logger = get_logger(__name__)
+
+COLD_ARCHIVE_COLLECTION = 'cold_archive'
+PURGE_CHUNK_SIZE = int(os.getenv('PURGE_CHUNK_SIZE', '300'))
+# koleksiyon -> silinmiş bayrağı
+PURGE_TARGETS = {
+    'transactions': 'isDeleted',
+    'user_accounts': 'isArchived',
+    'user_defined_categories': 'isArchived',
+}
+
+
+def _expired(collection, cutoff, limit):
+    db = firebase_config.db
+    if collection == TOMBSTONES_COLLECTION:
+        query = db.collection(collection).where(filter=FieldFilter('updatedAt', '<', cutoff))
+    else:
+        query = (db.collection(collection)
+                   .where(filter=FieldFilter(PURGE_TARGETS[collection], '==', True))
+                   .where(filter=FieldFilter('updatedAt', '<', cutoff)))
+    return list(query.limit(limit).stream())
+
+
+def _account_shards(docs):
+    """Hesap id'si -> (shard ref'leri, shard toplamı)."""
+    from app.services.balance_service import BalanceService
+    refs = {doc.id: BalanceService.get_balance_counter(doc.reference, doc.to_dict().get('userId')).shard_refs()
+            for doc in docs}
+    all_refs = [ref for shard_refs in refs.values() for ref in shard_refs]
+    totals = ShardedCounter.sum_shards_by_parent(
+        [s for s in firebase_config.db.get_all(all_refs) if s.exists], 'currentBalance') if all_refs else {}
+    return {account_id: (shard_refs, totals.get(account_id, 0.0)) for account_id, shard_refs in refs.items()}
+
+
+def purge_collection(collection, cutoff, chunk_size=None, batch_size=None):
+    """
+    Bir koleksiyonun süresi dolmuş silinmiş kayıtlarını arşive taşır.
+    (taşınan kayıt, yazılan döküman) döner.
+    """
+    from app.services.balance_ledger_service import WRITE_BATCH_SIZE
+    db = firebase_config.db
+    chunk_size = chunk_size or PURGE_CHUNK_SIZE
+    batch_size = batch_size or WRITE_BATCH_SIZE
+    moved = written = 0
+    if collection == 'user_accounts':
+        # Her hesap shard'larıyla birlikte silinir; bir kullanıcının paketi tek batch'e sığmalı
+        from app.services.balance_service import ACCOUNT_BALANCE_SHARDS
+        chunk_size = max(1, min(chunk_size, (batch_size - 1) // (ACCOUNT_BALANCE_SHARDS + 1)))
+
+    while True:
+        docs = _expired(collection, cutoff, chunk_size)
+        if not docs:
+            break
+        shards = _account_shards(docs) if collection == 'user_accounts' else {}
+        by_user = defaultdict(list)
+        for doc in docs:
+            by_user[doc.to_dict().get('userId')].append(doc)
+
+        now = datetime.now(timezone.utc).isoformat()
+        batch, pending = db.batch(), 0
+        for user_id, user_docs in by_user.items():
+            needed = len(user_docs) + 1 + sum(len(shards.get(d.id, ((), 0))[0]) for d in user_docs)
+            if pending and pending + needed > batch_size:
+                batch.commit()
+                written += pending
+                batch, pending = db.batch(), 0
+            packed = {}
+            for doc in user_docs:
+                data = doc.to_dict()
+                if doc.id in shards:
+                    shard_refs, shard_total = shards[doc.id]
+                    data['currentBalance'] = float(data.get('currentBalance', 0.0) or 0.0) + shard_total
+                    for ref in shard_refs:
+                        batch.delete(ref)
+                    pending += len(shard_refs)
+                packed[doc.id] = data
+                batch.delete(doc.reference)
+            batch.set(db.collection(COLD_ARCHIVE_COLLECTION).document(), {
+                'userId': user_id, 'collection': collection, 'count': len(packed),
+                'docs': packed, 'purgedAt': now,
+            })
+            pending += len(user_docs) + 1
+        if pending:
+            batch.commit()
+            written += pending
+        moved += len(docs)
+        logger.debug("PURGE: Moved %d %s documents to %s.", len(docs), collection, COLD_ARCHIVE_COLLECTION)
+    return moved, written
+
+
+def purge_tombstones(cutoff, chunk_size=None):
+    """Süresi dolmuş sync_tombstones kayıtlarını siler; silinen sayıyı döner."""
+    db = firebase_config.db
+    chunk_size = chunk_size or PURGE_CHUNK_SIZE
+    deleted = 0
+    while True:
+        docs = _expired(TOMBSTONES_COLLECTION, cutoff, chunk_size)
+        if not docs:
+            break
+        batch = db.batch()
+        for doc in docs:
+            batch.delete(doc.reference)
+        batch.commit()
+        deleted += len(docs)
+    return deleted
+
+
+def count_expired(collection, cutoff):
+    return len(_expired(collection, cutoff, 10 ** 9))
+
+
+def run(dry_run=False, retention_days=None, chunk_size=None, collections=None):
+    """
+    Temizliği çalıştırır ve özet istatistikleri döner. Saklama süresi
+    RETENTION_DAYS'ten kısa olamaz: /api/sync sadece bundan eski imleçleri
+    tam senkrona döndürür, arada kalan istemci temizlenen silmeleri kaçırırdı.
+    """
+    started = time.perf_counter()
+    if retention_days is not None and retention_days < RETENTION_DAYS:
+        logger.warning("PURGE: retention of %d days is below TOMBSTONE_RETENTION_DAYS; using %d.",
+                       retention_days, RETENTION_DAYS)
+        retention_days = RETENTION_DAYS
+    cutoff = retention_cutoff(retention_days)
+    collections = collections or [*PURGE_TARGETS, TOMBSTONES_COLLECTION]
+    counts, written = {}, 0
+    for collection in collections:
+        if dry_run:
+            counts[collection] = count_expired(collection, cutoff)
+        elif collection == TOMBSTONES_COLLECTION:
+            counts[collection] = purge_tombstones(cutoff, chunk_size)
+            written += counts[collection]
+        else:
+            counts[collection], collection_writes = purge_collection(collection, cutoff, chunk_size)
+            written += collection_writes
+    elapsed = time.perf_counter() - started
+    summary = {'cutoff': cutoff, 'purged': counts, 'writes': written, 'dryRun': dry_run,
+               'seconds': round(elapsed, 3)}
+    logger.info("PURGE: %s documents deleted before %s purged (%d writes) in %.2fs.",
+                sum(counts.values()), cutoff, written, elapsed)
+    return summary
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Move soft-deleted documents past the retention window to cold storage.")
+    parser.add_argument('--dry-run', action='store_true', help='count expired documents without moving them')
+    parser.add_argument('--retention-days', type=int, default=RETENTION_DAYS,
+                        help=f'keep deletions this many days (at least {RETENTION_DAYS})')
+    parser.add_argument('--chunk-size', type=int, default=PURGE_CHUNK_SIZE, help='documents per query')
+    parser.add_argument('--collection', action='append', dest='collections',
+                        choices=[*PURGE_TARGETS, TOMBSTONES_COLLECTION], help='only this collection (repeatable)')
+    args = parser.parse_args(argv)
+    if args.retention_days < RETENTION_DAYS:
+        parser.error(f"--retention-days must be at least TOMBSTONE_RETENTION_DAYS ({RETENTION_DAYS}); "
+                     "sync clients only fall back to a full resync past that window")
+
+    if firebase_config.db is None:
+        firebase_config.initialize_firebase_admin()
+    summary = run(args.dry_run, args.retention_days, args.chunk_size, args.collections)
+
+    verb = 'Would purge' if summary['dryRun'] else 'Purged'
+    for collection, count in summary['purged'].items():
+        print(f"{verb} {count} {collection} documents deleted before {summary['cutoff']}.")
+    print(f"{summary['writes']} writes in {summary['seconds']:.2f}s.")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,60 @@
+# File: flask_api/app/jobs/rebuild_search_index.py
+"""
+İşlem arama index'inin yeniden oluşturulması (bkz.
+app/services/transaction_search_service.py).
+
+Index yazma yolunda artımlı tutulur; bu iş ilk kurulumda, normalizasyon
+kuralları değiştiğinde ya da index'ten şüphe edildiğinde çalıştırılır.
+Kullanıcı başına tüm silinmemiş işlemler okunur, terim dökümanları yeniden
+yazılır ve artık geçerli olmayanlar silinir.
+
+    python -m app.jobs.rebuild_search_index [--user UID]
+"""
+import argparse
+import sys
+import time
+from app.utils import firebase_config
+from app.utils.logging_config import get_logger
+from .compact_transactions import user_ids
+
+logger = get_logger(__name__)
+
+
+def run(users=None):
+    """Yeniden oluşturmayı çalıştırır ve özet istatistikleri döner."""
+    from app.services.transaction_search_service import TransactionSearchService
+    started = time.perf_counter()
+    users = users or user_ids()
+    terms, failed = 0, []
+    for user_id in users:
+        try:
+            terms += TransactionSearchService.rebuild_user(user_id)
+        except Exception as e:
+            logger.exception("SEARCH_REBUILD: Failed for user %s: %s", user_id, e)
+            failed.append(user_id)
+    elapsed = time.perf_counter() - started
+    summary = {'users': len(users), 'terms': terms, 'failedUsers': failed, 'seconds': round(elapsed, 3)}
+    logger.info("SEARCH_REBUILD: %d users, %d terms written in %.2fs (%d failed).",
+                len(users), terms, elapsed, len(failed))
+    return summary
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Rebuild the per-user transaction search index.")
+    parser.add_argument('--user', action='append', dest='users', help='only this user (repeatable)')
+    args = parser.parse_args(argv)
+
+    if firebase_config.db is None:
+        firebase_config.initialize_firebase_admin()
+    summary = run(args.users)
+
+    print(f"Rebuilt search index for {summary['users']} users: "
+          f"{summary['terms']} terms written in {summary['seconds']:.2f}s.")
+    if summary['failedUsers']:
+        print(f"Failed: {', '.join(summary['failedUsers'])}")
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,74 @@
+# File: flask_api/app/jobs/rebuild_tax_lots.py
+"""
+Vergi lotlarının ve realized_lots satırlarının geçmişten üretilmesi (bkz.
+app/services/tax_lot_service.py).
+
+Lotlar holding'e dokunan her yazmada yeniden hesaplanır; bu iş, lot
+defterinden önce oluşmuş pozisyonları tek seferde taşımak ya da bir
+holding'i yeniden oynatmak için çalıştırılır. Kullanıcının işlem
+gördüğü her (hesap, varlık) çifti için holding yeniden hesaplanır.
+
+    python -m app.jobs.rebuild_tax_lots [--user UID]
+"""
+import argparse
+import sys
+import time
+from google.cloud.firestore_v1.base_query import FieldFilter
+from app.utils import firebase_config, data_versions
+from app.utils.logging_config import get_logger
+from .compact_transactions import user_ids
+
+logger = get_logger(__name__)
+
+
+def positions(user_id):
+    """Kullanıcının işlem gördüğü (hesap id, varlık) çiftleri."""
+    query = (firebase_config.db.collection('investment_transactions')
+               .where(filter=FieldFilter('userId', '==', user_id))
+               .select(['accountId', 'assetSymbol']))
+    return sorted({(doc.to_dict().get('accountId'), doc.to_dict().get('assetSymbol')) for doc in query.stream()})
+
+
+def run(users=None):
+    """Yeniden oynatmayı çalıştırır ve özet istatistikleri döner."""
+    from app.services.investment_service import InvestmentService
+    started = time.perf_counter()
+    users = users or user_ids()
+    holdings, corrected, failed = 0, 0.0, []
+    for user_id in users:
+        for account_id, asset_symbol in positions(user_id):
+            try:
+                corrected += InvestmentService._recalculate_holding(
+                    firebase_config.db.transaction(), account_id, user_id, asset_symbol)
+                holdings += 1
+            except Exception as e:
+                logger.exception("TAX_LOTS: Failed for %s %s/%s: %s", user_id, account_id, asset_symbol, e)
+                failed.append(f"{user_id}:{account_id}:{asset_symbol}")
+        data_versions.bump(user_id, 'investments', 'accounts')
+    elapsed = time.perf_counter() - started
+    summary = {'users': len(users), 'holdings': holdings, 'realizedCorrection': round(corrected, 2),
+               'failed': failed, 'seconds': round(elapsed, 3)}
+    logger.info("TAX_LOTS: %d holdings of %d users replayed in %.2fs (realized P&L corrected by %.2f, %d failed).",
+                holdings, len(users), elapsed, corrected, len(failed))
+    return summary
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Replay investment history into tax lots and realized lot rows.")
+    parser.add_argument('--user', action='append', dest='users', help='only this user (repeatable)')
+    args = parser.parse_args(argv)
+
+    if firebase_config.db is None:
+        firebase_config.initialize_firebase_admin()
+    summary = run(args.users)
+
+    print(f"Replayed {summary['holdings']} holdings for {summary['users']} users in {summary['seconds']:.2f}s; "
+          f"realized P&L corrected by {summary['realizedCorrection']:.2f}.")
+    if summary['failed']:
+        print(f"Failed: {', '.join(summary['failed'])}")
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,331 @@
+# File: flask_api/app/jobs/reconcile_balances.py
+"""
+Bakiye mutabakatı: user_accounts.currentBalance ve
+user_savings_balances.totalSavingsBalance, işlemlerin ima ettiği değerlerle
+karşılaştırılır ve sapmalar düzeltilir.
+
+TransactionService.update_transaction'daki geri al / uygula adımları atomik
+olmadığından yarıda kalan bir güncelleme bakiyeyi kaydırabilir. İş üç adımda
+çalışır:
+
+1. işlemler, kumbara kayıtları, hedefler, hesaplar ve bakiye shard'ları
+   koleksiyon başına tek akış sorgusuyla okunur ve kullanıcıya göre bölümlenir,
+2. kullanıcı grupları süreç havuzunda toplanıp saklanan değerlerle
+   karşılaştırılır (saf hesaplama; işçiler Firestore'a dokunmaz),
+3. sapan kullanıcılar taze okumalarla yeniden kontrol edilir (o an süren bir
+   yazmanın yarısını yakalamamak için) ve düzeltmeler WRITE_BATCH_SIZE'lık
+   batch'lerle shard artırımı olarak yazılır. Defterli hesaplarda aynı batch'e
+   'reconciliation' kaydı eklenir, defter ile sayaç ayrışmaz.
+
+Beklenen değerler:
+- hesap: initialBalance + elle atanan bakiyeler (defterdeki 'adjustment'
+  kayıtları) + silinmemiş işlemlerin net etkisi
+- kumbara: kumbara kayıtlarının toplamı - hedeflerde biriken tutar
+
+Yatırım hesapları (değeri holding'lerden gelir) ve kullanıcının aynı adı
+taşıyan birden fazla hesabı atlanır (işlemler hesaba adıyla bağlı).
+Defter öncesinde elle atanmış bakiyeler hiçbir yerde kayıtlı olmadığından
+sapma olarak görünür; ilk çalıştırmada raporu --dry-run ile incelemek önerilir.
+
+    python -m app.jobs.reconcile_balances [--dry-run] [--workers N] [--chunk-users N] [--tolerance X]
+"""
+import argparse
+import os
+import sys
+import time
+from collections import Counter, defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from google.cloud.firestore_v1.base_query import FieldFilter
+from app.utils import firebase_config, data_versions
+from app.utils.sharded_counter import ShardedCounter
+from app.utils.logging_config import get_logger
+
+logger = get_logger(__name__)
+
+RECONCILE_WORKERS = int(os.getenv('RECONCILE_WORKERS', str(os.cpu_count() or 1)))
+RECONCILE_CHUNK_USERS = int(os.getenv('RECONCILE_CHUNK_USERS', '50'))
+# Gelirden kumbaraya ayrılan tutar yüzdeye çevrilip geri hesaplandığından işlem
+# başına kuruş düzeyinde yuvarlama farkı birikebilir; bu eşiğin altı düzeltilmez.
+DRIFT_TOLERANCE = float(os.getenv('RECONCILE_DRIFT_TOLERANCE', '1.0'))
+# SavingsService._get_savings_counter shard'ları varsayılan alt koleksiyonda tutar
+SAVINGS_SHARD_COLLECTION = 'shards'
+TRANSACTION_FIELDS = ['userId', 'account', 'type', 'amount', 'incomeAllocationPct']
+
+
+def _new_partition():
+    return {'transactions': [], 'allocations': [], 'goals': [], 'accounts': [],
+            'adjustments': defaultdict(float), 'savings': 0.0}
+
+
+def _transaction_row(tx):
+    return (tx.get('account'), tx.get('type'), float(tx.get('amount', 0.0) or 0.0), tx.get('incomeAllocationPct'))
+
+
+def _account_row(doc_id, account, stored):
+    return {'id': doc_id, 'name': account.get('accountName'), 'type': account.get('accountType'),
+            'initialBalance': float(account.get('initialBalance', 0.0) or 0.0), 'stored': stored,
+            'ledger': bool(account.get('ledgerStartedAt'))}
+
+
+# =========================================================
+# OKUMA
+# =========================================================
+
+def load_partitions():
+    """Tüm kaynakları akış halinde okuyup {userId: bölüm} sözlüğüne böler."""
+    from app.services.balance_ledger_service import LEDGER_COLLECTION
+    db = firebase_config.db
+    partitions = defaultdict(_new_partition)
+
+    tx_query = (db.collection('transactions')
+                  .where(filter=FieldFilter('isDeleted', '==', False))
+                  .select(TRANSACTION_FIELDS))
+    for doc in tx_query.stream():
+        tx = doc.to_dict()
+        partitions[tx.get('userId')]['transactions'].append(_transaction_row(tx))
+
+    for doc in db.collection('savings_allocations').select(['userId', 'amount']).stream():
+        allocation = doc.to_dict()
+        partitions[allocation.get('userId')]['allocations'].append(float(allocation.get('amount', 0.0) or 0.0))
+
+    for doc in db.collection('savings_goals').select(['userId', 'currentAmount']).stream():
+        goal = doc.to_dict()
+        partitions[goal.get('userId')]['goals'].append(float(goal.get('currentAmount', 0.0) or 0.0))
+
+    adjustments = (db.collection(LEDGER_COLLECTION)
+                     .where(filter=FieldFilter('kind', '==', 'adjustment'))
+                     .select(['userId', 'accountId', 'amount']))
+    for doc in adjustments.stream():
+        entry = doc.to_dict()
+        partitions[entry.get('userId')]['adjustments'][entry.get('accountId')] += float(entry.get('amount', 0.0) or 0.0)
+
+    account_shards = ShardedCounter.sum_shards_by_parent(
+        db.collection_group('balance_shards').stream(), 'currentBalance')
+    for doc in db.collection('user_accounts').stream():
+        account = doc.to_dict()
+        stored = float(account.get('currentBalance', 0.0) or 0.0) + account_shards.get(doc.id, 0.0)
+        partitions[account.get('userId')]['accounts'].append(_account_row(doc.id, account, stored))
+
+    savings_shards = ShardedCounter.sum_shards_by_parent(
+        db.collection_group(SAVINGS_SHARD_COLLECTION).stream(), 'totalSavingsBalance')
+    for user_id, total in savings_shards.items():
+        partitions[user_id]['savings'] += total
+    for doc in db.collection('user_savings_balances').stream():
+        partitions[doc.id]['savings'] += float((doc.to_dict() or {}).get('totalSavingsBalance', 0.0) or 0.0)
+
+    partitions.pop(None, None)
+    return partitions
+
+
+def load_user_partition(user_id):
+    """Tek kullanıcının bölümü, sayaçlar önbelleksiz okunarak (düzeltme öncesi yeniden kontrol)."""
+    from app.services.balance_service import BalanceService
+    from app.services.savings_service import SavingsService
+    from app.services.balance_ledger_service import LEDGER_COLLECTION
+    db = firebase_config.db
+    partition = _new_partition()
+
+    def owned(collection):
+        return db.collection(collection).where(filter=FieldFilter('userId', '==', user_id))
+
+    tx_query = owned('transactions').where(filter=FieldFilter('isDeleted', '==', False)).select(TRANSACTION_FIELDS)
+    partition['transactions'] = [_transaction_row(doc.to_dict()) for doc in tx_query.stream()]
+    partition['allocations'] = [float(doc.to_dict().get('amount', 0.0) or 0.0)
+                                for doc in owned('savings_allocations').select(['amount']).stream()]
+    partition['goals'] = [float(doc.to_dict().get('currentAmount', 0.0) or 0.0)
+                          for doc in owned('savings_goals').select(['currentAmount']).stream()]
+    adjustments = owned(LEDGER_COLLECTION).where(filter=FieldFilter('kind', '==', 'adjustment'))
+    for doc in adjustments.select(['accountId', 'amount']).stream():
+        entry = doc.to_dict()
+        partition['adjustments'][entry.get('accountId')] += float(entry.get('amount', 0.0) or 0.0)
+    for doc in owned('user_accounts').stream():
+        stored = BalanceService.get_balance_counter(doc.reference, user_id).get_total(use_cache=False)
+        partition['accounts'].append(_account_row(doc.id, doc.to_dict(), stored))
+    partition['savings'] = SavingsService._get_savings_counter(user_id).get_total(use_cache=False)
+    return partition
+
+
+# =========================================================
+# KARŞILAŞTIRMA (süreç havuzunda)
+# =========================================================
+
+def reconcile_partition(user_id, partition, tolerance=None):
+    """
+    Bir kullanıcının beklenen bakiyelerini hesaplayıp saklananlarla
+    karşılaştırır. Sadece `tolerance`'tan fazla sapan hesaplar / kumbara döner.
+    """
+    from app.services.balance_service import BalanceService
+    tolerance = DRIFT_TOLERANCE if tolerance is None else tolerance
+    net_by_account = defaultdict(float)
+    for account_name, tx_type, amount, allocation_pct in partition['transactions']:
+        net_by_account[account_name] += BalanceService._transaction_net_change(
+            {'type': tx_type, 'amount': amount, 'incomeAllocationPct': allocation_pct})
+
+    name_counts = Counter(account['name'] for account in partition['accounts'])
+    drifts, checked, skipped = [], 0, 0
+    for account in partition['accounts']:
+        if account['type'] == 'investment':
+            continue
+        if name_counts[account['name']] > 1:
+            skipped += 1
+            continue
+        checked += 1
+        expected = round(account['initialBalance'] + partition['adjustments'].get(account['id'], 0.0)
+                         + net_by_account.get(account['name'], 0.0), 2)
+        drift = round(expected - account['stored'], 2)
+        if abs(drift) > tolerance:
+            drifts.append({'accountId': account['id'], 'accountName': account['name'], 'ledger': account['ledger'],
+                           'stored': round(account['stored'], 2), 'expected': expected, 'drift': drift})
+
+    savings = None
+    expected_savings = round(sum(partition['allocations']) - sum(partition['goals']), 2)
+    savings_drift = round(expected_savings - partition['savings'], 2)
+    if abs(savings_drift) > tolerance:
+        savings = {'stored': round(partition['savings'], 2), 'expected': expected_savings, 'drift': savings_drift}
+
+    return {'userId': user_id, 'accounts': drifts, 'savings': savings,
+            'checkedAccounts': checked, 'skippedAccounts': skipped}
+
+
+def _reconcile_chunk(chunk, tolerance=None):
+    return [reconcile_partition(user_id, partition, tolerance) for user_id, partition in chunk]
+
+
+def reconcile_all(partitions, workers=None, chunk_users=None, tolerance=None):
+    """Bölümleri chunk_users'lık gruplar halinde süreç havuzunda karşılaştırır."""
+    workers = workers or RECONCILE_WORKERS
+    chunk_users = max(chunk_users or RECONCILE_CHUNK_USERS, 1)
+    items = list(partitions.items())
+    chunks = [items[i:i + chunk_users] for i in range(0, len(items), chunk_users)]
+    if workers <= 1 or len(chunks) <= 1:
+        return [result for chunk in chunks for result in _reconcile_chunk(chunk, tolerance)]
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return [result for results in pool.map(_reconcile_chunk, chunks, [tolerance] * len(chunks))
+                for result in results]
+
+
+# =========================================================
+# DÜZELTME
+# =========================================================
+
+def apply_corrections(results, batch_size=None):
+    """
+    Sapmaları shard artırımı olarak yazar; bir kullanıcının tüm düzeltmeleri
+    aynı batch'e düşer. Yazılan döküman sayısını döner.
+    """
+    from app.services.balance_service import BalanceService
+    from app.services.savings_service import SavingsService
+    from app.services.balance_ledger_service import BalanceLedgerService, WRITE_BATCH_SIZE
+    db = firebase_config.db
+    batch_size = batch_size or WRITE_BATCH_SIZE
+    batch, pending, bumps, written = db.batch(), 0, {}, 0
+
+    def flush():
+        nonlocal batch, pending, bumps, written
+        if pending:
+            batch.commit()
+            for user_id, collections in bumps.items():
+                data_versions.bump(user_id, *sorted(collections))
+            written += pending
+        batch, pending, bumps = db.batch(), 0, {}
+
+    for result in results:
+        user_id = result['userId']
+        needed = sum(2 if drift['ledger'] else 1 for drift in result['accounts']) + (1 if result['savings'] else 0)
+        if pending + needed > batch_size:
+            flush()
+        for drift in result['accounts']:
+            account_ref = db.collection('user_accounts').document(drift['accountId'])
+            BalanceService.get_balance_counter(account_ref, user_id).increment(drift['drift'], writer=batch)
+            pending += 1
+            if drift['ledger']:
+                BalanceLedgerService.append(batch, user_id, drift['accountId'], drift['drift'], kind='reconciliation')
+                pending += 1
+            bumps.setdefault(user_id, set()).add('accounts')
+        if result['savings']:
+            SavingsService._get_savings_counter(user_id).increment(result['savings']['drift'], writer=batch)
+            pending += 1
+            bumps.setdefault(user_id, set()).add('savings')
+    flush()
+    return written
+
+
+def run(dry_run=False, workers=None, chunk_users=None, batch_size=None, tolerance=None):
+    """Mutabakatı çalıştırır ve özet istatistikleri döner."""
+    started = time.perf_counter()
+    partitions = load_partitions()
+    loaded = time.perf_counter()
+    results = reconcile_all(partitions, workers, chunk_users, tolerance)
+    compared = time.perf_counter()
+
+    drifted = [result for result in results if result['accounts'] or result['savings']]
+    # Akış okuması sırasında yarıda yakalanan yazmalar yanlış sapma gibi görünebilir: taze okumayla doğrula
+    confirmed = [reconcile_partition(result['userId'], load_user_partition(result['userId']), tolerance)
+                 for result in drifted]
+    confirmed = [result for result in confirmed if result['accounts'] or result['savings']]
+    written = 0 if dry_run else apply_corrections(confirmed, batch_size)
+    finished = time.perf_counter()
+
+    account_drifts = [drift for result in confirmed for drift in result['accounts']]
+    savings_drifts = [result['savings'] for result in confirmed if result['savings']]
+    elapsed = finished - started
+    summary = {
+        'users': len(results),
+        'accountsChecked': sum(result['checkedAccounts'] for result in results),
+        'accountsSkipped': sum(result['skippedAccounts'] for result in results),
+        'transactions': sum(len(partition['transactions']) for partition in partitions.values()),
+        'driftedAccounts': len(account_drifts),
+        'driftedSavings': len(savings_drifts),
+        'unconfirmedUsers': len(drifted) - len(confirmed),
+        'absoluteDrift': round(sum(abs(d['drift']) for d in account_drifts + savings_drifts), 2),
+        'writes': written,
+        'dryRun': dry_run,
+        'loadSeconds': round(loaded - started, 3),
+        'compareSeconds': round(compared - loaded, 3),
+        'correctSeconds': round(finished - compared, 3),
+        'usersPerSecond': round(len(results) / elapsed, 1) if elapsed > 0 else None,
+        'drifts': confirmed,
+    }
+    logger.info("RECONCILE: %d users, %d drifted accounts, %d drifted savings balances, %.2f total drift, "
+                "%d writes in %.2fs.", summary['users'], summary['driftedAccounts'], summary['driftedSavings'],
+                summary['absoluteDrift'], written, elapsed)
+    return summary
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Reconcile stored account/savings balances with transactions.")
+    parser.add_argument('--dry-run', action='store_true', help='report drift without writing corrections')
+    parser.add_argument('--workers', type=int, default=RECONCILE_WORKERS, help='aggregation processes')
+    parser.add_argument('--chunk-users', type=int, default=RECONCILE_CHUNK_USERS, help='users per worker task')
+    parser.add_argument('--batch-size', type=int, default=None, help='writes per correction batch')
+    parser.add_argument('--tolerance', type=float, default=DRIFT_TOLERANCE, help='ignore drift up to this amount')
+    args = parser.parse_args(argv)
+
+    if firebase_config.db is None:
+        firebase_config.initialize_firebase_admin()
+    summary = run(args.dry_run, args.workers, args.chunk_users, args.batch_size, args.tolerance)
+
+    print(f"Reconciled {summary['users']} users ({summary['accountsChecked']} accounts, "
+          f"{summary['transactions']} transactions) in "
+          f"{summary['loadSeconds'] + summary['compareSeconds'] + summary['correctSeconds']:.2f}s "
+          f"({summary['usersPerSecond']} users/s; load {summary['loadSeconds']}s, "
+          f"compare {summary['compareSeconds']}s, correct {summary['correctSeconds']}s).")
+    if summary['accountsSkipped']:
+        print(f"Skipped {summary['accountsSkipped']} accounts sharing a name with another account of the same user.")
+    print(f"Drift: {summary['driftedAccounts']} accounts, {summary['driftedSavings']} savings balances, "
+          f"{summary['absoluteDrift']:.2f} total ({summary['unconfirmedUsers']} users cleared on re-check).")
+    for result in summary['drifts']:
+        for drift in result['accounts']:
+            print(f"  {result['userId']} account {drift['accountId']} ({drift['accountName']}): "
+                  f"stored {drift['stored']:.2f}, expected {drift['expected']:.2f}, drift {drift['drift']:+.2f}")
+        if result['savings']:
+            savings = result['savings']
+            print(f"  {result['userId']} savings: stored {savings['stored']:.2f}, "
+                  f"expected {savings['expected']:.2f}, drift {savings['drift']:+.2f}")
+    print("Dry run; no corrections written." if summary['dryRun']
+          else f"Wrote {summary['writes']} correction documents.")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,216 @@
+# File: flask_api/app/jobs/revalue_portfolios.py
+"""
+Gece çalışan toplu portföy değerlemesi.
+
+Yatırım hesaplarının `currentBalance` değeri bugün sadece kullanıcı
+/api/investments/portfolio'yu açtığında güncelleniyor ve her istek kendi
+sembollerinin fiyatını ayrıca çekiyor. Bu iş tüm kullanıcılar için tek
+geçişte çalışır:
+
+1. yatırım hesapları ve holding'ler koleksiyon başına tek akış sorgusuyla
+   okunur,
+2. tüm holding'lerdeki farklı semboller toplanır ve her sembolün fiyatı bir
+   kez (PRICE_BATCH_SIZE'lık toplu `yf.download` çağrılarıyla), kur bir kez
+   çekilir,
+3. holding × fiyat × kur birleştirmesi pandas ile vektörel yapılır ve hesap
+   bazında toplanır (fiyatı bulunamayan sembol, portföy özetindeki gibi
+   ortalama maliyetten değerlenir),
+4. değeri değişen hesapların bakiyesi ve her hesabın günlük değerleme
+   snapshot'ı (portfolio_valuations/{accountId}_{YYYY-MM-DD}) WRITE_BATCH_SIZE'lık
+   batch'lerle yazılır. Snapshot kimliği güne bağlı olduğundan aynı gün
+   yeniden çalıştırmak kaydı çoğaltmaz, üzerine yazar.
+
+Fiyatlar market_data önbelleğine de yazıldığından iş aynı süreçte
+çalıştırılırsa sonraki portföy istekleri TTL boyunca yeniden indirme yapmaz.
+
+    python -m app.jobs.revalue_portfolios [--dry-run] [--batch-size N] [--price-batch-size N]
+"""
+import argparse
+import os
+import sys
+import time
+from datetime import datetime, timezone
+import numpy as np
+import pandas as pd
+from google.cloud.firestore_v1.base_query import FieldFilter
+from app.utils import firebase_config, data_versions, market_data
+from app.utils.logging_config import get_logger
+
+logger = get_logger(__name__)
+
+VALUATIONS_COLLECTION = 'portfolio_valuations'
+# yfinance tek istekte çok uzun sembol listelerinde zaman aşımına düşebiliyor
+PRICE_BATCH_SIZE = int(os.getenv('REVALUE_PRICE_BATCH_SIZE', '200'))
+HOLDING_FIELDS = ['userId', 'accountId', 'assetSymbol', 'quantity', 'averageCost']
+ACCOUNT_FIELDS = ['userId', 'currency', 'currentBalance']
+
+
+# =========================================================
+# OKUMA
+# =========================================================
+
+def load_book():
+    """Yatırım hesapları ve holding'leri iki DataFrame olarak döner."""
+    db = firebase_config.db
+    accounts_query = (db.collection('user_accounts')
+                        .where(filter=FieldFilter('accountType', '==', 'investment'))
+                        .select(ACCOUNT_FIELDS))
+    accounts = pd.DataFrame(
+        [{'accountId': doc.id, **doc.to_dict()} for doc in accounts_query.stream()],
+        columns=['accountId', *ACCOUNT_FIELDS])
+    holdings = pd.DataFrame(
+        [doc.to_dict() for doc in db.collection('holdings').select(HOLDING_FIELDS).stream()],
+        columns=HOLDING_FIELDS)
+
+    accounts['currency'] = accounts['currency'].fillna('TRY')
+    accounts['currentBalance'] = pd.to_numeric(accounts['currentBalance'], errors='coerce').fillna(0.0)
+    holdings['quantity'] = pd.to_numeric(holdings['quantity'], errors='coerce').fillna(0.0)
+    holdings['averageCost'] = pd.to_numeric(holdings['averageCost'], errors='coerce').fillna(0.0)
+    # Silinmiş / yatırım dışı hesaplara ait kalıntı holding'ler değerlenmez
+    holdings = holdings[holdings['accountId'].isin(accounts['accountId'])]
+    return accounts, holdings
+
+
+def fetch_prices(symbols, batch_size=None):
+    """Her sembolün fiyatını bir kez çeker; bulunamayanlar sonuçta yer almaz."""
+    batch_size = batch_size or PRICE_BATCH_SIZE
+    prices = {}
+    for start in range(0, len(symbols), batch_size):
+        prices.update(market_data.get_latest_prices(symbols[start:start + batch_size]))
+    return prices
+
+
+# =========================================================
+# DEĞERLEME
+# =========================================================
+
+def value_accounts(accounts, holdings, prices, usd_try_rate):
+    """
+    Hesap başına değer, maliyet ve holding sayıları. Holding'i olmayan
+    hesaplar 0 değerle yer alır (portföy özetindeki davranış).
+    """
+    book = holdings.merge(accounts[['accountId', 'currency']], on='accountId', how='inner')
+    price = book['assetSymbol'].map(prices)
+    book['priced'] = price.notna()
+    book['price'] = price.fillna(book['averageCost'])
+    book['fx'] = np.where(book['currency'] == 'USD', usd_try_rate, 1.0)
+    book['value'] = book['quantity'] * book['price'] * book['fx']
+    book['cost'] = book['quantity'] * book['averageCost'] * book['fx']
+
+    totals = book.groupby('accountId').agg(
+        value=('value', 'sum'), cost=('cost', 'sum'),
+        holdings=('assetSymbol', 'size'), priced=('priced', 'sum'))
+    valued = accounts.set_index('accountId').join(totals, how='left')
+    valued[['value', 'cost']] = valued[['value', 'cost']].fillna(0.0).round(2)
+    valued[['holdings', 'priced']] = valued[['holdings', 'priced']].fillna(0).astype(int)
+    return valued.reset_index()
+
+
+# =========================================================
+# YAZMA
+# =========================================================
+
+def write_valuations(valued, usd_try_rate, batch_size=None):
+    """
+    Değişen bakiyeleri ve günlük snapshot'ları yazar; bir kullanıcının
+    kayıtları aynı batch'e düşer. (yazılan döküman, güncellenen hesap) döner.
+    """
+    from app.services.balance_ledger_service import WRITE_BATCH_SIZE
+    db = firebase_config.db
+    batch_size = batch_size or WRITE_BATCH_SIZE
+    now = datetime.now(timezone.utc)
+    now_iso, today = now.isoformat(), now.strftime('%Y-%m-%d')
+    batch, pending, bumps, written, updated = db.batch(), 0, set(), 0, 0
+
+    def flush():
+        nonlocal batch, pending, bumps, written
+        if pending:
+            batch.commit()
+            for user_id in bumps:
+                data_versions.bump(user_id, 'accounts')
+            written += pending
+        batch, pending, bumps = db.batch(), 0, set()
+
+    for user_id, group in valued.groupby('userId', sort=False):
+        rows = group.to_dict('records')
+        changed = [row for row in rows if round(row['currentBalance'], 2) != row['value']]
+        if pending + len(rows) + len(changed) > batch_size:
+            flush()
+        for row in changed:
+            batch.update(db.collection('user_accounts').document(row['accountId']),
+                         {'currentBalance': float(row['value']), 'lastValuedAt': now_iso, 'updatedAt': now_iso})
+            bumps.add(user_id)
+        for row in rows:
+            batch.set(db.collection(VALUATIONS_COLLECTION).document(f"{row['accountId']}_{today}"), {
+                'userId': user_id, 'accountId': row['accountId'], 'date': today,
+                'value': float(row['value']), 'cost': float(row['cost']), 'currency': row['currency'],
+                'holdings': int(row['holdings']), 'pricedHoldings': int(row['priced']),
+                'usdTryRate': usd_try_rate, 'createdAt': now_iso,
+            })
+        pending += len(rows) + len(changed)
+        updated += len(changed)
+    flush()
+    return written, updated
+
+
+def run(dry_run=False, batch_size=None, price_batch_size=None):
+    """Değerlemeyi çalıştırır ve özet istatistikleri döner."""
+    started = time.perf_counter()
+    accounts, holdings = load_book()
+    loaded = time.perf_counter()
+
+    symbols = sorted(holdings['assetSymbol'].dropna().unique())
+    usd_try_rate = market_data.get_usdtry_rate()
+    prices = fetch_prices(symbols, price_batch_size)
+    priced = time.perf_counter()
+
+    valued = value_accounts(accounts, holdings, prices, usd_try_rate)
+    written, updated = (0, 0) if dry_run else write_valuations(valued, usd_try_rate, batch_size)
+    finished = time.perf_counter()
+
+    summary = {
+        'users': int(accounts['userId'].nunique()),
+        'accounts': len(accounts),
+        'holdings': len(holdings),
+        'symbols': len(symbols),
+        'unpricedSymbols': sorted(set(symbols) - set(prices)),
+        'usdTryRate': usd_try_rate,
+        'totalValue': round(float(valued['value'].sum()), 2),
+        'accountsUpdated': updated,
+        'writes': written,
+        'dryRun': dry_run,
+        'loadSeconds': round(loaded - started, 3),
+        'priceSeconds': round(priced - loaded, 3),
+        'writeSeconds': round(finished - priced, 3),
+    }
+    logger.info("REVALUE: %d accounts / %d holdings valued with %d distinct symbols, %d balances updated, "
+                "%d writes in %.2fs.", summary['accounts'], summary['holdings'], summary['symbols'],
+                updated, written, finished - started)
+    return summary
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Revalue every investment account with one quote fetch per symbol.")
+    parser.add_argument('--dry-run', action='store_true', help='value accounts without writing')
+    parser.add_argument('--batch-size', type=int, default=None, help='writes per batch')
+    parser.add_argument('--price-batch-size', type=int, default=PRICE_BATCH_SIZE, help='symbols per quote request')
+    args = parser.parse_args(argv)
+
+    if firebase_config.db is None:
+        firebase_config.initialize_firebase_admin()
+    summary = run(args.dry_run, args.batch_size, args.price_batch_size)
+
+    print(f"Valued {summary['accounts']} accounts of {summary['users']} users ({summary['holdings']} holdings, "
+          f"{summary['symbols']} distinct symbols) in "
+          f"{summary['loadSeconds'] + summary['priceSeconds'] + summary['writeSeconds']:.2f}s "
+          f"(load {summary['loadSeconds']}s, prices {summary['priceSeconds']}s, write {summary['writeSeconds']}s).")
+    print(f"Total value {summary['totalValue']:.2f} TRY at USDTRY {summary['usdTryRate']:.4f}; "
+          f"{summary['accountsUpdated']} balances updated, {summary['writes']} writes.")
+    if summary['unpricedSymbols']:
+        print(f"No quote for {len(summary['unpricedSymbols'])} symbols (valued at average cost): "
+              f"{', '.join(summary['unpricedSymbols'])}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,7 +1,11 @@
 # File: flask_api/app/routes/account_routes.py
+from datetime import datetime, timezone
 from flask import Blueprint, request, jsonify
+from app.utils.data_versions import conditional_get
 from app.services.account_service import AccountService
-import traceback
+from app.utils.logging_config import get_logger
+
+logger = get_logger(__name__)
 
 account_bp = Blueprint('account_bp', __name__, url_prefix='/api/accounts')
 
@@ -11,26 +15,49 @@ def add_account_route():
     if not data:
         return jsonify({"success": False, "error": "No data provided"}), 400
 
-    print(f"POST /api/accounts received data: {data}")
+    logger.debug("POST /api/accounts received data: %s", data)
     try:
         result, status_code = AccountService.create_account(data)
         return jsonify(result), status_code
     except Exception as e:
-        print(f"Unhandled exception in add_account_route: {e}")
-        traceback.print_exc()
+        logger.exception("Unhandled exception in add_account_route: %s", e)
         return jsonify({"success": False, "error": "Internal server error while creating account"}), 500
 
 @account_bp.route('', methods=['GET'])
+@conditional_get('accounts')
 def list_accounts_route():
     user_id = request.args.get('userId')
     if not user_id:
         return jsonify({"success": False, "error": "Missing userId query parameter"}), 400
 
-    print(f"GET /api/accounts for userId: {user_id}")
+    logger.debug("GET /api/accounts for userId: %s", user_id)
     try:
         result, status_code = AccountService.list_accounts(user_id)
         return jsonify(result), status_code
     except Exception as e:
-        print(f"Unhandled exception in list_accounts_route: {e}")
-        traceback.print_exc()
-        return jsonify({"success": False, "error": "Internal server error while listing accounts"}), 500
\ No newline at end of file
+        logger.exception("Unhandled exception in list_accounts_route: %s", e)
+        return jsonify({"success": False, "error": "Internal server error while listing accounts"}), 500
+@account_bp.route('/<string:account_id>/balance', methods=['GET'])
+@conditional_get('accounts')
+def get_balance_as_of_route(account_id):
+    user_id = request.args.get('userId')
+    if not user_id:
+        return jsonify({"success": False, "error": "Missing userId query parameter"}), 400
+
+    as_of = request.args.get('asOf') or datetime.now(timezone.utc).strftime('%Y-%m-%d')
+    result, status_code = AccountService.get_balance_as_of(user_id, account_id, as_of)
+    return jsonify(result), status_code
+
+@account_bp.route('/net-worth', methods=['GET'])
+@conditional_get('accounts')
+def get_net_worth_history_route():
+    user_id = request.args.get('userId')
+    if not user_id:
+        return jsonify({"success": False, "error": "Missing userId query parameter"}), 400
+    try:
+        months = int(request.args.get('months', 12))
+    except ValueError:
+        return jsonify({"success": False, "error": "months must be an integer"}), 400
+
+    result, status_code = AccountService.get_net_worth_history(user_id, months)
+    return jsonify(result), status_code
@@ -5,12 +5,13 @@ from app.services.ai_service import AIService
 ai_bp = Blueprint('ai_bp', __name__, url_prefix='/api/ai')
 
 @ai_bp.route('/parse-text', methods=['POST'])
-def parse_text_route():
+async def parse_text_route():
+    # Async view: metindeki her parça için LLM çağrıları eşzamanlı yapılır
     data = request.get_json()
     if not data or 'text' not in data:
         return jsonify({"success": False, "error": "Lütfen 'text' alanını içeren bir JSON gönderin."}), 400
     try:
-        result = AIService.parse_transaction_text(data['text'])
+        result = await AIService.parse_transaction_text_async(data['text'])
         return jsonify(result), 200
     except Exception as e:
         return jsonify({"success": False, "error": f"Metin işlenirken bir hata oluştu: {str(e)}"}), 500
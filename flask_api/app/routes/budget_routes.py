@@ -1,12 +1,16 @@
 # File: flask_api/app/routes/budget_routes.py
 from flask import Blueprint, request, jsonify
+from app.utils.data_versions import conditional_get
 from app.services.budget_service import BudgetService
-import traceback
 from datetime import datetime # For default year/month
+from app.utils.logging_config import get_logger
+
+logger = get_logger(__name__)
 
 budget_bp = Blueprint('budget_bp', __name__, url_prefix='/api/budgets')
 
 @budget_bp.route('', methods=['GET'])
+@conditional_get('budgets')
 def list_budgets_route():
     user_id = request.args.get('userId')
     if not user_id:
@@ -22,13 +26,12 @@ def list_budgets_route():
     except ValueError:
         return jsonify({"success": False, "error": "Invalid year or month format"}), 400
 
-    print(f"GET /api/budgets for userId: {user_id}, year: {year}, month: {month}")
+    logger.debug("GET /api/budgets for userId: %s, year: %s, month: %s", user_id, year, month)
     try:
         result, status_code = BudgetService.list_budgets(user_id, year, month)
         return jsonify(result), status_code
     except Exception as e:
-        print(f"Unhandled exception in list_budgets_route: {e}")
-        traceback.print_exc()
+        logger.exception("Unhandled exception in list_budgets_route: %s", e)
         return jsonify({"success": False, "error": "Internal server error"}), 500
 
 @budget_bp.route('', methods=['POST'])
@@ -41,13 +44,12 @@ def add_or_update_budget_route():
     if 'userId' not in data:
         return jsonify({"success": False, "error": "userId is required in payload"}), 400
 
-    print(f"POST /api/budgets received data: {data}")
+    logger.debug("POST /api/budgets received data: %s", data)
     try:
         result, status_code = BudgetService.create_or_update_budget(data)
         return jsonify(result), status_code
     except Exception as e:
-        print(f"Unhandled exception in add_or_update_budget_route: {e}")
-        traceback.print_exc()
+        logger.exception("Unhandled exception in add_or_update_budget_route: %s", e)
         return jsonify({"success": False, "error": "Internal server error"}), 500
 
 @budget_bp.route('/<string:budget_id>', methods=['PUT'])
@@ -102,11 +104,10 @@ def delete_budget_route(budget_id):
     if not user_id_from_auth:
         return jsonify({"success": False, "error": "User authentication required"}), 401
 
-    print(f"DELETE /api/budgets/{budget_id} for user {user_id_from_auth}")
+    logger.debug("DELETE /api/budgets/%s for user %s", budget_id, user_id_from_auth)
     try:
         result, status_code = BudgetService.delete_budget(user_id_from_auth, budget_id)
         return jsonify(result), status_code
     except Exception as e:
-        print(f"Unhandled exception in delete_budget_route for {budget_id}: {e}")
-        traceback.print_exc()
+        logger.exception("Unhandled exception in delete_budget_route for %s: %s", budget_id, e)
         return jsonify({"success": False, "error": "Internal server error"}), 500
\ No newline at end of file
@@ -1,7 +1,10 @@
 # File: flask_api/app/routes/category_routes.py
 from flask import Blueprint, request, jsonify
+from app.utils.data_versions import conditional_get
 from app.services.category_service import CategoryService
-import traceback
+from app.utils.logging_config import get_logger
+
+logger = get_logger(__name__)
 
 category_bp = Blueprint('category_bp', __name__, url_prefix='/api/categories')
 
@@ -15,17 +18,17 @@ def add_category_route():
     if not user_id_from_auth:
          return jsonify({"success": False, "error": "userId is required in payload"}), 400 # Should be from auth
 
-    print(f"POST /api/categories received data: {data}")
+    logger.debug("POST /api/categories received data: %s", data)
     try:
         # Pass entire data, service will extract userId
         result, status_code = CategoryService.create_category(data) 
         return jsonify(result), status_code
     except Exception as e:
-        print(f"Unhandled exception in add_category_route: {e}")
-        traceback.print_exc()
+        logger.exception("Unhandled exception in add_category_route: %s", e)
         return jsonify({"success": False, "error": "Internal server error while creating category"}), 500
 
 @category_bp.route('', methods=['GET'])
+@conditional_get('categories')
 def list_categories_route():
     user_id = request.args.get('userId')
     if not user_id:
@@ -33,13 +36,12 @@ def list_categories_route():
 
     category_type = request.args.get('type')
 
-    print(f"GET /api/categories for userId: {user_id}, type: {category_type}")
+    logger.debug("GET /api/categories for userId: %s, type: %s", user_id, category_type)
     try:
         result, status_code = CategoryService.list_categories(user_id, category_type)
         return jsonify(result), status_code
     except Exception as e:
-        print(f"Unhandled exception in list_categories_route: {e}")
-        traceback.print_exc()
+        logger.exception("Unhandled exception in list_categories_route: %s", e)
         return jsonify({"success": False, "error": "Internal server error while listing categories"}), 500
 
 # NEW: Update Category Route
@@ -59,13 +61,12 @@ def update_category_route(category_id):
              return jsonify({"success": False, "error": "User authentication required (userId missing)"}), 401
 
 
-    print(f"PUT /api/categories/{category_id} for user {user_id_from_auth} with data: {data_to_update}")
+    logger.debug("PUT /api/categories/%s for user %s with data: %s", category_id, user_id_from_auth, data_to_update)
     try:
         result, status_code = CategoryService.update_category(user_id_from_auth, category_id, data_to_update)
         return jsonify(result), status_code
     except Exception as e:
-        print(f"Unhandled exception in update_category_route for {category_id}: {e}")
-        traceback.print_exc()
+        logger.exception("Unhandled exception in update_category_route for %s: %s", category_id, e)
         return jsonify({"success": False, "error": "Internal server error while updating category"}), 500
 
 # NEW: Delete Category Route (Soft Delete)
@@ -76,11 +77,10 @@ def delete_category_route(category_id):
     if not user_id_from_auth:
         return jsonify({"success": False, "error": "User authentication required (userId missing in query)"}), 401
 
-    print(f"DELETE /api/categories/{category_id} for user {user_id_from_auth}")
+    logger.debug("DELETE /api/categories/%s for user %s", category_id, user_id_from_auth)
     try:
         result, status_code = CategoryService.delete_category(user_id_from_auth, category_id)
         return jsonify(result), status_code
     except Exception as e:
-        print(f"Unhandled exception in delete_category_route for {category_id}: {e}")
-        traceback.print_exc()
+        logger.exception("Unhandled exception in delete_category_route for %s: %s", category_id, e)
         return jsonify({"success": False, "error": "Internal server error while deleting category"}), 500
\ No newline at end of file
@@ -0,0 +1,45 @@
+# File: flask_api/app/routes/export_routes.py
+from datetime import datetime, timezone
+from flask import Blueprint, Response, request, jsonify, stream_with_context
+from app.services.export_service import ExportService, EXPORT_FORMATS, EXPORT_SOURCES
+
+export_bp = Blueprint('export_bp', __name__, url_prefix='/api/export')
+
+_MIMETYPES = {'ndjson': 'application/x-ndjson', 'csv': 'application/zip', 'parquet': 'application/zip'}
+
+
+@export_bp.route('', methods=['GET'])
+def export_route():
+    """
+    Kullanıcının verisini akış halinde indirir.
+    `format`: ndjson (varsayılan) | csv | parquet — csv/parquet kaynak başına bir dosyalı zip döner.
+    `collections`: virgülle ayrılmış kaynaklar (varsayılan hepsi).
+    """
+    user_id = request.args.get('userId')
+    if not user_id:
+        return jsonify({"success": False, "error": "Missing userId query parameter"}), 400
+
+    fmt = request.args.get('format', 'ndjson').lower()
+    if fmt not in EXPORT_FORMATS:
+        return jsonify({"success": False, "error": f"format must be one of: {', '.join(EXPORT_FORMATS)}"}), 400
+    if fmt == 'parquet' and not ExportService.parquet_available():
+        return jsonify({"success": False, "error": "Parquet export is not available on this server"}), 400
+
+    requested = request.args.get('collections')
+    sources = [s.strip() for s in requested.split(',') if s.strip()] if requested else list(EXPORT_SOURCES)
+    unknown = [s for s in sources if s not in EXPORT_SOURCES]
+    if unknown:
+        return jsonify({"success": False, "error": f"Unknown collections: {', '.join(unknown)}"}), 400
+
+    stamp = datetime.now(timezone.utc).strftime('%Y%m%d')
+    filename = f"export-{stamp}.{'ndjson' if fmt == 'ndjson' else 'zip'}"
+    return Response(
+        stream_with_context(ExportService.stream(user_id, fmt, sources)),
+        mimetype=_MIMETYPES[fmt],
+        headers={
+            'Content-Disposition': f'attachment; filename="{filename}"',
+            # Ters proxy'ler (nginx) akışı tamponlamasın
+            'X-Accel-Buffering': 'no',
+            'Cache-Control': 'no-store',
+        },
+    )
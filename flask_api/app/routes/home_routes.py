@@ -0,0 +1,22 @@
+# File: flask_api/app/routes/home_routes.py
+from flask import Blueprint, request, jsonify
+from app.utils.data_versions import conditional_get
+from app.services.home_service import HomeService
+
+home_bp = Blueprint('home_bp', __name__, url_prefix='/api/home')
+
+@home_bp.route('', methods=['GET'])
+@conditional_get('accounts', 'transactions', 'budgets', 'goals', 'savings')
+def get_home_route():
+    """Ana ekran verilerini (hesaplar, işlemler, bütçeler, hedefler, tasarruf bakiyesi) tek yanıtta döner."""
+    user_id = request.args.get('userId')
+    if not user_id:
+        return jsonify({"success": False, "error": "Missing userId query parameter"}), 400
+
+    try:
+        days = int(request.args.get('days', 30))
+    except ValueError:
+        return jsonify({"success": False, "error": "Invalid days parameter"}), 400
+
+    result, status_code = HomeService.get_home_data(user_id, days)
+    return jsonify(result), status_code
@@ -1,14 +1,21 @@
 # File: flask_api/app/routes/investment_routes.py
 from flask import Blueprint, request, jsonify
+from app.utils.data_versions import conditional_get
+from app.services.account_service import AccountService
 from app.services.investment_service import InvestmentService
+from app.services.tax_lot_service import TaxLotService
 
 investment_bp = Blueprint('investment_bp', __name__, url_prefix='/api/investments')
 
 @investment_bp.route('/accounts', methods=['GET'])
+@conditional_get('accounts')
 def list_accounts_route():
     user_id = request.args.get('userId') 
     if not user_id: return jsonify({"success": False, "error": "Missing userId"}), 400
-    result, status_code = InvestmentService.list_accounts(user_id)
+    # Yatırım hesapları, genel hesap listesinin accountType'a göre süzülmüş halidir
+    result, status_code = AccountService.list_accounts(user_id)
+    if status_code == 200:
+        result['accounts'] = [a for a in result['accounts'] if a.get('accountType') == 'investment']
     return jsonify(result), status_code
 
 @investment_bp.route('/portfolio', methods=['GET'])
@@ -18,6 +25,16 @@ def get_portfolio_summary_route():
     result, status_code = InvestmentService.get_portfolio_summary(user_id)
     return jsonify(result), status_code
 
+@investment_bp.route('/realized-gains', methods=['GET'])
+@conditional_get('investments')
+def get_realized_gains_route():
+    """Yılın lot bazında gerçekleşen kâr/zarar raporu (`year`, opsiyonel `accountId`)."""
+    user_id = request.args.get('userId')
+    if not user_id: return jsonify({"success": False, "error": "Missing userId query parameter"}), 400
+    result, status_code = TaxLotService.get_realized_gains(
+        user_id, request.args.get('year'), request.args.get('accountId'))
+    return jsonify(result), status_code
+
 @investment_bp.route('/analysis/<string:symbol>', methods=['GET'])
 def get_asset_analysis_route(symbol):
     if not symbol: return jsonify({"success": False, "error": "Asset symbol is required."}), 400
@@ -34,6 +51,7 @@ def create_transaction_route():
     return jsonify(result), status_code
 
 @investment_bp.route('/transactions', methods=['GET'])
+@conditional_get('investments')
 def list_transactions_route():
     user_id = request.args.get('userId')
     if not user_id: return jsonify({"success": False, "error": "Missing userId parameter"}), 400
@@ -1,5 +1,8 @@
 # File: flask_api/app/routes/profile_routes.py
 from flask import Blueprint, jsonify
+from app.utils.logging_config import get_logger
+
+logger = get_logger(__name__)
 
 profile_utility_bp = Blueprint('profile_utility_bp', __name__, url_prefix='/api/profile')
 
@@ -7,6 +10,6 @@ PROFILE_ICONS = [f"icon-{i}" for i in range(1, 11)] # icon-1, icon-2, ..., icon-
 
 @profile_utility_bp.route('/icons', methods=['GET'])
 def get_profile_icons():
-    print("GET /api/profile/icons route hit")
+    logger.debug("GET /api/profile/icons route hit")
     icon_data = [{"id": icon_id} for icon_id in PROFILE_ICONS]
     return jsonify({"icons": icon_data}), 200
\ No newline at end of file
@@ -1,8 +1,11 @@
 # File: flask_api/app/routes/savings_routes.py
 from flask import Blueprint, request, jsonify
+from app.utils.data_versions import conditional_get
 from app.services.savings_service import SavingsService, InsufficientFundsError
-import traceback
 from datetime import datetime, timezone
+from app.utils.logging_config import get_logger
+
+logger = get_logger(__name__)
 
 savings_bp = Blueprint('savings_bp', __name__, url_prefix='/api/savings')
 
@@ -16,10 +19,11 @@ def get_savings_balance_route():
         result = SavingsService.get_user_savings_balance(user_id)
         return jsonify(result), 200
     except Exception as e:
-        traceback.print_exc()
+        logger.exception("Unhandled error in get_savings_balance_route")
         return jsonify({"success": False, "error": f"Internal server error: {str(e)}"}), 500
 
 @savings_bp.route('/allocations', methods=['GET'])
+@conditional_get('savings')
 def list_savings_allocations_route():
     user_id = request.args.get('userId')
     if not user_id:
@@ -33,7 +37,7 @@ def list_savings_allocations_route():
         result = SavingsService.get_user_savings_allocations(user_id, start_date_str, end_date_str, source_filter)
         return jsonify(result), 200
     except Exception as e:
-        traceback.print_exc()
+        logger.exception("Unhandled error in list_savings_allocations_route")
         return jsonify({"success": False, "error": f"Internal server error: {str(e)}"}), 500
 
 @savings_bp.route('/allocations', methods=['POST'])
@@ -65,7 +69,7 @@ def add_manual_savings_allocation_route():
     except ValueError:
         return jsonify({"success": False, "error": "Invalid amount format"}), 400
     except Exception as e:
-        traceback.print_exc()
+        logger.exception("Unhandled error in add_manual_savings_allocation_route")
         return jsonify({"success": False, "error": f"Internal server error: {str(e)}"}), 500
 
 # =========================================================
@@ -82,6 +86,7 @@ def create_goal_route():
     return jsonify(result), status_code
 
 @savings_bp.route('/goals', methods=['GET'])
+@conditional_get('goals')
 def list_goals_route():
     user_id = request.args.get('userId')
     if not user_id:
@@ -90,6 +95,16 @@ def list_goals_route():
     result, status_code = SavingsService.list_goals(user_id)
     return jsonify(result), status_code
 
+@savings_bp.route('/goals/projections', methods=['GET'])
+@conditional_get('goals', 'savings')
+def goal_projections_route():
+    user_id = request.args.get('userId')
+    if not user_id:
+        return jsonify({"success": False, "error": "Missing userId query parameter"}), 400
+
+    result, status_code = SavingsService.get_goal_projections(user_id)
+    return jsonify(result), status_code
+
 @savings_bp.route('/goals/<goal_id>', methods=['DELETE'])
 def delete_goal_route(goal_id):
     user_id = request.args.get('userId') # Auth token'dan alınmalı
@@ -0,0 +1,19 @@
+# File: flask_api/app/routes/sync_routes.py
+from flask import Blueprint, request, jsonify
+from app.services.sync_service import SyncService
+
+sync_bp = Blueprint('sync_bp', __name__, url_prefix='/api/sync')
+
+@sync_bp.route('', methods=['GET'])
+def sync_route():
+    """
+    Delta senkron. `since` verilmezse tüm koleksiyonlar döner (full=True);
+    verilirse sadece o token'dan sonra eklenen/güncellenen/silinen kayıtlar.
+    Yanıttaki `token` bir sonraki çağrıda `since` olarak gönderilir.
+    """
+    user_id = request.args.get('userId')
+    if not user_id:
+        return jsonify({"success": False, "error": "Missing userId query parameter"}), 400
+
+    result, status_code = SyncService.get_changes(user_id, request.args.get('since'))
+    return jsonify(result), status_code
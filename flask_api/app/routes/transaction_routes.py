@@ -1,12 +1,17 @@
 # File: flask_api/app/routes/transaction_routes.py
 from flask import Blueprint, request, jsonify
+from app.utils.data_versions import conditional_get
 from app.services.transaction_service import TransactionService
-import traceback
+from app.services.transaction_search_service import TransactionSearchService
 from datetime import datetime, timedelta
+from app.utils.logging_config import get_logger
+
+logger = get_logger(__name__)
 
 transaction_bp = Blueprint('transaction_bp', __name__, url_prefix='/api/transactions')
 
 @transaction_bp.route('', methods=['GET'])
+@conditional_get('transactions')
 def list_transactions_route():
     user_id = request.args.get('userId')
     if not user_id:
@@ -21,14 +26,35 @@ def list_transactions_route():
     type_filter = request.args.get('type')
     account_filter = request.args.get('account') # account filtresini al
 
-    print(f"GET /api/transactions for userId: {user_id}, startDate: {start_date_str}, endDate: {end_date_str}, type: {type_filter}, account: {account_filter}")
+    logger.debug("GET /api/transactions for userId: %s, startDate: %s, endDate: %s, type: %s, account: %s",
+                 user_id, start_date_str, end_date_str, type_filter, account_filter)
     try:
         # Servis metoduna account filtresini de geçir
         result, status_code = TransactionService.list_transactions(user_id, start_date_str, end_date_str, type_filter, account_filter)
         return jsonify(result), status_code
     except Exception as e:
-        print(f"Unhandled exception in list_transactions_route: {e}")
-        traceback.print_exc()
+        logger.exception("Unhandled exception in list_transactions_route: %s", e)
+        return jsonify({"success": False, "error": "Internal server error"}), 500
+
+@transaction_bp.route('/search', methods=['GET'])
+def search_transactions_route():
+    """
+    Açıklama/not metninde arama. `q`: aranan kelimeler (hepsi eşleşmeli),
+    `mode`: term | prefix (varsayılan) | substring, `limit`: en fazla sonuç.
+    """
+    user_id = request.args.get('userId')
+    if not user_id:
+        return jsonify({"success": False, "error": "Missing userId query parameter"}), 400
+    query_text = request.args.get('q', '')
+    mode = request.args.get('mode', 'prefix').lower()
+    limit = request.args.get('limit', type=int)
+
+    logger.debug("GET /api/transactions/search for userId: %s, q: %r, mode: %s", user_id, query_text, mode)
+    try:
+        result, status_code = TransactionSearchService.search(user_id, query_text, mode, limit)
+        return jsonify(result), status_code
+    except Exception as e:
+        logger.exception("Unhandled exception in search_transactions_route: %s", e)
         return jsonify({"success": False, "error": "Internal server error"}), 500
 
 @transaction_bp.route('', methods=['POST'])
@@ -37,13 +63,12 @@ def add_transaction_route():
     if not data:
         return jsonify({"success": False, "error": "No data provided"}), 400
     
-    print(f"POST /api/transactions received data: {data}")
+    logger.debug("POST /api/transactions received data: %s", data)
     try:
         result, status_code = TransactionService.create_transaction(data)
         return jsonify(result), status_code
     except Exception as e:
-        print(f"Unhandled exception in add_transaction_route: {e}")
-        traceback.print_exc()
+        logger.exception("Unhandled exception in add_transaction_route: %s", e)
         return jsonify({"success": False, "error": "Internal server error"}), 500
 
 @transaction_bp.route('/<string:transaction_id>', methods=['PUT'])
@@ -52,13 +77,12 @@ def update_transaction_route(transaction_id):
     if not data:
         return jsonify({"success": False, "error": "No update data provided"}), 400
     
-    print(f"PUT /api/transactions/{transaction_id} received data: {data}")
+    logger.debug("PUT /api/transactions/%s received data: %s", transaction_id, data)
     try:
         result, status_code = TransactionService.update_transaction(transaction_id, data)
         return jsonify(result), status_code
     except Exception as e:
-        print(f"Unhandled exception in update_transaction_route: {e}")
-        traceback.print_exc()
+        logger.exception("Unhandled exception in update_transaction_route: %s", e)
         return jsonify({"success": False, "error": "Internal server error"}), 500
 
 @transaction_bp.route('/<string:transaction_id>', methods=['DELETE'])
@@ -68,11 +92,10 @@ def delete_transaction_route(transaction_id):
     if not user_id:
         return jsonify({"success": False, "error": "Missing userId query parameter for authorization"}), 400
 
-    print(f"DELETE /api/transactions/{transaction_id} for user {user_id}")
+    logger.debug("DELETE /api/transactions/%s for user %s", transaction_id, user_id)
     try:
         result, status_code = TransactionService.delete_transaction(user_id, transaction_id)
         return jsonify(result), status_code
     except Exception as e:
-        print(f"Unhandled exception in delete_transaction_route: {e}")
-        traceback.print_exc()
+        logger.exception("Unhandled exception in delete_transaction_route: %s", e)
         return jsonify({"success": False, "error": "Internal server error"}), 500
\ No newline at end of file
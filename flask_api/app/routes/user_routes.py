@@ -1,7 +1,10 @@
 # File: flask_api/app/routes/user_routes.py
 from flask import Blueprint, request, jsonify
+from app.utils.data_versions import conditional_get
 from app.services.user_service import UserService
-import traceback
+from app.utils.logging_config import get_logger
+
+logger = get_logger(__name__)
 
 user_bp = Blueprint('user_bp', __name__, url_prefix='/api/users')
 
@@ -21,14 +24,15 @@ def create_profile():
         result = UserService.create_user_profile(uid, data)
         return jsonify(result), 201
     except Exception as e:
-        print(f"Unhandled exception in /create_profile for UID {uid if 'uid' in data else 'UNKNOWN'}: {e}")
-        traceback.print_exc() 
+        logger.exception("Unhandled exception in /create_profile for UID %s: %s",
+                         uid if 'uid' in data else 'UNKNOWN', e)
         return jsonify({"success": False, "error": f"Internal server error: {str(e)}"}), 500
 
 @user_bp.route('/<string:uid>/profile', methods=['GET'])
+@conditional_get('profile', user_id_arg='uid')
 def get_profile(uid):
     try:
-        print(f"GET /api/users/{uid}/profile route hit")
+        logger.debug("GET /api/users/%s/profile route hit", uid)
         result = UserService.get_user_profile(uid)
 
         if result.get("success"):
@@ -37,8 +41,7 @@ def get_profile(uid):
             status_code = result.get("status_code", 500) 
             return jsonify({"success": False, "error": result.get("error", "An unknown error occurred")}), status_code
     except Exception as e:
-        print(f"Unhandled exception in /profile for UID {uid}: {e}")
-        traceback.print_exc()
+        logger.exception("Unhandled exception in /profile for UID %s: %s", uid, e)
         return jsonify({"success": False, "error": f"Internal server error: {str(e)}"}), 500
 
 # NEW ROUTE TO UPDATE USER PROFILE
@@ -49,7 +52,7 @@ def update_profile(uid):
         return jsonify({"success": False, "error": "No data provided for update"}), 400
 
     try:
-        print(f"PUT /api/users/{uid}/profile route hit with data: {data}")
+        logger.debug("PUT /api/users/%s/profile route hit with data: %s", uid, data)
         result = UserService.update_user_profile(uid, data)
 
         if result.get("success"):
@@ -58,6 +61,5 @@ def update_profile(uid):
             status_code = result.get("status_code", 400) # Default to 400 for bad update data
             return jsonify({"success": False, "error": result.get("error", "Failed to update profile")}), status_code
     except Exception as e:
-        print(f"Unhandled exception in update /profile for UID {uid}: {e}")
-        traceback.print_exc()
+        logger.exception("Unhandled exception in update /profile for UID %s: %s", uid, e)
         return jsonify({"success": False, "error": f"Internal server error: {str(e)}"}), 500
\ No newline at end of file
@@ -2,10 +2,19 @@
 
 from app.utils.firebase_config import db
 from datetime import datetime, timezone
-import traceback
 from firebase_admin import firestore
 from google.cloud.firestore_v1.base_query import FieldFilter
+from app.utils.sharded_counter import ShardedCounter
+from .balance_service import BalanceService, LedgerNotReady
+from .balance_ledger_service import BalanceLedgerService, add_months, current_month
+from .tax_lot_service import TaxLotService, ACCOUNT_LOT_METHODS
+from app.utils import concurrency
+from app.utils.request_cache import get_request_cache
+from app.utils import data_versions
 import uuid
+from app.utils.logging_config import get_logger
+
+logger = get_logger(__name__)
 
 
 class AccountService:
@@ -34,22 +43,41 @@ class AccountService:
                 'isArchived':    False
             }
             
-            # Yatırım hesapları için kategori ekle
+            # Yatırım hesapları için kategori ve satışlarda kullanılacak lot yöntemi ekle
             if account_data['accountType'] == 'investment':
                 account_data['category'] = data.get('category', 'Diğer Yatırımlar')
+                if data.get('costMethod'):
+                    try:
+                        account_data['costMethod'] = TaxLotService.resolve_method(
+                            data['costMethod'], allowed=ACCOUNT_LOT_METHODS)
+                    except ValueError as e:
+                        return {"success": False, "error": str(e)}, 400
+            else:
+                # Bakiye defteri hesabın ilk gününden başlar (geriye dönük doldurma gerekmez).
+                # Açılış, sonradan eklenen daha eski tarihli işlemlerin önüne taşınır
+                # (bkz. BalanceService._move_opening).
+                account_data['ledgerStartedAt'] = account_data['createdAt']
+                account_data['ledgerOpeningDate'] = account_data['createdAt'][:10]
+                account_data['ledgerOpeningBalance'] = initial_balance
 
             doc_ref = db.collection('user_accounts').document()
-            doc_ref.set(account_data)
+            batch = db.batch()
+            batch.set(doc_ref, account_data)
+            if account_data['accountType'] != 'investment' and initial_balance:
+                BalanceLedgerService.append(batch, data['userId'], doc_ref.id, initial_balance,
+                                            date_str=account_data['ledgerOpeningDate'],
+                                            kind='opening', entry_id=f"opening_{doc_ref.id}")
+            batch.commit()
+            data_versions.bump(data['userId'], 'accounts')
 
             created = account_data.copy()
             created['id'] = doc_ref.id
 
-            print(f"Account created: {doc_ref.id} for user {data['userId']}")
+            logger.debug("Account created: %s for user %s", doc_ref.id, data['userId'])
             return { "success": True, "message": "Account created successfully", "account": created }, 201
 
         except Exception as e:
-            print(f"Error creating account: {e}")
-            traceback.print_exc()
+            logger.exception("Error creating account: %s", e)
             return { "success": False, "error": f"An internal error occurred: {str(e)}" }, 500
 
     @staticmethod
@@ -66,18 +94,23 @@ class AccountService:
             )
 
             docs = query.stream()
+
+            # Tüm hesapların bakiye shard'larını tek bir collection group sorgusuyla topla
+            shard_query = db.collection_group('balance_shards').where(filter=FieldFilter('userId', '==', user_id))
+            shard_totals = ShardedCounter.sum_shards_by_parent(shard_query.stream(), 'currentBalance')
+
             accounts = []
             for doc in docs:
                 item = doc.to_dict()
                 item['id'] = doc.id
+                item['currentBalance'] = float(item.get('currentBalance', 0.0)) + shard_totals.get(doc.id, 0.0)
                 accounts.append(item)
 
-            print(f"Fetched {len(accounts)} accounts for user {user_id}")
+            logger.debug("Fetched %s accounts for user %s", len(accounts), user_id)
             return { "success": True, "accounts": accounts }, 200
 
         except Exception as e:
-            print(f"Error listing accounts for user {user_id}: {e}")
-            traceback.print_exc()
+            logger.exception("Error listing accounts for user %s: %s", user_id, e)
             return { "success": False, "error": f"An internal error occurred: {str(e)}" }, 500
 
     @staticmethod
@@ -86,26 +119,50 @@ class AccountService:
         Mevcut hesabı günceller. Sadece gönderilen alanları değiştirir.
         """
         try:
+            cache = get_request_cache()
             ref = db.collection('user_accounts').document(account_id)
-            doc = ref.get()
-            if not doc.exists:
+            existing = cache.get(ref)
+            if existing is None:
                 return {"success": False, "error": "Account not found"}, 404
 
             update_payload = {}
-            for field in ('accountName', 'accountType', 'currency', 'initialBalance', 'currentBalance'):
+            for field in ('accountName', 'accountType', 'currency', 'initialBalance'):
                 if field in data:
                     # numeric değerler için dönüştürme
                     update_payload[field] = float(data[field]) if 'Balance' in field else data[field]
+            if data.get('costMethod'):
+                # Sadece sonraki satışları etkiler; geçmiş satışlar kendi yöntemleriyle kayıtlı
+                try:
+                    update_payload['costMethod'] = TaxLotService.resolve_method(
+                        data['costMethod'], allowed=ACCOUNT_LOT_METHODS)
+                except ValueError as e:
+                    return {"success": False, "error": str(e)}, 400
             update_payload['updatedAt'] = datetime.now(timezone.utc).isoformat()
 
-            ref.update(update_payload)
-            updated = ref.get().to_dict()
+            counter = BalanceService.get_balance_counter(ref, existing.get('userId'))
+            batch = db.batch()
+            batch.update(ref, update_payload)
+            if 'currentBalance' in data:
+                # Doğrudan atanan bakiye: taban değeri yaz, shard'ları sıfırla; farkı deftere düzeltme olarak ekle
+                adjustment = float(data['currentBalance']) - counter.get_total(use_cache=False)
+                counter.reset(float(data['currentBalance']), batch)
+                if adjustment and existing.get('ledgerStartedAt'):
+                    BalanceLedgerService.append(batch, existing.get('userId'), account_id, round(adjustment, 2),
+                                                kind='adjustment')
+            batch.commit()
+            cache.apply_local(ref, update_payload)
+            data_versions.bump(existing.get('userId'), 'accounts')
+
+            updated = cache.get(ref)
             updated['id'] = account_id
+            if 'currentBalance' in data:
+                updated['currentBalance'] = float(data['currentBalance'])
+            else:
+                updated['currentBalance'] = counter.get_total(use_cache=False)
             return {"success": True, "account": updated}, 200
 
         except Exception as e:
-            print(f"Error updating account {account_id}: {e}")
-            traceback.print_exc()
+            logger.exception("Error updating account %s: %s", account_id, e)
             return {"success": False, "error": f"An internal error occurred: {str(e)}"}, 500
 
     @staticmethod
@@ -114,18 +171,97 @@ class AccountService:
         Soft‐delete: isArchived bayrağını True yapar.
         """
         try:
+            cache = get_request_cache()
             ref = db.collection('user_accounts').document(account_id)
-            doc = ref.get()
-            if not doc.exists:
+            existing = cache.get(ref)
+            if existing is None:
                 return {"success": True, "message": "Account already archived."}, 200
 
-            ref.update({
+            cache.update(ref, {
                 'isArchived': True,
                 'updatedAt': datetime.now(timezone.utc).isoformat()
             })
+            data_versions.bump(existing.get('userId'), 'accounts')
             return {"success": True, "message": "Account archived successfully."}, 200
 
         except Exception as e:
-            print(f"Error archiving account {account_id}: {e}")
-            traceback.print_exc()
+            logger.exception("Error archiving account %s: %s", account_id, e)
+            return {"success": False, "error": f"An internal error occurred: {str(e)}"}, 500
+
+    @staticmethod
+    def get_balance_as_of(user_id, account_id, date_str):
+        """Hesabın verilen gün sonundaki bakiyesi (bakiye defteri + aylık snapshot'lar)."""
+        try:
+            try:
+                datetime.strptime(date_str, '%Y-%m-%d')
+            except (TypeError, ValueError):
+                return {"success": False, "error": "asOf must be a date in YYYY-MM-DD format"}, 400
+
+            account = BalanceService.ensure_ledger(user_id, account_id)
+            if account is None:
+                return {"success": False, "error": "Account not found"}, 404
+            if account.get('accountType') == 'investment':
+                return {"success": False, "error": "Point-in-time balances are not kept for investment accounts"}, 400
+
+            result = BalanceLedgerService.balance_as_of(user_id, account_id, date_str)
+            return {"success": True, "accountId": account_id, "asOf": date_str, **result}, 200
+        except LedgerNotReady:
+            return {"success": False, "error": "Balance updates are still being applied, please retry"}, 503
+        except Exception as e:
+            logger.exception("Error computing balance of account %s as of %s: %s", account_id, date_str, e)
+            return {"success": False, "error": f"An internal error occurred: {str(e)}"}, 500
+
+    @staticmethod
+    def get_net_worth_history(user_id, months=12):
+        """
+        Son `months` kapanmış ayın ay sonu net değeri ve bu ayın güncel değeri.
+        Ay sonları snapshot'lardan (tek sorgu), bu ay son snapshot + bu ayın
+        defter kayıtlarından gelir; işlem geçmişi taranmaz. Yatırım hesapları
+        (değeri portföy değerlemesinden gelir) dahil değildir.
+        """
+        try:
+            months = max(1, min(int(months), 120))
+            accounts_query = (db.collection('user_accounts')
+                                .where(filter=FieldFilter('userId', '==', user_id))
+                                .where(filter=FieldFilter('isArchived', '==', False)))
+            accounts = {doc.id: doc.to_dict() for doc in accounts_query.stream()
+                        if doc.to_dict().get('accountType') != 'investment'}
+
+            this_month = current_month()
+            last_closed = add_months(this_month, -1)
+            start_month = add_months(this_month, -months)
+
+            # Eski hesapları deftere geçir, eksik aylık snapshot'ları üret (ilk seferden sonra 1 sorgu/hesap)
+            def prepare(account_id):
+                if not accounts[account_id].get('ledgerStartedAt'):
+                    BalanceService.ensure_ledger(user_id, account_id)
+                return BalanceLedgerService.ensure_snapshots(user_id, account_id, last_closed)
+
+            latest = concurrency.run_parallel({aid: (lambda aid=aid: prepare(aid)) for aid in accounts})
+            snapshots = [s for s in BalanceLedgerService.user_snapshots(user_id, start_month) if s['accountId'] in accounts]
+            entries = BalanceLedgerService.user_entries_since(user_id, f"{this_month}-01")
+
+            balances = {}
+            for snapshot in snapshots:
+                balances.setdefault(snapshot['month'], {})[snapshot['accountId']] = float(snapshot['balance'])
+
+            points = []
+            month = start_month
+            while month <= last_closed:
+                by_account = balances.get(month, {})
+                points.append({'month': month, 'netWorth': round(sum(by_account.values()), 2)})
+                month = add_months(month, 1)
+
+            current = {aid: float(s['balance']) if s else 0.0 for aid, s in latest.items()}
+            for entry in entries:
+                if entry.get('accountId') in current:
+                    current[entry['accountId']] += float(entry.get('amount', 0.0) or 0.0)
+            points.append({'month': this_month, 'netWorth': round(sum(current.values()), 2), 'current': True})
+
+            return {"success": True, "points": points, "accountCount": len(accounts),
+                    "excludes": ["investment"]}, 200
+        except LedgerNotReady:
+            return {"success": False, "error": "Balance updates are still being applied, please retry"}, 503
+        except Exception as e:
+            logger.exception("Error computing net worth history for user %s: %s", user_id, e)
             return {"success": False, "error": f"An internal error occurred: {str(e)}"}, 500
@@ -3,9 +3,14 @@
 import re
 import os
 import json
+import asyncio
 from datetime import datetime, timezone
 import google.generativeai as genai
 from dotenv import load_dotenv
+from app.utils.logging_config import get_logger
+from .budget_recommendation_service import BudgetRecommendationService
+
+logger = get_logger(__name__)
 
 load_dotenv()
 
@@ -26,27 +31,30 @@ try:
         'gemini-1.5-flash',
         generation_config=generation_config
     )
-    print("AI_SERVICE: Google Gemini API (gemini-1.5-flash) başarıyla yapılandırıldı.")
+    logger.info("AI_SERVICE: Google Gemini API (gemini-1.5-flash) başarıyla yapılandırıldı.")
 
 except Exception as e:
-    print(f"KRİTİK HATA: Google Gemini API yapılandırılamadı. Hata: {e}")
+    logger.error("KRİTİK HATA: Google Gemini API yapılandırılamadı. Hata: %s", e)
     llm_model = None
 
 
+# Tek bir metindeki parçalar için aynı anda yapılacak en fazla LLM çağrısı
+AI_PARSE_CONCURRENCY = int(os.getenv('AI_PARSE_CONCURRENCY', '8'))
+# Bütçe önerisinin açıklama metni LLM ile yeniden yazılsın mı (rakamlar her zaman yereldir)
+AI_BUDGET_RATIONALE_LLM = os.getenv('AI_BUDGET_RATIONALE_LLM', '1') == '1'
+
+CATEGORIES = [
+    "Market", "Yemek/Restoran", "Kahve", "Ulaşım", "Fatura", 
+    "Kira Gideri", "Giyim", "Eğlence", "Sağlık", "Eğitim", "Maaş", 
+    "Freelance", "Ek Gelir", "Kira Geliri", "Diğer Gelir", "Diğer"
+]
+DEFAULT_CATEGORY = {"kategori": "Diğer", "tip": "expense"}
+
+
 class AIService:
     @staticmethod
-    def _get_category_from_llm(chunk: str):
-        if not llm_model:
-            print("AI_SERVICE_LLM: Model yapılandırılmadığı için varsayılan kategori kullanılıyor.")
-            return {"kategori": "Diğer", "tip": "expense"}
-
-        CATEGORIES = [
-            "Market", "Yemek/Restoran", "Kahve", "Ulaşım", "Fatura", 
-            "Kira Gideri", "Giyim", "Eğlence", "Sağlık", "Eğitim", "Maaş", 
-            "Freelance", "Ek Gelir", "Kira Geliri", "Diğer Gelir", "Diğer"
-        ]
-        
-        prompt = f"""
+    def _build_category_prompt(chunk: str):
+        return f"""
         Bir finansal işlem metnini analiz et. Bu metnin bir 'gelir' mi yoksa 'gider' mi olduğunu belirle. 
         Ardından, aşağıdaki listeden en uygun kategoriyi seç.
         Yanıtını SADECE bir JSON objesi olarak şu formatta ver: {{"kategori": "SeçilenKategori", "tip": "gelir_veya_gider"}}.
@@ -55,44 +63,116 @@ class AIService:
         
         İşlem Metni: "{chunk}"
         """
-        
+
+    @staticmethod
+    def _parse_category_response(response_text: str):
+        data = json.loads(response_text)
+        kategori = data.get("kategori", "Diğer")
+        tip = data.get("tip", "expense")
+        return {
+            "kategori": kategori if kategori in CATEGORIES else "Diğer",
+            "tip": "income" if tip == "gelir" else "expense"
+        }
+
+    @staticmethod
+    def _get_category_from_llm(chunk: str):
+        if not llm_model:
+            logger.warning("AI_SERVICE_LLM: Model yapılandırılmadığı için varsayılan kategori kullanılıyor.")
+            return dict(DEFAULT_CATEGORY)
+
         try:
-            response = llm_model.generate_content(prompt)
-            data = json.loads(response.text)
-            
-            kategori = data.get("kategori", "Diğer")
-            tip = data.get("tip", "expense")
-
-            return {
-                "kategori": kategori if kategori in CATEGORIES else "Diğer",
-                "tip": "income" if tip == "gelir" else "expense"
-            }
+            response = llm_model.generate_content(AIService._build_category_prompt(chunk))
+            return AIService._parse_category_response(response.text)
         except Exception as e:
-            print(f"AI_SERVICE_LLM: Metin işlenirken hata oluştu ('{chunk}'). Hata: {e}")
-            return {"kategori": "Diğer", "tip": "expense"}
+            logger.error("AI_SERVICE_LLM: Metin işlenirken hata oluştu ('%s'). Hata: %s", chunk, e)
+            return dict(DEFAULT_CATEGORY)
 
     @staticmethod
-    def parse_transaction_text(text: str):
-        chunks = text.lower().split(',')
-        parsed_transactions = []
+    async def _get_category_from_llm_async(chunk: str, semaphore):
+        if not llm_model:
+            logger.warning("AI_SERVICE_LLM: Model yapılandırılmadığı için varsayılan kategori kullanılıyor.")
+            return dict(DEFAULT_CATEGORY)
 
-        for chunk in chunks:
+        try:
+            async with semaphore:
+                response = await llm_model.generate_content_async(AIService._build_category_prompt(chunk))
+            return AIService._parse_category_response(response.text)
+        except Exception as e:
+            logger.error("AI_SERVICE_LLM: Metin işlenirken hata oluştu ('%s'). Hata: %s", chunk, e)
+            return dict(DEFAULT_CATEGORY)
+
+    @staticmethod
+    def _split_chunks(text: str):
+        """Metni virgüllerden böler ve tutar içeren parçaları (parça, tutar) olarak döner."""
+        chunks = []
+        for chunk in text.lower().split(','):
             chunk = chunk.strip()
             if not chunk: continue
 
             amount_match = re.search(r'(\d+\.?\d*)', chunk)
             if not amount_match: continue
-            
-            amount = float(amount_match.group(1))
-
-            llm_result = AIService._get_category_from_llm(chunk)
-            
-            parsed_transactions.append({
-                'amount': amount,
-                'category': llm_result['kategori'],
-                'type': llm_result['tip'],
-                'description': chunk.capitalize(),
-                'date': datetime.now(timezone.utc).strftime('%Y-%m-%d'),
-            })
-
-        return {"success": True, "parsedTransactions": parsed_transactions}
\ No newline at end of file
+
+            chunks.append((chunk, float(amount_match.group(1))))
+        return chunks
+
+    @staticmethod
+    def _build_parsed_transactions(chunks, llm_results):
+        today = datetime.now(timezone.utc).strftime('%Y-%m-%d')
+        return [{
+            'amount': amount,
+            'category': llm_result['kategori'],
+            'type': llm_result['tip'],
+            'description': chunk.capitalize(),
+            'date': today,
+        } for (chunk, amount), llm_result in zip(chunks, llm_results)]
+
+    @staticmethod
+    def parse_transaction_text(text: str):
+        chunks = AIService._split_chunks(text)
+        llm_results = [AIService._get_category_from_llm(chunk) for chunk, _ in chunks]
+        return {"success": True, "parsedTransactions": AIService._build_parsed_transactions(chunks, llm_results)}
+
+    @staticmethod
+    async def parse_transaction_text_async(text: str):
+        """
+        parse_transaction_text'in async karşılığı: her parça için LLM çağrıları
+        sırayla değil aynı anda yapılır, toplam süre en yavaş çağrı kadardır.
+        """
+        chunks = AIService._split_chunks(text)
+        semaphore = asyncio.Semaphore(AI_PARSE_CONCURRENCY)
+        llm_results = await asyncio.gather(
+            *(AIService._get_category_from_llm_async(chunk, semaphore) for chunk, _ in chunks)
+        )
+        return {"success": True, "parsedTransactions": AIService._build_parsed_transactions(chunks, llm_results)}
+
+    @staticmethod
+    def _phrase_budget_rationale(category, stats, fallback_text):
+        """Hesaplanmış rakamları LLM'e sadece açıklama metni için verir; hata olursa şablon metin."""
+        if not llm_model or not AI_BUDGET_RATIONALE_LLM:
+            return fallback_text
+        prompt = f"""
+        Bir kişisel finans uygulaması için kısa (en fazla 2 cümle), samimi ve Türkçe bir bütçe önerisi açıklaması yaz.
+        Rakamları değiştirme, yeni rakam ekleme. Yanıtını SADECE şu formatta bir JSON objesi olarak ver: {{"aciklama": "..."}}
+
+        Kategori: {category}
+        Hesaplanan veriler: {json.dumps(stats, ensure_ascii=False)}
+        Taslak açıklama: {fallback_text}
+        """
+        try:
+            response = llm_model.generate_content(prompt)
+            text = json.loads(response.text).get("aciklama")
+            if isinstance(text, str) and 0 < len(text.strip()) <= 600:
+                return text.strip()
+        except Exception as e:
+            logger.warning("AI_SERVICE_LLM: Bütçe önerisi açıklaması üretilemedi, şablon kullanılıyor. Hata: %s", e)
+        return fallback_text
+
+    @staticmethod
+    def get_budget_recommendation(user_id, category):
+        """
+        Kategori için aylık bütçe önerisi. Rakamlar yerel istatistikle hesaplanır
+        ve (kullanıcı, kategori, ay) için önbelleklenir; LLM sadece açıklama
+        metnini yazar ve sadece önbellek ıskalandığında çağrılır.
+        """
+        return BudgetRecommendationService.get_recommendation(
+            user_id, category, phrase=AIService._phrase_budget_rationale)
@@ -1,9 +1,10 @@
 # File: flask_api/app/services/analytics_service.py
-from app.utils.firebase_config import db
 from datetime import datetime, timezone, timedelta
-from google.cloud.firestore_v1.base_query import FieldFilter
-import traceback
 import pandas as pd
+from .transaction_archive_service import TransactionArchiveService
+from app.utils.logging_config import get_logger
+
+logger = get_logger(__name__)
 
 class AnalyticsService:
     @staticmethod
@@ -23,15 +24,8 @@ class AnalyticsService:
             start_date_iso = start_date.isoformat()
             end_date_iso = end_date.isoformat()
 
-            # İlgili harcama işlemlerini Firestore'dan tek seferde çek
-            transactions_ref = db.collection('transactions')
-            query = (transactions_ref
-                     .where(filter=FieldFilter("userId", "==", user_id))
-                     .where(filter=FieldFilter("date", ">=", start_date_iso))
-                     .where(filter=FieldFilter("date", "<=", end_date_iso))
-                     .where(filter=FieldFilter("isDeleted", "==", False)))
-            
-            docs = list(query.stream())
+            # İlgili işlemler tek seferde: arşivlenmiş aylar bucket'lardan, kalanı canlı sorgudan
+            transactions = TransactionArchiveService.fetch(user_id, start_date_iso, end_date_iso)
 
             # Değişkenleri başlat
             income_total = 0.0
@@ -43,8 +37,7 @@ class AnalyticsService:
             daily_expenses = {}
 
             # Tüm işlemleri tek döngüde işle
-            for doc in docs:
-                transaction = doc.to_dict()
+            for transaction in transactions:
                 amount = float(transaction.get("amount", 0.0))
                 tx_type = transaction.get("type")
 
@@ -71,8 +64,7 @@ class AnalyticsService:
             # Son 7 günlük trend için veriyi işle
             seven_days_ago = end_date - timedelta(days=6)
             seven_days_iso = seven_days_ago.isoformat()
-            for doc in docs:
-                transaction = doc.to_dict()
+            for transaction in transactions:
                 tx_date_str = transaction.get('date', '')
                 if transaction.get('type') == 'expense' and tx_date_str >= seven_days_iso:
                     day_only = tx_date_str.split('T')[0]
@@ -109,6 +101,5 @@ class AnalyticsService:
             return {"success": True, "dashboard": dashboard_data}, 200
 
         except Exception as e:
-            print(f"Error in get_dashboard_insights: {e}")
-            traceback.print_exc()
+            logger.exception("Error in get_dashboard_insights: %s", e)
             return {"success": False, "error": str(e)}, 500
\ No newline at end of file
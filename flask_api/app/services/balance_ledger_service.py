@@ -0,0 +1,188 @@
+# File: flask_api/app/services/balance_ledger_service.py
+"""
+Hesap bakiyeleri için yalnızca eklenen (append-only) hareket defteri ve aylık
+kapanış snapshot'ları.
+
+- balance_ledger: her bakiye etkisi bir kayıt (işlem, geri alma, açılış,
+  düzeltme). Kayıtlar değiştirilmez/silinmez; düzeltme yeni kayıttır.
+  `date` işlemin kendi tarihidir (geriye tarihli işlemler geçmişe yazılır).
+- balance_snapshots/{accountId}_{YYYY-MM}: ay sonu bakiyesi (`balance`) ve
+  ayın net hareketi (`net`). Sadece kapanmış aylar için, ilk ihtiyaçta
+  (bakiye sorgusu / net değer grafiği) üretilir; geçmiş bir aya yazılan
+  kayıt, o aydan sonraki mevcut snapshot'ları aynı batch'te artırır.
+
+Bir tarihteki bakiye = o tarihten önceki son snapshot (tek indeksli sorgu)
++ snapshot'tan sonraki kayıtların toplamı (en fazla bir aylık tekrar).
+Bakiye shard'ı ile defter kaydı aynı batch'te yazıldığı için ikisi birbirinden
+ayrışamaz; eski veriler için `BalanceService.ensure_ledger` bir kerelik
+geriye dönük doldurma yapar.
+"""
+from collections import defaultdict
+from datetime import datetime, timezone
+from firebase_admin import firestore
+from google.cloud.firestore_v1.base_query import FieldFilter
+from app.utils.firebase_config import db
+from app.utils.logging_config import get_logger
+
+logger = get_logger(__name__)
+
+LEDGER_COLLECTION = 'balance_ledger'
+SNAPSHOTS_COLLECTION = 'balance_snapshots'
+# Firestore commit başına yazma sınırının (500) altında
+WRITE_BATCH_SIZE = 400
+
+
+def month_of(date_str):
+    return date_str[:7]
+
+
+def add_months(month, count):
+    index = int(month[:4]) * 12 + int(month[5:7]) - 1 + count
+    return f"{index // 12:04d}-{index % 12 + 1:02d}"
+
+
+def current_month():
+    return datetime.now(timezone.utc).strftime('%Y-%m')
+
+
+class BalanceLedgerService:
+    @staticmethod
+    def snapshot_ref(account_id, month):
+        return db.collection(SNAPSHOTS_COLLECTION).document(f"{account_id}_{month}")
+
+    # --- yazma ---
+
+    @staticmethod
+    def append(writer, user_id, account_id, amount, date_str=None, transaction_id=None, kind='transaction',
+               entry_id=None, create=False):
+        """
+        Defter kaydını `writer` (batch/transaction) üzerine ekler; commit
+        çağırana aittir. Kayıt kapanmış bir aya düşüyorsa o aydan sonraki
+        mevcut snapshot'lar da aynı writer'da güncellenir. `create=True` ile
+        kayıt `entry_id` zaten varsa commit AlreadyExists ile reddedilir
+        (yeniden denenen işlerde aynı etkinin iki kez yazılmaması için).
+        """
+        now = datetime.now(timezone.utc).isoformat()
+        date_str = (date_str or now)[:10]
+        entry_ref = (db.collection(LEDGER_COLLECTION).document(entry_id) if entry_id
+                     else db.collection(LEDGER_COLLECTION).document())
+        entry = {
+            'userId': user_id, 'accountId': account_id, 'amount': float(amount), 'date': date_str,
+            'kind': kind, 'transactionId': transaction_id, 'createdAt': now,
+        }
+        if create:
+            writer.create(entry_ref, entry)
+        else:
+            writer.set(entry_ref, entry)
+
+        entry_month = month_of(date_str)
+        if entry_month < current_month():
+            for snapshot in BalanceLedgerService._snapshots_from(account_id, entry_month):
+                update = {'balance': firestore.Increment(float(amount)), 'updatedAt': now}
+                if snapshot.get('month') == entry_month:
+                    update['net'] = firestore.Increment(float(amount))
+                writer.update(snapshot.reference, update)
+        return entry_ref
+
+    # --- sorgular ---
+
+    @staticmethod
+    def _snapshots_from(account_id, month):
+        query = (db.collection(SNAPSHOTS_COLLECTION)
+                   .where(filter=FieldFilter('accountId', '==', account_id))
+                   .where(filter=FieldFilter('month', '>=', month))
+                   .order_by('month', direction=firestore.Query.DESCENDING))
+        return list(query.stream())
+
+    @staticmethod
+    def _latest_snapshot(account_id, upto_month):
+        query = (db.collection(SNAPSHOTS_COLLECTION)
+                   .where(filter=FieldFilter('accountId', '==', account_id))
+                   .where(filter=FieldFilter('month', '<=', upto_month))
+                   .order_by('month', direction=firestore.Query.DESCENDING)
+                   .limit(1))
+        docs = list(query.stream())
+        return docs[0].to_dict() if docs else None
+
+    @staticmethod
+    def _entries(account_id, start_date=None, end_date=None):
+        """[start_date, end_date] aralığındaki kayıtlar (uçlar dahil, None = sınırsız)."""
+        query = db.collection(LEDGER_COLLECTION).where(filter=FieldFilter('accountId', '==', account_id))
+        if start_date:
+            query = query.where(filter=FieldFilter('date', '>=', start_date))
+        if end_date:
+            query = query.where(filter=FieldFilter('date', '<=', end_date))
+        return [doc.to_dict() for doc in query.stream()]
+
+    @staticmethod
+    def ensure_snapshots(user_id, account_id, target_month):
+        """
+        target_month (dahil) kadar eksik aylık snapshot'ları üretir ve
+        target_month'un snapshot'ını döner; hesabın o aya kadar kaydı yoksa None.
+        """
+        base = BalanceLedgerService._latest_snapshot(account_id, target_month)
+        if base and base['month'] == target_month:
+            return base
+
+        start_month = add_months(base['month'], 1) if base else None
+        entries = BalanceLedgerService._entries(
+            account_id, start_date=f"{start_month}-01" if start_month else None,
+            end_date=f"{target_month}-31")
+        if base is None and not entries:
+            return None
+
+        net_by_month = defaultdict(float)
+        for entry in entries:
+            net_by_month[month_of(entry['date'])] += float(entry.get('amount', 0.0) or 0.0)
+
+        balance = float(base['balance']) if base else 0.0
+        month = start_month or min(net_by_month)
+        now = datetime.now(timezone.utc).isoformat()
+        snapshot, batch, pending = base, db.batch(), 0
+        while month <= target_month:
+            balance = round(balance + net_by_month.get(month, 0.0), 2)
+            snapshot = {'userId': user_id, 'accountId': account_id, 'month': month, 'balance': balance,
+                        'net': round(net_by_month.get(month, 0.0), 2), 'createdAt': now, 'updatedAt': now}
+            batch.set(BalanceLedgerService.snapshot_ref(account_id, month), snapshot)
+            pending += 1
+            if pending >= WRITE_BATCH_SIZE:
+                batch.commit()
+                batch, pending = db.batch(), 0
+            month = add_months(month, 1)
+        if pending:
+            batch.commit()
+        logger.debug("BALANCE_LEDGER: Built snapshots for account %s up to %s.", account_id, target_month)
+        return snapshot
+
+    @staticmethod
+    def balance_as_of(user_id, account_id, date_str):
+        """
+        Hesabın `date_str` günü sonundaki bakiyesi: son kapanmış aya kadar
+        snapshot + sonraki kayıtların tekrarı.
+        """
+        last_closed = add_months(current_month(), -1)
+        target = min(add_months(month_of(date_str), -1), last_closed)
+        snapshot = BalanceLedgerService.ensure_snapshots(user_id, account_id, target)
+        replay_start = f"{add_months(target, 1)}-01"
+        entries = BalanceLedgerService._entries(account_id, start_date=replay_start, end_date=date_str)
+        balance = (float(snapshot['balance']) if snapshot else 0.0) + sum(
+            float(e.get('amount', 0.0) or 0.0) for e in entries)
+        return {
+            'balance': round(balance, 2),
+            'snapshotMonth': snapshot['month'] if snapshot else None,
+            'replayedEntries': len(entries),
+        }
+
+    @staticmethod
+    def user_snapshots(user_id, start_month):
+        query = (db.collection(SNAPSHOTS_COLLECTION)
+                   .where(filter=FieldFilter('userId', '==', user_id))
+                   .where(filter=FieldFilter('month', '>=', start_month)))
+        return [doc.to_dict() for doc in query.stream()]
+
+    @staticmethod
+    def user_entries_since(user_id, start_date):
+        query = (db.collection(LEDGER_COLLECTION)
+                   .where(filter=FieldFilter('userId', '==', user_id))
+                   .where(filter=FieldFilter('date', '>=', start_date)))
+        return [doc.to_dict() for doc in query.stream()]
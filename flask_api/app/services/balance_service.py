@@ -2,105 +2,222 @@
 from app.utils.firebase_config import db
 from datetime import datetime, timezone
 from google.cloud.firestore_v1.base_query import FieldFilter
-from google.cloud import firestore
-import traceback
+from google.api_core.exceptions import AlreadyExists
+from app.utils.sharded_counter import ShardedCounter
+from app.utils.request_cache import get_request_cache
+from app.utils import data_versions, job_queue
+from .balance_ledger_service import BalanceLedgerService, LEDGER_COLLECTION, WRITE_BATCH_SIZE
+import os
+from app.utils.logging_config import get_logger
+
+logger = get_logger(__name__)
+
+ACCOUNT_BALANCE_SHARDS = int(os.getenv('ACCOUNT_BALANCE_SHARDS', '5'))
+
+class LedgerNotReady(Exception):
+    """Kullanıcının bekleyen bakiye işleri bitmeden defter doldurulamaz (istemci tekrar dener)."""
+
 
 class BalanceService:
     @staticmethod
     def _get_account_ref(user_id, account_name):
         """Hesap adından döküman referansını getirir."""
         if db is None: raise Exception("Firestore client (db) is not initialized.")
-        accounts_ref = db.collection('user_accounts')
-        query = accounts_ref.where(filter=FieldFilter('accountName', '==', account_name)) \
-                            .where(filter=FieldFilter('userId', '==', user_id)) \
-                            .limit(1)
-        docs = list(query.stream())
-        if not docs:
-            return None
-        return docs[0].reference
+        cache = get_request_cache()
+
+        def lookup():
+            accounts_ref = db.collection('user_accounts')
+            query = accounts_ref.where(filter=FieldFilter('accountName', '==', account_name)) \
+                                .where(filter=FieldFilter('userId', '==', user_id)) \
+                                .limit(1)
+            docs = list(query.stream())
+            if not docs:
+                return None
+            # Sorgunun döndürdüğü snapshot'ı sakla; _update_balance tekrar okumasın
+            cache.remember(docs[0])
+            return docs[0].reference
+
+        return cache.memoize(('account_ref', user_id, account_name), lookup)
 
     @staticmethod
-    def _update_balance(account_ref, amount_change):
-        """Belirli bir hesap dökümanının bakiyesini atomik olarak günceller."""
-        if account_ref.get().to_dict().get('accountType') == 'investment':
-            print(f"BALANCE_SERVICE: Skipping balance update for investment account '{account_ref.id}'.")
+    def get_balance_counter(account_ref, user_id=None):
+        """
+        Hesabın currentBalance alanı için sharded counter. Shard'lar
+        `user_accounts/{id}/balance_shards` altında durur ve collection group
+        sorgusuyla tek seferde okunabilmeleri için userId/accountId taşır.
+        """
+        shard_fields = {'accountId': account_ref.id}
+        if user_id:
+            shard_fields['userId'] = user_id
+        return ShardedCounter(
+            db, account_ref, field='currentBalance', num_shards=ACCOUNT_BALANCE_SHARDS,
+            shard_collection='balance_shards', shard_fields=shard_fields
+        )
+
+    @staticmethod
+    def _update_balance(account_ref, amount_change, date_str=None, transaction_id=None, kind='transaction',
+                        entry_id=None):
+        """
+        Belirli bir hesap dökümanının bakiyesini atomik olarak günceller. Shard
+        artırımı ve defter kaydı (bkz. BalanceLedgerService) aynı batch'te yazılır.
+        `entry_id` verilirse defter kaydı bu kimlikle oluşturulur; kayıt zaten
+        varsa (yeniden denenen iş) hiçbir şey yazılmaz.
+        """
+        account_data = get_request_cache().get(account_ref) or {}
+        if account_data.get('accountType') == 'investment':
+            logger.warning("BALANCE_SERVICE: Skipping balance update for investment account '%s'.", account_ref.id)
             return
         
-        account_ref.update({
-            'currentBalance': firestore.Increment(amount_change),
-            'updatedAt': datetime.now(timezone.utc).isoformat()
-        })
-        print(f"BALANCE_SERVICE: Account '{account_ref.id}' balance updated by {amount_change}.")
+        # Ana dökümana değil, rastgele bir bakiye shard'ına yazılır
+        user_id = account_data.get('userId')
+        batch = db.batch()
+        BalanceService.get_balance_counter(account_ref, user_id).increment(amount_change, writer=batch)
+        BalanceLedgerService.append(batch, user_id, account_ref.id, amount_change, date_str, transaction_id, kind,
+                                    entry_id=entry_id, create=entry_id is not None)
+        moved = BalanceService._move_opening(batch, account_ref, account_data, date_str)
+        try:
+            batch.commit()
+        except AlreadyExists:
+            logger.info("BALANCE_SERVICE: Ledger entry %s already applied; skipping.", entry_id)
+            return
+        if moved:
+            get_request_cache().apply_local(account_ref, moved)
+        data_versions.bump(user_id, 'accounts')
+        logger.debug("BALANCE_SERVICE: Account '%s' balance updated by %s.", account_ref.id, amount_change)
 
     @staticmethod
-    def _apply_transaction_effect(user_id, tx_data):
-        """Bir işlemin bakiye etkisini uygular."""
+    def _move_opening(writer, account_ref, account_data, date_str):
+        """
+        Açılış bakiyesi hesabın ilk kaydından önce durmalıdır. Açılıştan önce
+        tarihli bir kayıt yazılıyorsa açılış o tarihe taşınır: eski tarihe
+        ters kayıt, yeni tarihe açılış kaydı (defter yalnızca eklenir). Hesap
+        güncellemesini döner; taşıma gerekmiyorsa None.
+        """
+        opening_date = account_data.get('ledgerOpeningDate')
+        opening = float(account_data.get('ledgerOpeningBalance') or 0.0)
+        date_str = (date_str or '')[:10]
+        if not opening or not opening_date or not date_str or date_str >= opening_date:
+            return None
+        user_id, account_id = account_data.get('userId'), account_ref.id
+        BalanceLedgerService.append(writer, user_id, account_id, -opening, opening_date, kind='opening',
+                                    entry_id=f"opening_{account_id}_moved_{opening_date}")
+        BalanceLedgerService.append(writer, user_id, account_id, opening, date_str, kind='opening',
+                                    entry_id=f"opening_{account_id}_{date_str}")
+        update = {'ledgerOpeningDate': date_str}
+        writer.update(account_ref, update)
+        return update
+
+    @staticmethod
+    def _transaction_net_change(tx_data):
+        """İşlemin hesaba net etkisi (gelirde kumbaraya ayrılan kısım düşülür)."""
         amount = tx_data.get('amount', 0.0)
         tx_type = tx_data.get('type')
-        account_name = tx_data.get('account')
         allocated_to_savings = 0.0
-        
         if tx_type == 'income' and tx_data.get('incomeAllocationPct') is not None:
             allocated_to_savings = round(amount * (int(tx_data['incomeAllocationPct']) / 100), 2)
+        if tx_type == 'income':
+            return amount - allocated_to_savings
+        if tx_type == 'expense':
+            return -amount
+        return 0.0
 
-        account_ref = BalanceService._get_account_ref(user_id, account_name)
+    @staticmethod
+    def _apply_transaction_effect(user_id, tx_data, transaction_id=None, entry_id=None):
+        """Bir işlemin bakiye etkisini uygular."""
+        account_ref = BalanceService._get_account_ref(user_id, tx_data.get('account'))
         if not account_ref: return
 
-        net_change = 0.0
-        if tx_type == 'income':
-            net_change = amount - allocated_to_savings
-        elif tx_type == 'expense':
-            net_change = -amount
-        
+        net_change = BalanceService._transaction_net_change(tx_data)
         if net_change != 0:
-            BalanceService._update_balance(account_ref, net_change)
+            BalanceService._update_balance(account_ref, net_change, tx_data.get('date'), transaction_id,
+                                           entry_id=entry_id)
 
     @staticmethod
-    def _revert_transaction_effect(user_id, tx_data):
-        """Bir işlemin bakiye etkisini geri alır."""
-        amount = tx_data.get('amount', 0.0)
-        tx_type = tx_data.get('type')
-        account_name = tx_data.get('account')
-        allocated_to_savings = 0.0
-        
-        if tx_type == 'income' and tx_data.get('incomeAllocationPct') is not None:
-            allocated_to_savings = round(amount * (int(tx_data['incomeAllocationPct']) / 100), 2)
-
-        account_ref = BalanceService._get_account_ref(user_id, account_name)
+    def _revert_transaction_effect(user_id, tx_data, transaction_id=None, entry_id=None):
+        """Bir işlemin bakiye etkisini geri alır (defterde 'reversal' kaydı olarak)."""
+        account_ref = BalanceService._get_account_ref(user_id, tx_data.get('account'))
         if not account_ref: return
-        
-        reversal_amount = 0.0
-        if tx_type == 'income':
-            reversal_amount = -(amount - allocated_to_savings)
-        elif tx_type == 'expense':
-            reversal_amount = amount
-            
+
+        reversal_amount = -BalanceService._transaction_net_change(tx_data)
         if reversal_amount != 0:
-            BalanceService._update_balance(account_ref, reversal_amount)
+            BalanceService._update_balance(account_ref, reversal_amount, tx_data.get('date'), transaction_id,
+                                           kind='reversal', entry_id=entry_id)
 
-    @staticmethod
-    def update_balance_on_new_transaction(user_id, account_name, amount, transaction_type, allocated_to_savings=0.0):
-        """Yeni bir işlem eklendiğinde çağrılır."""
-        tx_data = {
-            "account": account_name, "amount": amount, "type": transaction_type,
-            "incomeAllocationPct": (allocated_to_savings / amount * 100) if amount > 0 else 0
-        }
-        BalanceService._apply_transaction_effect(user_id, tx_data)
+    # =========================================================
+    # BAKİYE DEFTERİ
+    # =========================================================
 
     @staticmethod
-    def update_balance_on_delete_transaction(user_id, account_name, amount, transaction_type, allocated_to_savings=0.0):
-        """Bir işlem silindiğinde çağrılır."""
-        tx_data = {
-            "account": account_name, "amount": amount, "type": transaction_type,
-            "incomeAllocationPct": (allocated_to_savings / amount * 100) if amount > 0 else 0
-        }
-        BalanceService._revert_transaction_effect(user_id, tx_data)
+    def ensure_ledger(user_id, account_id):
+        """
+        Defterden önce oluşturulmuş hesaplar için bir kerelik geriye dönük
+        doldurma. Defterde karşılığı olmayan her işlem kendi tarihiyle
+        (kimlik: backfill_{txId}) yazılır; kalan fark, güncel bakiyeyle
+        tutarlı olacak şekilde en eski tarihli açılış kaydına (opening_{hesap})
+        konur. Kimlikler deterministik olduğundan yarıda kalan/eşzamanlı
+        doldurma tekrar çalıştırılabilir. Sonunda hesaba ledgerStartedAt ve
+        açılışın tarihi/tutarı (bkz. _move_opening) yazılır.
+        Bekleyen bakiye işleri zamanında bitmezse LedgerNotReady fırlatılır;
+        doldurma yapılmaz, ledgerStartedAt yazılmaz.
+        """
+        cache = get_request_cache()
+        account_ref = db.collection('user_accounts').document(account_id)
+        account = cache.get(account_ref)
+        if account is None or account.get('userId') != user_id:
+            return None
+        if account.get('ledgerStartedAt') or account.get('accountType') == 'investment':
+            return account
+
+        # Kuyrukta bekleyen bakiye etkileri önce uygulansın; yoksa aynı işlem hem doldurmaya hem deftere girer
+        if not job_queue.wait_for(user_id):
+            raise LedgerNotReady(f"Pending balance jobs of {user_id} did not finish")
+        existing = [doc.to_dict() for doc in db.collection(LEDGER_COLLECTION)
+                    .where(filter=FieldFilter('accountId', '==', account_id)).stream()]
+        live_entries = [e for e in existing if e.get('kind') not in ('backfill', 'opening')]
+        covered = {e.get('transactionId') for e in live_entries if e.get('transactionId')}
+
+        tx_query = (db.collection('transactions')
+                      .where(filter=FieldFilter('userId', '==', user_id))
+                      .where(filter=FieldFilter('account', '==', account.get('accountName')))
+                      .where(filter=FieldFilter('isDeleted', '==', False)))
+        backfill = []
+        for doc in tx_query.stream():
+            if doc.id in covered:
+                continue
+            tx = doc.to_dict()
+            net_change = BalanceService._transaction_net_change(tx)
+            if net_change and tx.get('date'):
+                backfill.append((doc.id, tx['date'][:10], net_change))
+
+        total = BalanceService.get_balance_counter(account_ref, user_id).get_total(use_cache=False)
+        opening = total - sum(float(e.get('amount', 0.0) or 0.0) for e in live_entries) - sum(a for _, _, a in backfill)
+        dates = [d for _, d, _ in backfill] + [e['date'] for e in live_entries if e.get('date')]
+        created = (account.get('createdAt') or datetime.now(timezone.utc).isoformat())[:10]
+        opening_date = min(dates + [created])
+
+        batch, pending = db.batch(), 0
+        for tx_id, date_str, amount in [(None, opening_date, round(opening, 2))] + backfill:
+            kind = 'opening' if tx_id is None else 'backfill'
+            entry_id = f"opening_{account_id}" if tx_id is None else f"backfill_{tx_id}"
+            BalanceLedgerService.append(batch, user_id, account_id, amount, date_str, tx_id, kind, entry_id=entry_id)
+            pending += 1
+            if pending >= WRITE_BATCH_SIZE:
+                batch.commit()
+                batch, pending = db.batch(), 0
+        marker = {'ledgerStartedAt': datetime.now(timezone.utc).isoformat(),
+                  'ledgerOpeningDate': opening_date, 'ledgerOpeningBalance': round(opening, 2)}
+        batch.update(account_ref, marker)
+        batch.commit()
+        cache.apply_local(account_ref, marker)
+        logger.info("BALANCE_SERVICE: Backfilled ledger for account %s (%d transactions, opening %.2f).",
+                    account_id, len(backfill), opening)
+        return {**account, **marker}
 
     @staticmethod
-    def update_balance_on_update_transaction(user_id, old_tx_data, new_tx_data):
-        """Bir işlem güncellendiğinde çağrılır. Önce eskiyi geri alır, sonra yeniyi uygular."""
-        print("BALANCE_SERVICE: Reverting old transaction effect...")
-        BalanceService._revert_transaction_effect(user_id, old_tx_data)
-        
-        print("BALANCE_SERVICE: Applying new transaction effect...")
-        BalanceService._apply_transaction_effect(user_id, new_tx_data)
\ No newline at end of file
+    def verify_ledger(user_id, account_id):
+        """Defterden hesaplanan güncel bakiye ile shard toplamını karşılaştırır (drift tespiti)."""
+        account_ref = db.collection('user_accounts').document(account_id)
+        ledger = BalanceLedgerService.balance_as_of(user_id, account_id, '9999-12-31')['balance']
+        counter = round(BalanceService.get_balance_counter(account_ref, user_id).get_total(use_cache=False), 2)
+        return {'accountId': account_id, 'ledgerBalance': ledger, 'counterBalance': counter,
+                'drift': round(counter - ledger, 2)}
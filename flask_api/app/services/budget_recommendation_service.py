@@ -0,0 +1,187 @@
+# File: flask_api/app/services/budget_recommendation_service.py
+"""
+Kategori bazlı aylık bütçe önerisi (yerel istatistik; LLM gerekmez).
+
+Kullanıcının kategorideki gider geçmişi arşiv bucket'ları + tek canlı sorguyla
+okunur (bkz. TransactionArchiveService) ve tek bir vektörel geçişte aylık
+toplamlara çevrilir (np.bincount). Öneri:
+
+- EWMA: yakın aylara daha fazla ağırlık veren aylık harcama tahmini
+- mevsimsellik: hedef ayın geçmiş yıllardaki harcaması / genel ortalama
+  (az veri varsa 1'e doğru büzülür, [0.75, 1.5] aralığında)
+- son 12 ayın p50..p90 aralığına kırpılıp 10 TL'ye yuvarlanır
+
+Sonuç (kullanıcı, kategori, ay) için süreç içinde önbelleklenir. Anahtar,
+kategoriye gider eklendiğinde/değiştiğinde artan veri sürümüyle
+(data_versions.scoped_key('expenses', kategori)) birlikte saklanır; sürüm
+değişince öneri yeniden hesaplanır.
+"""
+import math
+import os
+import threading
+from collections import OrderedDict
+from datetime import datetime, timezone
+import numpy as np
+from app.utils.firebase_config import db
+from app.utils import data_versions
+from app.utils.logging_config import get_logger
+from .transaction_archive_service import TransactionArchiveService
+
+logger = get_logger(__name__)
+
+RECOMMENDATION_HISTORY_MONTHS = int(os.getenv('BUDGET_RECOMMENDATION_HISTORY_MONTHS', '24'))
+RECOMMENDATION_EWMA_ALPHA = float(os.getenv('BUDGET_RECOMMENDATION_EWMA_ALPHA', '0.4'))
+RECOMMENDATION_CACHE_SIZE = int(os.getenv('BUDGET_RECOMMENDATION_CACHE_SIZE', '4096'))
+SEASONAL_FACTOR_BOUNDS = (0.75, 1.5)
+
+MONTH_NAMES = ["Ocak", "Şubat", "Mart", "Nisan", "Mayıs", "Haziran",
+               "Temmuz", "Ağustos", "Eylül", "Ekim", "Kasım", "Aralık"]
+
+# (userId, kategori, 'YYYY-MM') -> (kategori sürümü, öneri)
+_cache = OrderedDict()
+_cache_lock = threading.Lock()
+
+
+def expense_version_key(category):
+    return data_versions.scoped_key('expenses', category)
+
+
+class BudgetRecommendationService:
+    @staticmethod
+    def _fetch_expenses(user_id, category, start_date):
+        return TransactionArchiveService.fetch(
+            user_id, start_date, filters={'type': 'expense', 'category': category}, fields=['amount', 'date'])
+
+    @staticmethod
+    def _monthly_totals(expenses, start_month, num_months):
+        """Giderleri ay indeksine (0 = başlangıç ayı) göre toplar; tek geçiş."""
+        months = np.fromiter(
+            (int(e['date'][:4]) * 12 + int(e['date'][5:7]) - 1 - start_month for e in expenses),
+            dtype=np.int64, count=len(expenses))
+        amounts = np.fromiter((float(e.get('amount', 0.0) or 0.0) for e in expenses),
+                              dtype=np.float64, count=len(expenses))
+        valid = (months >= 0) & (months < num_months)
+        totals = np.bincount(months[valid], weights=amounts[valid], minlength=num_months)
+        return totals, int(valid.sum())
+
+    @staticmethod
+    def compute(expenses, now=None, history_months=None):
+        """
+        Aylık toplamlardan öneri istatistikleri. `expenses`: {'amount', 'date'}
+        listesi. Açıklama metni içermez (bkz. rationale_text).
+        """
+        now = now or datetime.now(timezone.utc)
+        history_months = history_months or RECOMMENDATION_HISTORY_MONTHS
+        current_month = now.year * 12 + now.month - 1
+        start_month = current_month - history_months
+
+        totals, transaction_count = BudgetRecommendationService._monthly_totals(
+            expenses, start_month, history_months + 1)
+        history, spent_this_month = totals[:history_months], float(totals[history_months])
+
+        active_months = np.flatnonzero(history)
+        stats = {
+            'month': f"{now.year:04d}-{now.month:02d}",
+            'transactionCount': transaction_count,
+            'spentThisMonth': round(spent_this_month, 2),
+        }
+        if active_months.size == 0:
+            # Geçmiş yok: bu ayın harcaması (varsa) tek veri noktası
+            suggested = math.ceil(spent_this_month / 10) * 10 if spent_this_month else 0.0
+            stats.update({'suggestedBudget': float(suggested), 'expectedSpend': round(spent_this_month, 2),
+                          'monthlyAverage': 0.0, 'monthsOfHistory': 0, 'seasonalFactor': 1.0,
+                          'percentiles': None, 'confidence': 'none'})
+            return stats
+
+        # Kullanıcının ilk harcamasından önceki boş aylar ortalamayı düşürmesin
+        first = int(active_months[0])
+        active = history[first:]
+        n = active.size
+
+        weights = (1 - RECOMMENDATION_EWMA_ALPHA) ** np.arange(n - 1, -1, -1)
+        ewma = float(np.dot(weights, active) / weights.sum())
+
+        recent = active[-12:]
+        p50, p75, p90 = (float(v) for v in np.percentile(recent, [50, 75, 90]))
+
+        seasonal_factor = 1.0
+        calendar_months = (start_month + first + np.arange(n)) % 12
+        same_month = active[calendar_months == now.month - 1]
+        mean_all = float(active.mean())
+        if n >= 13 and same_month.size and mean_all > 0:
+            raw_factor = float(same_month.mean()) / mean_all
+            shrink = same_month.size / (same_month.size + 1)
+            seasonal_factor = 1 + (raw_factor - 1) * shrink
+            seasonal_factor = min(max(seasonal_factor, SEASONAL_FACTOR_BOUNDS[0]), SEASONAL_FACTOR_BOUNDS[1])
+
+        expected = ewma * seasonal_factor
+        suggested = min(max(expected, p50), p90) if recent.size >= 3 else expected
+        stats.update({
+            'suggestedBudget': float(math.ceil(suggested / 10) * 10),
+            'expectedSpend': round(expected, 2),
+            'monthlyAverage': round(mean_all, 2),
+            'monthsOfHistory': n,
+            'seasonalFactor': round(seasonal_factor, 3),
+            'percentiles': {'p50': round(p50, 2), 'p75': round(p75, 2), 'p90': round(p90, 2)},
+            'confidence': 'low' if n < 3 else ('medium' if n < 9 else 'high'),
+        })
+        return stats
+
+    @staticmethod
+    def rationale_text(category, stats):
+        """Önerinin şablon açıklaması (LLM yoksa ya da başarısızsa kullanılır)."""
+        if stats['confidence'] == 'none':
+            if not stats['spentThisMonth']:
+                return f"'{category}' kategorisinde henüz harcama bulunmadığı için öneri yapılamadı."
+            return (f"'{category}' kategorisinde geçmiş aylara ait harcama bulunamadı; "
+                    f"öneri bu ayki harcamanıza göre yapıldı.")
+        parts = [f"Son {stats['monthsOfHistory']} ayda '{category}' için aylık ortalama "
+                 f"{stats['monthlyAverage']:.0f} TL harcadınız; yakın aylara daha fazla ağırlık veren "
+                 f"tahmin {stats['expectedSpend']:.0f} TL."]
+        factor = stats['seasonalFactor']
+        if abs(factor - 1) >= 0.05:
+            month_name = MONTH_NAMES[int(stats['month'][5:7]) - 1]
+            direction = 'daha yüksek' if factor > 1 else 'daha düşük'
+            parts.append(f"{month_name} aylarında bu kategorideki harcamanız genelde %{abs(factor - 1) * 100:.0f} {direction}.")
+        parts.append(f"Önerilen aylık bütçe {stats['suggestedBudget']:.0f} TL.")
+        return ' '.join(parts)
+
+    @staticmethod
+    def get_recommendation(user_id, category, phrase=None):
+        """
+        Önbellekli öneri. `phrase(category, stats, fallback_text)` verilirse
+        açıklama metni onunla üretilir (sadece hesaplama yapıldığında çağrılır).
+        """
+        if db is None: raise Exception("Firestore client not initialized.")
+        now = datetime.now(timezone.utc)
+        key = (user_id, category, f"{now.year:04d}-{now.month:02d}")
+        version = int(data_versions.get_versions(user_id).get(expense_version_key(category), 0) or 0)
+
+        with _cache_lock:
+            entry = _cache.get(key)
+            if entry is not None and entry[0] == version:
+                _cache.move_to_end(key)
+                return dict(entry[1])
+
+        start_month = now.year * 12 + now.month - 1 - RECOMMENDATION_HISTORY_MONTHS
+        start_date = f"{start_month // 12:04d}-{start_month % 12 + 1:02d}-01"
+        stats = BudgetRecommendationService.compute(
+            BudgetRecommendationService._fetch_expenses(user_id, category, start_date), now=now)
+        rationale = BudgetRecommendationService.rationale_text(category, stats)
+        if phrase is not None:
+            rationale = phrase(category, stats, rationale)
+
+        result = {'success': True, 'category': category, **stats, 'rationale': rationale}
+        with _cache_lock:
+            _cache[key] = (version, result)
+            _cache.move_to_end(key)
+            while len(_cache) > RECOMMENDATION_CACHE_SIZE:
+                _cache.popitem(last=False)
+        logger.debug("BUDGET_RECOMMENDATION: Computed %s for user %s (%d transactions).",
+                     category, user_id, stats['transactionCount'])
+        return dict(result)
+
+
+def clear_cache():
+    with _cache_lock:
+        _cache.clear()
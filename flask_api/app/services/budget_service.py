@@ -1,9 +1,13 @@
 # File: flask_api/app/services/budget_service.py
 from app.utils.firebase_config import db
 from datetime import datetime, timezone
-import traceback
 from firebase_admin import firestore
+from app.utils.request_cache import get_request_cache
+from app.utils import data_versions, sync_tombstones
 import uuid # For generating new budget IDs
+from app.utils.logging_config import get_logger
+
+logger = get_logger(__name__)
 
 class BudgetService:
     @staticmethod
@@ -35,6 +39,9 @@ class BudgetService:
 
             # isArchived veya isDeleted alanı varsa onu da ekleyin
             # query = query.where('isArchived', '==', False) 
+            # Filtre/sıralama değişirse QUERY_REGISTRY'deki BudgetService.list_budgets
+            # kaydı da güncellenmeli (userId, period, year, month, category composite
+            # index'i firestore.indexes.json'dan üretilir).
 
             query = query.order_by('category', direction=firestore.Query.ASCENDING)
 
@@ -45,12 +52,12 @@ class BudgetService:
                 budget_item['id'] = doc.id
                 budgets_list.append(budget_item)
 
-            print(f"Fetched {len(budgets_list)} budgets for user {user_id} for {target_year}-{target_month}")
+            logger.debug("Fetched %s budgets for user %s for %s-%s",
+                         len(budgets_list), user_id, target_year, target_month)
             return {"success": True, "budgets": budgets_list}, 200
 
         except Exception as e:
-            print(f"Error listing budgets for user {user_id}: {e}")
-            traceback.print_exc()
+            logger.exception("Error listing budgets for user %s: %s", user_id, e)
             # This query will likely require a composite index on userId, period, year, month, category
             return {"success": False, "error": f"An internal error occurred: {str(e)}" }, 500
 
@@ -85,6 +92,7 @@ class BudgetService:
                                .limit(1)
 
             existing_docs = list(query.stream())
+            cache = get_request_cache()
 
             budget_payload = {
                 'userId': user_id,
@@ -100,29 +108,32 @@ class BudgetService:
             if existing_docs:
                 # Update existing budget
                 doc_ref = existing_docs[0].reference
+                cache.remember(existing_docs[0])
                 budget_payload.pop('userId', None) # Not needed for update if doc_ref is specific
                 budget_payload.pop('category', None)
                 budget_payload.pop('period', None)
                 budget_payload.pop('year', None)
                 budget_payload.pop('month', None)
 
-                doc_ref.update(budget_payload)
+                cache.update(doc_ref, budget_payload)
                 budget_id = doc_ref.id
                 message = "Budget updated successfully"
                 status_code = 200
-                print(f"Budget {budget_id} updated for user {user_id}")
+                logger.debug("Budget %s updated for user %s", budget_id, user_id)
             else:
                 # Create new budget
                 budget_id = str(uuid.uuid4()) # Generate a new UUID for the document ID
                 doc_ref = budgets_ref.document(budget_id)
                 budget_payload['createdAt'] = datetime.now(timezone.utc).isoformat()
-                doc_ref.set(budget_payload)
+                cache.set(doc_ref, budget_payload)
                 message = "Budget created successfully"
                 status_code = 201
-                print(f"Budget {budget_id} created for user {user_id}")
+                logger.debug("Budget %s created for user %s", budget_id, user_id)
+
+            data_versions.bump(user_id, 'budgets')
 
-            # Fetch the created/updated document to return
-            final_doc = doc_ref.get().to_dict()
+            # Return the created/updated document from the request cache
+            final_doc = cache.get(doc_ref)
             final_doc['id'] = budget_id # Ensure ID is in the response
 
             return {"success": True, "message": message, "budget": final_doc}, status_code
@@ -130,8 +141,7 @@ class BudgetService:
         except ValueError:
             return {"success": False, "error": "Invalid limitAmount format. Must be a number."}, 400
         except Exception as e:
-            print(f"Error creating/updating budget: {e}")
-            traceback.print_exc()
+            logger.exception("Error creating/updating budget: %s", e)
             return {"success": False, "error": f"An internal error occurred: {str(e)}"}, 500
 
     @staticmethod
@@ -149,9 +159,10 @@ class BudgetService:
 
             # Perform hard delete for now as per MVP in doc (Section 6.2.1.4)
             doc_ref.delete()
-            print(f"Budget {budget_id} deleted for user {user_id_from_auth}")
+            sync_tombstones.record(user_id_from_auth, 'budgets', budget_id)
+            data_versions.bump(user_id_from_auth, 'budgets')
+            logger.debug("Budget %s deleted for user %s", budget_id, user_id_from_auth)
             return {"success": True, "message": "Budget deleted successfully"}, 200
         except Exception as e:
-            print(f"Error deleting budget {budget_id}: {e}")
-            traceback.print_exc()
+            logger.exception("Error deleting budget %s: %s", budget_id, e)
             return {"success": False, "error": f"Internal error during deletion: {str(e)}"}, 500
\ No newline at end of file
@@ -1,8 +1,12 @@
 # File: flask_api/app/services/category_service.py
 from app.utils.firebase_config import db
 from datetime import datetime, timezone
-import traceback
 from firebase_admin import firestore
+from app.utils.request_cache import get_request_cache
+from app.utils import data_versions
+from app.utils.logging_config import get_logger
+
+logger = get_logger(__name__)
 
 class CategoryService:
     @staticmethod
@@ -41,13 +45,13 @@ class CategoryService:
             }
             doc_ref = db.collection('user_defined_categories').document()
             doc_ref.set(category_data)
+            data_versions.bump(data['userId'], 'categories')
             created_category = category_data.copy()
             created_category['id'] = doc_ref.id
-            print(f"Custom category created with ID: {doc_ref.id} for user {data['userId']}")
+            logger.debug("Custom category created with ID: %s for user %s", doc_ref.id, data['userId'])
             return {"success": True, "message": "Custom category created successfully", "category": created_category}, 201
         except Exception as e:
-            print(f"Error creating custom category: {e}")
-            traceback.print_exc()
+            logger.exception("Error creating custom category: %s", e)
             return {"success": False, "error": f"An internal error occurred: {str(e)}"}, 500
 
     @staticmethod
@@ -62,11 +66,11 @@ class CategoryService:
             query = query.order_by('categoryName', direction=firestore.Query.ASCENDING)
             docs = query.stream()
             categories_list = [{'id': doc.id, **doc.to_dict()} for doc in docs]
-            print(f"Fetched {len(categories_list)} custom categories for user {user_id} (type: {category_type or 'all'})")
+            logger.debug("Fetched %s custom categories for user %s (type: %s)",
+                         len(categories_list), user_id, category_type or 'all')
             return {"success": True, "categories": categories_list}, 200
         except Exception as e:
-            print(f"Error listing custom categories for user {user_id}: {e}")
-            traceback.print_exc()
+            logger.exception("Error listing custom categories for user %s: %s", user_id, e)
             return {"success": False, "error": f"An internal error occurred: {str(e)}"}, 500
 
     # NEW: Update Category
@@ -74,13 +78,13 @@ class CategoryService:
     def update_category(user_id_from_auth, category_id, data_to_update):
         try:
             if db is None: raise Exception("Firestore client (db) is not initialized.")
+            cache = get_request_cache()
             doc_ref = CategoryService._get_category_doc_ref(category_id)
-            category_snapshot = doc_ref.get()
+            category_data = cache.get(doc_ref)
 
-            if not category_snapshot.exists:
+            if category_data is None:
                 return {"success": False, "error": "Category not found"}, 404
 
-            category_data = category_snapshot.to_dict()
             if category_data.get('userId') != user_id_from_auth:
                 return {"success": False, "error": "User not authorized to update this category"}, 403
             if category_data.get('isArchived', False):
@@ -112,15 +116,15 @@ class CategoryService:
                 return {"success": False, "error": "No valid fields provided for update or no changes detected."}, 400
 
             update_payload['updatedAt'] = datetime.now(timezone.utc).isoformat()
-            doc_ref.update(update_payload)
+            cache.update(doc_ref, update_payload)
+            data_versions.bump(user_id_from_auth, 'categories')
 
-            updated_doc = doc_ref.get().to_dict()
+            updated_doc = cache.get(doc_ref)
             updated_doc['id'] = category_id # ensure ID is in response
-            print(f"Custom category {category_id} updated for user {user_id_from_auth}")
+            logger.debug("Custom category %s updated for user %s", category_id, user_id_from_auth)
             return {"success": True, "message": "Category updated successfully", "category": updated_doc}, 200
         except Exception as e:
-            print(f"Error updating custom category {category_id}: {e}")
-            traceback.print_exc()
+            logger.exception("Error updating custom category %s: %s", category_id, e)
             return {"success": False, "error": f"An internal error occurred: {str(e)}"}, 500
 
     # NEW: Delete Category (Soft Delete)
@@ -128,13 +132,13 @@ class CategoryService:
     def delete_category(user_id_from_auth, category_id):
         try:
             if db is None: raise Exception("Firestore client (db) is not initialized.")
+            cache = get_request_cache()
             doc_ref = CategoryService._get_category_doc_ref(category_id)
-            category_snapshot = doc_ref.get()
+            category_data = cache.get(doc_ref)
 
-            if not category_snapshot.exists:
+            if category_data is None:
                 return {"success": False, "error": "Category not found"}, 404
 
-            category_data = category_snapshot.to_dict()
             if category_data.get('userId') != user_id_from_auth:
                 return {"success": False, "error": "User not authorized to delete this category"}, 403
 
@@ -145,10 +149,10 @@ class CategoryService:
                 'isArchived': True,
                 'updatedAt': datetime.now(timezone.utc).isoformat()
             }
-            doc_ref.update(update_payload)
-            print(f"Custom category {category_id} soft deleted for user {user_id_from_auth}")
+            cache.update(doc_ref, update_payload)
+            data_versions.bump(user_id_from_auth, 'categories')
+            logger.debug("Custom category %s soft deleted for user %s", category_id, user_id_from_auth)
             return {"success": True, "message": "Category archived successfully"}, 200
         except Exception as e:
-            print(f"Error deleting custom category {category_id}: {e}")
-            traceback.print_exc()
+            logger.exception("Error deleting custom category %s: %s", category_id, e)
             return {"success": False, "error": f"An internal error occurred: {str(e)}"}, 500
\ No newline at end of file
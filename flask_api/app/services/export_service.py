@@ -0,0 +1,235 @@
+# File: flask_api/app/services/export_service.py
+"""
+Kullanıcının tüm finansal geçmişinin akış halinde dışa aktarımı.
+
+Her kaynak (işlemler, yatırım işlemleri, kumbara kayıtları, bütçeler,
+hedefler) `userId ==` sorgusuyla EXPORT_PAGE_SIZE'lık sayfalar halinde,
+son dökümandan devam eden imleçle (start_after) okunur ve her sayfa
+kodlanıp hemen yanıta yazılır. Bellekte en fazla bir sayfa (Parquet'te bir
+row group) tutulur; geçmişin boyutu bellek kullanımını değiştirmez.
+
+Biçimler:
+- ndjson: satır başına bir kayıt, `collection` alanıyla; tek akış
+- csv: kaynak başına bir CSV dosyası (sabit sütunlar), zip akışı içinde
+- parquet: kaynak başına bir Parquet dosyası, zip akışı içinde
+  (pyarrow kuruluysa)
+
+Zip, konumlanamayan (seek edilemeyen) bir çıktıya yazılır; zipfile bu
+durumda her girdinin boyutunu girdiden sonra (data descriptor) yazar.
+"""
+import csv
+import io
+import json
+import os
+import zipfile
+from google.cloud.firestore_v1.base_query import FieldFilter
+from app.utils.firebase_config import db
+from app.utils.logging_config import get_logger
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson yoksa stdlib json kullanılır
+    orjson = None
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # pragma: no cover - Parquet dışa aktarımı opsiyonel
+    pa = pq = None
+
+logger = get_logger(__name__)
+
+EXPORT_PAGE_SIZE = int(os.getenv('EXPORT_PAGE_SIZE', '500'))
+PARQUET_ROW_GROUP_ROWS = int(os.getenv('EXPORT_PARQUET_ROW_GROUP_ROWS', '50000'))
+EXPORT_FORMATS = ('ndjson', 'csv', 'parquet')
+
+# kaynak adı -> (koleksiyon, soft-delete alanı, CSV/Parquet sütunları (alan, tür))
+EXPORT_SOURCES = {
+    'transactions': ('transactions', 'isDeleted', (
+        ('date', 'string'), ('type', 'string'), ('category', 'string'), ('amount', 'double'),
+        ('account', 'string'), ('description', 'string'), ('isNeed', 'bool'), ('emotion', 'string'),
+        ('incomeAllocationPct', 'int64'), ('createdAt', 'string'), ('updatedAt', 'string'))),
+    'investmentTransactions': ('investment_transactions', None, (
+        ('date', 'string'), ('accountId', 'string'), ('assetSymbol', 'string'), ('type', 'string'),
+        ('quantity', 'double'), ('pricePerUnit', 'double'), ('totalAmount', 'double'),
+        ('realizedPL', 'double'), ('note', 'string'), ('createdAt', 'string'))),
+    'allocations': ('savings_allocations', None, (
+        ('date', 'string'), ('amount', 'double'), ('source', 'string'), ('transactionId', 'string'),
+        ('goalId', 'string'), ('createdAt', 'string'))),
+    'budgets': ('budgets', None, (
+        ('category', 'string'), ('limitAmount', 'double'), ('period', 'string'), ('year', 'int64'),
+        ('month', 'int64'), ('isAuto', 'bool'), ('createdAt', 'string'), ('updatedAt', 'string'))),
+    'goals': ('savings_goals', None, (
+        ('title', 'string'), ('targetAmount', 'double'), ('currentAmount', 'double'),
+        ('targetDate', 'string'), ('isActive', 'bool'), ('createdAt', 'string'))),
+}
+
+
+def _typed(value, kind):
+    """Sütun türüne çevirir; çevrilemeyen değer boş bırakılır."""
+    if value is None:
+        return None
+    try:
+        if kind == 'double':
+            return float(value)
+        if kind == 'int64':
+            return int(value)
+        if kind == 'bool':
+            return bool(value)
+        return value if isinstance(value, str) else str(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _dumps_line(row):
+    if orjson is not None:
+        return orjson.dumps(row, option=orjson.OPT_NON_STR_KEYS) + b"\n"
+    return (json.dumps(row, ensure_ascii=False, default=str) + "\n").encode('utf-8')
+
+
+class _ChunkSink(io.RawIOBase):
+    """Yazılan byte'ları biriktirir; `drain` ile yanıta aktarılır (seek desteklemez)."""
+
+    def __init__(self):
+        self._chunks = []
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def drain(self):
+        data = b"".join(self._chunks)
+        self._chunks = []
+        return data
+
+
+class _PositionedWriter:
+    """pyarrow'un beklediği tell() desteğini zip girdisine ekler."""
+
+    def __init__(self, target):
+        self._target = target
+        self._position = 0
+        self.closed = False
+
+    def write(self, data):
+        self._target.write(data)
+        self._position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self._position
+
+    def flush(self):
+        self._target.flush()
+
+    def close(self):
+        # Zip girdisi `with` bloğunda kapanır
+        self.closed = True
+
+
+class ExportService:
+    @staticmethod
+    def parquet_available():
+        return pq is not None
+
+    @staticmethod
+    def pages(user_id, source, page_size=None):
+        """Kaynağın kayıtlarını sayfa sayfa ('id' alanıyla) üretir."""
+        collection, deleted_field, _ = EXPORT_SOURCES[source]
+        page_size = page_size or EXPORT_PAGE_SIZE
+        query = db.collection(collection).where(filter=FieldFilter('userId', '==', user_id))
+        if deleted_field:
+            query = query.where(filter=FieldFilter(deleted_field, '==', False))
+        last = None
+        while True:
+            page_query = query.limit(page_size)
+            if last is not None:
+                page_query = page_query.start_after(last)
+            docs = list(page_query.stream())
+            if not docs:
+                return
+            yield [{'id': doc.id, **doc.to_dict()} for doc in docs]
+            if len(docs) < page_size:
+                return
+            last = docs[-1]
+
+    # --- kodlayıcılar ---
+
+    @staticmethod
+    def _encode_ndjson(sources, pages, sink):
+        for source in sources:
+            for page in pages(source):
+                for row in page:
+                    row.pop('userId', None)
+                    sink.write(_dumps_line({'collection': source, **row}))
+                yield sink.drain()
+
+    @staticmethod
+    def _write_csv(source, entry, pages, sink):
+        columns = [field for field, _ in EXPORT_SOURCES[source][2]]
+        text = io.TextIOWrapper(entry, encoding='utf-8-sig', newline='')
+        writer = csv.writer(text)
+        writer.writerow(['id', *columns])
+        for page in pages(source):
+            writer.writerows([row['id'], *(row.get(field) for field in columns)] for row in page)
+            text.flush()
+            yield sink.drain()
+        text.flush()
+        text.detach()
+
+    @staticmethod
+    def _write_parquet(source, entry, pages, sink):
+        fields = EXPORT_SOURCES[source][2]
+        types = {'string': pa.string(), 'double': pa.float64(), 'int64': pa.int64(), 'bool': pa.bool_()}
+        schema = pa.schema([('id', pa.string())] + [(field, types[kind]) for field, kind in fields])
+        writer = pq.ParquetWriter(_PositionedWriter(entry), schema, compression='snappy')
+        buffered = []
+        for page in pages(source):
+            buffered.extend({'id': row['id'], **{field: _typed(row.get(field), kind) for field, kind in fields}}
+                            for row in page)
+            if len(buffered) >= PARQUET_ROW_GROUP_ROWS:
+                writer.write_table(pa.Table.from_pylist(buffered, schema=schema))
+                buffered = []
+                yield sink.drain()
+        if buffered:
+            writer.write_table(pa.Table.from_pylist(buffered, schema=schema))
+        writer.close()
+
+    @staticmethod
+    def _encode_zip(fmt, sources, pages, sink):
+        write_entry = ExportService._write_csv if fmt == 'csv' else ExportService._write_parquet
+        with zipfile.ZipFile(sink, 'w', compression=zipfile.ZIP_DEFLATED) as archive:
+            for source in sources:
+                with archive.open(f"{source}.{fmt}", 'w', force_zip64=True) as entry:
+                    yield from write_entry(source, entry, pages, sink)
+                yield sink.drain()
+        yield sink.drain()
+
+    @staticmethod
+    def encode(fmt, sources, pages):
+        """
+        `pages(source)` sayfalarını `fmt` biçiminde byte parçaları olarak üretir.
+        Boş parçalar atlanır (yanıta gereksiz flush gitmesin).
+        """
+        sink = _ChunkSink()
+        chunks = (ExportService._encode_ndjson(sources, pages, sink) if fmt == 'ndjson'
+                  else ExportService._encode_zip(fmt, sources, pages, sink))
+        for chunk in chunks:
+            if chunk:
+                yield chunk
+
+    @staticmethod
+    def stream(user_id, fmt, sources):
+        """Kullanıcının verisini akış halinde üreten generator (Response gövdesi için)."""
+        rows = {'count': 0}
+
+        def pages(source):
+            for page in ExportService.pages(user_id, source):
+                rows['count'] += len(page)
+                yield page
+
+        yield from ExportService.encode(fmt, sources, pages)
+        logger.info("EXPORT: Streamed %d rows (%s) for user %s.", rows['count'], fmt, user_id)
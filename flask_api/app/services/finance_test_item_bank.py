@@ -0,0 +1,148 @@
+# File: flask_api/app/services/finance_test_item_bank.py
+"""
+FinanceTestItems koleksiyonunun süreç içi, değişmez indeksi.
+
+Madde bankası seed_test_items.py ile yüklenen statik veridir; her test
+başlangıcında/bitişinde tüm koleksiyonu okumak yerine bir kez yüklenir.
+seed_test_items.py her çalıştığında app_meta/finance_test_items.version
+artırılır; süreçler sürümü en fazla ITEM_BANK_CHECK_SECONDS'ta bir kontrol
+eder (1 okuma) ve sürüm değiştiyse bankayı yeniden yükler.
+"""
+import os
+import threading
+import time
+from types import MappingProxyType
+from app.utils import firebase_config
+from app.utils.logging_config import get_logger
+
+logger = get_logger(__name__)
+
+ITEMS_COLLECTION = 'FinanceTestItems'
+META_COLLECTION = 'app_meta'
+META_DOCUMENT = 'finance_test_items'
+ITEM_BANK_CHECK_SECONDS = float(os.getenv('ITEM_BANK_CHECK_SECONDS', '60'))
+
+SCALES = ('FO', 'FWB', 'RT', 'FCAP')
+# Ölçek başına madde puanı üst sınırı: FO doğru/yanlış, RT Likert-7, diğerleri 5'li
+SCALE_MAX_SCORES = {'FO': 1, 'FWB': 5, 'RT': 7, 'FCAP': 5}
+
+
+class ItemBank:
+    """
+    Madde kimliği -> (ölçek, en yüksek puan, ters puanlama, doğru şık).
+    Oluşturulduktan sonra değiştirilmez; istekler arasında kilitsiz paylaşılır.
+    """
+    __slots__ = ('version', 'items', 'scoring', 'scale_counts', 'scale_max_totals')
+
+    def __init__(self, version, documents):
+        """documents: (döküman kimliği, döküman verisi) çiftleri."""
+        documents = sorted(documents, key=lambda pair: pair[0])
+        scoring, counts, max_totals = {}, dict.fromkeys(SCALES, 0), dict.fromkeys(SCALES, 0)
+        for item_id, item in documents:
+            scale = item['scale']
+            max_score = SCALE_MAX_SCORES.get(scale, 5)
+            scoring[item_id] = (scale, max_score, bool(item.get('reverseScored', False)), item.get('correctChoice'))
+            counts[scale] = counts.get(scale, 0) + 1
+            max_totals[scale] = max_totals.get(scale, 0) + max_score
+
+        object.__setattr__(self, 'version', version)
+        # Yanıtta aynen döndürülen maddeler (JSON'a çevrilebilmeleri için düz dict); değiştirilmemeli
+        object.__setattr__(self, 'items', tuple(item for _, item in documents))
+        object.__setattr__(self, 'scoring', MappingProxyType(scoring))
+        object.__setattr__(self, 'scale_counts', MappingProxyType(counts))
+        object.__setattr__(self, 'scale_max_totals', MappingProxyType(max_totals))
+
+    def __setattr__(self, name, value):
+        raise AttributeError("ItemBank is immutable")
+
+    def score_answers(self, answers):
+        """
+        Bir cevap grubunun madde puanları, tek geçişte: {itemId: puan}.
+        Bankada olmayan maddeler yok sayılır.
+        """
+        scoring = self.scoring
+        scores = {}
+        for answer in answers:
+            item_id = answer.get('itemId')
+            spec = scoring.get(item_id)
+            if spec is None:
+                continue
+            scale, max_score, reverse, correct = spec
+            choice = str(answer.get('selectedChoice', ''))
+            if scale == 'FO':
+                score = 1 if choice == correct else 0
+            else:
+                score = int(choice) if choice.isdigit() else 0
+            if reverse:
+                score = (max_score + 1) - score
+            scores[item_id] = score
+        return scores
+
+    def normalized_scores(self, item_scores):
+        """
+        Madde puanlarından ölçek skorları (0-100), totalScore ve risk profili.
+        Cevaplanmamış maddeler 0 puan sayılır.
+        """
+        raw_sums = dict.fromkeys(SCALES, 0)
+        scoring = self.scoring
+        for item_id, score in item_scores.items():
+            spec = scoring.get(item_id)
+            if spec is not None and spec[0] in raw_sums:
+                raw_sums[spec[0]] += score
+
+        normalized = {}
+        for scale in SCALES:
+            max_possible = self.scale_max_totals.get(scale, 0)
+            min_possible = 0 if scale == 'FO' else self.scale_counts.get(scale, 0)
+            norm_score = 0
+            if (max_possible - min_possible) > 0:
+                norm_score = ((raw_sums[scale] - min_possible) / (max_possible - min_possible)) * 100
+            normalized[f"{scale.lower()}Score"] = round(norm_score, 2)
+        normalized['totalScore'] = round(sum(normalized.values()) / len(SCALES), 2)
+
+        rt_score = normalized.get('rtScore', 50)
+        risk_profile = 'medium'
+        if rt_score <= 40: risk_profile = 'low'
+        elif rt_score >= 70: risk_profile = 'high'
+        return normalized, risk_profile
+
+
+_bank = None
+_checked_at = 0.0
+_lock = threading.Lock()
+
+
+def _read_version():
+    snapshot = firebase_config.db.collection(META_COLLECTION).document(META_DOCUMENT).get()
+    return int((snapshot.to_dict() or {}).get('version', 0) or 0) if snapshot.exists else 0
+
+
+def _load(version):
+    docs = firebase_config.db.collection(ITEMS_COLLECTION).stream()
+    bank = ItemBank(version, [(doc.id, doc.to_dict()) for doc in docs])
+    logger.info("FINANCE_TEST: Loaded item bank version %s (%d items).", version, len(bank.items))
+    return bank
+
+
+def get_item_bank():
+    """Güncel madde bankası; sürüm kontrolü TTL dolduğunda yapılır."""
+    global _bank, _checked_at
+    bank = _bank
+    if bank is not None and time.monotonic() - _checked_at < ITEM_BANK_CHECK_SECONDS:
+        return bank
+    with _lock:
+        if _bank is not None and time.monotonic() - _checked_at < ITEM_BANK_CHECK_SECONDS:
+            return _bank
+        version = _read_version()
+        if _bank is None or _bank.version != version:
+            _bank = _load(version)
+        _checked_at = time.monotonic()
+        return _bank
+
+
+def invalidate():
+    """Bir sonraki erişimde bankanın yeniden yüklenmesini sağlar (seed, testler)."""
+    global _bank, _checked_at
+    with _lock:
+        _bank = None
+        _checked_at = 0.0
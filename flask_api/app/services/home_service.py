@@ -0,0 +1,69 @@
+# File: flask_api/app/services/home_service.py
+from datetime import datetime, timedelta
+from app.utils import concurrency
+from .account_service import AccountService
+from .transaction_service import TransactionService
+from .budget_service import BudgetService
+from .savings_service import SavingsService
+from app.utils.logging_config import get_logger
+
+logger = get_logger(__name__)
+
+
+class HomeService:
+    """
+    Ana ekranın ihtiyaç duyduğu verileri (hesaplar, son işlemler, bütçeler,
+    hedefler, tasarruf bakiyesi) tek istekte ve eşzamanlı olarak toplar.
+    """
+
+    @staticmethod
+    def _unwrap(result):
+        # Servisler ya (dict, status) ya da sadece dict döner
+        if isinstance(result, tuple):
+            return result
+        return result, 200
+
+    @staticmethod
+    def get_home_data(user_id, days=30):
+        today = datetime.now().date()
+        start_date_str = (today - timedelta(days=days)).strftime('%Y-%m-%d')
+        end_date_str = today.strftime('%Y-%m-%d')
+
+        calls = {
+            'accounts': lambda: AccountService.list_accounts(user_id),
+            'transactions': lambda: TransactionService.list_transactions(user_id, start_date_str, end_date_str),
+            'budgets': lambda: BudgetService.list_budgets(user_id),
+            'goals': lambda: SavingsService.list_goals(user_id),
+            'savingsBalance': lambda: SavingsService.get_user_savings_balance(user_id),
+        }
+        # Bir bölümün hatası diğerlerini düşürmesin diye her çağrı kendi hatasını yakalar
+        guarded = {name: (lambda call=call: HomeService._guard(call)) for name, call in calls.items()}
+
+        try:
+            results = concurrency.run_parallel(guarded)
+        except Exception as e:
+            logger.exception("Unhandled error in get_home_data")
+            return {"success": False, "error": str(e)}, 500
+
+        response = {"success": True, "errors": {}}
+        for name, (body, status_code) in results.items():
+            if status_code >= 400 or not body.get('success', False):
+                response['errors'][name] = body.get('error', 'Unknown error')
+                response[name] = None
+            elif name == 'savingsBalance':
+                response[name] = {"balance": body.get('balance'), "updatedAt": body.get('updatedAt')}
+            else:
+                response[name] = body.get(name)
+
+        if len(response['errors']) == len(calls):
+            response['success'] = False
+            return response, 500
+        return response, 200
+
+    @staticmethod
+    def _guard(call):
+        try:
+            return HomeService._unwrap(call())
+        except Exception as e:
+            logger.exception("Unhandled error in _guard")
+            return {"success": False, "error": str(e)}, 500
@@ -2,14 +2,24 @@
 
 from app.utils.firebase_config import db
 from datetime import datetime, timezone
-import traceback
 from firebase_admin import firestore
-import yfinance as yf
 import uuid
-from functools import lru_cache
 import pandas as pd
 from google.cloud.firestore_v1.base_query import FieldFilter
 from .technical_analysis_service import TechnicalAnalysisService
+from .tax_lot_service import TaxLotService, LotBook
+from app.utils.request_cache import get_request_cache
+from app.utils import market_data, concurrency, data_versions, sync_tombstones, job_queue
+from app.utils.query_fanout import stream_in
+import os
+from app.utils.logging_config import get_logger
+
+logger = get_logger(__name__)
+
+# Holding'lerin portföy özetinde nasıl okunacağı:
+#   'userId'    -> denormalize userId alanıyla tek sorgu (hesap sorgusuyla paralel)
+#   'accountId' -> hesap id'leri üzerinden `in` sorgusu (30'luk parçalar halinde, paralel)
+HOLDINGS_ACCESS_PATH = os.getenv('HOLDINGS_ACCESS_PATH', 'userId')
 
 
 class InvestmentService:
@@ -28,36 +38,92 @@ class InvestmentService:
         return db.collection('investment_transactions')
 
     @staticmethod
-    @lru_cache(maxsize=1)
     def get_usdtry_rate():
-        try:
-            data = yf.download("USDTRY=X", period="1d", interval="1h", progress=False)
-            if not data.empty:
-                return float(data["Close"].iloc[-1])
-        except Exception as e:
-            print(f"INVESTMENT_SERVICE: USDTRY fetch failed: {e}. Using fallback.")
-        return 38.5
+        # Kur süreç içinde TTL ile önbelleklenir (bkz. app/utils/market_data.py)
+        return market_data.get_usdtry_rate()
     
     @staticmethod
-    def _update_investment_accounts_balance(accounts_values: dict):
+    def _update_investment_accounts_balance(user_id, accounts_values: dict, current_values=None):
+        """
+        Portföy değerlemesinden çıkan hesap bakiyelerini arka plan işiyle yazar;
+        değeri değişmeyen hesaplar için iş oluşturulmaz.
+        """
         try:
-            batch = db.batch()
-            for account_id, new_balance in accounts_values.items():
-                ref = InvestmentService._get_accounts_collection().document(account_id)
-                batch.update(ref, {
-                    "currentBalance": new_balance,
-                    "updatedAt": datetime.now(timezone.utc).isoformat()
-                })
-            batch.commit()
-            print(f"INVESTMENT_SERVICE: Balances updated for {len(accounts_values)} investment accounts.")
+            current_values = current_values or {}
+            changed = {aid: round(value, 2) for aid, value in accounts_values.items()
+                       if round(float(current_values.get(aid) or 0.0), 2) != round(value, 2)}
+            if not changed:
+                return
+            job_queue.enqueue('investments.revalue_accounts', {'userId': user_id, 'values': changed},
+                              ordering_key=user_id)
         except Exception as e:
-            print(f"INVESTMENT_SERVICE: Failed to update balances: {e}")
+            logger.error("INVESTMENT_SERVICE: Failed to queue balance update: %s", e)
+
+    @staticmethod
+    def _revalue_accounts_job(payload, job):
+        # Mutlak değer yazılır; yeniden denemede aynı sonuç
+        batch = db.batch()
+        for account_id, new_balance in payload['values'].items():
+            ref = InvestmentService._get_accounts_collection().document(account_id)
+            batch.update(ref, {
+                "currentBalance": new_balance,
+                "updatedAt": datetime.now(timezone.utc).isoformat()
+            })
+        batch.commit()
+        data_versions.bump(payload['userId'], 'accounts')
+        logger.debug("INVESTMENT_SERVICE: Balances updated for %s investment accounts.", len(payload['values']))
+
+    @staticmethod
+    def _enqueue_recalculation(user_id, account_id, asset_symbol, trigger):
+        """Holding'in işlem geçmişinden yeniden hesaplanmasını kuyruğa ekler; `trigger` yazmayı tekil tanımlar."""
+        job_queue.enqueue('investments.recalculate_holding',
+                          {'userId': user_id, 'accountId': account_id, 'assetSymbol': asset_symbol},
+                          ordering_key=user_id, idempotency_key=f"holding:{account_id}:{asset_symbol}:{trigger}")
+
+    @staticmethod
+    def _recalculate_holding_job(payload, job):
+        try:
+            realized_delta = InvestmentService._recalculate_holding(
+                db.transaction(), payload['accountId'], payload['userId'], payload['assetSymbol'])
+        except ValueError as e:
+            # Geçmiş tutarsız (ör. eldekinden fazla satış); tekrar denemek sonucu değiştirmez
+            raise job_queue.PermanentJobError(str(e))
+        data_versions.bump(payload['userId'], 'investments', *(('accounts',) if realized_delta else ()))
+
+    @staticmethod
+    def _revert_realized(writer, account_id, tx_docs):
+        """
+        Silinen satışların hesaba yazılmış kârını (totalRealizedPL) `writer`
+        üzerinde geri alır; realized_lots raporu ile hesap toplamı ayrışmaz.
+        Geri alınan toplamı döner.
+        """
+        realized = sum(float(doc.to_dict().get("realizedPL") or 0.0) for doc in tx_docs)
+        if realized:
+            writer.update(InvestmentService._get_accounts_collection().document(account_id), {
+                "totalRealizedPL": firestore.Increment(-realized),
+                "updatedAt": datetime.now(timezone.utc).isoformat()
+            })
+        return realized
+
+    @staticmethod
+    def _holding_user_id(holding):
+        """Holding'in sahibi; userId'si olmayan eski holding'lerde hesaptan okunur."""
+        if holding.get("userId"):
+            return holding["userId"]
+        account_ref = InvestmentService._get_accounts_collection().document(holding["accountId"])
+        return (get_request_cache().get(account_ref) or {}).get("userId")
 
     # === İŞ MANTIĞI METOTLARI ===
 
     @staticmethod
     @firestore.transactional
     def _recalculate_holding(transaction, account_id, user_id, asset_symbol):
+        """
+        Holding'i işlem geçmişinden yeniden üretir: açık lotlar, miktar, ortalama
+        maliyet ve satışların realized_lots satırları (bkz. TaxLotService).
+        Satışlarda kayıtlı `realizedPL` lot sonucundan farklıysa düzeltilir ve
+        fark hesabın totalRealizedPL'ine yansıtılır; bu fark döner.
+        """
         txs_collection = InvestmentService._get_transactions_collection()
         query = (txs_collection
                  .where(filter=FieldFilter("accountId", "==", account_id))
@@ -66,26 +132,8 @@ class InvestmentService:
                  .order_by("createdAt", direction=firestore.Query.ASCENDING))
         
         all_transactions = list(query.get(transaction=transaction))
-        
-        total_quantity = 0.0
-        weighted_total_cost = 0.0
-
-        for doc in all_transactions:
-            tx = doc.to_dict()
-            quantity = float(tx.get("quantity", 0.0))
-            price = float(tx.get("pricePerUnit", 0.0))
-            
-            if tx.get("type") == "buy":
-                current_avg_cost = weighted_total_cost / total_quantity if total_quantity > 0 else 0
-                weighted_total_cost = (total_quantity * current_avg_cost) + (quantity * price)
-                total_quantity += quantity
-            else:  # sell
-                if total_quantity < quantity:
-                    raise ValueError(f"Sell quantity {quantity} exceeds available {total_quantity} for {asset_symbol}")
-                
-                avg_cost_before_sell = weighted_total_cost / total_quantity if total_quantity > 0 else 0
-                weighted_total_cost -= quantity * avg_cost_before_sell
-                total_quantity -= quantity
+        existing_realized = {doc.id: doc.to_dict()
+                             for doc in TaxLotService.realized_query(account_id, asset_symbol).get(transaction=transaction)}
 
         holdings_collection = InvestmentService._get_holdings_collection()
         holdings_query = (holdings_collection
@@ -96,11 +144,16 @@ class InvestmentService:
         existing_holdings = list(holdings_query.get(transaction=transaction))
         holding_ref = existing_holdings[0].reference if existing_holdings else None
 
+        book, realized, realized_by_sell = TaxLotService.replay(
+            user_id, account_id, asset_symbol, [(doc.id, doc.to_dict()) for doc in all_transactions])
+        total_quantity = book.quantity
+
         if total_quantity > 1e-9:
-            new_average_cost = weighted_total_cost / total_quantity if total_quantity > 0 else 0
             data_to_update = {
+                "userId": user_id,  # eski holding'lerde eksikse userId erişim yolu için doldurulur
                 "quantity": total_quantity,
-                "averageCost": new_average_cost,
+                "averageCost": book.average_cost,
+                "lots": book.to_columns(),
                 "updatedAt": datetime.now(timezone.utc).isoformat()
             }
             if holding_ref:
@@ -108,7 +161,6 @@ class InvestmentService:
             else:
                 new_holding_ref = holdings_collection.document(str(uuid.uuid4()))
                 data_to_update.update({
-                    "userId": user_id,
                     "accountId": account_id,
                     "assetSymbol": asset_symbol,
                     "createdAt": datetime.now(timezone.utc).isoformat()
@@ -117,6 +169,25 @@ class InvestmentService:
         elif holding_ref:
             transaction.delete(holding_ref)
 
+        TaxLotService.write_realized(transaction, existing_realized, realized)
+
+        # Hesaba satış anında yazılan kâr, lot sonucuyla eşitlenir
+        realized_delta = 0.0
+        for doc in all_transactions:
+            if doc.id not in realized_by_sell:
+                continue
+            credited = float(doc.to_dict().get("realizedPL") or 0.0)
+            if abs(realized_by_sell[doc.id] - credited) > 1e-6:
+                transaction.update(doc.reference, {"realizedPL": realized_by_sell[doc.id],
+                                                   "updatedAt": datetime.now(timezone.utc).isoformat()})
+                realized_delta += realized_by_sell[doc.id] - credited
+        if realized_delta:
+            transaction.update(InvestmentService._get_accounts_collection().document(account_id), {
+                "totalRealizedPL": firestore.Increment(realized_delta),
+                "updatedAt": datetime.now(timezone.utc).isoformat()
+            })
+        return realized_delta
+
     @staticmethod
     def create_transaction(data):
         try:
@@ -131,9 +202,13 @@ class InvestmentService:
             account_id = data["accountId"]
             user_id = data["userId"]
             
-            payload = {**data, "createdAt": datetime.now(timezone.utc).isoformat(), "totalAmount": quantity * float(data["pricePerUnit"])}
+            now_iso = datetime.now(timezone.utc).isoformat()
+            payload = {**data, "createdAt": now_iso, "updatedAt": now_iso, "totalAmount": quantity * float(data["pricePerUnit"])}
 
             if tx_type == "sell":
+                # Satış eldeki lotlara göre doğrulanır; bekleyen yeniden hesaplamalar önce bitsin
+                if not job_queue.wait_for(user_id):
+                    return {"success": False, "error": "Önceki işlemler henüz işleniyor, lütfen tekrar deneyin."}, 503
                 holdings_ref = InvestmentService._get_holdings_collection()
                 hold_q = (holdings_ref
                           .where(filter=FieldFilter("accountId", "==", account_id))
@@ -144,73 +219,91 @@ class InvestmentService:
                     return {"success": False, "error": f"Yetersiz varlık. Satılabilecek miktar: {existing_hold[0].to_dict().get('quantity', 0) if existing_hold else 0}"}, 400
 
                 hold_data = existing_hold[0].to_dict()
-                average_cost = hold_data.get('averageCost', 0)
-                
-                cost_of_goods_sold = quantity * average_cost
-                revenue = quantity * price_per_unit
-                realized_pl = revenue - cost_of_goods_sold
-                
+                account_ref = InvestmentService._get_accounts_collection().document(account_id)
+                selection = payload.pop("lots", None)
+                try:
+                    method = TaxLotService.resolve_method(
+                        'specific' if selection else data.get("costMethod"), get_request_cache().get(account_ref))
+                    if method == 'specific' and not selection:
+                        raise ValueError("Specific lot sells need a 'lots' list of {lotId, quantity}")
+                    if "lots" in hold_data:
+                        consumed = LotBook.from_columns(hold_data["lots"]).sell(quantity, method, selection)
+                    else:
+                        # Lotları henüz üretilmemiş eski holding: ortalama maliyet; yeniden hesaplama düzeltir
+                        consumed = [('average', None, quantity, float(hold_data.get('averageCost', 0)))]
+                except (ValueError, KeyError, TypeError) as e:
+                    return {"success": False, "error": str(e)}, 400
+
+                payload["costMethod"] = method
+                if selection:
+                    payload["lotSelection"] = [{"lotId": item["lotId"], "quantity": float(item["quantity"])}
+                                               for item in selection]
+                realized_pl = sum(lot_quantity * (price_per_unit - unit_cost)
+                                  for _, _, lot_quantity, unit_cost in consumed)
                 payload["realizedPL"] = realized_pl
 
                 try:
-                    account_ref = InvestmentService._get_accounts_collection().document(account_id)
-                    account_ref.update({"totalRealizedPL": firestore.Increment(realized_pl)})
+                    account_ref.update({
+                        "totalRealizedPL": firestore.Increment(realized_pl),
+                        "updatedAt": datetime.now(timezone.utc).isoformat()
+                    })
+                    data_versions.bump(user_id, 'accounts')
                 except Exception as e:
-                    print(f"Could not update realized PL for account {account_id}: {e}")   
+                    logger.warning("Could not update realized PL for account %s: %s", account_id, e)
 
             tx_ref = InvestmentService._get_transactions_collection().document()
             tx_ref.set(payload)
-
-            txn = db.transaction()
-            InvestmentService._recalculate_holding(txn, account_id, user_id, symbol)
+            data_versions.bump(user_id, 'investments')
+            InvestmentService._enqueue_recalculation(user_id, account_id, symbol, tx_ref.id)
 
             payload["id"] = tx_ref.id
             return {"success": True, "transaction": payload}, 201
 
         except Exception as e:
-            traceback.print_exc()
+            logger.exception("Unhandled error in create_transaction")
             return {"success": False, "error": str(e)}, 500
 
     @staticmethod
     def get_portfolio_summary(user_id):
         try:
+            # Kur, hesap/holding sorgularından bağımsız olduğu için paralel çekilir
+            fx_future = concurrency.submit(InvestmentService.get_usdtry_rate)
+
             # 1. Adım: Hesapları ve Holdingleri Çek
             acc_q = (InvestmentService._get_accounts_collection()
                      .where(filter=FieldFilter("userId", "==", user_id))
                      .where(filter=FieldFilter("accountType", "==", "investment")))
-            accounts = list(acc_q.stream())
-            if not accounts:
-                return {"success": True, "summary": {"totalPortfolioValue": 0, "totalProfitLoss": 0, "totalProfitLossPercent": 0, "totalRealizedPL": 0, "holdings": []}}, 200
 
-            account_map = {acc.id: acc.to_dict() for acc in accounts}
+            empty_summary = {"success": True, "summary": {"totalPortfolioValue": 0, "totalProfitLoss": 0, "totalProfitLossPercent": 0, "totalRealizedPL": 0, "holdings": []}}
+            if HOLDINGS_ACCESS_PATH == 'userId':
+                hold_q = InvestmentService._get_holdings_collection().where(filter=FieldFilter("userId", "==", user_id))
+                fetched = concurrency.run_parallel({
+                    'accounts': lambda: list(acc_q.stream()),
+                    'holdings': lambda: list(hold_q.stream()),
+                })
+                accounts = fetched['accounts']
+                if not accounts:
+                    return empty_summary, 200
+                account_map = {acc.id: acc.to_dict() for acc in accounts}
+                # Silinmiş / yatırım dışı hesaplara ait kalıntı holding'ler hesaba katılmaz
+                all_holdings = [h for h in fetched['holdings'] if h.to_dict().get("accountId") in account_map]
+            else:
+                accounts = list(acc_q.stream())
+                if not accounts:
+                    return empty_summary, 200
+                account_map = {acc.id: acc.to_dict() for acc in accounts}
+                all_holdings = list(stream_in(InvestmentService._get_holdings_collection(), "accountId", account_map.keys()))
 
-            hold_q = InvestmentService._get_holdings_collection().where(filter=FieldFilter("accountId", "in", list(account_map.keys())))
-            all_holdings = list(hold_q.stream())
             if not all_holdings:
-                return {"success": True, "summary": {"totalPortfolioValue": 0, "totalProfitLoss": 0, "totalProfitLossPercent": 0, "totalRealizedPL": 0, "holdings": []}}, 200
+                return empty_summary, 200
 
             symbols = list(set(h.to_dict()["assetSymbol"] for h in all_holdings))
             
             # 2. Adım: Fiyatları Sağlam Bir Yöntemle Çek
-            live_prices = {}
-            if symbols:
-                price_data = yf.download(symbols, period="1d", progress=False) 
-                
-                if not price_data.empty:
-                    close_prices_df = price_data.get('Close')
-                    if close_prices_df is not None:
-                        for symbol in symbols:
-                            if isinstance(close_prices_df, pd.Series):
-                                price_series = close_prices_df.dropna()
-                                if not price_series.empty:
-                                    live_prices[symbol] = float(price_series.iloc[-1])
-                            elif isinstance(close_prices_df, pd.DataFrame) and symbol in close_prices_df.columns:
-                                price_series = close_prices_df[symbol].dropna()
-                                if not price_series.empty:
-                                    live_prices[symbol] = float(price_series.iloc[-1])
+            live_prices = market_data.get_latest_prices(symbols)
             
             # 3. Adım: Portföyü Hesapla
-            usd_try_rate = InvestmentService.get_usdtry_rate()
+            usd_try_rate = fx_future.result()
             detailed_holdings = []
             total_portfolio_value_try = 0.0
             total_portfolio_cost_try = 0.0
@@ -257,7 +350,8 @@ class InvestmentService:
                 total_portfolio_cost_try += cost_in_try
                 val_by_acc[account_id] += value_in_try
 
-            InvestmentService._update_investment_accounts_balance(val_by_acc)
+            InvestmentService._update_investment_accounts_balance(
+                user_id, val_by_acc, {aid: acc.get("currentBalance") for aid, acc in account_map.items()})
             total_pl = total_portfolio_value_try - total_portfolio_cost_try
             total_pl_pct = (total_pl / total_portfolio_cost_try * 100) if total_portfolio_cost_try > 0 else 0.0
             total_realized_pl_all_accounts = sum(acc.get('totalRealizedPL', 0) for acc in account_map.values())
@@ -272,7 +366,7 @@ class InvestmentService:
             return {"success": True, "summary": summary}, 200
 
         except Exception as e:
-            traceback.print_exc()
+            logger.exception("Unhandled error in get_portfolio_summary")
             return {"success": False, "error": str(e)}, 500
     @staticmethod
     def list_transactions(user_id, account_id=None, asset_symbol=None):
@@ -286,32 +380,31 @@ class InvestmentService:
             txs = [{"id": d.id, **d.to_dict()} for d in q.stream()]
             return {"success": True, "transactions": txs}, 200
         except Exception as e:
-            traceback.print_exc()
+            logger.exception("Unhandled error in list_transactions")
             return {"success": False, "error": str(e)}, 500
 
     @staticmethod
     def update_transaction(transaction_id, data):
         try:
+            cache = get_request_cache()
             tx_ref = InvestmentService._get_transactions_collection().document(transaction_id)
-            existing = tx_ref.get()
-            if not existing.exists:
+            old = cache.get(tx_ref)
+            if old is None:
                 return {"success": False, "error": "Transaction not found"}, 404
 
             update_payload = data.copy()
             update_payload["updatedAt"] = datetime.now(timezone.utc).isoformat()
-            tx_ref.update(update_payload)
-
-            old = existing.to_dict()
-            txn = db.transaction()
-            InvestmentService._recalculate_holding(
-                txn, old["accountId"], old["userId"], old["assetSymbol"]
+            cache.update(tx_ref, update_payload)
+            data_versions.bump(old["userId"], 'investments')
+            InvestmentService._enqueue_recalculation(
+                old["userId"], old["accountId"], old["assetSymbol"], f"{transaction_id}:{update_payload['updatedAt']}"
             )
 
-            updated = tx_ref.get().to_dict()
+            updated = cache.get(tx_ref)
             updated["id"] = transaction_id
             return {"success": True, "transaction": updated}, 200
         except Exception as e:
-            traceback.print_exc()
+            logger.exception("Unhandled error in update_transaction")
             return {"success": False, "error": str(e)}, 500
 
     @staticmethod
@@ -324,14 +417,21 @@ class InvestmentService:
 
             data = existing.to_dict()
             tx_ref.delete()
-
-            txn = db.transaction()
-            InvestmentService._recalculate_holding(
-                txn, data["accountId"], data["userId"], data["assetSymbol"]
+            if data.get("realizedPL"):
+                # Satışın hesaba yazılmış kârı geri alınır (yeniden hesaplama sadece kalan satışları eşitler)
+                InvestmentService._get_accounts_collection().document(data["accountId"]).update({
+                    "totalRealizedPL": firestore.Increment(-float(data["realizedPL"])),
+                    "updatedAt": datetime.now(timezone.utc).isoformat()
+                })
+                data_versions.bump(data["userId"], 'accounts')
+            sync_tombstones.record(data["userId"], 'investment_transactions', transaction_id)
+            data_versions.bump(data["userId"], 'investments')
+            InvestmentService._enqueue_recalculation(
+                data["userId"], data["accountId"], data["assetSymbol"], f"{transaction_id}:deleted"
             )
             return {"success": True, "message": "Transaction deleted successfully."}, 200
         except Exception as e:
-            traceback.print_exc()
+            logger.exception("Unhandled error in delete_transaction")
             return {"success": False, "error": str(e)}, 500
 
     @staticmethod
@@ -345,6 +445,7 @@ class InvestmentService:
             d = doc.to_dict()
             acc_id = d["accountId"]
             sym = d["assetSymbol"]
+            user_id = InvestmentService._holding_user_id(d)
 
             txs_ref = InvestmentService._get_transactions_collection()
             q = (txs_ref
@@ -355,15 +456,20 @@ class InvestmentService:
             batch = db.batch()
             for tx in to_delete:
                 batch.delete(tx.reference)
+                sync_tombstones.record(user_id, 'investment_transactions', tx.id, writer=batch)
+            for lot in TaxLotService.realized_query(acc_id, sym).stream():
+                batch.delete(lot.reference)
             batch.delete(hold_ref)
+            realized = InvestmentService._revert_realized(batch, acc_id, to_delete)
             batch.commit()
+            data_versions.bump(user_id, 'investments', *(('accounts',) if realized else ()))
 
             return {
                 "success": True,
                 "message": f"Holding {sym} and its transactions were deleted."
             }, 200
         except Exception as e:
-            traceback.print_exc()
+            logger.exception("Unhandled error in delete_holding")
             return {"success": False, "error": str(e)}, 500
 
     @staticmethod
@@ -380,7 +486,7 @@ class InvestmentService:
                 return {"success": False, "error": "Holding not found"}, 404
 
             h_data = doc.to_dict()
-            user_id = h_data["userId"]
+            user_id = InvestmentService._holding_user_id(h_data)
             account_id = h_data["accountId"]
             asset_symbol = h_data["assetSymbol"]
             
@@ -391,14 +497,21 @@ class InvestmentService:
                  .where(filter=FieldFilter("assetSymbol", "==", asset_symbol)))
             
             batch = db.batch()
-            for tx_doc in q.stream():
+            old_txs = list(q.stream())
+            for tx_doc in old_txs:
                 batch.delete(tx_doc.reference)
+                sync_tombstones.record(user_id, 'investment_transactions', tx_doc.id, writer=batch)
+            # realized_lots satırları yeniden hesaplamada silinir; hesabın toplamı da geri alınır
+            realized = InvestmentService._revert_realized(batch, account_id, old_txs)
             batch.commit()
+            if realized:
+                data_versions.bump(user_id, 'accounts')
 
             # 3. Yeni verilerle tek bir 'buy' işlemi oluştur
             new_quantity = float(data["quantity"])
             new_average_cost = float(data["averageCost"])
-            
+            now = datetime.now(timezone.utc)
+
             new_tx_payload = {
                 "userId": user_id,
                 "accountId": account_id,
@@ -407,27 +520,28 @@ class InvestmentService:
                 "quantity": new_quantity,
                 "pricePerUnit": new_average_cost,
                 "totalAmount": new_quantity * new_average_cost,
-                "date": datetime.now(timezone.utc).strftime('%Y-%m-%d'),
-                "createdAt": datetime.now(timezone.utc).isoformat(),
+                "date": now.strftime('%Y-%m-%d'),
+                "createdAt": now.isoformat(),
+                "updatedAt": now.isoformat(),
                 "note": "Holding override işlemi."
             }
             new_tx_ref = txs_ref.document()
             new_tx_ref.set(new_tx_payload)
             
             # 4. Holding'i yeniden hesaplat (bu, tek işleme göre güncelleyecektir)
-            txn = db.transaction()
-            InvestmentService._recalculate_holding(txn, account_id, user_id, asset_symbol)
+            data_versions.bump(user_id, 'investments')
+            InvestmentService._enqueue_recalculation(user_id, account_id, asset_symbol, new_tx_ref.id)
 
             return {"success": True, "message": "Holding overridden successfully"}, 200
 
         except Exception as e:
-            traceback.print_exc()
+            logger.exception("Unhandled error in override_holding")
             return {"success": False, "error": str(e)}, 500
 
     @staticmethod
     def get_asset_analysis(symbol):
         try:
-            df = yf.download(symbol, period="90d", interval="1h", progress=False)
+            df = market_data.download(symbol, period="90d", interval="1h", progress=False)
             if df.empty:
                 return {"success": False, "error": "Veri bulunamadı."}, 404
 
@@ -473,5 +587,9 @@ class InvestmentService:
             }
             return {"success": True, "analysis": result}, 200
         except Exception as e:
-            traceback.print_exc()
-            return {"success": False, "error": str(e)}, 500
\ No newline at end of file
+            logger.exception("Unhandled error in get_asset_analysis")
+            return {"success": False, "error": str(e)}, 500
+
+
+job_queue.register('investments.recalculate_holding', InvestmentService._recalculate_holding_job)
+job_queue.register('investments.revalue_accounts', InvestmentService._revalue_accounts_job)
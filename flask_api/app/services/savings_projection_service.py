@@ -0,0 +1,237 @@
+# File: flask_api/app/services/savings_projection_service.py
+from app.utils.firebase_config import db
+from datetime import datetime, timezone, timedelta, date
+from firebase_admin import firestore
+from app.utils import data_versions, job_queue
+from app.utils.logging_config import get_logger
+
+logger = get_logger(__name__)
+
+# EWMA ağırlığı: son ayın katkısı. 0.3 ≈ son ~6 ayın etkin penceresi.
+EWMA_ALPHA = 0.3
+AVG_DAYS_PER_MONTH = 30.44
+# Yeniden denenen istatistik işlerini tanımak için dökümanda tutulan son iş kimlikleri
+APPLIED_JOBS_KEPT = 50
+
+
+def _month_key(dt):
+    return f"{dt.year:04d}-{dt.month:02d}"
+
+
+def _months_between(from_key, to_key):
+    fy, fm = (int(p) for p in from_key.split('-'))
+    ty, tm = (int(p) for p in to_key.split('-'))
+    return (ty - fy) * 12 + (tm - fm)
+
+
+class SavingsProjectionService:
+    """
+    Kullanıcı başına aylık tasarruf hızını (EWMA) artımlı olarak tutar ve
+    hedefler için tamamlanma tahmini üretir. İstatistikler
+    `user_savings_stats/{userId}` dökümanında saklanır; her tahsis kaydı
+    sadece bu tek dökümanı okuyup yazar, geçmiş yeniden taranmaz.
+    """
+
+    @staticmethod
+    def _get_stats_ref(user_id):
+        if db is None: raise Exception("Firestore client not initialized.")
+        return db.collection('user_savings_stats').document(user_id)
+
+    @staticmethod
+    def _fold_months(ewma, months_observed, month_total, months_elapsed):
+        """
+        Kapanan ayın toplamını EWMA'ya katar; aradaki boş aylar 0 olarak sayılır.
+        """
+        if months_elapsed <= 0:
+            return ewma, months_observed
+        values = [month_total] + [0.0] * (months_elapsed - 1)
+        for value in values:
+            ewma = value if months_observed == 0 else EWMA_ALPHA * value + (1 - EWMA_ALPHA) * ewma
+            months_observed += 1
+        return ewma, months_observed
+
+    @staticmethod
+    def _apply_amount(stats, amount, field_prefix, now):
+        """
+        Stats dict'ine bir tutar ekler. field_prefix: 'inflow' veya 'goal'.
+        Gerekirse önce kapanan ayları EWMA'ya katar.
+        """
+        current_key = _month_key(now)
+        stats_month = stats.get('currentMonth') or current_key
+        elapsed = _months_between(stats_month, current_key)
+
+        updated = dict(stats)
+        for prefix in ('inflow', 'goal'):
+            ewma, observed = SavingsProjectionService._fold_months(
+                stats.get(f'{prefix}RateEwma', 0.0),
+                stats.get(f'{prefix}MonthsObserved', 0),
+                stats.get(f'{prefix}CurrentMonthTotal', 0.0),
+                elapsed
+            )
+            updated[f'{prefix}RateEwma'] = ewma
+            updated[f'{prefix}MonthsObserved'] = observed
+            if elapsed > 0:
+                updated[f'{prefix}CurrentMonthTotal'] = 0.0
+
+        updated['currentMonth'] = current_key
+        total_field = f'{field_prefix}CurrentMonthTotal'
+        updated[total_field] = updated.get(total_field, 0.0) + float(amount)
+        updated['updatedAt'] = now.isoformat()
+        return updated
+
+    @staticmethod
+    def _record(user_id, amount, field_prefix, apply_id=None):
+        stats_ref = SavingsProjectionService._get_stats_ref(user_id)
+
+        @firestore.transactional
+        def record_in_tx(transaction, doc_ref):
+            snapshot = doc_ref.get(transaction=transaction)
+            stats = snapshot.to_dict() if snapshot.exists else {}
+            applied = list(stats.get('appliedJobs') or [])
+            if apply_id and apply_id in applied:
+                return False
+            updated = SavingsProjectionService._apply_amount(stats, amount, field_prefix, datetime.now(timezone.utc))
+            updated['userId'] = user_id
+            if apply_id:
+                updated['appliedJobs'] = (applied + [apply_id])[-APPLIED_JOBS_KEPT:]
+            transaction.set(doc_ref, updated)
+            return True
+
+        # Projeksiyonlar ('goals', 'savings' ETag'i) yeni EWMA ile yeniden hesaplansın
+        if record_in_tx(db.transaction(), stats_ref):
+            data_versions.bump(user_id, 'savings')
+
+    @staticmethod
+    def _record_job(payload, job):
+        SavingsProjectionService._record(payload['userId'], payload['amount'], payload['prefix'], job.step_id('stats'))
+
+    @staticmethod
+    def _enqueue(user_id, amount, field_prefix):
+        # İstatistik tek dökümanda okuma-yazma transaction'ı; istek yolunda beklenmez
+        job_queue.enqueue('savings.record_stats', {'userId': user_id, 'amount': float(amount), 'prefix': field_prefix},
+                          ordering_key=user_id)
+
+    @staticmethod
+    def record_savings_inflow(user_id, amount_delta):
+        """Ana kumbaraya giren (veya geri alınan) tutarı istatistiğe işler (arka plan işi)."""
+        try:
+            if amount_delta == 0: return
+            SavingsProjectionService._enqueue(user_id, amount_delta, 'inflow')
+        except Exception as e:
+            # İstatistik güncellemesi ana işlemi bozmamalı
+            logger.warning("SAVINGS_PROJECTION: Could not record inflow for user %s: %s", user_id, e)
+
+    @staticmethod
+    def record_goal_allocation(user_id, amount):
+        """Hedefe yapılan aktarımı istatistiğe işler (arka plan işi)."""
+        try:
+            if amount <= 0: return
+            SavingsProjectionService._enqueue(user_id, amount, 'goal')
+        except Exception as e:
+            logger.warning("SAVINGS_PROJECTION: Could not record goal allocation for user %s: %s", user_id, e)
+
+    @staticmethod
+    def _effective_rate(stats, prefix, now):
+        """İçinde bulunulan aya kadar katlanmış aylık hız tahmini."""
+        if not stats:
+            return 0.0
+        elapsed = _months_between(stats.get('currentMonth') or _month_key(now), _month_key(now))
+        month_total = stats.get(f'{prefix}CurrentMonthTotal', 0.0)
+        ewma, observed = SavingsProjectionService._fold_months(
+            stats.get(f'{prefix}RateEwma', 0.0),
+            stats.get(f'{prefix}MonthsObserved', 0),
+            month_total,
+            elapsed
+        )
+        if observed == 0:
+            # Henüz kapanmış ay yok: içinde bulunulan ayın toplamını taban kabul et
+            return max(month_total, 0.0)
+        return max(ewma, 0.0)
+
+    @staticmethod
+    def project_goals(goals, stats, main_balance, now=None):
+        """
+        Hedefleri hedef tarihine göre sırayla (şelale) fonlanacak kabul ederek
+        tahmini tamamlanma tarihi ve gereken aylık katkıyı hesaplar. O(goals).
+        `goals` targetDate'e göre artan sıralı olmalıdır.
+        """
+        now = now or datetime.now(timezone.utc)
+        today = now.date()
+        monthly_rate = SavingsProjectionService._effective_rate(stats, 'inflow', now)
+        goal_rate = SavingsProjectionService._effective_rate(stats, 'goal', now)
+
+        cumulative_need = -max(float(main_balance or 0.0), 0.0)
+        projections = []
+        for goal in goals:
+            target = float(goal.get('targetAmount', 0.0))
+            current = float(goal.get('currentAmount', 0.0))
+            remaining = max(target - current, 0.0)
+            cumulative_need += remaining
+
+            try:
+                target_date = date.fromisoformat(str(goal.get('targetDate', ''))[:10])
+            except ValueError:
+                target_date = None
+
+            required_monthly = None
+            if target_date is not None:
+                months_left = (target_date - today).days / AVG_DAYS_PER_MONTH
+                required_monthly = round(remaining / max(months_left, 1.0), 2) if remaining > 0 else 0.0
+
+            if remaining <= 0 or cumulative_need <= 0:
+                projected_date = today
+            elif monthly_rate > 0:
+                projected_date = today + timedelta(days=(cumulative_need / monthly_rate) * AVG_DAYS_PER_MONTH)
+            else:
+                projected_date = None
+
+            on_track = None
+            if target_date is not None and projected_date is not None:
+                on_track = projected_date <= target_date
+            elif target_date is not None:
+                on_track = False
+
+            projections.append({
+                'goalId': goal.get('id'),
+                'title': goal.get('title'),
+                'targetAmount': round(target, 2),
+                'currentAmount': round(current, 2),
+                'remainingAmount': round(remaining, 2),
+                'progressPercent': round(current / target * 100, 2) if target > 0 else 0.0,
+                'requiredMonthlyContribution': required_monthly,
+                'projectedCompletionDate': projected_date.isoformat() if projected_date else None,
+                'onTrack': on_track
+            })
+
+        return {
+            'monthlySavingsRate': round(monthly_rate, 2),
+            'monthlyGoalAllocationRate': round(goal_rate, 2),
+            'availableSavingsBalance': round(float(main_balance or 0.0), 2),
+            'goals': projections
+        }
+
+    @staticmethod
+    def get_goal_projections(user_id):
+        try:
+            if db is None: raise Exception("Firestore client not initialized.")
+            goals_query = db.collection('savings_goals') \
+                .where('userId', '==', user_id) \
+                .where('isActive', '==', True) \
+                .order_by('targetDate', direction=firestore.Query.ASCENDING)
+            goals = [{'id': doc.id, **doc.to_dict()} for doc in goals_query.stream()]
+
+            stats_snapshot = SavingsProjectionService._get_stats_ref(user_id).get()
+            stats = stats_snapshot.to_dict() if stats_snapshot.exists else {}
+
+            from .savings_service import SavingsService
+            # Yanıt 'savings' sürümüyle ETag'lenir; bakiye önbellekten değil, güncel okunur
+            main_balance = SavingsService._get_savings_counter(user_id).get_total(use_cache=False)
+
+            projection = SavingsProjectionService.project_goals(goals, stats, main_balance)
+            return {"success": True, "projection": projection}, 200
+        except Exception as e:
+            logger.exception("Unhandled error in get_goal_projections")
+            return {"success": False, "error": str(e)}, 500
+
+
+job_queue.register('savings.record_stats', SavingsProjectionService._record_job)
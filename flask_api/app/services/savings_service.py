@@ -1,9 +1,18 @@
 # File: flask_api/app/services/savings_service.py
 from app.utils.firebase_config import db
 from datetime import datetime, timezone
-import traceback
 from firebase_admin import firestore 
+from google.api_core.exceptions import AlreadyExists
 import uuid
+from .savings_projection_service import SavingsProjectionService
+from app.utils.sharded_counter import ShardedCounter
+from app.utils import data_versions, sync_tombstones
+import os
+from app.utils.logging_config import get_logger
+
+logger = get_logger(__name__)
+
+SAVINGS_BALANCE_SHARDS = int(os.getenv('SAVINGS_BALANCE_SHARDS', '5'))
 
 # Yetersiz bakiye durumu için özel hata sınıfı
 class InsufficientFundsError(Exception):
@@ -12,97 +21,97 @@ class InsufficientFundsError(Exception):
 
 class SavingsService:
     @staticmethod
-    def _update_total_savings_balance(user_id, amount_delta):
-        user_savings_ref = db.collection('user_savings_balances').document(user_id)
-        # Atomik artırma/azaltma işlemi
-        user_savings_ref.set({
-            'totalSavingsBalance': firestore.Increment(amount_delta),
-            'updatedAt': datetime.now(timezone.utc).isoformat()
-        }, merge=True)
-        print(f"SAVINGS_SERVICE: User {user_id} total savings balance updated by {amount_delta}.")
+    def _get_savings_counter(user_id):
+        """Kullanıcının ana kumbara bakiyesi için sharded counter."""
+        if db is None: raise Exception("Firestore client not initialized.")
+        return ShardedCounter(
+            db, db.collection('user_savings_balances').document(user_id),
+            field='totalSavingsBalance', num_shards=SAVINGS_BALANCE_SHARDS,
+            shard_fields={'userId': user_id}
+        )
+
+    @staticmethod
+    def _update_total_savings_balance(user_id, amount_delta, writer=None):
+        # Rastgele bir shard'a atomik artırma/azaltma; ana döküman kilitlenmez.
+        # `writer` verilirse artırım onun commit'ine kalır ve sonrası çağırana aittir
+        # (bkz. _after_savings_change).
+        SavingsService._get_savings_counter(user_id).increment(amount_delta, writer=writer)
+        if writer is None:
+            SavingsService._after_savings_change(user_id, amount_delta)
+
+    @staticmethod
+    def _after_savings_change(user_id, amount_delta):
+        data_versions.bump(user_id, 'savings')
+        logger.debug("SAVINGS_SERVICE: User %s total savings balance updated by %s.", user_id, amount_delta)
+        SavingsProjectionService.record_savings_inflow(user_id, amount_delta)
 
     @staticmethod
-    def create_savings_allocation(user_id, transaction_id, amount, date_str):
+    def create_savings_allocation(user_id, transaction_id, amount, date_str, source='auto', allocation_id=None):
+        """
+        Kumbara kaydı ve toplam bakiye artırımı tek batch'te yazılır.
+        `allocation_id` verilirse kayıt bu kimlikle oluşturulur; zaten varsa
+        (yeniden denenen iş) tekrar yazılmaz.
+        """
         try:
-            if amount <= 0: return
-            allocation_doc_ref = db.collection('savings_allocations').document()
+            if amount <= 0:
+                return {"success": False, "error": "Allocation amount must be positive.", "status_code": 400}
+            collection = db.collection('savings_allocations')
+            allocation_doc_ref = collection.document(allocation_id) if allocation_id else collection.document()
             allocation_data = {
                 'userId': user_id, 'transactionId': transaction_id, 'amount': float(amount),
-                'date': date_str, 'source': 'auto', 'createdAt': datetime.now(timezone.utc).isoformat()
+                'date': date_str, 'source': source, 'createdAt': datetime.now(timezone.utc).isoformat(),
+                'updatedAt': datetime.now(timezone.utc).isoformat()
             }
-            allocation_doc_ref.set(allocation_data)
-            SavingsService._update_total_savings_balance(user_id, float(amount))
-            print(f"SAVINGS_SERVICE: Auto savings allocation created for tx {transaction_id}.")
+            batch = db.batch()
+            if allocation_id:
+                batch.create(allocation_doc_ref, allocation_data)
+            else:
+                batch.set(allocation_doc_ref, allocation_data)
+            SavingsService._update_total_savings_balance(user_id, float(amount), writer=batch)
+            try:
+                batch.commit()
+            except AlreadyExists:
+                logger.info("SAVINGS_SERVICE: Allocation %s already exists; skipping.", allocation_id)
+                return {"success": True, "allocation": {'id': allocation_doc_ref.id, **allocation_data}}
+            SavingsService._after_savings_change(user_id, float(amount))
+            logger.debug("SAVINGS_SERVICE: %s savings allocation created for tx %s.",
+                         source.capitalize(), transaction_id)
+            return {"success": True, "allocation": {'id': allocation_doc_ref.id, **allocation_data}}
         except Exception as e:
-            print(f"SAVINGS_SERVICE: Error creating auto savings allocation: {e}")
+            logger.error("SAVINGS_SERVICE: Error creating auto savings allocation: %s", e)
             raise
 
     @staticmethod
     def delete_savings_allocation_by_transaction_id(user_id, transaction_id):
+        """Kayıt, tombstone ve toplam bakiye düşüşü tek batch'te; kayıt yoksa bir şey yapmaz (idempotent)."""
         try:
             alloc_query = db.collection('savings_allocations').where('userId', '==', user_id).where('transactionId', '==', transaction_id)
             alloc_docs = list(alloc_query.stream())
             if not alloc_docs: return
             
             amount_to_revert = alloc_docs[0].to_dict().get('amount', 0.0)
-            alloc_docs[0].reference.delete()
-            
+            batch = db.batch()
+            batch.delete(alloc_docs[0].reference)
+            sync_tombstones.record(user_id, 'savings_allocations', alloc_docs[0].id, writer=batch)
             if amount_to_revert > 0:
-                SavingsService._update_total_savings_balance(user_id, -float(amount_to_revert))
-            print(f"SAVINGS_SERVICE: Deleted savings allocation for tx {transaction_id}.")
-        except Exception as e:
-            traceback.print_exc()
-            raise
-
-    @staticmethod
-    def update_or_delete_allocation_for_transaction(user_id, transaction_id, new_allocated_amount, new_date_str):
-        """
-        Bir işlem güncellendiğinde, ona bağlı tasarruf kaydını günceller, oluşturur veya siler.
-        """
-        try:
-            alloc_query = db.collection('savings_allocations').where('transactionId', '==', transaction_id).limit(1)
-            existing_alloc_docs = list(alloc_query.stream())
-            
-            old_allocated_amount = 0.0
-            existing_alloc_ref = None
-
-            if existing_alloc_docs:
-                existing_alloc_ref = existing_alloc_docs[0].reference
-                old_allocated_amount = existing_alloc_docs[0].to_dict().get('amount', 0.0)
-
-            delta = new_allocated_amount - old_allocated_amount
-
-            if delta == 0 and not existing_alloc_ref: return # Değişiklik yok ve kayıt da yok
-
-            if new_allocated_amount > 0:
-                if existing_alloc_ref: # Kayıt varsa güncelle
-                    existing_alloc_ref.update({'amount': new_allocated_amount, 'date': new_date_str})
-                else: # Kayıt yoksa oluştur
-                    SavingsService.create_savings_allocation(user_id, transaction_id, new_allocated_amount, new_date_str)
-                    return # Bakiye zaten create içinde güncellendiği için çık
-            elif existing_alloc_ref: # Yeni alokasyon 0 veya daha azsa ve eskiden kayıt varsa, sil
-                existing_alloc_ref.delete()
-
-            # Toplam kumbara bakiyesini fark kadar güncelle
-            if delta != 0:
-                SavingsService._update_total_savings_balance(user_id, delta)
-
+                SavingsService._update_total_savings_balance(user_id, -float(amount_to_revert), writer=batch)
+            batch.commit()
+            if amount_to_revert > 0:
+                SavingsService._after_savings_change(user_id, -float(amount_to_revert))
+            else:
+                data_versions.bump(user_id, 'savings')
+            logger.debug("SAVINGS_SERVICE: Deleted savings allocation for tx %s.", transaction_id)
         except Exception as e:
-            print(f"SAVINGS_SERVICE: Error updating allocation for tx {transaction_id}: {e}")
-            traceback.print_exc()
+            logger.exception("Unhandled error in delete_savings_allocation_by_transaction_id")
             raise
 
     @staticmethod
     def get_user_savings_balance(user_id):
         if db is None: raise Exception("Firestore client not initialized.")
-        user_savings_ref = db.collection('user_savings_balances').document(user_id)
-        snapshot = user_savings_ref.get()
-        balance = 0.0
-        updated_at = None
-        if snapshot.exists:
-            data = snapshot.to_dict()
-            balance = data.get('totalSavingsBalance', 0.0)
-            updated_at = data.get('updatedAt')
+        # updatedAt: bakiyenin son değiştiği an (ana döküman ve shard'ların en yenisi).
+        # Sonuç sürüm ETag'li /api/home yanıtına ve sync'e girer;
+        # süreç önbelleği başka worker'ın yazmasını görmeyebileceğinden atlanır.
+        balance, updated_at = SavingsService._get_savings_counter(user_id).get_total_and_updated_at(use_cache=False)
         return {"success": True, "balance": balance, "updatedAt": updated_at}
 
     @staticmethod
@@ -142,15 +151,17 @@ class SavingsService:
                 'currentAmount': 0.0,
                 'targetDate': data['targetDate'],
                 'isActive': True,
-                'createdAt': datetime.now(timezone.utc).isoformat()
+                'createdAt': datetime.now(timezone.utc).isoformat(),
+                'updatedAt': datetime.now(timezone.utc).isoformat()
             }
             doc_ref = goals_ref.document()
             doc_ref.set(goal_data)
+            data_versions.bump(data['userId'], 'goals')
             created_goal = goal_data.copy()
             created_goal['id'] = doc_ref.id
             return {"success": True, "goal": created_goal}, 201
         except Exception as e:
-            traceback.print_exc()
+            logger.exception("Unhandled error in create_goal")
             return {"success": False, "error": str(e)}, 500
 
     @staticmethod
@@ -163,17 +174,21 @@ class SavingsService:
             goals_list = [{'id': doc.id, **doc.to_dict()} for doc in docs]
             return {"success": True, "goals": goals_list}, 200
         except Exception as e:
-            traceback.print_exc()
+            logger.exception("Unhandled error in list_goals")
             return {"success": False, "error": str(e)}, 500
 
+    @staticmethod
+    def get_goal_projections(user_id):
+        return SavingsProjectionService.get_goal_projections(user_id)
+
     @staticmethod
     def delete_goal(user_id, goal_id):
         try:
             goal_ref = SavingsService._get_goals_collection_ref().document(goal_id)
-            savings_balance_ref = db.collection('user_savings_balances').document(user_id)
+            savings_counter = SavingsService._get_savings_counter(user_id)
 
             @firestore.transactional
-            def delete_in_tx(transaction, goal_doc_ref, balance_doc_ref):
+            def delete_in_tx(transaction, goal_doc_ref, counter):
                 goal_snapshot = goal_doc_ref.get(transaction=transaction)
                 if not goal_snapshot.exists or goal_snapshot.to_dict().get('userId') != user_id:
                     raise Exception("Goal not found or user not authorized.")
@@ -181,18 +196,18 @@ class SavingsService:
                 amount_to_return = goal_snapshot.to_dict().get('currentAmount', 0.0)
                 
                 if amount_to_return > 0:
-                    balance_snapshot = balance_doc_ref.get(transaction=transaction)
-                    current_total = balance_snapshot.to_dict().get('totalSavingsBalance', 0.0) if balance_snapshot.exists else 0.0
-                    new_balance = current_total + amount_to_return
-                    transaction.set(balance_doc_ref, {'totalSavingsBalance': new_balance, 'updatedAt': datetime.now(timezone.utc).isoformat()}, merge=True)
+                    # Bakiye okumaya gerek yok; iade tek bir shard artırımıdır
+                    counter.increment(amount_to_return, writer=transaction)
                 
                 transaction.delete(goal_doc_ref)
+                sync_tombstones.record(user_id, 'savings_goals', goal_doc_ref.id, writer=transaction)
 
             transaction_obj = db.transaction()
-            delete_in_tx(transaction_obj, goal_ref, savings_balance_ref)
+            delete_in_tx(transaction_obj, goal_ref, savings_counter)
+            data_versions.bump(user_id, 'goals', 'savings')
             return {"success": True, "message": "Goal deleted and funds returned to main savings."}, 200
         except Exception as e:
-            traceback.print_exc()
+            logger.exception("Unhandled error in delete_goal")
             return {"success": False, "error": str(e)}, 500
 
     @staticmethod
@@ -202,23 +217,20 @@ class SavingsService:
                 return {"success": False, "error": "Allocation amount must be positive."}, 400
             
             goal_ref = SavingsService._get_goals_collection_ref().document(goal_id)
-            savings_balance_ref = db.collection('user_savings_balances').document(user_id)
+            savings_counter = SavingsService._get_savings_counter(user_id)
 
             @firestore.transactional
-            def allocate_in_tx(transaction, goal_doc_ref, balance_doc_ref, alloc_amount):
-                balance_snapshot = balance_doc_ref.get(transaction=transaction)
+            def allocate_in_tx(transaction, goal_doc_ref, counter, alloc_amount):
+                main_balance = counter.get_total(transaction=transaction)
                 goal_snapshot = goal_doc_ref.get(transaction=transaction)
 
                 if not goal_snapshot.exists or goal_snapshot.to_dict().get('userId') != user_id:
                     raise Exception("Goal not found or user not authorized.")
 
-                main_balance = balance_snapshot.to_dict().get('totalSavingsBalance', 0.0) if balance_snapshot.exists else 0.0
-                
                 if main_balance < alloc_amount:
                     raise InsufficientFundsError(f"Insufficient funds in main savings. Required: {alloc_amount}, Available: {main_balance}")
                 
-                new_main_balance = main_balance - alloc_amount
-                transaction.set(balance_doc_ref, {'totalSavingsBalance': new_main_balance, 'updatedAt': datetime.now(timezone.utc).isoformat()}, merge=True)
+                counter.increment(-alloc_amount, writer=transaction)
                 
                 transaction.update(goal_doc_ref, {
                     'currentAmount': firestore.Increment(alloc_amount),
@@ -226,12 +238,14 @@ class SavingsService:
                 })
             
             transaction_obj = db.transaction()
-            allocate_in_tx(transaction_obj, goal_ref, savings_balance_ref, float(amount))
+            allocate_in_tx(transaction_obj, goal_ref, savings_counter, float(amount))
+            data_versions.bump(user_id, 'goals', 'savings')
+            SavingsProjectionService.record_goal_allocation(user_id, float(amount))
             return {"success": True, "message": f"Successfully allocated {amount} to goal {goal_id}."}, 200
         
         except InsufficientFundsError as e:
-            print(f"SAVINGS_SERVICE: Insufficient funds for user {user_id}: {e}")
+            logger.warning("SAVINGS_SERVICE: Insufficient funds for user %s: %s", user_id, e)
             return {"success": False, "error": str(e)}, 400
         except Exception as e:
-            traceback.print_exc()
+            logger.exception("Unhandled error in allocate_to_goal")
             return {"success": False, "error": str(e)}, 500
\ No newline at end of file
@@ -0,0 +1,238 @@
+# File: flask_api/app/services/sync_service.py
+import base64
+import json
+import logging
+import os
+from datetime import datetime, timedelta, timezone
+from google.cloud.firestore_v1.base_query import FieldFilter
+from app.utils.firebase_config import db
+from app.utils import concurrency, data_versions
+from app.utils.sync_tombstones import TOMBSTONES_COLLECTION, retention_cutoff
+from app.utils.sharded_counter import ShardedCounter
+from .balance_service import BalanceService
+from .savings_service import SavingsService
+from app.utils.logging_config import get_logger
+
+logger = get_logger(__name__)
+
+# Yazma anında hesaplanan updatedAt ile commit arasındaki gecikme ve sunucular
+# arası saat farkı için token zamanı bu kadar geri alınır. Pencere içindeki
+# dökümanlar bir sonraki senkronda tekrar gelebilir; istemci id ile upsert eder.
+SYNC_CLOCK_SKEW_SECONDS = float(os.getenv('SYNC_CLOCK_SKEW_SECONDS', '5'))
+
+# Yanıt adı -> (Firestore koleksiyonu, data_versions anahtarı, soft-delete alanı)
+SYNC_COLLECTIONS = {
+    'transactions':           ('transactions', 'transactions', 'isDeleted'),
+    'accounts':               ('user_accounts', 'accounts', 'isArchived'),
+    'categories':             ('user_defined_categories', 'categories', 'isArchived'),
+    'budgets':                ('budgets', 'budgets', None),
+    'goals':                  ('savings_goals', 'goals', None),
+    'allocations':            ('savings_allocations', 'savings', None),
+    'investmentTransactions': ('investment_transactions', 'investments', None),
+}
+_NAME_BY_COLLECTION = {collection: name for name, (collection, _, _) in SYNC_COLLECTIONS.items()}
+
+
+class InvalidSyncToken(Exception):
+    pass
+
+
+class SyncService:
+    """
+    Çevrimdışı çalışan istemciler için delta senkron. Token, her koleksiyon
+    için son görülen veri sürümünü ve zaman imlecini taşır:
+
+        {"u": userId, "c": {"transactions": [sürüm, "2025-01-01T00:00:00+00:00"], ...}}
+
+    Sürümü değişmeyen koleksiyonlar hiç sorgulanmaz (imleçleri aynen taşınır);
+    değişenler `updatedAt > imleç` ile okunur, fiziksel silmeler
+    sync_tombstones'tan gelir. Böylece senkron maliyeti değişiklik sayısıyla
+    orantılıdır.
+    """
+
+    # --- token ---
+
+    @staticmethod
+    def encode_token(user_id, cursors):
+        raw = json.dumps({'u': user_id, 'c': cursors}, separators=(',', ':'), sort_keys=True)
+        return base64.urlsafe_b64encode(raw.encode('utf-8')).decode('ascii').rstrip('=')
+
+    @staticmethod
+    def decode_token(token, user_id):
+        try:
+            padded = token + '=' * (-len(token) % 4)
+            payload = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+            cursors = payload['c']
+            if payload.get('u') != user_id or not isinstance(cursors, dict):
+                raise ValueError("token belongs to another user")
+            return {name: (int(version), str(since)) for name, (version, since) in cursors.items()
+                    if name in SYNC_COLLECTIONS}
+        except Exception as e:
+            raise InvalidSyncToken(str(e))
+
+    # --- sorgular ---
+
+    @staticmethod
+    def _fetch_all(user_id, name):
+        collection, _, deleted_field = SYNC_COLLECTIONS[name]
+        query = db.collection(collection).where(filter=FieldFilter('userId', '==', user_id))
+        if deleted_field:
+            query = query.where(filter=FieldFilter(deleted_field, '==', False))
+        return [{'id': doc.id, **doc.to_dict()} for doc in query.stream()]
+
+    @staticmethod
+    def _fetch_changed(user_id, name, since):
+        collection = SYNC_COLLECTIONS[name][0]
+        query = (db.collection(collection)
+                   .where(filter=FieldFilter('userId', '==', user_id))
+                   .where(filter=FieldFilter('updatedAt', '>', since)))
+        return [{'id': doc.id, **doc.to_dict()} for doc in query.stream()]
+
+    @staticmethod
+    def _fetch_tombstones(user_id, since):
+        query = (db.collection(TOMBSTONES_COLLECTION)
+                   .where(filter=FieldFilter('userId', '==', user_id))
+                   .where(filter=FieldFilter('updatedAt', '>', since)))
+        return [doc.to_dict() for doc in query.stream()]
+
+    @staticmethod
+    def _fetch_account_changes(user_id, since):
+        """
+        Hesap dökümanlarındaki değişiklikler + bakiye shard'ı değişen hesaplar.
+        Bakiyeler shard'larda tutulduğu için ana döküman updatedAt'i bakiye
+        değişiminde ilerlemez; shard'ların updatedAt'i kullanılır.
+        """
+        docs = {item['id']: item for item in SyncService._fetch_changed(user_id, 'accounts', since)}
+        shard_query = (db.collection_group('balance_shards')
+                         .where(filter=FieldFilter('userId', '==', user_id))
+                         .where(filter=FieldFilter('updatedAt', '>', since)))
+        balance_changed = {doc.reference.parent.parent.id for doc in shard_query.stream()}
+
+        missing = [db.collection('user_accounts').document(aid) for aid in balance_changed if aid not in docs]
+        for snapshot in (db.get_all(missing) if missing else []):
+            if snapshot.exists:
+                docs[snapshot.id] = {'id': snapshot.id, **snapshot.to_dict()}
+        return SyncService._with_balances(user_id, list(docs.values()))
+
+    @staticmethod
+    def _with_balances(user_id, accounts):
+        # currentBalance = ana döküman tabanı + shard toplamı (list_accounts ile aynı)
+        live = [a for a in accounts if not a.get('isArchived') and a.get('accountType') != 'investment']
+        shard_refs = []
+        for account in live:
+            counter = BalanceService.get_balance_counter(db.collection('user_accounts').document(account['id']), user_id)
+            shard_refs.extend(counter.shard_refs())
+        shard_docs = [s for s in (db.get_all(shard_refs) if shard_refs else []) if s.exists]
+        totals = ShardedCounter.sum_shards_by_parent(shard_docs, 'currentBalance')
+        for account in live:
+            account['currentBalance'] = float(account.get('currentBalance', 0.0) or 0.0) + totals.get(account['id'], 0.0)
+        return accounts
+
+    @staticmethod
+    def _fetch_all_accounts(user_id):
+        return SyncService._with_balances(user_id, SyncService._fetch_all(user_id, 'accounts'))
+
+    # --- ana akış ---
+
+    @staticmethod
+    def get_changes(user_id, token=None):
+        try:
+            if db is None: raise Exception("Firestore client (db) is not initialized.")
+
+            resync_reason = None
+            cursors = {}
+            if token:
+                try:
+                    cursors = SyncService.decode_token(token, user_id)
+                except InvalidSyncToken as e:
+                    logger.warning("SYNC_SERVICE: Invalid sync token for user %s, full resync: %s", user_id, e)
+                    resync_reason = 'invalid_token'
+
+            # Sürümler sorgulardan ÖNCE okunur: sorgu sırasında gelen bir yazma
+            # sürümü artırır ve bir sonraki senkronda yakalanır.
+            versions = data_versions.get_versions(user_id)
+            next_since = (datetime.now(timezone.utc) - timedelta(seconds=SYNC_CLOCK_SKEW_SECONDS)).isoformat()
+
+            # Sorgulanacak bir imleç saklama süresinden eskiyse arada temizlenen
+            # silmeler görülemez: tam senkron
+            cutoff = retention_cutoff()
+            if any(since < cutoff for name, (version, since) in cursors.items()
+                   if int(versions.get(SYNC_COLLECTIONS[name][1], 0) or 0) != version):
+                logger.info("SYNC_SERVICE: Sync token of user %s is older than the retention window, full resync.",
+                            user_id)
+                cursors, resync_reason = {}, 'expired_token'
+
+            plan = {}
+            new_cursors = {}
+            for name, (_, version_key, _) in SYNC_COLLECTIONS.items():
+                version = int(versions.get(version_key, 0) or 0)
+                previous = cursors.get(name)
+                if previous is None:
+                    plan[name] = None                      # tam liste
+                    new_cursors[name] = [version, next_since]
+                elif previous[0] == version:
+                    new_cursors[name] = list(previous)     # değişiklik yok, sorgu yok
+                else:
+                    plan[name] = previous[1]
+                    new_cursors[name] = [version, next_since]
+
+            calls = {}
+            for name, since in plan.items():
+                if name == 'accounts':
+                    calls[name] = (lambda since=since: SyncService._fetch_all_accounts(user_id) if since is None
+                                   else SyncService._fetch_account_changes(user_id, since))
+                elif since is None:
+                    calls[name] = lambda name=name: SyncService._fetch_all(user_id, name)
+                else:
+                    calls[name] = lambda name=name, since=since: SyncService._fetch_changed(user_id, name, since)
+
+            # Fiziksel silmeler: değişen koleksiyonların en eski imlecinden itibaren tek sorgu
+            delta_sinces = [since for since in plan.values() if since is not None]
+            if delta_sinces:
+                calls['_tombstones'] = lambda: SyncService._fetch_tombstones(user_id, min(delta_sinces))
+
+            # Kumbara bakiyesi 'savings' sürümüne bağlı (allocations ile aynı anahtar)
+            if 'allocations' in plan:
+                calls['_savingsBalance'] = lambda: SavingsService.get_user_savings_balance(user_id)['balance']
+
+            results = concurrency.run_parallel(calls)
+
+            changes = {}
+            for name, since in plan.items():
+                deleted_field = SYNC_COLLECTIONS[name][2]
+                upserts, deleted = [], []
+                for item in results[name]:
+                    (deleted if deleted_field and item.get(deleted_field) else upserts).append(item)
+                changes[name] = {'upserts': upserts, 'deleted': [item['id'] for item in deleted]}
+
+            for tombstone in results.get('_tombstones', []):
+                name = _NAME_BY_COLLECTION.get(tombstone.get('collection'))
+                since = plan.get(name)
+                if name is None or since is None or tombstone.get('updatedAt', '') <= since:
+                    continue
+                changes[name]['deleted'].append(tombstone.get('docId'))
+
+            full = not cursors
+            if not full:
+                changes = {name: change for name, change in changes.items() if change['upserts'] or change['deleted']}
+
+            response = {
+                "success": True,
+                "full": full,
+                "token": SyncService.encode_token(user_id, new_cursors),
+                "changes": changes,
+            }
+            if resync_reason:
+                response['resyncReason'] = resync_reason
+            if '_savingsBalance' in results:
+                response['savingsBalance'] = results['_savingsBalance']
+
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("SYNC_SERVICE: %s sync for user %s: %d changes, %d of %d collections queried.",
+                             'Full' if full else 'Delta', user_id,
+                             sum(len(c['upserts']) + len(c['deleted']) for c in changes.values()),
+                             len(plan), len(SYNC_COLLECTIONS))
+            return response, 200
+        except Exception as e:
+            logger.exception("Error syncing for user %s: %s", user_id, e)
+            return {"success": False, "error": f"An internal error occurred: {str(e)}"}, 500
@@ -0,0 +1,251 @@
+# File: flask_api/app/services/tax_lot_service.py
+"""
+Yatırım pozisyonları için vergi lotu (tax lot) defteri.
+
+Her alış bir lot açar (lot id'si = alış işleminin id'si). Açık lotlar
+holding dökümanında alış sırasına göre sütunlu olarak tutulur:
+
+    holdings/{id}.lots = {ids: [...], dates: [...], quantities: [...], unitCosts: [...]}
+
+Satış lotları seçilen yönteme göre tüketir:
+- fifo:     en eski lottan başlayarak
+- lifo:     en yeni lottan başlayarak
+- average:  tüm lotlardan oransal olarak, ağırlıklı ortalama maliyetle
+            (eski `averageCost` davranışı; tek bir 'average' satırı yazılır)
+- specific: satışta verilen lot seçimine göre ({lotId, quantity} listesi)
+
+Yöntem satış anında belirlenip işleme (`costMethod`) yazılır: istekte
+verilen > hesabın `costMethod`'u > TAX_LOT_DEFAULT_METHOD. Yöntemi olmayan
+eski satışlar 'average' ile yeniden oynatılır, kayıtlı kârları değişmez.
+
+Tüketilen her lot için realized_lots/{satışId}_{lotId} dökümanı yazılır
+(maliyet, gelir, kâr, tutma süresi, satış yılı). Yıllık gerçekleşen kâr
+raporu sadece o yılın bu satırlarını okur; işlem geçmişi taranmaz.
+Lotlar ve realized_lots, holding yeniden hesaplama işinde geçmişten
+deterministik olarak üretilir (bkz. InvestmentService._recalculate_holding).
+"""
+import os
+from collections import defaultdict
+from datetime import date, datetime, timezone
+from google.cloud.firestore_v1.base_query import FieldFilter
+from app.utils.firebase_config import db
+from app.utils.logging_config import get_logger
+
+logger = get_logger(__name__)
+
+REALIZED_LOTS_COLLECTION = 'realized_lots'
+LOT_METHODS = ('fifo', 'lifo', 'average', 'specific')
+# Hesap varsayılanı olabilecekler ('specific' her satışta lot seçimi ister)
+ACCOUNT_LOT_METHODS = ('fifo', 'lifo', 'average')
+TAX_LOT_DEFAULT_METHOD = os.getenv('TAX_LOT_DEFAULT_METHOD', 'fifo')
+# Eski (yöntemi kayıtlı olmayan) satışlar ortalama maliyetle hesaplanmıştı
+LEGACY_METHOD = 'average'
+_EPSILON = 1e-9
+
+
+def _days_between(start, end):
+    try:
+        return (date.fromisoformat(end[:10]) - date.fromisoformat(start[:10])).days
+    except (TypeError, ValueError):
+        return None
+
+
+class LotBook:
+    """Bir holding'in açık lotları (alış sırasına göre)."""
+
+    def __init__(self, lots=None):
+        # her lot: [id, tarih, miktar, birim maliyet]
+        self.lots = [list(lot) for lot in (lots or [])]
+
+    @classmethod
+    def from_columns(cls, columns):
+        columns = columns or {}
+        return cls(zip(columns.get('ids') or [], columns.get('dates') or [],
+                       columns.get('quantities') or [], columns.get('unitCosts') or []))
+
+    def to_columns(self):
+        return {
+            'ids': [lot[0] for lot in self.lots], 'dates': [lot[1] for lot in self.lots],
+            'quantities': [lot[2] for lot in self.lots], 'unitCosts': [lot[3] for lot in self.lots],
+        }
+
+    @property
+    def quantity(self):
+        return sum(lot[2] for lot in self.lots)
+
+    @property
+    def cost(self):
+        return sum(lot[2] * lot[3] for lot in self.lots)
+
+    @property
+    def average_cost(self):
+        quantity = self.quantity
+        return self.cost / quantity if quantity > _EPSILON else 0.0
+
+    def buy(self, lot_id, date_str, quantity, unit_cost):
+        self.lots.append([lot_id, date_str, float(quantity), float(unit_cost)])
+
+    def sell(self, quantity, method, selection=None):
+        """
+        Lotları tüketir; (lot id, alış tarihi, miktar, birim maliyet) listesi
+        döner. Yetersiz miktar ya da geçersiz seçimde ValueError.
+        """
+        quantity = float(quantity)
+        available = self.quantity
+        if quantity > available + _EPSILON:
+            raise ValueError(f"Sell quantity {quantity} exceeds available {available}")
+        if method == 'average':
+            average = self.average_cost
+            remaining = 1 - quantity / available if available > _EPSILON else 0.0
+            for lot in self.lots:
+                lot[2] *= remaining
+            self._drop_empty()
+            return [('average', None, quantity, average)]
+
+        if method == 'specific':
+            wanted = defaultdict(float)
+            for item in selection or []:
+                wanted[item['lotId']] += float(item['quantity'])
+            if abs(sum(wanted.values()) - quantity) > _EPSILON:
+                raise ValueError("Selected lot quantities must add up to the sell quantity")
+            by_id = {lot[0]: lot for lot in self.lots}
+            order = []
+            for lot_id, lot_quantity in wanted.items():
+                lot = by_id.get(lot_id)
+                if lot is None or lot[2] < lot_quantity - _EPSILON:
+                    raise ValueError(f"Lot {lot_id} does not have {lot_quantity} units open")
+                order.append((lot, lot_quantity))
+        else:
+            lots = self.lots if method == 'fifo' else list(reversed(self.lots))
+            order, left = [], quantity
+            for lot in lots:
+                if left <= _EPSILON:
+                    break
+                taken = min(lot[2], left)
+                order.append((lot, taken))
+                left -= taken
+
+        consumed = []
+        for lot, taken in order:
+            taken = min(taken, lot[2])
+            lot[2] -= taken
+            consumed.append((lot[0], lot[1], taken, lot[3]))
+        self._drop_empty()
+        return consumed
+
+    def _drop_empty(self):
+        self.lots = [lot for lot in self.lots if lot[2] > _EPSILON]
+
+
+class TaxLotService:
+    @staticmethod
+    def resolve_method(requested=None, account=None, allowed=LOT_METHODS):
+        """Satışın maliyet yöntemi; geçersizse ValueError."""
+        method = str(requested or (account or {}).get('costMethod') or TAX_LOT_DEFAULT_METHOD).lower()
+        if method not in allowed:
+            raise ValueError(f"costMethod must be one of: {', '.join(allowed)}")
+        return method
+
+    @staticmethod
+    def replay(user_id, account_id, asset_symbol, transactions):
+        """
+        (id, işlem) çiftlerini (tarih, createdAt sırasıyla) oynatır.
+        (LotBook, {realized_lots id: satır}, {satış id: gerçekleşen kâr}) döner.
+        """
+        book, realized, by_sell = LotBook(), {}, {}
+        for transaction_id, tx in transactions:
+            quantity = float(tx.get('quantity', 0.0))
+            price = float(tx.get('pricePerUnit', 0.0))
+            tx_date = tx.get('date')
+            if tx.get('type') == 'buy':
+                book.buy(transaction_id, tx_date, quantity, price)
+                continue
+            method = tx.get('costMethod') or LEGACY_METHOD
+            try:
+                consumed = book.sell(quantity, method, tx.get('lotSelection'))
+            except ValueError as e:
+                raise ValueError(f"{asset_symbol} sell {transaction_id}: {e}")
+            total = 0.0
+            for lot_id, buy_date, lot_quantity, unit_cost in consumed:
+                row = TaxLotService._realized_row(user_id, account_id, asset_symbol, transaction_id, tx_date, method,
+                                                  price, lot_id, buy_date, lot_quantity, unit_cost)
+                realized[f"{transaction_id}_{lot_id}"] = row
+                total += row['realizedPL']
+            by_sell[transaction_id] = total
+        return book, realized, by_sell
+
+    @staticmethod
+    def _realized_row(user_id, account_id, asset_symbol, sell_id, sell_date, method, price,
+                      lot_id, buy_date, quantity, unit_cost):
+        proceeds, cost_basis = quantity * price, quantity * unit_cost
+        return {
+            'userId': user_id, 'accountId': account_id, 'assetSymbol': asset_symbol,
+            'sellTransactionId': sell_id, 'lotId': lot_id, 'method': method,
+            'buyDate': buy_date, 'sellDate': sell_date, 'year': int(str(sell_date)[:4]),
+            'quantity': quantity, 'unitCost': unit_cost, 'sellPrice': price,
+            'proceeds': proceeds, 'costBasis': cost_basis, 'realizedPL': proceeds - cost_basis,
+            'holdingDays': _days_between(buy_date, sell_date) if buy_date else None,
+        }
+
+    @staticmethod
+    def realized_query(account_id, asset_symbol):
+        return (db.collection(REALIZED_LOTS_COLLECTION)
+                  .where(filter=FieldFilter('accountId', '==', account_id))
+                  .where(filter=FieldFilter('assetSymbol', '==', asset_symbol)))
+
+    @staticmethod
+    def write_realized(transaction, existing, realized):
+        """Değişen realized_lots satırlarını yazar, artık olmayanları siler (yazma sayısını döner)."""
+        now = datetime.now(timezone.utc).isoformat()
+        writes = 0
+        collection = db.collection(REALIZED_LOTS_COLLECTION)
+        for lot_key, row in realized.items():
+            old = existing.get(lot_key)
+            if old is None or any(old.get(k) != v for k, v in row.items()):
+                transaction.set(collection.document(lot_key), {**row, 'updatedAt': now})
+                writes += 1
+        for lot_key in existing.keys() - realized.keys():
+            transaction.delete(collection.document(lot_key))
+            writes += 1
+        return writes
+
+    @staticmethod
+    def get_realized_gains(user_id, year=None, account_id=None):
+        """
+        Yılın gerçekleşen kâr/zarar raporu: satış yılı `year` olan realized_lots
+        satırları (varlık bazında toplamlarla). Tutarlar hesabın para birimindedir.
+        """
+        try:
+            year = int(year or datetime.now(timezone.utc).year)
+            query = db.collection(REALIZED_LOTS_COLLECTION).where(filter=FieldFilter('userId', '==', user_id))
+            if account_id:
+                query = query.where(filter=FieldFilter('accountId', '==', account_id))
+            query = (query.where(filter=FieldFilter('sellDate', '>=', f"{year}-01-01"))
+                          .where(filter=FieldFilter('sellDate', '<=', f"{year}-12-31")))
+            rows = [{'id': doc.id, **doc.to_dict()} for doc in query.stream()]
+            rows.sort(key=lambda r: (r.get('sellDate') or '', r.get('sellTransactionId') or '', r.get('buyDate') or ''))
+
+            by_symbol = {}
+            for row in rows:
+                entry = by_symbol.setdefault((row['accountId'], row['assetSymbol']), {
+                    'accountId': row['accountId'], 'assetSymbol': row['assetSymbol'],
+                    'quantity': 0.0, 'proceeds': 0.0, 'costBasis': 0.0, 'realizedPL': 0.0})
+                for field in ('quantity', 'proceeds', 'costBasis', 'realizedPL'):
+                    entry[field] += row.get(field) or 0.0
+            symbols = sorted(({k: round(v, 2) if isinstance(v, float) else v for k, v in entry.items()}
+                              for entry in by_symbol.values()), key=lambda e: e['realizedPL'], reverse=True)
+
+            report = {
+                'year': year,
+                'totalProceeds': round(sum(r.get('proceeds') or 0.0 for r in rows), 2),
+                'totalCostBasis': round(sum(r.get('costBasis') or 0.0 for r in rows), 2),
+                'totalRealizedPL': round(sum(r.get('realizedPL') or 0.0 for r in rows), 2),
+                'bySymbol': symbols,
+                'lots': rows,
+            }
+            return {"success": True, "report": report}, 200
+        except ValueError:
+            return {"success": False, "error": "year must be a number"}, 400
+        except Exception as e:
+            logger.exception("Error building realized gains for user %s: %s", user_id, e)
+            return {"success": False, "error": f"An internal error occurred: {str(e)}"}, 500
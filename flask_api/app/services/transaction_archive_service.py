@@ -0,0 +1,288 @@
+# File: flask_api/app/services/transaction_archive_service.py
+"""
+Geçmiş işlemler için aylık arşiv bucket'ları.
+
+Yıllık raporlar ve uzun aralıklı grafikler her işlem için ayrı bir döküman
+okuyor. Kapanmış aylar kullanıcı başına tek bir bucket dökümanında sütun
+dizileri olarak tutulur:
+
+    transaction_archives/{userId}_{YYYY-MM}
+        ids:     [...]                     işlem id'leri
+        columns: {amount: [...], date: [...], category: [...], isNeed: [...], ...}
+
+- transactions koleksiyonu doğruluğun kaynağı olmaya devam eder; bucket'lar
+  okuma için tutulan bir kopyadır (güncelleme/silme, senkronizasyon ve
+  defter akışları değişmez). Bucket'ta sadece silinmemiş işlemler bulunur.
+- transaction_archive_state/{userId}: `archivedThrough` (dahil) ayına kadar
+  her ay arşivlenmiştir; `months` bucket'ı olan ayların listesidir.
+- `fetch`, aralığın arşivlenmiş kısmını bucket'lardan (ay başına bir okuma),
+  kalanını canlı sorgudan okuyup birleştirir. Bir yıllık aralık binlerce
+  döküman yerine en fazla on iki bucket okur.
+- Arşivlenmiş bir aya düşen yazma (geriye tarihli ekleme, eski bir işlemin
+  düzenlenmesi/silinmesi) `record_write` ile bucket'a aynı istekte yansıtılır.
+  Sadece ARCHIVE_AGE_MONTHS'tan eski tarihler için durum dökümanı okunur;
+  güncel işlemlerin yazma yoluna ek okuma gelmez.
+
+Bucket'lar gece işiyle üretilir: `python -m app.jobs.compact_transactions`.
+"""
+import os
+from collections import defaultdict
+from datetime import datetime, timezone
+from firebase_admin import firestore
+from google.cloud.firestore_v1.base_query import FieldFilter
+from app.utils.firebase_config import db
+from app.utils.request_cache import get_request_cache
+from app.utils import job_queue
+from app.utils.logging_config import get_logger
+from .balance_ledger_service import month_of, add_months, current_month
+
+logger = get_logger(__name__)
+
+ARCHIVE_COLLECTION = 'transaction_archives'
+ARCHIVE_STATE_COLLECTION = 'transaction_archive_state'
+# Geçen ay geç gelen düzeltmeler için canlı kalır; daha eski aylar arşivlenir
+ARCHIVE_AGE_MONTHS = int(os.getenv('TRANSACTION_ARCHIVE_AGE_MONTHS', '2'))
+# Firestore döküman sınırı (1 MiB) için güvenli üst sınır; aşan ay ve sonrası canlı kalır
+ARCHIVE_BUCKET_MAX_ROWS = int(os.getenv('TRANSACTION_ARCHIVE_BUCKET_MAX_ROWS', '2000'))
+# Bucket'lar büyük olabildiğinden batch başına az döküman (commit başına 10 MiB sınırı)
+ARCHIVE_WRITE_BATCH_SIZE = 8
+# Sütunlara alınmayan alanlar: userId bucket'ta bir kez, isDeleted her zaman False
+ROW_EXCLUDED_FIELDS = ('userId', 'isDeleted')
+
+
+def max_archivable_month():
+    return add_months(current_month(), -ARCHIVE_AGE_MONTHS)
+
+
+class TransactionArchiveService:
+    @staticmethod
+    def _state_ref(user_id):
+        return db.collection(ARCHIVE_STATE_COLLECTION).document(user_id)
+
+    @staticmethod
+    def _bucket_ref(user_id, month):
+        return db.collection(ARCHIVE_COLLECTION).document(f"{user_id}_{month}")
+
+    @staticmethod
+    def get_state(user_id):
+        return get_request_cache().get(TransactionArchiveService._state_ref(user_id))
+
+    # --- bucket biçimi ---
+
+    @staticmethod
+    def _sort_key(row):
+        return (row.get('date') or '', row.get('createdAt') or '')
+
+    @staticmethod
+    def _build_bucket(user_id, month, rows):
+        """{'id': ..., alanlar...} satırlarından sütunlu bucket dökümanı."""
+        rows = sorted(rows, key=TransactionArchiveService._sort_key)
+        fields = sorted({field for row in rows for field in row if field != 'id' and field not in ROW_EXCLUDED_FIELDS})
+        return {
+            'userId': user_id, 'month': month, 'count': len(rows),
+            'ids': [row['id'] for row in rows],
+            'columns': {field: [row.get(field) for row in rows] for field in fields},
+            'updatedAt': datetime.now(timezone.utc).isoformat(),
+        }
+
+    @staticmethod
+    def _rows(bucket):
+        """Bucket'ı işlem sözlüklerine açar (None değerli alanlar atlanır)."""
+        columns = bucket.get('columns') or {}
+        user_id = bucket.get('userId')
+        rows = []
+        for index, transaction_id in enumerate(bucket.get('ids') or []):
+            row = {field: values[index] for field, values in columns.items() if values[index] is not None}
+            row.update({'id': transaction_id, 'userId': user_id, 'isDeleted': False})
+            rows.append(row)
+        return rows
+
+    @staticmethod
+    def _row(transaction_id, transaction):
+        return {'id': transaction_id, **{k: v for k, v in transaction.items() if k not in ROW_EXCLUDED_FIELDS}}
+
+    # --- okuma ---
+
+    @staticmethod
+    def fetch(user_id, start_date, end_date=None, filters=None, fields=None):
+        """
+        [start_date, end_date] aralığındaki silinmemiş işlemler ('id' alanıyla);
+        `filters` eşitlik filtreleri ({alan: değer}). `fields` verilirse canlı
+        sorgu sadece bu alanları okur. Sıralama garanti edilmez.
+        """
+        filters = {k: v for k, v in (filters or {}).items() if v is not None}
+        state = TransactionArchiveService.get_state(user_id) or {}
+        horizon = state.get('archivedThrough')
+        live_start = start_date
+        rows = []
+
+        if horizon and month_of(start_date) <= horizon:
+            last_month = min(month_of(end_date), horizon) if end_date else horizon
+            months = [m for m in state.get('months') or [] if month_of(start_date) <= m <= last_month]
+            refs = [TransactionArchiveService._bucket_ref(user_id, m) for m in months]
+            for snapshot in (db.get_all(refs) if refs else []):
+                if not snapshot.exists:
+                    continue
+                for row in TransactionArchiveService._rows(snapshot.to_dict()):
+                    date = row.get('date') or ''
+                    if date < start_date or (end_date and date > end_date):
+                        continue
+                    if all(row.get(k) == v for k, v in filters.items()):
+                        rows.append(row)
+            live_start = max(start_date, f"{add_months(horizon, 1)}-01")
+
+        if end_date is None or live_start <= end_date:
+            query = (db.collection('transactions')
+                       .where(filter=FieldFilter('userId', '==', user_id))
+                       .where(filter=FieldFilter('isDeleted', '==', False)))
+            for field, value in filters.items():
+                query = query.where(filter=FieldFilter(field, '==', value))
+            query = query.where(filter=FieldFilter('date', '>=', live_start))
+            if end_date:
+                query = query.where(filter=FieldFilter('date', '<=', end_date))
+            if fields:
+                query = query.select(list(fields))
+            rows.extend({**doc.to_dict(), 'id': doc.id} for doc in query.stream())
+        return rows
+
+    # --- yazma yolu ---
+
+    @staticmethod
+    def record_write(user_id, transaction_id, old=None, new=None):
+        """
+        Arşivlenmiş bir aya dokunan yazmayı bucket'a yansıtır. `new`, yazmadan
+        sonraki döküman (silmede isDeleted=True). Başarısız olursa aynı
+        eşitleme arka plan işine bırakılır.
+        """
+        months = {month_of(t['date']) for t in (old, new) if t and t.get('date')}
+        months = {m for m in months if m <= max_archivable_month()}
+        if not months:
+            return
+        try:
+            horizon = (TransactionArchiveService.get_state(user_id) or {}).get('archivedThrough')
+            for month in sorted(m for m in months if horizon and m <= horizon):
+                TransactionArchiveService._sync_row(user_id, month, transaction_id, new)
+        except Exception as e:
+            logger.warning("TRANSACTION_ARCHIVE: Inline sync of %s failed, queueing: %s", transaction_id, e)
+            job_queue.enqueue('transactions.sync_archive',
+                              {'userId': user_id, 'transactionId': transaction_id, 'months': sorted(months)},
+                              ordering_key=user_id)
+
+    @staticmethod
+    def _sync_archive_job(payload, job):
+        # Güncel döküman okunur; eşitleme idempotent olduğundan tekrar denemek güvenli
+        user_id = payload['userId']
+        snapshot = db.collection('transactions').document(payload['transactionId']).get()
+        current = snapshot.to_dict() if snapshot.exists else None
+        horizon = ((TransactionArchiveService._state_ref(user_id).get().to_dict() or {})
+                   .get('archivedThrough'))
+        for month in payload['months']:
+            if horizon and month <= horizon:
+                TransactionArchiveService._sync_row(user_id, month, payload['transactionId'], current)
+
+    @staticmethod
+    def _sync_row(user_id, month, transaction_id, transaction):
+        """
+        Bucket'taki satırı işlemin güncel haline eşitler: silinmiş ya da başka
+        aya taşınmışsa çıkarır, aksi halde ekler/günceller.
+        """
+        bucket_ref = TransactionArchiveService._bucket_ref(user_id, month)
+        state_ref = TransactionArchiveService._state_ref(user_id)
+        keep = (transaction is not None and not transaction.get('isDeleted')
+                and month_of(transaction.get('date') or '') == month)
+
+        @firestore.transactional
+        def sync_in_tx(tx):
+            snapshot = bucket_ref.get(transaction=tx)
+            bucket = snapshot.to_dict() if snapshot.exists else None
+            if bucket is None and not keep:
+                return
+            rows = [row for row in TransactionArchiveService._rows(bucket or {}) if row['id'] != transaction_id]
+            if keep:
+                rows.append(TransactionArchiveService._row(transaction_id, transaction))
+            tx.set(bucket_ref, TransactionArchiveService._build_bucket(user_id, month, rows))
+            if bucket is None:
+                tx.set(state_ref, {'months': firestore.ArrayUnion([month])}, merge=True)
+
+        sync_in_tx(db.transaction())
+
+    # --- sıkıştırma ---
+
+    @staticmethod
+    def compact_user(user_id, through_month=None):
+        """
+        Kullanıcının arşivlenmemiş kapanmış aylarını bucket'lara yazar ve
+        `archivedThrough`'u ilerletir. Yazılan bucket sayısını döner.
+        """
+        through = min(through_month or max_archivable_month(), max_archivable_month())
+        state = TransactionArchiveService._state_ref(user_id).get().to_dict() or {}
+        horizon = state.get('archivedThrough')
+        start = add_months(horizon, 1) if horizon else None
+        if start and start > through:
+            return 0
+        started_at = datetime.now(timezone.utc).isoformat()
+
+        query = (db.collection('transactions')
+                   .where(filter=FieldFilter('userId', '==', user_id))
+                   .where(filter=FieldFilter('isDeleted', '==', False))
+                   .where(filter=FieldFilter('date', '<=', f"{through}-31")))
+        if start:
+            query = query.where(filter=FieldFilter('date', '>=', f"{start}-01"))
+        by_month = defaultdict(list)
+        for doc in query.stream():
+            transaction = doc.to_dict()
+            by_month[month_of(transaction.get('date') or '')].append(TransactionArchiveService._row(doc.id, transaction))
+
+        oversized = sorted(m for m, rows in by_month.items() if len(rows) > ARCHIVE_BUCKET_MAX_ROWS)
+        if oversized:
+            logger.warning("TRANSACTION_ARCHIVE: %s has %d transactions in %s; archiving stops before it.",
+                           user_id, len(by_month[oversized[0]]), oversized[0])
+            through = add_months(oversized[0], -1)
+            if start and start > through:
+                return 0
+        months = sorted(m for m in by_month if m <= through)
+
+        batch, pending = db.batch(), 0
+        for month in months:
+            batch.set(TransactionArchiveService._bucket_ref(user_id, month),
+                      TransactionArchiveService._build_bucket(user_id, month, by_month[month]))
+            pending += 1
+            if pending >= ARCHIVE_WRITE_BATCH_SIZE:
+                batch.commit()
+                batch, pending = db.batch(), 0
+        # Durum en son yazılır: okuyucular bucket'lar tamamlanmadan arşive geçmez
+        batch.set(TransactionArchiveService._state_ref(user_id), {
+            'userId': user_id, 'archivedThrough': through, 'months': firestore.ArrayUnion(months),
+            'updatedAt': datetime.now(timezone.utc).isoformat(),
+        }, merge=True)
+        batch.commit()
+
+        # Okuma ile durum yazımı arasında değişen işlemler bucket'a eşitlenir
+        archived_in = {row['id']: month for month in months for row in by_month[month]}
+        changed = (db.collection('transactions')
+                     .where(filter=FieldFilter('userId', '==', user_id))
+                     .where(filter=FieldFilter('updatedAt', '>', started_at)))
+        for doc in changed.stream():
+            transaction = doc.to_dict()
+            targets = {archived_in.get(doc.id), month_of(transaction.get('date') or '')}
+            for month in sorted(m for m in targets if m and m <= through):
+                TransactionArchiveService._sync_row(user_id, month, doc.id, transaction)
+
+        logger.debug("TRANSACTION_ARCHIVE: Archived %d months for %s through %s.", len(months), user_id, through)
+        return len(months)
+
+    @staticmethod
+    def reset_user(user_id):
+        """Kullanıcının bucket'larını ve arşiv durumunu siler (yeniden oluşturmadan önce)."""
+        state_ref = TransactionArchiveService._state_ref(user_id)
+        state = state_ref.get().to_dict() or {}
+        # Önce durum silinir; okuyucular silinmekte olan bucket'lara yönlenmez
+        refs = [state_ref] + [TransactionArchiveService._bucket_ref(user_id, m) for m in state.get('months') or []]
+        for start in range(0, len(refs), 400):
+            batch = db.batch()
+            for ref in refs[start:start + 400]:
+                batch.delete(ref)
+            batch.commit()
+
+
+job_queue.register('transactions.sync_archive', TransactionArchiveService._sync_archive_job)
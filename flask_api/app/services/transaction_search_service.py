@@ -0,0 +1,327 @@
+# File: flask_api/app/services/transaction_search_service.py
+"""
+İşlem açıklaması ve notları üzerinde kullanıcı başına ters index (inverted index).
+
+Firestore metin içinde arama yapamadığı için her terim ayrı bir posting
+dökümanında tutulur:
+
+    transaction_search_terms/{userId}_{terim}
+        ids:        [...]   bu terimle birebir aynı kelimeyi içeren işlemler
+        partialIds: [...]   terimi bir kelimenin (baştan olmayan) parçası olarak içerenler
+
+- Normalizasyon Türkçe'ye göre yapılır: 'İ'/'I' doğru küçültülür, ardından
+  Türkçe karakterler katlanır (ç→c, ğ→g, ı→i, ö→o, ş→s, ü→u); "aboneligi"
+  araması "Aboneliği"ni bulur.
+- Her kelime kendisi (`ids`) ve MIN_TERM_LENGTH'ten uzun son ekleriyle
+  (`partialIds`) indexlenir. Bir alt dize, kelimenin bir son ekinin önekidir;
+  bu yüzden üç sorgu türü de terim aralığı sorgusuna iner:
+    term:      terim dökümanı (tek okuma)             -> ids
+    prefix:    term >= q AND term < q + '\\uf8ff'     -> ids
+    substring: aynı aralık                            -> ids + partialIds
+  Çok kelimeli sorguda her kelime eşleşmelidir (kesişim).
+- Aralık sorguları (prefix/substring) en az SEARCH_MIN_QUERY_LENGTH
+  karakterlik kelime ister. Bir kelimenin eşleştiği terim sayısı
+  SEARCH_MAX_TERMS'ü ya da adaylar SEARCH_MAX_CANDIDATES'i aşarsa sorgu
+  "çok geniş" sayılıp 400 döner; böylece kısa bir sorgu kullanıcının
+  tüm geçmişini okumaz. Tam terim aramasında adaylar bu sınırı aşarsa
+  işlemler yeniden eskiye sayfa sayfa taranır ve ilk `limit` eşleşmede
+  durulur (bkz. _newest_matches).
+- Index, yazma yolundaki arka plan işiyle ('transactions.index_search')
+  artımlı güncellenir; aynı kullanıcının işleri sırayla çalışır. Aramada
+  adaylar canlı dökümanla yeniden doğrulanır, index'te kalmış eski bir
+  posting yanlış sonuç döndürmez.
+
+Yeniden oluşturma: `python -m app.jobs.rebuild_search_index`.
+"""
+import os
+import re
+import unicodedata
+from datetime import datetime, timezone
+from firebase_admin import firestore
+from google.cloud.firestore_v1.base_query import FieldFilter
+from app.utils.firebase_config import db
+from app.utils import concurrency, job_queue
+from app.utils.logging_config import get_logger
+
+logger = get_logger(__name__)
+
+SEARCH_COLLECTION = 'transaction_search_terms'
+# İndexlenen metin alanları
+SEARCH_FIELDS = ('description', 'note')
+SEARCH_MODES = ('term', 'prefix', 'substring')
+MIN_TERM_LENGTH = 2
+# Uzun kelimelerin son ek sayısı (ve posting yazımı) sınırlı kalsın
+MAX_TERM_LENGTH = int(os.getenv('SEARCH_MAX_TERM_LENGTH', '32'))
+SEARCH_DEFAULT_LIMIT = 50
+SEARCH_MAX_LIMIT = 500
+# prefix/substring kelimelerinin en kısa uzunluğu ('term' MIN_TERM_LENGTH ile yetinir)
+SEARCH_MIN_QUERY_LENGTH = int(os.getenv('SEARCH_MIN_QUERY_LENGTH', '3'))
+# Bir kelimenin okuyabileceği terim dökümanı ve canlı dökümanı okunacak aday sayısı
+SEARCH_MAX_TERMS = int(os.getenv('SEARCH_MAX_TERMS', '500'))
+SEARCH_MAX_CANDIDATES = int(os.getenv('SEARCH_MAX_CANDIDATES', '1000'))
+# Çok yaygın terimlerde yeniden eskiye taramanın sayfa boyu
+SEARCH_SCAN_PAGE_SIZE = 200
+
+_TURKISH_FOLD = str.maketrans('çğıöşüâîû', 'cgiosuaiu')
+_WORD_RE = re.compile(r'[^\W_]+')
+
+
+def normalize(text):
+    """Türkçe küçültme + karakter katlama; diğer aksanlar da atılır."""
+    text = str(text).replace('İ', 'i').replace('I', 'ı').lower().translate(_TURKISH_FOLD)
+    return ''.join(c for c in unicodedata.normalize('NFKD', text) if not unicodedata.combining(c))
+
+
+def tokenize(text):
+    """Metnin normalize edilmiş kelimeleri (MIN_TERM_LENGTH'ten kısa olanlar atılır)."""
+    if not text:
+        return []
+    return [word[:MAX_TERM_LENGTH] for word in _WORD_RE.findall(normalize(text)) if len(word) >= MIN_TERM_LENGTH]
+
+
+def searchable_text(transaction):
+    """İşlemin indexlenen alanları; silinmiş ya da olmayan işlem için None."""
+    if not transaction or transaction.get('isDeleted'):
+        return None
+    return {field: transaction.get(field) for field in SEARCH_FIELDS if transaction.get(field)}
+
+
+def postings(text):
+    """{terim: {'ids'} | {'partialIds'} | ikisi} — bir işlemin katkısı."""
+    result = {}
+    for field in SEARCH_FIELDS:
+        for word in tokenize((text or {}).get(field)):
+            result.setdefault(word, set()).add('ids')
+            for start in range(1, len(word) - MIN_TERM_LENGTH + 1):
+                result.setdefault(word[start:], set()).add('partialIds')
+    return result
+
+
+class SearchTooBroad(Exception):
+    """Sorgu, okunması sınırlı tutulan sayıdan fazla terim ya da işlemle eşleşiyor."""
+
+
+def _matches(words, token, mode):
+    if mode == 'term':
+        return token in words
+    if mode == 'prefix':
+        return any(word.startswith(token) for word in words)
+    return any(token in word for word in words)
+
+
+def _verified(user_id, snapshot, tokens, mode):
+    """Adayın canlı dökümanı sorguyla hâlâ eşleşiyorsa işlem ('id' alanıyla), değilse None."""
+    transaction = snapshot.to_dict() if snapshot.exists else None
+    if not transaction or transaction.get('userId') != user_id or transaction.get('isDeleted'):
+        return None
+    words = [w for value in (searchable_text(transaction) or {}).values() for w in tokenize(value)]
+    if not all(_matches(words, token, mode) for token in tokens):
+        return None
+    return {**transaction, 'id': snapshot.id}
+
+
+class TransactionSearchService:
+    @staticmethod
+    def _term_ref(user_id, term):
+        return db.collection(SEARCH_COLLECTION).document(f"{user_id}_{term}")
+
+    # --- yazma yolu ---
+
+    @staticmethod
+    def record_write(user_id, transaction_id, version, old=None, new=None):
+        """Aranan metin değiştiyse (ya da işlem silindiyse) index güncellemesini kuyruğa ekler."""
+        old_text, new_text = searchable_text(old), searchable_text(new)
+        if old_text == new_text:
+            return
+        job_queue.enqueue('transactions.index_search', {
+            'userId': user_id, 'transactionId': transaction_id, 'old': old_text, 'new': new_text,
+        }, ordering_key=user_id, idempotency_key=f"search:{transaction_id}:{version}")
+
+    @staticmethod
+    def _index_job(payload, job):
+        TransactionSearchService.apply_postings(payload['userId'], payload['transactionId'],
+                                                postings(payload.get('old')), postings(payload.get('new')))
+
+    @staticmethod
+    def apply_postings(user_id, transaction_id, old, new):
+        """
+        Eski ve yeni posting'lerin farkını ArrayUnion/ArrayRemove ile yazar.
+        Tekrar uygulamak sonucu değiştirmez (iş yeniden denenebilir).
+        """
+        from .balance_ledger_service import WRITE_BATCH_SIZE
+        now = datetime.now(timezone.utc).isoformat()
+        batch, pending = db.batch(), 0
+        for term in sorted(set(old) | set(new)):
+            update = {}
+            for kind in ('ids', 'partialIds'):
+                before, after = kind in old.get(term, ()), kind in new.get(term, ())
+                if after and not before:
+                    update[kind] = firestore.ArrayUnion([transaction_id])
+                elif before and not after:
+                    update[kind] = firestore.ArrayRemove([transaction_id])
+            if not update:
+                continue
+            batch.set(TransactionSearchService._term_ref(user_id, term),
+                      {'userId': user_id, 'term': term, 'updatedAt': now, **update}, merge=True)
+            pending += 1
+            if pending >= WRITE_BATCH_SIZE:
+                batch.commit()
+                batch, pending = db.batch(), 0
+        if pending:
+            batch.commit()
+
+    # --- arama ---
+
+    @staticmethod
+    def _candidates(user_id, token, mode):
+        if mode == 'term':
+            snapshot = TransactionSearchService._term_ref(user_id, token).get()
+            return set((snapshot.to_dict() or {}).get('ids') or []) if snapshot.exists else set()
+        query = (db.collection(SEARCH_COLLECTION)
+                   .where(filter=FieldFilter('userId', '==', user_id))
+                   .where(filter=FieldFilter('term', '>=', token))
+                   .where(filter=FieldFilter('term', '<', token + '\uf8ff')))
+        kinds = ('ids',) if mode == 'prefix' else ('ids', 'partialIds')
+        docs = list(query.select(list(kinds)).limit(SEARCH_MAX_TERMS + 1).stream())
+        if len(docs) > SEARCH_MAX_TERMS:
+            raise SearchTooBroad(token)
+        ids = set()
+        for doc in docs:
+            data = doc.to_dict()
+            for kind in kinds:
+                ids.update(data.get(kind) or [])
+        return ids
+
+    @staticmethod
+    def search(user_id, query_text, mode='prefix', limit=None):
+        """
+        `query_text`'in tüm kelimelerini içeren silinmemiş işlemler, tarihe göre
+        yeniden eskiye. `total` limitten önceki eşleşme sayısıdır. Adaylar
+        sınırlı olduğundan canlı dökümanlar tek bir get_all ile okunur; sınırı
+        aşan tam terim aramasında `total` index'teki aday sayısıdır.
+        """
+        try:
+            if mode not in SEARCH_MODES:
+                return {"success": False, "error": f"mode must be one of: {', '.join(SEARCH_MODES)}"}, 400
+            tokens = list(dict.fromkeys(tokenize(query_text)))
+            if not tokens:
+                return {"success": False,
+                        "error": f"Query must contain a word of at least {MIN_TERM_LENGTH} characters"}, 400
+            if mode != 'term' and any(len(token) < SEARCH_MIN_QUERY_LENGTH for token in tokens):
+                return {"success": False,
+                        "error": f"{mode} search needs words of at least {SEARCH_MIN_QUERY_LENGTH} characters"}, 400
+            limit = max(1, min(int(limit or SEARCH_DEFAULT_LIMIT), SEARCH_MAX_LIMIT))
+
+            # Kullanıcının kuyruktaki yazmaları index'e yansısın (okuduğunu-yazdığını görme)
+            job_queue.wait_for(user_id)
+            candidates = concurrency.run_parallel({
+                token: (lambda token=token: TransactionSearchService._candidates(user_id, token, mode))
+                for token in tokens})
+            ids = set.intersection(*candidates.values())
+            if len(ids) > SEARCH_MAX_CANDIDATES:
+                if mode != 'term':
+                    raise SearchTooBroad(query_text)
+                matches = TransactionSearchService._newest_matches(user_id, ids, tokens, limit)
+                logger.debug("SEARCH: %r (term) for %s: %d candidates, scanned newest-first.",
+                             query_text, user_id, len(ids))
+                return {"success": True, "transactions": matches, "total": len(ids)}, 200
+
+            refs = [db.collection('transactions').document(i) for i in sorted(ids)]
+            matches = [match for match in (_verified(user_id, snapshot, tokens, mode)
+                                           for snapshot in (db.get_all(refs) if refs else [])) if match]
+            matches.sort(key=lambda t: (t.get('date') or '', t.get('createdAt') or ''), reverse=True)
+
+            logger.debug("SEARCH: %r (%s) for %s: %d candidates, %d matches.",
+                         query_text, mode, user_id, len(ids), len(matches))
+            return {"success": True, "transactions": matches[:limit], "total": len(matches)}, 200
+        except SearchTooBroad:
+            logger.debug("SEARCH: %r (%s) for %s is too broad.", query_text, mode, user_id)
+            return {"success": False,
+                    "error": "Query matches too many transactions; add more characters or words"}, 400
+        except Exception as e:
+            logger.exception("Error searching transactions for user %s: %s", user_id, e)
+            return {"success": False, "error": f"An internal error occurred: {str(e)}"}, 500
+
+    @staticmethod
+    def _newest_matches(user_id, ids, tokens, limit):
+        """
+        Çok yaygın bir terimde tüm adayları okumak yerine kullanıcının işlemleri
+        yeniden eskiye sayfa sayfa taranır; `limit` doğrulanmış eşleşmede durulur.
+        Aday yoğunluğu yüksek olduğundan okunan döküman sayısı limite yakındır.
+        """
+        query = (db.collection('transactions')
+                   .where(filter=FieldFilter('userId', '==', user_id))
+                   .where(filter=FieldFilter('isDeleted', '==', False))
+                   .order_by('date', direction=firestore.Query.DESCENDING)
+                   .order_by('createdAt', direction=firestore.Query.DESCENDING))
+        matches, last = [], None
+        while len(matches) < limit:
+            page_query = query.limit(SEARCH_SCAN_PAGE_SIZE)
+            if last is not None:
+                page_query = page_query.start_after(last)
+            docs = list(page_query.stream())
+            for doc in docs:
+                match = _verified(user_id, doc, tokens, 'term') if doc.id in ids else None
+                if match:
+                    matches.append(match)
+                    if len(matches) >= limit:
+                        break
+            if len(docs) < SEARCH_SCAN_PAGE_SIZE:
+                break
+            last = docs[-1]
+        return matches
+
+    # --- yeniden oluşturma ---
+
+    @staticmethod
+    def rebuild_user(user_id):
+        """
+        Kullanıcının index'ini canlı işlemlerden yeniden yazar; artık geçerli
+        olmayan terim dökümanlarını siler. Yazılan terim sayısını döner.
+        """
+        from .balance_ledger_service import WRITE_BATCH_SIZE
+        started_at = datetime.now(timezone.utc).isoformat()
+        index = {}
+        transactions = (db.collection('transactions')
+                          .where(filter=FieldFilter('userId', '==', user_id))
+                          .where(filter=FieldFilter('isDeleted', '==', False)))
+        for doc in transactions.stream():
+            for term, kinds in postings(searchable_text(doc.to_dict())).items():
+                entry = index.setdefault(term, {'ids': [], 'partialIds': []})
+                for kind in kinds:
+                    entry[kind].append(doc.id)
+
+        existing = (db.collection(SEARCH_COLLECTION)
+                      .where(filter=FieldFilter('userId', '==', user_id)).select(['term']).stream())
+        stale = [doc.reference for doc in existing if (doc.to_dict() or {}).get('term') not in index]
+
+        # Önce yeni terimler yazılır, sonra eskiler silinir; arada arama boş dönmez
+        batch, pending = db.batch(), 0
+        for term, entry in index.items():
+            batch.set(TransactionSearchService._term_ref(user_id, term),
+                      {'userId': user_id, 'term': term, 'updatedAt': started_at, **entry})
+            pending += 1
+            if pending >= WRITE_BATCH_SIZE:
+                batch.commit()
+                batch, pending = db.batch(), 0
+        for ref in stale:
+            batch.delete(ref)
+            pending += 1
+            if pending >= WRITE_BATCH_SIZE:
+                batch.commit()
+                batch, pending = db.batch(), 0
+        if pending:
+            batch.commit()
+
+        # Okuma sırasında değişen işlemler tekrar eklenir; eski posting'ler aramada elenir
+        changed = (db.collection('transactions')
+                     .where(filter=FieldFilter('userId', '==', user_id))
+                     .where(filter=FieldFilter('updatedAt', '>', started_at)))
+        for doc in changed.stream():
+            TransactionSearchService.apply_postings(user_id, doc.id, {}, postings(searchable_text(doc.to_dict())))
+
+        logger.debug("SEARCH: Rebuilt %d terms (%d stale removed) for %s.", len(index), len(stale), user_id)
+        return len(index)
+
+
+job_queue.register('transactions.index_search', TransactionSearchService._index_job)
@@ -2,17 +2,78 @@
 
 from app.utils.firebase_config import db
 from datetime import datetime, timezone
-import traceback
-from firebase_admin import firestore
-from google.cloud.firestore_v1.base_query import FieldFilter
+from app.utils.request_cache import get_request_cache
+from app.utils import data_versions, job_queue
 import uuid
 
 # Diğer servislerle etkileşim için import ediyoruz
 from .balance_service import BalanceService
 from .savings_service import SavingsService
+from .budget_recommendation_service import expense_version_key
+from .transaction_archive_service import TransactionArchiveService
+from .transaction_search_service import TransactionSearchService
+from app.utils.logging_config import get_logger
+
+logger = get_logger(__name__)
+
+# Bakiye/kumbara etkisini belirleyen alanlar (arka plan işine bu alanlar taşınır)
+EFFECT_FIELDS = ('account', 'type', 'amount', 'date', 'incomeAllocationPct')
 
 
 class TransactionService:
+    @staticmethod
+    def _effect_snapshot(tx):
+        if not tx:
+            return None
+        snapshot = {field: tx.get(field) for field in EFFECT_FIELDS}
+        snapshot['amount'] = float(snapshot['amount'] or 0.0)
+        return snapshot
+
+    @staticmethod
+    def _allocated_amount(tx):
+        pct = tx.get('incomeAllocationPct')
+        if tx.get('type') == 'income' and pct is not None and int(pct) > 0:
+            return round(float(tx.get('amount', 0.0)) * (int(pct) / 100), 2)
+        return 0.0
+
+    @staticmethod
+    def _enqueue_effects(user_id, transaction_id, version, old=None, new=None):
+        """
+        İşlem dökümanı yazıldıktan sonra bakiye ve kumbara etkilerini arka plan
+        işine bırakır. Aynı kullanıcının işleri sırayla uygulanır; `version`
+        (yazmanın updatedAt'i) aynı yazmanın iki kez kuyruğa girmesini önler.
+        """
+        job_queue.enqueue('transactions.apply_effects', {
+            'userId': user_id, 'transactionId': transaction_id,
+            'old': TransactionService._effect_snapshot(old), 'new': TransactionService._effect_snapshot(new),
+        }, ordering_key=user_id, idempotency_key=f"transactions:{transaction_id}:{version}")
+
+    @staticmethod
+    def _apply_effects_job(payload, job):
+        """
+        Eski etkiyi geri alır, yenisini uygular. Her adım deterministik kimlikle
+        yazıldığından iş yeniden denendiğinde uygulanmış adımlar tekrarlanmaz.
+        """
+        user_id, transaction_id = payload['userId'], payload['transactionId']
+        old, new = payload.get('old'), payload.get('new')
+        if old:
+            BalanceService._revert_transaction_effect(user_id, old, transaction_id, entry_id=job.step_id('revert'))
+            if TransactionService._allocated_amount(old) > 0:
+                SavingsService.delete_savings_allocation_by_transaction_id(user_id, transaction_id)
+        if new:
+            BalanceService._apply_transaction_effect(user_id, new, transaction_id, entry_id=job.step_id('apply'))
+            allocated = TransactionService._allocated_amount(new)
+            if allocated > 0:
+                SavingsService.create_savings_allocation(
+                    user_id=user_id, transaction_id=transaction_id, amount=allocated, date_str=new.get('date'),
+                    allocation_id=job.step_id('allocation'))
+
+    @staticmethod
+    def _expense_version_keys(*transactions):
+        """Değişen gider kategorilerinin sürüm anahtarları (bütçe önerisi önbelleği için)."""
+        return {expense_version_key(t['category']) for t in transactions
+                if t and t.get('type') == 'expense' and t.get('category')}
+
     @staticmethod
     def list_transactions(user_id, start_date_str, end_date_str, type=None, account=None):
         """
@@ -23,38 +84,16 @@ class TransactionService:
             if db is None:
                 raise Exception("Firestore client (db) is not initialized.")
 
-            transactions_ref = db.collection('transactions')
-            # Temel filtreler
-            query = (
-                transactions_ref
-                .where(filter=FieldFilter('userId', '==', user_id))
-                .where(filter=FieldFilter('date', '>=', start_date_str))
-                .where(filter=FieldFilter('date', '<=', end_date_str))
-                .where(filter=FieldFilter('isDeleted', '==', False))
-            )
-
-            # Opsiyonel filtreler
-            if type:
-                query = query.where(filter=FieldFilter('type', '==', type))
-            if account:
-                query = query.where(filter=FieldFilter('account', '==', account))
-
-            # Sıralama
-            query = query.order_by('date', direction=firestore.Query.DESCENDING).order_by('createdAt', direction=firestore.Query.DESCENDING)
-            
-            docs = list(query.stream())
-            transactions_list = []
-            for doc in docs:
-                data = doc.to_dict()
-                data['id'] = doc.id
-                transactions_list.append(data)
-
-            print(f"Fetched {len(transactions_list)} non-deleted transactions for user {user_id}")
+            # Arşivlenmiş aylar bucket'lardan, kalanı canlı sorgudan (bkz. TransactionArchiveService)
+            transactions_list = TransactionArchiveService.fetch(
+                user_id, start_date_str, end_date_str, filters={'type': type, 'account': account})
+            transactions_list.sort(key=lambda t: (t.get('date') or '', t.get('createdAt') or ''), reverse=True)
+
+            logger.debug("Fetched %s non-deleted transactions for user %s", len(transactions_list), user_id)
             return {"success": True, "transactions": transactions_list}, 200
 
         except Exception as e:
-            print(f"Error listing transactions for user {user_id}: {e}")
-            traceback.print_exc()
+            logger.exception("Error listing transactions for user %s: %s", user_id, e)
             return {"success": False, "error": f"An internal error occurred: {str(e)}"}, 500
 
     @staticmethod
@@ -69,13 +108,6 @@ class TransactionService:
                     return {"success": False, "error": f"Missing required field: {field}"}, 400
 
             doc_ref = db.collection('transactions').document()
-            amount = float(data.get('amount', 0.0))
-            income_allocation_pct = data.get('incomeAllocationPct')
-            allocated_to_savings = 0.0
-
-            if data['type'] == 'income' and income_allocation_pct is not None and int(income_allocation_pct) > 0:
-                allocated_to_savings = round(amount * (int(income_allocation_pct) / 100), 2)
-
             transaction_data = data.copy()
             transaction_data.update({
                 'isDeleted': False,
@@ -83,80 +115,59 @@ class TransactionService:
                 'updatedAt': datetime.now(timezone.utc).isoformat()
             })
             doc_ref.set(transaction_data)
-            print(f"TRANSACTION_SERVICE: Created transaction with ID {doc_ref.id}")
-
-            BalanceService.update_balance_on_new_transaction(
-                user_id=data['userId'],
-                account_name=data['account'],
-                amount=amount,
-                transaction_type=data['type'],
-                allocated_to_savings=allocated_to_savings
-            )
-            
-            if allocated_to_savings > 0:
-                SavingsService.create_savings_allocation(
-                    user_id=data['userId'], transaction_id=doc_ref.id,
-                    amount=allocated_to_savings, date_str=data['date']
-                )
+            TransactionArchiveService.record_write(data['userId'], doc_ref.id, new=transaction_data)
+            data_versions.bump(data['userId'], 'transactions', *TransactionService._expense_version_keys(transaction_data))
+            logger.debug("TRANSACTION_SERVICE: Created transaction with ID %s", doc_ref.id)
+
+            # Bakiye ve kumbara etkileri arka planda (bkz. _apply_effects_job)
+            TransactionService._enqueue_effects(data['userId'], doc_ref.id, transaction_data['createdAt'],
+                                                new=transaction_data)
+            TransactionSearchService.record_write(data['userId'], doc_ref.id, transaction_data['createdAt'],
+                                                  new=transaction_data)
 
             transaction_data['id'] = doc_ref.id
             return {"success": True, "transaction": transaction_data}, 201
 
         except Exception as e:
-            traceback.print_exc()
+            logger.exception("Unhandled error in create_transaction")
             return {"success": False, "error": f"Internal server error: {str(e)}"}, 500
 
     @staticmethod
     def update_transaction(transaction_id, data):
         """
-        Mevcut işlemi günceller; BalanceService ve SavingsService metotlarını çağırır.
+        Mevcut işlemi günceller; bakiye/kumbara etkisinin düzeltilmesi arka plan işine bırakılır.
         """
         try:
+            cache = get_request_cache()
             doc_ref = db.collection('transactions').document(transaction_id)
-            existing_doc = doc_ref.get()
-            if not existing_doc.exists:
+            old_data = cache.get(doc_ref)
+            if old_data is None:
                 return {"success": False, "error": "Transaction not found"}, 404
 
-            old_data = existing_doc.to_dict()
             user_id = old_data.get('userId')
-
-            # 1. ESKİ İŞLEMİN ETKİLERİNİ GERİ AL
-            BalanceService._revert_transaction_effect(user_id, old_data)
-            if old_data.get('type') == 'income' and old_data.get('incomeAllocationPct', 0) > 0:
-                SavingsService.delete_savings_allocation_by_transaction_id(user_id, transaction_id)
-            
-            # 2. YENİ VERİYİ OLUŞTUR VE KAYDET
-            new_amount = float(data.get('amount', old_data.get('amount')))
-            new_type = data.get('type', old_data.get('type'))
-            new_income_pct = data.get('incomeAllocationPct', old_data.get('incomeAllocationPct'))
-
-            new_allocated = 0.0
-            if new_type == 'income' and new_income_pct is not None and int(new_income_pct) > 0:
-                new_allocated = round(new_amount * (int(new_income_pct) / 100), 2)
-            
             update_payload = old_data.copy()
             update_payload.update(data)
             update_payload['updatedAt'] = datetime.now(timezone.utc).isoformat()
             
-            doc_ref.update(update_payload)
-            
-            # 3. YENİ İŞLEMİN ETKİLERİNİ UYGULA
-            new_data = doc_ref.get().to_dict()
-            BalanceService._apply_transaction_effect(user_id, new_data)
-
-            if new_allocated > 0:
-                # Not: Bu basitçe yenisini oluşturur. Daha karmaşık senaryoda update mantığı gerekir.
-                SavingsService.create_savings_allocation(
-                    user_id=user_id, transaction_id=transaction_id,
-                    amount=new_allocated, date_str=new_data.get('date')
-                )
+            cache.update(doc_ref, update_payload)
+            TransactionArchiveService.record_write(user_id, transaction_id, old=old_data, new=update_payload)
+            data_versions.bump(user_id, 'transactions',
+                               *TransactionService._expense_version_keys(old_data, update_payload))
+
+            # Eski etkinin geri alınması ve yenisinin uygulanması tek arka plan işinde, sırayla
+            new_data = cache.get(doc_ref)
+            if not old_data.get('isDeleted'):
+                TransactionService._enqueue_effects(user_id, transaction_id, update_payload['updatedAt'],
+                                                    old=old_data, new=new_data)
+            TransactionSearchService.record_write(user_id, transaction_id, update_payload['updatedAt'],
+                                                  old=old_data, new=new_data)
             
-            updated_doc = doc_ref.get().to_dict()
+            updated_doc = cache.get(doc_ref)
             updated_doc['id'] = transaction_id
             return {"success": True, "transaction": updated_doc}, 200
 
         except Exception as e:
-            traceback.print_exc()
+            logger.exception("Unhandled error in update_transaction")
             return {"success": False, "error": f"Internal server error: {str(e)}"}, 500
 
     @staticmethod
@@ -165,24 +176,30 @@ class TransactionService:
         Bir işlemi silinmiş olarak işaretler ve ilgili servisleri tetikler.
         """
         try:
+            cache = get_request_cache()
             doc_ref = db.collection('transactions').document(transaction_id)
-            doc = doc_ref.get()
-            if not doc.exists: return {"success": False, "error": "Transaction not found"}, 404
+            txn = cache.get(doc_ref)
+            if txn is None: return {"success": False, "error": "Transaction not found"}, 404
             
-            txn = doc.to_dict()
             if txn.get('userId') != user_id: return {"success": False, "error": "Not authorized"}, 403
             if txn.get('isDeleted') == True: return {"success": True, "message": "Transaction already deleted."}, 200
 
-            # 1. Bakiyeleri ve tasarrufları geri al
-            BalanceService._revert_transaction_effect(user_id, txn)
-            if txn.get('type') == 'income' and txn.get('incomeAllocationPct', 0) > 0:
-                SavingsService.delete_savings_allocation_by_transaction_id(user_id, transaction_id)
+            # 1. İşlemi silinmiş olarak işaretle
+            deleted_at = datetime.now(timezone.utc).isoformat()
+            cache.update(doc_ref, {'isDeleted': True, 'updatedAt': deleted_at})
+            TransactionArchiveService.record_write(user_id, transaction_id, old=txn,
+                                                   new={**txn, 'isDeleted': True, 'updatedAt': deleted_at})
+            data_versions.bump(user_id, 'transactions', *TransactionService._expense_version_keys(txn))
 
-            # 2. İşlemi silinmiş olarak işaretle
-            doc_ref.update({'isDeleted': True, 'updatedAt': datetime.now(timezone.utc).isoformat()})
+            # 2. Bakiye ve kumbara etkisinin geri alınması arka planda
+            TransactionService._enqueue_effects(user_id, transaction_id, deleted_at, old=txn)
+            TransactionSearchService.record_write(user_id, transaction_id, deleted_at, old=txn)
             
             return {"success": True, "message": "Transaction deleted successfully."}, 200
 
         except Exception as e:
-            traceback.print_exc()
-            return {"success": False, "error": f"Internal server error: {str(e)}"}, 500
\ No newline at end of file
+            logger.exception("Unhandled error in delete_transaction")
+            return {"success": False, "error": f"Internal server error: {str(e)}"}, 500
+
+
+job_queue.register('transactions.apply_effects', TransactionService._apply_effects_job)
@@ -1,7 +1,11 @@
 # File: flask_api/app/services/user_service.py
 from app.utils.firebase_config import db
 from datetime import datetime
-import traceback
+from app.utils.request_cache import get_request_cache
+from app.utils import data_versions
+from app.utils.logging_config import get_logger
+
+logger = get_logger(__name__)
 
 class UserService:
     @staticmethod
@@ -19,18 +23,18 @@ class UserService:
                 'updatedAt': datetime.utcnow().isoformat() + "Z"
             }
             user_ref.set(profile_data)
-            print(f"User profile created in Firestore for UID: {uid}")
+            data_versions.bump(uid, 'profile')
+            logger.debug("User profile created in Firestore for UID: %s", uid)
             return {"success": True, "message": "User profile created successfully.", "uid": uid}
         except Exception as e:
-            print(f"Error creating user profile in Firestore for UID {uid}: {e}")
-            traceback.print_exc()
+            logger.exception("Error creating user profile in Firestore for UID %s: %s", uid, e)
             raise Exception(f"Failed to create user profile due to Firestore error: {str(e)}")
 
     @staticmethod
     def get_user_profile(uid):
         try:
             if db is None:
-                print("UserService: Firestore client (db) is None.")
+                logger.error("UserService: Firestore client (db) is None.")
                 raise Exception("Database service not available.")
             user_ref = db.collection('users').document(uid)
             user_doc = user_ref.get()
@@ -41,14 +45,13 @@ class UserService:
                     profile_data['createdAt'] = profile_data['createdAt'].isoformat() + "Z"
                 if 'updatedAt' in profile_data and not isinstance(profile_data['updatedAt'], str):
                     profile_data['updatedAt'] = profile_data['updatedAt'].isoformat() + "Z"
-                print(f"User profile fetched from Firestore for UID: {uid}")
+                logger.debug("User profile fetched from Firestore for UID: %s", uid)
                 return {"success": True, "profile": profile_data}
             else:
-                print(f"No user profile found in Firestore for UID: {uid}")
+                logger.debug("No user profile found in Firestore for UID: %s", uid)
                 return {"success": False, "error": "User profile not found", "status_code": 404}
         except Exception as e:
-            print(f"Error fetching user profile from Firestore for UID {uid}: {e}")
-            traceback.print_exc()
+            logger.exception("Error fetching user profile from Firestore for UID %s: %s", uid, e)
             raise Exception(f"Failed to fetch user profile due to Firestore error: {str(e)}")
 
     # NEW METHOD TO UPDATE USER PROFILE
@@ -56,10 +59,13 @@ class UserService:
     def update_user_profile(uid, data_to_update):
         try:
             if db is None:
-                print("UserService: Firestore client (db) is None.")
+                logger.error("UserService: Firestore client (db) is None.")
                 raise Exception("Database service not available.")
 
+            cache = get_request_cache()
             user_ref = db.collection('users').document(uid)
+            if cache.get(user_ref) is None:
+                return {"success": False, "error": "User profile not found.", "status_code": 404}
 
             # Prepare data for update, only including fields that are allowed to be updated
             # and are present in the input.
@@ -80,17 +86,13 @@ class UserService:
 
             update_payload['updatedAt'] = datetime.utcnow().isoformat() + "Z"
 
-            user_ref.update(update_payload)
-            print(f"User profile updated in Firestore for UID: {uid} with data: {update_payload}")
+            cache.update(user_ref, update_payload)
+            data_versions.bump(uid, 'profile')
+            logger.debug("User profile updated in Firestore for UID: %s with data: %s", uid, update_payload)
 
-            # Fetch the updated profile to return it
-            updated_doc = user_ref.get()
-            if updated_doc.exists:
-                return {"success": True, "message": "Profile updated successfully.", "profile": updated_doc.to_dict()}
-            else: # Should not happen if update was successful on existing doc
-                return {"success": False, "error": "Profile not found after update attempt."}, 404
+            # Updated profile comes from the request cache, no second read
+            return {"success": True, "message": "Profile updated successfully.", "profile": cache.get(user_ref)}
 
         except Exception as e:
-            print(f"Error updating user profile in Firestore for UID {uid}: {e}")
-            traceback.print_exc()
+            logger.exception("Error updating user profile in Firestore for UID %s: %s", uid, e)
             raise Exception(f"Failed to update user profile due to Firestore error: {str(e)}")
\ No newline at end of file
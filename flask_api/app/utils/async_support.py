@@ -0,0 +1,31 @@
+# File: flask_api/app/utils/async_support.py
+import asyncio
+import contextvars
+import sys
+
+
+def _gevent_patched():
+    monkey = sys.modules.get('gevent.monkey')
+    return monkey is not None and monkey.is_module_patched('socket')
+
+
+def run_coroutine(coro):
+    """
+    Async view'ların coroutine'ini senkron worker içinde çalıştırır.
+
+    gevent worker'larında tüm greenlet'ler aynı OS thread'ini paylaştığı için
+    thread başına tek event loop kuralı eşzamanlı istekleri çakıştırır; bu
+    durumda her istek kendi event loop'unu gevent'in gerçek thread havuzunda
+    çalıştırır ve hub diğer istekleri taşımaya devam eder. İstek context'i
+    (flask.g, request) contextvars kopyasıyla taşınır.
+    """
+    if _gevent_patched():
+        import gevent
+        ctx = contextvars.copy_context()
+        return gevent.get_hub().threadpool.apply(ctx.run, (asyncio.run, coro))
+    return asyncio.run(coro)
+
+
+def init_async(app):
+    # Flask'ın varsayılan asgiref köprüsü yerine run_coroutine kullanılır
+    app.async_to_sync = lambda func: (lambda *args, **kwargs: run_coroutine(func(*args, **kwargs)))
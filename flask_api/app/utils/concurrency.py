@@ -0,0 +1,63 @@
+# File: flask_api/app/utils/concurrency.py
+import contextvars
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+# Bir istek içindeki bağımsız Firestore / ağ çağrıları için paylaşılan thread havuzu.
+IO_POOL_SIZE = int(os.getenv('IO_POOL_SIZE', '16'))
+
+_executor = None
+_executor_pid = None
+_executor_lock = threading.Lock()
+
+
+def _get_executor():
+    # Gunicorn fork'undan sonra havuz her worker'da yeniden oluşturulur
+    global _executor, _executor_pid
+    pid = os.getpid()
+    if _executor is None or _executor_pid != pid:
+        with _executor_lock:
+            if _executor is None or _executor_pid != pid:
+                _executor = ThreadPoolExecutor(max_workers=IO_POOL_SIZE, thread_name_prefix='io')
+                _executor_pid = pid
+    return _executor
+
+
+def _prepare_request_state():
+    # Lazy oluşturulan istek nesneleri thread'ler arasında tek kopya olsun diye
+    # iş dağıtılmadan önce oluşturulur.
+    from .request_cache import get_request_cache
+    from .firestore_metrics import current_request_metrics
+    get_request_cache()
+    current_request_metrics()
+
+
+def submit(fn, *args, **kwargs):
+    """
+    fn'i havuzda çalıştırır ve Future döner. Çağıranın context'i (flask.g,
+    request, istek önbelleği ve metrikleri) kopyalanarak taşınır.
+    """
+    _prepare_request_state()
+    ctx = contextvars.copy_context()
+    return _get_executor().submit(ctx.run, fn, *args, **kwargs)
+
+
+def run_parallel(calls):
+    """
+    {isim: argümansız çağrılabilir} sözlüğündeki çağrıları eşzamanlı çalıştırır
+    ve {isim: sonuç} döner. Bir çağrı hata verirse diğerleri bitince ilk hata
+    yeniden fırlatılır. Tek çağrı havuza gönderilmeden doğrudan çalıştırılır.
+    """
+    if IO_POOL_SIZE <= 1 or len(calls) <= 1:
+        return {name: call() for name, call in calls.items()}
+    futures = {name: submit(call) for name, call in calls.items()}
+    results, first_error = {}, None
+    for name, future in futures.items():
+        try:
+            results[name] = future.result()
+        except Exception as e:
+            first_error = first_error or e
+    if first_error is not None:
+        raise first_error
+    return results
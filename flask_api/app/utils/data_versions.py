@@ -0,0 +1,129 @@
+# File: flask_api/app/utils/data_versions.py
+import hashlib
+import os
+from datetime import datetime, timezone
+from functools import wraps
+from flask import g, request, has_request_context, make_response
+from firebase_admin import firestore
+from . import firebase_config
+from .logging_config import get_logger
+
+logger = get_logger(__name__)
+
+# Kullanıcı başına koleksiyon sürümleri: user_data_versions/{userId} -> {koleksiyon: int}
+VERSIONS_COLLECTION = 'user_data_versions'
+CONDITIONAL_GET_ENABLED = os.getenv('CONDITIONAL_GET_ENABLED', '1') == '1'
+# Yanıt şekli değiştiğinde (deploy) eski ETag'lerin geçersiz olması için
+ETAG_SALT = os.getenv('ETAG_SALT', os.getenv('APP_VERSION', '1'))
+
+
+def _versions_ref(user_id):
+    return firebase_config.db.collection(VERSIONS_COLLECTION).document(user_id)
+
+
+def scoped_key(collection, scope):
+    """
+    Bir koleksiyonun alt kümesi için sürüm anahtarı (ör. tek kategorinin
+    giderleri). Kapsam değeri serbest metin olabileceğinden (nokta, '/')
+    alan adına özetlenerek çevrilir.
+    """
+    digest = hashlib.sha1(str(scope).encode('utf-8')).hexdigest()[:12]
+    return f"{collection}_{digest}"
+
+
+def _write_bumps(user_id, collections):
+    payload = {name: firestore.Increment(1) for name in collections}
+    payload['updatedAt'] = datetime.now(timezone.utc).isoformat()
+    _versions_ref(user_id).set(payload, merge=True)
+
+
+def bump(user_id, *collections):
+    """
+    Kullanıcının verilen koleksiyonlarının sürümünü artırır. İstek içinde
+    yapılan tüm artışlar birleştirilir ve yanıt dönmeden önce tek yazmayla
+    kaydedilir; istek dışında (job, script) hemen yazılır.
+    """
+    if not user_id or not collections:
+        return
+    if has_request_context():
+        pending = g.get('_pending_version_bumps')
+        if pending is None:
+            pending = g._pending_version_bumps = {}
+        pending.setdefault(user_id, set()).update(collections)
+        return
+    try:
+        _write_bumps(user_id, collections)
+    except Exception as e:
+        logger.warning("DATA_VERSIONS: Failed to bump %s for user %s: %s", collections, user_id, e)
+
+
+def flush_pending():
+    pending = g.pop('_pending_version_bumps', None)
+    if not pending:
+        return
+    for user_id, collections in pending.items():
+        try:
+            _write_bumps(user_id, sorted(collections))
+        except Exception as e:
+            # Yazma başarısızsa sonraki yazmaya kadar eski ETag geçerli kalabilir
+            logger.exception("DATA_VERSIONS: Failed to bump %s for user %s: %s", sorted(collections), user_id, e)
+
+
+def get_versions(user_id):
+    """Kullanıcının koleksiyon sürümleri (tek döküman okuması, istek boyunca saklanır)."""
+    cache = g.setdefault('_data_versions', {}) if has_request_context() else {}
+    if user_id not in cache:
+        snapshot = _versions_ref(user_id).get()
+        cache[user_id] = (snapshot.to_dict() or {}) if snapshot.exists else {}
+    return cache[user_id]
+
+
+def compute_etag(user_id, collections, versions):
+    # Sürümler + tam URL (query string dahil) + gün: varsayılan tarih aralıkları
+    # güne bağlı olduğundan gün değişince ETag de değişir.
+    parts = [ETAG_SALT, user_id, request.full_path, datetime.now().strftime('%Y-%m-%d')]
+    parts += [f"{name}={int(versions.get(name, 0) or 0)}" for name in collections]
+    return hashlib.sha1('|'.join(parts).encode('utf-8')).hexdigest()
+
+
+def conditional_get(*collections, user_id_arg='userId'):
+    """
+    GET route dekoratörü. ETag, kullanıcının ilgili koleksiyon sürümlerinden
+    hesaplanır; If-None-Match eşleşirse view ve sorguları hiç çalıştırılmadan
+    304 döner (tek bir döküman okuması).
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            user_id = kwargs.get(user_id_arg) or request.args.get(user_id_arg)
+            if not CONDITIONAL_GET_ENABLED or request.method != 'GET' or not user_id:
+                return view(*args, **kwargs)
+            try:
+                etag = compute_etag(user_id, collections, get_versions(user_id))
+            except Exception as e:
+                logger.warning("DATA_VERSIONS: Version lookup failed for user %s: %s", user_id, e)
+                return view(*args, **kwargs)
+
+            if request.if_none_match.contains_weak(etag):
+                response = make_response('', 304)
+                response.set_etag(etag, weak=True)
+                return response
+
+            response = make_response(view(*args, **kwargs))
+            if response.status_code == 200:
+                response.set_etag(etag, weak=True)
+            return response
+        return wrapper
+    return decorator
+
+
+def init_data_versions(app):
+    @app.after_request
+    def flush_version_bumps(response):
+        flush_pending()
+        return response
+
+    @app.teardown_request
+    def flush_version_bumps_on_error(exc):
+        # after_request'e ulaşmayan (hata ile biten) isteklerde kalan artışlar
+        flush_pending()
@@ -3,6 +3,10 @@ import firebase_admin
 from firebase_admin import credentials, firestore
 import os
 from dotenv import load_dotenv
+from .firestore_metrics import InstrumentedClient
+from .logging_config import get_logger
+
+logger = get_logger(__name__)
 
 # Load environment variables from .env file
 load_dotenv(dotenv_path=os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), '.env'))
@@ -10,8 +14,36 @@ load_dotenv(dotenv_path=os.path.join(os.path.dirname(os.path.dirname(os.path.dir
 
 db = None
 
+
+def _instrument(client):
+    if os.getenv('FIRESTORE_INSTRUMENTATION', '1') == '1':
+        # Okuma/yazma/sorgu sayıları ve gecikmeleri endpoint bazında toplanır
+        return InstrumentedClient(client)
+    return client
+
+
+def use_client(client):
+    """
+    Servislerin kullanacağı istemciyi doğrudan atar (ör. in-memory backend).
+    Servis modülleri `db`'yi import anında bağladığı için blueprint'ler
+    import edilmeden önce çağrılmalıdır.
+    """
+    global db
+    db = _instrument(client)
+    logger.info("Firestore client set to %s.", type(client).__name__)
+
+
 def initialize_firebase_admin():
     global db
+    if os.getenv('FIRESTORE_BACKEND', 'firestore') == 'memory':
+        # Kimlik bilgisi gerektirmeyen süreç içi Firestore (yerel geliştirme / benchmark)
+        from .memory_firestore import MemoryFirestoreClient
+        from .firestore_indexes import INDEX_VALIDATION_ENABLED, IndexValidator
+        # FIRESTORE_INDEX_VALIDATION=1: firestore.indexes.json'da olmayan sorgular reddedilir
+        validator = IndexValidator() if INDEX_VALIDATION_ENABLED else None
+        use_client(MemoryFirestoreClient(query_validator=validator))
+        return True
+
     if not firebase_admin._apps: # Check if already initialized
         cred_path = os.getenv('GOOGLE_APPLICATION_CREDENTIALS')
         if not cred_path:
@@ -28,10 +60,10 @@ def initialize_firebase_admin():
         try:
             cred = credentials.Certificate(absolute_cred_path)
             firebase_admin.initialize_app(cred)
-            print("Firebase Admin SDK initialized successfully.")
+            logger.info("Firebase Admin SDK initialized successfully.")
         except Exception as e:
-            print(f"Error initializing Firebase Admin SDK: {e}")
+            logger.error("Error initializing Firebase Admin SDK: %s", e)
             raise
 
-    db = firestore.client() # Get Firestore client
-    print("Firestore client obtained.")
\ No newline at end of file
+    db = _instrument(firestore.client()) # Get Firestore client
+    logger.info("Firestore client obtained.")
\ No newline at end of file
@@ -0,0 +1,319 @@
+# File: flask_api/app/utils/firestore_indexes.py
+"""
+Servislerin attığı Firestore sorgularının kaydı, bu kayıttan üretilen index
+manifesti (firestore.indexes.json) ve sorgu planı doğrulayıcısı.
+
+    python -m app.utils.firestore_indexes           # manifesti yeniden üret
+    python -m app.utils.firestore_indexes --check   # manifest kayıtla uyumlu mu?
+
+Servise yeni bir sorgu (ya da mevcut sorguya yeni filtre/sıralama) eklenince
+QUERY_REGISTRY'ye de eklenir ve manifest yeniden üretilir; yayın
+`firebase deploy --only firestore:indexes` ile yapılır.
+
+Memory backend'de FIRESTORE_INDEX_VALIDATION=1 iken manifestin karşılamadığı
+her sorgu, gerçek Firestore'daki gibi FailedPrecondition ile reddedilir;
+eksik index production'da 500 olarak değil geliştirmede/CI'da yakalanır
+(bkz. benchmarks/check_indexes.py).
+"""
+import argparse
+import itertools
+import json
+import os
+import sys
+from collections import namedtuple
+
+try:
+    from google.api_core.exceptions import FailedPrecondition as _FailedPrecondition
+except ImportError:  # pragma: no cover
+    class _FailedPrecondition(Exception):
+        pass
+
+MANIFEST_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))),
+                             'firestore.indexes.json')
+INDEX_VALIDATION_ENABLED = os.getenv('FIRESTORE_INDEX_VALIDATION', '0') == '1'
+
+ASC, DESC = 'ASCENDING', 'DESCENDING'
+EQUALITY_OPS = {'==', 'in'}
+RANGE_OPS = {'<', '<=', '>', '>=', '!=', 'not-in'}
+
+# equality: her zaman uygulanan eşitlik filtreleri
+# optional: isteğe bağlı eşitlik filtreleri (her alt küme ayrı bir sorgu şeklidir)
+# range:    eşitsizlik filtresi uygulanan alan (tarih aralığı, updatedAt > imleç)
+# orders:   açık order_by'lar, (alan, yön)
+QuerySpec = namedtuple('QuerySpec', 'name collection equality optional range orders collection_group')
+QuerySpec.__new__.__defaults__ = ((), (), None, (), False)
+
+
+class MissingIndexError(_FailedPrecondition):
+    pass
+
+
+# --- kayıt ---
+
+def _sync_delta(collection):
+    return QuerySpec(f'SyncService._fetch_changed[{collection}]', collection, ('userId',), range='updatedAt')
+
+
+QUERY_REGISTRY = [
+    # transactions
+    # liste, dashboard ve bütçe önerisi: arşivlenmemiş aylar için canlı sorgu (sıralama bellekte)
+    QuerySpec('TransactionArchiveService.fetch', 'transactions', ('userId', 'isDeleted'),
+              optional=('type', 'account'), range='date'),
+    QuerySpec('TransactionArchiveService.fetch[expenses]', 'transactions',
+              ('userId', 'isDeleted', 'type', 'category'), range='date'),
+    QuerySpec('TransactionArchiveService.compact_user', 'transactions', ('userId', 'isDeleted'), range='date'),
+    QuerySpec('TransactionArchiveService.compact_user[changed]', 'transactions', ('userId',), range='updatedAt'),
+    QuerySpec('SyncService._fetch_all[transactions]', 'transactions', ('userId', 'isDeleted')),
+    QuerySpec('TransactionSearchService.rebuild_user', 'transactions', ('userId', 'isDeleted')),
+    QuerySpec('TransactionSearchService._newest_matches', 'transactions', ('userId', 'isDeleted'),
+              orders=(('date', DESC), ('createdAt', DESC))),
+    QuerySpec('TransactionSearchService.rebuild_user[changed]', 'transactions', ('userId',), range='updatedAt'),
+    _sync_delta('transactions'),
+
+    # user_accounts + bakiye shard'ları
+    QuerySpec('AccountService.list_accounts', 'user_accounts', ('userId', 'isArchived'), orders=(('accountName', ASC),)),
+    QuerySpec('BalanceService._get_account_ref', 'user_accounts', ('accountName', 'userId')),
+    QuerySpec('InvestmentService.get_portfolio_summary[accounts]', 'user_accounts', ('userId', 'accountType')),
+    QuerySpec('SyncService._fetch_all[accounts]', 'user_accounts', ('userId', 'isArchived')),
+    _sync_delta('user_accounts'),
+    QuerySpec('AccountService.list_accounts[balance_shards]', 'balance_shards', ('userId',), collection_group=True),
+    QuerySpec('SyncService._fetch_account_changes[balance_shards]', 'balance_shards', ('userId',),
+              range='updatedAt', collection_group=True),
+
+    # user_defined_categories
+    QuerySpec('CategoryService.list_categories', 'user_defined_categories', ('userId', 'isArchived'),
+              optional=('categoryType',), orders=(('categoryName', ASC),)),
+    QuerySpec('CategoryService.create_category[duplicate]', 'user_defined_categories',
+              ('userId', 'categoryType', 'categoryName', 'isArchived')),
+    QuerySpec('SyncService._fetch_all[categories]', 'user_defined_categories', ('userId', 'isArchived')),
+    _sync_delta('user_defined_categories'),
+
+    # budgets
+    QuerySpec('BudgetService.list_budgets', 'budgets', ('userId', 'period', 'year', 'month'), orders=(('category', ASC),)),
+    QuerySpec('BudgetService.create_or_update_budget[existing]', 'budgets', ('userId', 'category', 'period', 'year', 'month')),
+    QuerySpec('SyncService._fetch_all[budgets]', 'budgets', ('userId',)),
+    _sync_delta('budgets'),
+
+    # savings
+    QuerySpec('SavingsService.get_user_savings_allocations', 'savings_allocations', ('userId',),
+              optional=('source',), range='date', orders=(('date', DESC), ('createdAt', DESC))),
+    QuerySpec('SavingsService.get_user_savings_allocations[no dates]', 'savings_allocations', ('userId',),
+              optional=('source',), orders=(('date', DESC), ('createdAt', DESC))),
+    QuerySpec('SavingsService.delete_savings_allocation_by_transaction_id', 'savings_allocations', ('userId', 'transactionId')),
+    QuerySpec('SyncService._fetch_all[allocations]', 'savings_allocations', ('userId',)),
+    _sync_delta('savings_allocations'),
+    QuerySpec('SavingsService.list_goals', 'savings_goals', ('userId', 'isActive'), orders=(('targetDate', ASC),)),
+    QuerySpec('SyncService._fetch_all[goals]', 'savings_goals', ('userId',)),
+    _sync_delta('savings_goals'),
+
+    # yatırımlar
+    QuerySpec('InvestmentService._recalculate_holding[transactions]', 'investment_transactions', ('accountId', 'assetSymbol'),
+              orders=(('date', ASC), ('createdAt', ASC))),
+    QuerySpec('InvestmentService.list_transactions', 'investment_transactions', ('userId',),
+              optional=('accountId', 'assetSymbol'), orders=(('date', DESC), ('createdAt', DESC))),
+    QuerySpec('InvestmentService.delete_holding[transactions]', 'investment_transactions', ('accountId', 'assetSymbol')),
+    QuerySpec('SyncService._fetch_all[investmentTransactions]', 'investment_transactions', ('userId',)),
+    _sync_delta('investment_transactions'),
+    QuerySpec('InvestmentService._recalculate_holding[holdings]', 'holdings', ('accountId', 'assetSymbol')),
+    QuerySpec('InvestmentService.get_portfolio_summary[holdings]', 'holdings', ('userId',)),
+    QuerySpec('InvestmentService.get_portfolio_summary[holdings by account]', 'holdings', ('accountId',)),
+    QuerySpec('rebuild_tax_lots.positions', 'investment_transactions', ('userId',)),
+
+    # realized_lots (vergi lotları)
+    QuerySpec('TaxLotService.realized_query', 'realized_lots', ('accountId', 'assetSymbol')),
+    QuerySpec('TaxLotService.get_realized_gains', 'realized_lots', ('userId',), optional=('accountId',),
+              range='sellDate'),
+
+    # bakiye defteri
+    QuerySpec('BalanceLedgerService._entries', 'balance_ledger', ('accountId',), range='date'),
+    QuerySpec('BalanceLedgerService.user_entries_since', 'balance_ledger', ('userId',), range='date'),
+    QuerySpec('BalanceService.ensure_ledger[entries]', 'balance_ledger', ('accountId',)),
+    QuerySpec('BalanceService.ensure_ledger[transactions]', 'transactions', ('userId', 'account', 'isDeleted')),
+    QuerySpec('BalanceLedgerService._latest_snapshot', 'balance_snapshots', ('accountId',),
+              range='month', orders=(('month', DESC),)),
+    QuerySpec('BalanceLedgerService._snapshots_from', 'balance_snapshots', ('accountId',),
+              range='month', orders=(('month', DESC),)),
+    QuerySpec('BalanceLedgerService.user_snapshots', 'balance_snapshots', ('userId',), range='month'),
+
+    # transaction_search_terms (işlem arama index'i)
+    QuerySpec('TransactionSearchService._candidates', 'transaction_search_terms', ('userId',), range='term'),
+    QuerySpec('TransactionSearchService.rebuild_user[terms]', 'transaction_search_terms', ('userId',)),
+
+    # diğer
+    QuerySpec('SyncService._fetch_tombstones', 'sync_tombstones', ('userId',), range='updatedAt'),
+    QuerySpec('purge_deleted._expired[transactions]', 'transactions', ('isDeleted',), range='updatedAt'),
+    QuerySpec('purge_deleted._expired[accounts]', 'user_accounts', ('isArchived',), range='updatedAt'),
+    QuerySpec('purge_deleted._expired[categories]', 'user_defined_categories', ('isArchived',), range='updatedAt'),
+    QuerySpec('purge_deleted._expired[tombstones]', 'sync_tombstones', (), range='updatedAt'),
+    QuerySpec('finance_test_item_bank._load', 'FinanceTestItems'),
+]
+
+
+# --- sorgu şekli -> index ---
+
+def _dedupe(items):
+    return list(dict.fromkeys(items))
+
+
+def effective_orders(range_fields, orders):
+    """Firestore'un index'te kullandığı sıra: açık sıralamada olmayan eşitsizlik alanı başa eklenir."""
+    orders = list(orders)
+    ordered = {field for field, _ in orders}
+    prefix = [(field, ASC) for field in range_fields if field not in ordered]
+    return tuple(prefix + orders)
+
+
+def _index_key(collection, scope, equality, orders):
+    return (collection, scope, frozenset(equality), tuple(orders))
+
+
+def _requires_composite(equality, orders):
+    # Sadece eşitlik filtreleri: tek alan index'leri birleştirilerek (merge) karşılanır.
+    # Eşitlik yokken tek bir sıralama/eşitsizlik alanı: tek alan index'i yeter.
+    if not orders:
+        return False
+    return bool(equality) or len(orders) > 1
+
+
+def spec_shapes(spec):
+    """Kayıttaki bir sorgunun olası tüm şekilleri (isteğe bağlı filtrelerin alt kümeleri)."""
+    for size in range(len(spec.optional) + 1):
+        for extra in itertools.combinations(spec.optional, size):
+            yield tuple(spec.equality) + extra, effective_orders([spec.range] if spec.range else [], spec.orders)
+
+
+def build_manifest(registry=None):
+    """firestore.indexes.json içeriği (deterministik sıralı)."""
+    registry = QUERY_REGISTRY if registry is None else registry
+    indexes, overrides = {}, set()
+    for spec in registry:
+        scope = 'COLLECTION_GROUP' if spec.collection_group else 'COLLECTION'
+        for equality, orders in spec_shapes(spec):
+            if _requires_composite(equality, orders):
+                key = _index_key(spec.collection, scope, equality, orders)
+                indexes.setdefault(key, {
+                    'collectionGroup': spec.collection,
+                    'queryScope': scope,
+                    'fields': [{'fieldPath': field, 'order': ASC} for field in equality]
+                              + [{'fieldPath': field, 'order': direction} for field, direction in orders],
+                })
+            elif spec.collection_group:
+                # Collection group sorguları için tek alan index'leri varsayılan olarak yoktur
+                for field in _dedupe(list(equality) + [field for field, _ in orders]):
+                    overrides.add((spec.collection, field))
+
+    field_overrides = [{
+        'collectionGroup': collection,
+        'fieldPath': field,
+        'indexes': [
+            {'order': ASC, 'queryScope': 'COLLECTION'},
+            {'order': DESC, 'queryScope': 'COLLECTION'},
+            {'arrayConfig': 'CONTAINS', 'queryScope': 'COLLECTION'},
+            {'order': ASC, 'queryScope': 'COLLECTION_GROUP'},
+        ],
+    } for collection, field in sorted(overrides)]
+
+    ordered = sorted(indexes.values(), key=lambda ix: (ix['collectionGroup'], ix['queryScope'],
+                                                       [(f['fieldPath'], f['order']) for f in ix['fields']]))
+    return {'indexes': ordered, 'fieldOverrides': field_overrides}
+
+
+def load_manifest(path=MANIFEST_PATH):
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def write_manifest(manifest, path=MANIFEST_PATH):
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2, ensure_ascii=False)
+        f.write('\n')
+
+
+# --- doğrulayıcı ---
+
+def describe_shape(shape):
+    filters = ', '.join(f"{field} {op}" for field, op in shape['filters']) or '-'
+    orders = ', '.join(f"{field} {direction}" for field, direction in shape['orders']) or '-'
+    scope = 'collection group ' if shape['allDescendants'] else ''
+    return f"{scope}{shape['collectionGroup']} where [{filters}] order by [{orders}]"
+
+
+class IndexValidator:
+    """
+    MemoryFirestoreClient(query_validator=...) için sorgu planı kontrolü.
+    strict=True: karşılanmayan sorgu MissingIndexError fırlatır; False: sadece
+    `violations` listesine eklenir (rapor için).
+    """
+
+    def __init__(self, manifest=None, strict=True):
+        manifest = manifest if manifest is not None else load_manifest()
+        self.strict = strict
+        self.violations = []
+        self._indexes = set()
+        for ix in manifest.get('indexes', []):
+            fields = [(f['fieldPath'], f.get('order', ASC)) for f in ix['fields'] if f['fieldPath'] != '__name__']
+            # Eşitlik alanları başta ASC; sıralama kısmı ilk eşitlik-dışı alandan itibaren eşleştirilir
+            for split in range(len(fields) + 1):
+                equality = [field for field, order in fields[:split] if order == ASC]
+                if len(equality) == split:
+                    self._indexes.add(_index_key(ix['collectionGroup'], ix['queryScope'], equality, fields[split:]))
+        self._group_fields = {
+            (o['collectionGroup'], o['fieldPath'])
+            for o in manifest.get('fieldOverrides', [])
+            if any(i.get('queryScope') == 'COLLECTION_GROUP' for i in o.get('indexes', []))
+        }
+
+    def is_covered(self, shape):
+        collection = shape['collectionGroup']
+        scope = 'COLLECTION_GROUP' if shape['allDescendants'] else 'COLLECTION'
+        equality = _dedupe(field for field, op in shape['filters'] if op in EQUALITY_OPS)
+        range_fields = _dedupe(field for field, op in shape['filters'] if op in RANGE_OPS)
+        orders = effective_orders(range_fields, shape['orders'])
+
+        if not _requires_composite(equality, orders):
+            if scope == 'COLLECTION':
+                return True
+            fields = _dedupe(list(equality) + [field for field, _ in orders])
+            return all((collection, field) in self._group_fields for field in fields)
+        return _index_key(collection, scope, equality, orders) in self._indexes
+
+    def __call__(self, shape):
+        if self.is_covered(shape):
+            return
+        description = describe_shape(shape)
+        if description not in self.violations:
+            self.violations.append(description)
+        if self.strict:
+            raise MissingIndexError(
+                f"The query requires an index that is not in firestore.indexes.json: {description}. "
+                f"Add the query to QUERY_REGISTRY (app/utils/firestore_indexes.py) and regenerate the manifest."
+            )
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate or check firestore.indexes.json from QUERY_REGISTRY.")
+    parser.add_argument('--check', action='store_true', help='exit 1 if the manifest on disk is out of date')
+    parser.add_argument('--path', default=MANIFEST_PATH)
+    args = parser.parse_args(argv)
+
+    manifest = build_manifest()
+    if args.check:
+        try:
+            current = load_manifest(args.path)
+        except FileNotFoundError:
+            current = None
+        if current != manifest:
+            print(f"{args.path} is out of date; run `python -m app.utils.firestore_indexes`.", file=sys.stderr)
+            return 1
+        print(f"{args.path} is up to date ({len(manifest['indexes'])} composite indexes, "
+              f"{len(manifest['fieldOverrides'])} field overrides).")
+        return 0
+
+    write_manifest(manifest, args.path)
+    print(f"Wrote {args.path}: {len(manifest['indexes'])} composite indexes, "
+          f"{len(manifest['fieldOverrides'])} field overrides from {len(QUERY_REGISTRY)} registered queries.")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,602 @@
+# File: flask_api/app/utils/firestore_metrics.py
+import json
+import os
+import threading
+import time
+from flask import g, request, has_request_context, Response
+from .logging_config import get_logger
+
+logger = get_logger(__name__)
+
+# Bu süreyi aşan istekler "slow request" olarak loglanır (ms).
+SLOW_REQUEST_MS = float(os.getenv('SLOW_REQUEST_MS', '1000'))
+
+# Prometheus histogram kovaları (saniye)
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Çok process'li sunucuda (gunicorn worker'ları) her process sayaçlarını
+# METRICS_MULTIPROC_DIR dizinine en fazla bu sıklıkla (saniye) yazar.
+METRICS_FLUSH_SECONDS = float(os.getenv('METRICS_FLUSH_SECONDS', '1'))
+_ARCHIVE_FILE = 'metrics_archive.json'
+
+
+class _Histogram:
+    __slots__ = ('counts', 'total', 'count')
+
+    def __init__(self):
+        self.counts = [0] * len(LATENCY_BUCKETS)
+        self.total = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        for i, bound in enumerate(LATENCY_BUCKETS):
+            if value <= bound:
+                self.counts[i] += 1
+        self.total += value
+        self.count += 1
+
+
+class MetricsRegistry:
+    """
+    Süreç genelindeki sayaç ve histogramlar. Etiketler (label) tuple olarak
+    saklanır; /metrics çağrısında Prometheus metin formatına dönüştürülür.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters = {}
+        self._histograms = {}
+
+    def inc(self, name, labels, amount=1):
+        key = (name, labels)
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + amount
+
+    def observe(self, name, labels, value):
+        key = (name, labels)
+        with self._lock:
+            hist = self._histograms.get(key)
+            if hist is None:
+                hist = self._histograms[key] = _Histogram()
+            hist.observe(value)
+
+    def snapshot(self):
+        """JSON'a yazılabilir kopya (bkz. merge)."""
+        with self._lock:
+            return {
+                'counters': [[name, [list(p) for p in labels], value]
+                             for (name, labels), value in self._counters.items()],
+                'histograms': [[name, [list(p) for p in labels], list(hist.counts), hist.total, hist.count]
+                               for (name, labels), hist in self._histograms.items()],
+            }
+
+    def merge(self, snapshot):
+        """Başka bir process'in snapshot'ını bu kayda ekler."""
+        with self._lock:
+            for name, labels, value in snapshot.get('counters') or []:
+                key = (name, tuple(tuple(p) for p in labels))
+                self._counters[key] = self._counters.get(key, 0) + value
+            for name, labels, counts, total, count in snapshot.get('histograms') or []:
+                key = (name, tuple(tuple(p) for p in labels))
+                hist = self._histograms.get(key)
+                if hist is None:
+                    hist = self._histograms[key] = _Histogram()
+                hist.counts = [a + b for a, b in zip(hist.counts, counts)]
+                hist.total += total
+                hist.count += count
+
+    def clear(self):
+        with self._lock:
+            self._counters.clear()
+            self._histograms.clear()
+
+    @staticmethod
+    def _format_labels(labels, extra=()):
+        pairs = list(labels) + list(extra)
+        if not pairs:
+            return ''
+        body = ','.join(f'{k}="{str(v)}"' for k, v in pairs)
+        return '{' + body + '}'
+
+    def render(self):
+        lines = []
+        with self._lock:
+            counters = sorted(self._counters.items())
+            histograms = sorted(self._histograms.items())
+
+        seen = set()
+        for (name, labels), value in counters:
+            if name not in seen:
+                lines.append(f'# TYPE {name} counter')
+                seen.add(name)
+            lines.append(f'{name}{self._format_labels(labels)} {value}')
+
+        for (name, labels), hist in histograms:
+            if name not in seen:
+                lines.append(f'# TYPE {name} histogram')
+                seen.add(name)
+            for bound, count in zip(LATENCY_BUCKETS, hist.counts):
+                lines.append(f'{name}_bucket{self._format_labels(labels, [("le", bound)])} {count}')
+            lines.append(f'{name}_bucket{self._format_labels(labels, [("le", "+Inf")])} {hist.count}')
+            lines.append(f'{name}_sum{self._format_labels(labels)} {hist.total:.6f}')
+            lines.append(f'{name}_count{self._format_labels(labels)} {hist.count}')
+        return '\n'.join(lines) + '\n'
+
+
+registry = MetricsRegistry()
+
+
+# =========================================================
+# ÇOK PROCESS'Lİ TOPLAMA
+# =========================================================
+# Gunicorn'da her worker ayrı bir process'tir ve kendi registry'sini tutar;
+# /metrics'i hangi worker karşılarsa karşılasın tüm worker'ların toplamı
+# dönmelidir (yoksa sayaçlar worker'lar arasında zıplar, rate() bozulur).
+# Her worker registry'sini METRICS_MULTIPROC_DIR altında kendi dosyasına
+# yazar; /metrics dizindeki dosyaları toplar. Çıkmış worker'ların dosyaları
+# arşiv dosyasına eklenir, sayaçlar worker yeniden başlatılınca geri gitmez.
+# Dizin tanımlı değilse sadece bu process raporlanır.
+
+_process_file = None
+_last_flush = 0.0
+_flush_lock = threading.Lock()
+
+
+def multiprocess_dir():
+    return os.getenv('METRICS_MULTIPROC_DIR') or None
+
+
+def _own_file():
+    # Dosya adı process ömrü boyunca sabit ve benzersizdir; pid tekrar
+    # kullanılsa da çıkmış bir worker'ın dosyasıyla karışmaz
+    global _process_file
+    if _process_file is None:
+        _process_file = f"metrics_{os.getpid()}_{time.time_ns()}.json"
+    return _process_file
+
+
+def _after_fork():
+    # Fork'tan önce (ör. preload edilen master'da) sayılanlar çocukta tekrar sayılmasın
+    global _process_file, _last_flush
+    _process_file, _last_flush = None, 0.0
+    registry.clear()
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_after_fork)
+
+
+def _read_json(path):
+    try:
+        with open(path, encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _write_json(path, data):
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, 'w', encoding='utf-8') as f:
+        json.dump(data, f)
+    os.replace(tmp, path)
+
+
+def _process_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except OSError:
+        return True
+    return True
+
+
+def flush(force=False):
+    """Bu process'in sayaçlarını paylaşılan dizine yazar (METRICS_FLUSH_SECONDS'ta bir)."""
+    global _last_flush
+    directory = multiprocess_dir()
+    if not directory:
+        return
+    now = time.monotonic()
+    if not force and now - _last_flush < METRICS_FLUSH_SECONDS:
+        return
+    with _flush_lock:
+        _last_flush = now
+        path = os.path.join(directory, _own_file())
+        try:
+            _write_json(path, registry.snapshot())
+        except OSError as e:
+            logger.warning("METRICS: Could not write %s: %s", path, e)
+
+
+def _collect(directory):
+    """Dizin kilitliyken: çıkmış worker'ları arşive ekler, toplamı döner."""
+    own = _own_file()
+    files = {}
+    for name in os.listdir(directory):
+        if name.startswith('metrics_') and name.endswith('.json') and name not in (own, _ARCHIVE_FILE):
+            files[name] = int(name.split('_')[1])
+
+    archive_path = os.path.join(directory, _ARCHIVE_FILE)
+    archive = MetricsRegistry()
+    archive.merge(_read_json(archive_path) or {})
+    dead = [name for name, pid in files.items() if not _process_alive(pid)]
+    if dead:
+        for name in dead:
+            archive.merge(_read_json(os.path.join(directory, name)) or {})
+        _write_json(archive_path, archive.snapshot())
+        for name in dead:
+            os.remove(os.path.join(directory, name))
+
+    combined = MetricsRegistry()
+    combined.merge(archive.snapshot())
+    combined.merge(registry.snapshot())
+    for name in files.keys() - set(dead):
+        combined.merge(_read_json(os.path.join(directory, name)) or {})
+    return combined
+
+
+def render_all():
+    """/metrics çıktısı; çok process'li kurulumda tüm worker'ların toplamı."""
+    directory = multiprocess_dir()
+    if not directory:
+        return registry.render()
+    import fcntl
+    try:
+        with open(os.path.join(directory, 'metrics.lock'), 'a') as lock:
+            # Aynı anda iki scrape çıkmış bir worker'ı iki kez arşive eklemesin
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                return _collect(directory).render()
+            finally:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+    except OSError as e:
+        logger.warning("METRICS: Could not aggregate %s: %s", directory, e)
+        return registry.render()
+
+
+class RequestMetrics:
+    """Tek bir isteğin Firestore kullanım özeti."""
+
+    __slots__ = ('reads', 'writes', 'queries', 'documents', 'firestore_seconds', 'lock')
+
+    def __init__(self):
+        self.reads = 0
+        self.writes = 0
+        self.queries = 0
+        self.documents = 0
+        self.firestore_seconds = 0.0
+        self.lock = threading.Lock()
+
+    def as_dict(self):
+        return {
+            'reads': self.reads, 'writes': self.writes, 'queries': self.queries,
+            'documents': self.documents, 'firestoreMs': round(self.firestore_seconds * 1000, 2)
+        }
+
+
+def _current_labels():
+    if has_request_context():
+        return (('blueprint', request.blueprint or '-'), ('endpoint', request.endpoint or '-'))
+    return (('blueprint', '-'), ('endpoint', 'background'))
+
+
+def current_request_metrics():
+    if not has_request_context():
+        return None
+    metrics = g.get('_firestore_metrics')
+    if metrics is None:
+        metrics = g._firestore_metrics = RequestMetrics()
+    return metrics
+
+
+def record_operation(op, elapsed, reads=0, writes=0, documents=0):
+    """
+    Bir Firestore round trip'ini kaydeder.
+    op: 'get', 'get_all', 'query', 'commit', 'write'
+    """
+    labels = _current_labels()
+    op_labels = labels + (('op', op),)
+    registry.inc('firestore_operations_total', op_labels)
+    registry.observe('firestore_operation_duration_seconds', op_labels, elapsed)
+    if reads:
+        registry.inc('firestore_reads_total', labels, reads)
+    if writes:
+        registry.inc('firestore_writes_total', labels, writes)
+    if documents:
+        registry.inc('firestore_documents_returned_total', labels, documents)
+
+    metrics = current_request_metrics()
+    if metrics is not None:
+        with metrics.lock:
+            metrics.reads += reads
+            metrics.writes += writes
+            metrics.documents += documents
+            if op == 'query':
+                metrics.queries += 1
+            metrics.firestore_seconds += elapsed
+
+
+# =========================================================
+# FIRESTORE İSTEMCİ SARMALAYICILARI
+# =========================================================
+
+def _unwrap(obj):
+    return getattr(obj, '_wrapped', obj)
+
+
+class _Proxy:
+    __slots__ = ('_wrapped',)
+
+    def __init__(self, wrapped):
+        object.__setattr__(self, '_wrapped', wrapped)
+
+    def __getattr__(self, name):
+        return getattr(self._wrapped, name)
+
+    def __repr__(self):
+        return f'<{type(self).__name__} {self._wrapped!r}>'
+
+
+class InstrumentedSnapshot(_Proxy):
+    __slots__ = ()
+
+    @property
+    def reference(self):
+        return InstrumentedDocumentReference(self._wrapped.reference)
+
+
+class InstrumentedDocumentReference(_Proxy):
+    __slots__ = ()
+
+    def __eq__(self, other):
+        return _unwrap(other) == self._wrapped
+
+    def __hash__(self):
+        return hash(self._wrapped.path)
+
+    @property
+    def parent(self):
+        return InstrumentedCollectionReference(self._wrapped.parent)
+
+    def collection(self, collection_id):
+        return InstrumentedCollectionReference(self._wrapped.collection(collection_id))
+
+    def get(self, field_paths=None, transaction=None, **kwargs):
+        start = time.perf_counter()
+        snapshot = self._wrapped.get(field_paths=field_paths, transaction=_unwrap(transaction), **kwargs)
+        record_operation('get', time.perf_counter() - start, reads=1, documents=1 if snapshot.exists else 0)
+        return InstrumentedSnapshot(snapshot)
+
+    def _write(self, method, *args, **kwargs):
+        start = time.perf_counter()
+        result = getattr(self._wrapped, method)(*args, **kwargs)
+        record_operation('write', time.perf_counter() - start, writes=1)
+        return result
+
+    def set(self, *args, **kwargs):
+        return self._write('set', *args, **kwargs)
+
+    def create(self, *args, **kwargs):
+        return self._write('create', *args, **kwargs)
+
+    def update(self, *args, **kwargs):
+        return self._write('update', *args, **kwargs)
+
+    def delete(self, *args, **kwargs):
+        return self._write('delete', *args, **kwargs)
+
+
+class InstrumentedQuery(_Proxy):
+    __slots__ = ()
+
+    def _chain(self, method, *args, **kwargs):
+        args = [_unwrap(a) for a in args]
+        kwargs = {k: _unwrap(v) for k, v in kwargs.items()}
+        return InstrumentedQuery(getattr(self._wrapped, method)(*args, **kwargs))
+
+    def where(self, *args, **kwargs):
+        return self._chain('where', *args, **kwargs)
+
+    def order_by(self, *args, **kwargs):
+        return self._chain('order_by', *args, **kwargs)
+
+    def limit(self, *args, **kwargs):
+        return self._chain('limit', *args, **kwargs)
+
+    def offset(self, *args, **kwargs):
+        return self._chain('offset', *args, **kwargs)
+
+    def select(self, *args, **kwargs):
+        return self._chain('select', *args, **kwargs)
+
+    def start_at(self, *args, **kwargs):
+        return self._chain('start_at', *args, **kwargs)
+
+    def start_after(self, *args, **kwargs):
+        return self._chain('start_after', *args, **kwargs)
+
+    def end_at(self, *args, **kwargs):
+        return self._chain('end_at', *args, **kwargs)
+
+    def end_before(self, *args, **kwargs):
+        return self._chain('end_before', *args, **kwargs)
+
+    def stream(self, transaction=None, **kwargs):
+        """Sonuçlar tüketildikçe döner; round trip sonuç bitince kaydedilir."""
+        start = time.perf_counter()
+        count = 0
+        try:
+            for snapshot in self._wrapped.stream(transaction=_unwrap(transaction), **kwargs):
+                count += 1
+                yield InstrumentedSnapshot(snapshot)
+        finally:
+            # Boş sonuç da en az bir okuma olarak faturalanır
+            record_operation('query', time.perf_counter() - start, reads=max(count, 1), documents=count)
+
+    def get(self, transaction=None, **kwargs):
+        return list(self.stream(transaction=transaction, **kwargs))
+
+
+class InstrumentedCollectionReference(InstrumentedQuery):
+    __slots__ = ()
+
+    @property
+    def parent(self):
+        parent = self._wrapped.parent
+        return InstrumentedDocumentReference(parent) if parent is not None else None
+
+    def document(self, document_id=None):
+        if document_id is None:
+            return InstrumentedDocumentReference(self._wrapped.document())
+        return InstrumentedDocumentReference(self._wrapped.document(document_id))
+
+    def add(self, *args, **kwargs):
+        start = time.perf_counter()
+        update_time, ref = self._wrapped.add(*args, **kwargs)
+        record_operation('write', time.perf_counter() - start, writes=1)
+        return update_time, InstrumentedDocumentReference(ref)
+
+    def list_documents(self, *args, **kwargs):
+        return (InstrumentedDocumentReference(ref) for ref in self._wrapped.list_documents(*args, **kwargs))
+
+
+class _InstrumentedWriter(_Proxy):
+    """Batch ve transaction için ortak yazma sarmalayıcısı."""
+    __slots__ = ('_pending',)
+
+    def __init__(self, wrapped):
+        super().__init__(wrapped)
+        object.__setattr__(self, '_pending', 0)
+
+    def _add(self, method, reference, *args, **kwargs):
+        object.__setattr__(self, '_pending', self._pending + 1)
+        return getattr(self._wrapped, method)(_unwrap(reference), *args, **kwargs)
+
+    def set(self, reference, *args, **kwargs):
+        return self._add('set', reference, *args, **kwargs)
+
+    def create(self, reference, *args, **kwargs):
+        return self._add('create', reference, *args, **kwargs)
+
+    def update(self, reference, *args, **kwargs):
+        return self._add('update', reference, *args, **kwargs)
+
+    def delete(self, reference, *args, **kwargs):
+        return self._add('delete', reference, *args, **kwargs)
+
+
+class InstrumentedWriteBatch(_InstrumentedWriter):
+    __slots__ = ()
+
+    def __len__(self):
+        return self._pending
+
+    def commit(self, *args, **kwargs):
+        start = time.perf_counter()
+        result = self._wrapped.commit(*args, **kwargs)
+        record_operation('commit', time.perf_counter() - start, writes=self._pending)
+        object.__setattr__(self, '_pending', 0)
+        return result
+
+
+class InstrumentedTransaction(_InstrumentedWriter):
+    """
+    `firestore.transactional` dekoratörü özel alanlara (_begin, _commit, _id...)
+    erişir; bunlar __getattr__ ile gerçek transaction'a iletilir.
+    """
+    __slots__ = ()
+
+    def _commit(self):
+        start = time.perf_counter()
+        result = self._wrapped._commit()
+        record_operation('commit', time.perf_counter() - start, writes=self._pending)
+        object.__setattr__(self, '_pending', 0)
+        return result
+
+    def _clean_up(self):
+        object.__setattr__(self, '_pending', 0)
+        return self._wrapped._clean_up()
+
+    def get(self, ref_or_query, **kwargs):
+        if isinstance(ref_or_query, InstrumentedQuery):
+            return iter(ref_or_query.get(transaction=self, **kwargs))
+        return iter([ref_or_query.get(transaction=self, **kwargs)])
+
+    def get_all(self, references, **kwargs):
+        return InstrumentedClient._get_all(self._wrapped._client, references, transaction=self._wrapped, **kwargs)
+
+
+class InstrumentedClient(_Proxy):
+    """
+    `firestore.client()` sarmalayıcısı. Servisler aynı API'yi kullanmaya devam
+    eder; her round trip istek ve endpoint bazında sayılır ve süresi ölçülür.
+    """
+    __slots__ = ()
+
+    def collection(self, *path):
+        return InstrumentedCollectionReference(self._wrapped.collection(*path))
+
+    def collection_group(self, collection_id):
+        return InstrumentedQuery(self._wrapped.collection_group(collection_id))
+
+    def document(self, *path):
+        return InstrumentedDocumentReference(self._wrapped.document(*path))
+
+    def batch(self):
+        return InstrumentedWriteBatch(self._wrapped.batch())
+
+    def transaction(self, **kwargs):
+        return InstrumentedTransaction(self._wrapped.transaction(**kwargs))
+
+    def get_all(self, references, field_paths=None, transaction=None, **kwargs):
+        return InstrumentedClient._get_all(self._wrapped, references, field_paths=field_paths,
+                                           transaction=_unwrap(transaction), **kwargs)
+
+    @staticmethod
+    def _get_all(raw_client, references, **kwargs):
+        refs = [_unwrap(ref) for ref in references]
+        start = time.perf_counter()
+        snapshots = [InstrumentedSnapshot(s) for s in raw_client.get_all(refs, **kwargs)]
+        record_operation('get_all', time.perf_counter() - start, reads=len(refs),
+                         documents=sum(1 for s in snapshots if s.exists))
+        return snapshots
+
+
+# =========================================================
+# FLASK ENTEGRASYONU
+# =========================================================
+
+def init_metrics(app):
+    """İstek süresi/maliyet metriklerini, /metrics uç noktasını ve slow log'u kaydeder."""
+
+    @app.before_request
+    def start_request_timer():
+        g._request_started = time.perf_counter()
+        g._firestore_metrics = RequestMetrics()
+
+    @app.after_request
+    def record_request_metrics(response):
+        started = g.get('_request_started')
+        metrics = g.get('_firestore_metrics')
+        if started is None or metrics is None or request.endpoint == 'metrics':
+            return response
+
+        elapsed = time.perf_counter() - started
+        labels = _current_labels()
+        registry.inc('http_requests_total', labels + (('status', response.status_code),))
+        registry.observe('http_request_duration_seconds', labels, elapsed)
+
+        response.headers['X-Firestore-Reads'] = str(metrics.reads)
+        response.headers['X-Firestore-Writes'] = str(metrics.writes)
+        response.headers['X-Firestore-Queries'] = str(metrics.queries)
+
+        if elapsed * 1000 >= SLOW_REQUEST_MS:
+            logger.warning("SLOW_REQUEST: %s %s endpoint=%s status=%s durationMs=%.1f firestore=%s",
+                           request.method, request.path, request.endpoint, response.status_code, elapsed * 1000, metrics.as_dict())
+        flush()
+        return response
+
+    @app.route('/metrics')
+    def metrics():
+        return Response(render_all(), mimetype='text/plain; version=0.0.4')
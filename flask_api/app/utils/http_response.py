@@ -0,0 +1,131 @@
+# File: flask_api/app/utils/http_response.py
+import gzip
+import os
+from flask import request
+from flask.json.provider import DefaultJSONProvider, _default
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson yoksa stdlib json kullanılır
+    orjson = None
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - brotli opsiyonel
+    brotli = None
+
+# Bu boyutun altındaki yanıtlar sıkıştırılmaz (byte)
+COMPRESSION_MIN_BYTES = int(os.getenv('COMPRESSION_MIN_BYTES', '1024'))
+GZIP_LEVEL = int(os.getenv('GZIP_LEVEL', '6'))
+BROTLI_QUALITY = int(os.getenv('BROTLI_QUALITY', '5'))
+COMPRESSIBLE_MIMETYPES = {'application/json', 'text/plain', 'text/csv', 'text/html', 'application/x-ndjson'}
+
+
+class FastJSONProvider(DefaultJSONProvider):
+    """
+    orjson ile serileştirme yapan JSON sağlayıcı. Çıktı varsayılan sağlayıcıyla
+    aynı kurallara uyar (sıralı anahtarlar, tarihler HTTP date formatında);
+    orjson'un desteklemediği bir değer olursa stdlib json'a düşer.
+    """
+
+    def _orjson_options(self):
+        options = orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_SERIALIZE_NUMPY
+        if self.sort_keys:
+            options |= orjson.OPT_SORT_KEYS
+        return options
+
+    def _dumps_bytes(self, obj):
+        return orjson.dumps(obj, default=_default, option=self._orjson_options())
+
+    def dumps(self, obj, **kwargs):
+        if kwargs.get('indent') is None:
+            try:
+                return self._dumps_bytes(obj).decode('utf-8')
+            except TypeError:
+                pass
+        return super().dumps(obj, **kwargs)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        if (self.compact is None and self._app.debug) or self.compact is False:
+            return super().response(obj)
+        try:
+            body = self._dumps_bytes(obj) + b"\n"
+        except TypeError:
+            return super().response(obj)
+        return self._app.response_class(body, mimetype=self.mimetype)
+
+
+def _accepted_encodings(header):
+    """Accept-Encoding başlığından q > 0 olan kodlamaları döner."""
+    accepted = set()
+    for part in (header or '').split(','):
+        name, _, params = part.strip().partition(';')
+        name = name.strip().lower()
+        q = 1.0
+        params = params.strip()
+        if params.startswith('q='):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        if name and q > 0:
+            accepted.add(name)
+    return accepted
+
+
+def _choose_encoding(header):
+    accepted = _accepted_encodings(header)
+    if brotli is not None and 'br' in accepted:
+        return 'br'
+    if 'gzip' in accepted or '*' in accepted:
+        return 'gzip'
+    return None
+
+
+def compress_body(data, encoding):
+    if encoding == 'br':
+        return brotli.compress(data, quality=BROTLI_QUALITY)
+    return gzip.compress(data, compresslevel=GZIP_LEVEL, mtime=0)
+
+
+def init_response_layer(app):
+    """
+    - Hızlı JSON sağlayıcı (orjson varsa)
+    - GET yanıtlarında ETag + If-None-Match ile 304
+    - Accept-Encoding'e göre br/gzip sıkıştırma (COMPRESSION_MIN_BYTES üstü)
+
+    Diğer after_request hook'larından önce kaydedilmelidir; Flask hook'ları ters
+    sırada çalıştırdığı için sıkıştırma en son uygulanır.
+    """
+    if orjson is not None:
+        app.json = FastJSONProvider(app)
+
+    @app.after_request
+    def finalize_response(response):
+        if response.direct_passthrough or response.is_streamed:
+            return response
+
+        if request.method in ('GET', 'HEAD') and response.status_code == 200:
+            if not response.get_etag()[0]:
+                response.add_etag(weak=True)
+            response.make_conditional(request)
+            if response.status_code == 304:
+                return response
+
+        if (response.status_code < 200 or response.status_code == 204
+                or 'Content-Encoding' in response.headers
+                or response.mimetype not in COMPRESSIBLE_MIMETYPES):
+            return response
+
+        response.vary.add('Accept-Encoding')
+        encoding = _choose_encoding(request.headers.get('Accept-Encoding'))
+        if encoding is None:
+            return response
+        data = response.get_data()
+        if len(data) < COMPRESSION_MIN_BYTES:
+            return response
+
+        response.set_data(compress_body(data, encoding))
+        response.headers['Content-Encoding'] = encoding
+        return response
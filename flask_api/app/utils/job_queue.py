@@ -0,0 +1,436 @@
+# File: flask_api/app/utils/job_queue.py
+"""
+İstek yolundan çıkarılabilen yan etkiler için kalıcı, yerel iş kuyruğu.
+
+İşler SQLite'a yazılır (JOB_QUEUE_PATH; gunicorn worker'ları aynı dosyayı
+paylaşır) ve her süreçteki JOB_WORKERS thread'lik havuz tarafından işlenir.
+İstek sadece birincil dökümanı yazıp işi kuyruğa ekler ve döner.
+
+- Sıralama: aynı `ordering_key`'e (kullanıcı) sahip işler eklenme sırasıyla,
+  tek tek çalışır. Önceki iş yeniden denemeyi beklerken sonrakiler de bekler;
+  kalıcı olarak başarısız olan ('dead') iş kuyruğu tıkamaz.
+- Tekrar deneme: hata veren iş üstel bekleme ile JOB_MAX_ATTEMPTS kez denenir.
+  PermanentJobError tekrar denenmez. Süresi dolan kilit (çöken worker), işin
+  başka bir worker'da yeniden çalışmasına yol açar; handler'lar bu yüzden
+  idempotent yazılmalıdır (bkz. Job.step_id).
+- Idempotency: aynı `idempotency_key` ile ikinci kez eklenen iş yeni kayıt
+  oluşturmaz. Tamamlanan işler JOB_RETENTION_SECONDS boyunca saklanır.
+
+JOB_QUEUE_MODE=inline işleri eklendikleri anda çağıranın thread'inde çalıştırır
+(script'ler, hata ayıklama).
+
+    python -m app.utils.job_queue [--drain] [--retry-dead]
+"""
+import argparse
+import atexit
+import hashlib
+import json
+import os
+import random
+import sqlite3
+import sys
+import threading
+import time
+from collections import namedtuple
+from .logging_config import get_logger, request_id_var, current_request_id
+
+logger = get_logger(__name__)
+
+_DEFAULT_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), 'instance', 'job_queue.sqlite3')
+# in-memory Firestore ile kalıcı kuyruk anlamsız (yeniden başlatmada veri yok); süreç içi SQLite
+JOB_QUEUE_PATH = os.getenv('JOB_QUEUE_PATH') or (
+    ':memory:' if os.getenv('FIRESTORE_BACKEND', 'firestore') == 'memory' else _DEFAULT_PATH)
+JOB_QUEUE_MODE = os.getenv('JOB_QUEUE_MODE', 'async')
+JOB_WORKERS = int(os.getenv('JOB_WORKERS', '4'))
+JOB_MAX_ATTEMPTS = int(os.getenv('JOB_MAX_ATTEMPTS', '8'))
+JOB_RETRY_BASE_SECONDS = float(os.getenv('JOB_RETRY_BASE_SECONDS', '1'))
+JOB_RETRY_MAX_SECONDS = float(os.getenv('JOB_RETRY_MAX_SECONDS', '300'))
+# Bir işin kilidi bu süre içinde tamamlanmazsa iş yeniden alınabilir
+JOB_LEASE_SECONDS = float(os.getenv('JOB_LEASE_SECONDS', '60'))
+JOB_POLL_SECONDS = float(os.getenv('JOB_POLL_SECONDS', '0.5'))
+JOB_RETENTION_SECONDS = float(os.getenv('JOB_RETENTION_SECONDS', str(7 * 24 * 3600)))
+# wait_for: bekleyen işler bitmeden okunmaması gereken veriler için üst sınır
+JOB_BARRIER_TIMEOUT_SECONDS = float(os.getenv('JOB_BARRIER_TIMEOUT_SECONDS', '5'))
+
+PENDING, RUNNING, DONE, DEAD = 'pending', 'running', 'done', 'dead'
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    name TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    ordering_key TEXT,
+    idempotency_key TEXT UNIQUE,
+    request_id TEXT,
+    status TEXT NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    max_attempts INTEGER NOT NULL,
+    run_at REAL NOT NULL,
+    locked_until REAL,
+    last_error TEXT,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS jobs_ready ON jobs (status, run_at);
+CREATE INDEX IF NOT EXISTS jobs_ordering ON jobs (ordering_key, status, id);
+"""
+
+# Çalıştırılabilir iş: beklemede ve zamanı gelmiş ya da kilidi süresi dolmuş;
+# aynı sıralama anahtarında kendinden önce bitmemiş iş yok.
+_CLAIM_SQL = """
+SELECT id, name, payload, ordering_key, idempotency_key, request_id, attempts, max_attempts
+FROM jobs AS job
+WHERE ((job.status = 'pending' AND job.run_at <= :now)
+       OR (job.status = 'running' AND job.locked_until < :now))
+  AND (job.ordering_key IS NULL OR NOT EXISTS (
+        SELECT 1 FROM jobs AS prior
+        WHERE prior.ordering_key = job.ordering_key AND prior.id < job.id
+          AND prior.status IN ('pending', 'running')))
+ORDER BY job.run_at, job.id
+LIMIT 1
+"""
+
+
+class PermanentJobError(Exception):
+    """Tekrar denemenin sonucu değiştirmeyeceği hata; iş doğrudan 'dead' olur."""
+    pass
+
+
+class Job(namedtuple('Job', 'id name payload ordering_key idempotency_key request_id attempts max_attempts')):
+    __slots__ = ()
+
+    def step_id(self, step):
+        """
+        İşin bir adımı için deterministik döküman kimliği. Adım yazısı bu
+        kimlikle `create` edilirse yeniden denemede AlreadyExists alınır ve
+        adımın zaten uygulandığı anlaşılır. Kimliksiz inline işlerde None.
+        """
+        if self.idempotency_key is None and self.id is None:
+            return None
+        base = self.idempotency_key or f"job-{self.id}"
+        return hashlib.sha1(f"{base}:{step}".encode('utf-8')).hexdigest()[:20]
+
+
+_handlers = {}
+
+
+def register(name, handler):
+    """`handler(payload, job)` fonksiyonunu `name` işi için kaydeder."""
+    _handlers[name] = handler
+
+
+class JobQueue:
+    """SQLite tablosu üzerinde iş ekleme/alma/sonuçlandırma."""
+
+    def __init__(self, path):
+        self.path = path
+        if path != ':memory:':
+            os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        # Tek bağlantı + kilit; işlemler milisaniyelik, süreçler arası kilidi SQLite yönetir
+        self._conn = sqlite3.connect(path, timeout=30, isolation_level=None, check_same_thread=False)
+        self._lock = threading.Lock()
+        with self._lock:
+            if path != ':memory:':
+                self._conn.execute('PRAGMA journal_mode=WAL')
+            self._conn.execute('PRAGMA busy_timeout=30000')
+            self._conn.executescript(_SCHEMA)
+
+    def _write(self, fn):
+        """fn(conn)'u tek bir yazma işlemi (BEGIN IMMEDIATE) içinde çalıştırır."""
+        with self._lock:
+            self._conn.execute('BEGIN IMMEDIATE')
+            try:
+                result = fn(self._conn)
+            except BaseException:
+                self._conn.execute('ROLLBACK')
+                raise
+            self._conn.execute('COMMIT')
+            return result
+
+    def _read(self, sql, params=()):
+        with self._lock:
+            return self._conn.execute(sql, params).fetchall()
+
+    def enqueue(self, name, payload, ordering_key=None, idempotency_key=None, max_attempts=None, delay=0.0):
+        """İşi ekler ve kimliğini döner; anahtar zaten varsa mevcut işin kimliği döner."""
+        now = time.time()
+        row = (name, json.dumps(payload, separators=(',', ':')), ordering_key, idempotency_key,
+               current_request_id(), PENDING, max_attempts or JOB_MAX_ATTEMPTS, now + delay, now, now)
+
+        def insert(conn):
+            cursor = conn.execute(
+                'INSERT OR IGNORE INTO jobs (name, payload, ordering_key, idempotency_key, request_id, status, '
+                'max_attempts, run_at, created_at, updated_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)', row)
+            if cursor.rowcount:
+                return cursor.lastrowid, True
+            existing = conn.execute('SELECT id FROM jobs WHERE idempotency_key = ?', (idempotency_key,)).fetchone()
+            return existing[0], False
+
+        return self._write(insert)
+
+    def claim(self):
+        """Sıradaki çalıştırılabilir işi kilitleyip döner; yoksa None."""
+        def take(conn):
+            now = time.time()
+            row = conn.execute(_CLAIM_SQL, {'now': now}).fetchone()
+            if row is None:
+                return None
+            conn.execute("UPDATE jobs SET status = 'running', attempts = attempts + 1, locked_until = ?, "
+                         "updated_at = ? WHERE id = ?", (now + JOB_LEASE_SECONDS, now, row[0]))
+            job_id, name, payload, ordering_key, idempotency_key, request_id, attempts, max_attempts = row
+            return Job(job_id, name, json.loads(payload), ordering_key, idempotency_key, request_id,
+                       attempts + 1, max_attempts)
+
+        return self._write(take)
+
+    def complete(self, job_id):
+        now = time.time()
+        self._write(lambda conn: conn.execute(
+            "UPDATE jobs SET status = 'done', locked_until = NULL, last_error = NULL, updated_at = ? WHERE id = ?",
+            (now, job_id)))
+
+    def fail(self, job, error, permanent=False):
+        """Hatayı kaydeder; deneme hakkı varsa üstel beklemeyle yeniden sıraya koyar. Yeni durumu döner."""
+        now = time.time()
+        if permanent or job.attempts >= job.max_attempts:
+            status, run_at = DEAD, now
+        else:
+            backoff = min(JOB_RETRY_BASE_SECONDS * (2 ** (job.attempts - 1)), JOB_RETRY_MAX_SECONDS)
+            status, run_at = PENDING, now + backoff * random.uniform(0.8, 1.2)
+        self._write(lambda conn: conn.execute(
+            'UPDATE jobs SET status = ?, run_at = ?, locked_until = NULL, last_error = ?, updated_at = ? WHERE id = ?',
+            (status, run_at, str(error)[:2000], now, job.id)))
+        return status
+
+    def outstanding(self, ordering_key=None):
+        """Bitmemiş (pending/running) iş sayısı; anahtar verilirse sadece o anahtarın."""
+        if ordering_key is None:
+            rows = self._read("SELECT COUNT(*) FROM jobs WHERE status IN ('pending', 'running')")
+        else:
+            rows = self._read("SELECT COUNT(*) FROM jobs WHERE ordering_key = ? AND status IN ('pending', 'running')",
+                              (ordering_key,))
+        return rows[0][0]
+
+    def stats(self):
+        counts = dict.fromkeys((PENDING, RUNNING, DONE, DEAD), 0)
+        counts.update(dict(self._read('SELECT status, COUNT(*) FROM jobs GROUP BY status')))
+        return counts
+
+    def dead_jobs(self, limit=50):
+        rows = self._read("SELECT id, name, ordering_key, attempts, last_error FROM jobs WHERE status = 'dead' "
+                          "ORDER BY id DESC LIMIT ?", (limit,))
+        return [dict(zip(('id', 'name', 'orderingKey', 'attempts', 'lastError'), row)) for row in rows]
+
+    def retry_dead(self):
+        now = time.time()
+        return self._write(lambda conn: conn.execute(
+            "UPDATE jobs SET status = 'pending', attempts = 0, run_at = ?, updated_at = ? WHERE status = 'dead'",
+            (now, now)).rowcount)
+
+    def purge(self, older_than_seconds=None):
+        """Saklama süresi dolan tamamlanmış işleri (ve idempotency anahtarlarını) siler."""
+        cutoff = time.time() - (JOB_RETENTION_SECONDS if older_than_seconds is None else older_than_seconds)
+        return self._write(lambda conn: conn.execute(
+            "DELETE FROM jobs WHERE status = 'done' AND updated_at < ?", (cutoff,)).rowcount)
+
+
+# =========================================================
+# ÇALIŞTIRMA
+# =========================================================
+
+def run_job(queue, job):
+    """İşi handler'ıyla çalıştırır ve sonucu kuyruğa işler. Başarılıysa True."""
+    handler = _handlers.get(job.name)
+    token = request_id_var.set(job.request_id)
+    try:
+        if handler is None:
+            raise PermanentJobError(f"No handler registered for job '{job.name}'")
+        handler(job.payload, job)
+    except Exception as e:
+        status = queue.fail(job, e, permanent=isinstance(e, PermanentJobError))
+        log = logger.error if status == DEAD else logger.warning
+        log("JOB_QUEUE: Job %s (%s) failed on attempt %d/%d, now %s: %s",
+            job.id, job.name, job.attempts, job.max_attempts, status, e)
+        return False
+    finally:
+        request_id_var.reset(token)
+    queue.complete(job.id)
+    logger.debug("JOB_QUEUE: Job %s (%s) done.", job.id, job.name)
+    return True
+
+
+def drain(queue=None, timeout=None):
+    """Çalıştırılabilir iş kalmayana kadar işleri çağıranın thread'inde çalıştırır; çalışan iş sayısını döner."""
+    queue = queue or get_queue()
+    deadline = None if timeout is None else time.monotonic() + timeout
+    processed = 0
+    while deadline is None or time.monotonic() < deadline:
+        job = queue.claim()
+        if job is None:
+            break
+        run_job(queue, job)
+        processed += 1
+    return processed
+
+
+class _WorkerPool:
+    def __init__(self, queue, size):
+        self.queue = queue
+        self.wakeup = threading.Event()
+        self.stopping = threading.Event()
+        self._last_purge = 0.0
+        self.threads = [threading.Thread(target=self._loop, name=f'job-worker-{i}', daemon=True)
+                        for i in range(max(size, 1))]
+        for thread in self.threads:
+            thread.start()
+
+    def _loop(self):
+        while not self.stopping.is_set():
+            try:
+                job = self.queue.claim()
+            except Exception as e:
+                logger.exception("JOB_QUEUE: Could not claim a job: %s", e)
+                job = None
+            if job is not None:
+                run_job(self.queue, job)
+                continue
+            self._maybe_purge()
+            self.wakeup.wait(JOB_POLL_SECONDS)
+            self.wakeup.clear()
+
+    def _maybe_purge(self):
+        now = time.monotonic()
+        if now - self._last_purge < 3600:
+            return
+        self._last_purge = now
+        try:
+            purged = self.queue.purge()
+            if purged:
+                logger.info("JOB_QUEUE: Purged %d finished jobs.", purged)
+        except Exception as e:
+            logger.warning("JOB_QUEUE: Purge failed: %s", e)
+
+    def stop(self, timeout=5.0):
+        self.stopping.set()
+        self.wakeup.set()
+        for thread in self.threads:
+            thread.join(timeout)
+
+
+_queue = None
+_pool = None
+_pid = None
+_state_lock = threading.Lock()
+
+
+def get_queue():
+    # Fork sonrası SQLite bağlantısı ve worker thread'leri her süreçte yeniden kurulur
+    global _queue, _pool, _pid
+    pid = os.getpid()
+    if _queue is None or _pid != pid:
+        with _state_lock:
+            if _queue is None or _pid != pid:
+                _queue, _pool, _pid = JobQueue(JOB_QUEUE_PATH), None, pid
+    return _queue
+
+
+def start_workers():
+    """Bu süreçte worker havuzunu (yoksa) başlatır."""
+    global _pool
+    queue = get_queue()
+    if _pool is None and JOB_QUEUE_MODE != 'inline':
+        with _state_lock:
+            if _pool is None:
+                _pool = _WorkerPool(queue, JOB_WORKERS)
+                logger.info("JOB_QUEUE: Started %d workers on %s.", JOB_WORKERS, JOB_QUEUE_PATH)
+    return _pool
+
+
+def stop_workers(timeout=5.0):
+    global _pool
+    pool, _pool = _pool, None
+    if pool is not None and _pid == os.getpid():
+        pool.stop(timeout)
+
+
+def enqueue(name, payload, ordering_key=None, idempotency_key=None, max_attempts=None, delay=0.0):
+    """
+    İşi kuyruğa ekler ve worker'ları uyandırır. Inline modda handler hemen
+    çalışır ve hatası çağırana yükselir.
+    """
+    if JOB_QUEUE_MODE == 'inline':
+        _handlers[name](payload, Job(None, name, payload, ordering_key, idempotency_key, current_request_id(), 1, 1))
+        return None
+    job_id, created = get_queue().enqueue(name, payload, ordering_key, idempotency_key, max_attempts, delay)
+    if not created:
+        logger.debug("JOB_QUEUE: Duplicate job %s ignored (idempotency key %s).", name, idempotency_key)
+    pool = start_workers()
+    if pool is not None:
+        pool.wakeup.set()
+    return job_id
+
+
+def wait_for(ordering_key, timeout=None):
+    """
+    Anahtarın bekleyen işleri bitene kadar bekler (ör. güncel holding'e göre
+    satış). Zaman aşımında False döner; çağıran eski veriyle devam eder.
+    """
+    if JOB_QUEUE_MODE == 'inline':
+        return True
+    timeout = JOB_BARRIER_TIMEOUT_SECONDS if timeout is None else timeout
+    deadline = time.monotonic() + timeout
+    queue = get_queue()
+    while queue.outstanding(ordering_key):
+        if time.monotonic() >= deadline:
+            logger.warning("JOB_QUEUE: Timed out waiting for jobs of %s.", ordering_key)
+            return False
+        time.sleep(0.01)
+    return True
+
+
+def wait_idle(timeout=30.0):
+    """Tüm bekleyen işler bitene kadar bekler (benchmark / kontrol script'leri)."""
+    if JOB_QUEUE_MODE == 'inline':
+        return True
+    deadline = time.monotonic() + timeout
+    queue = get_queue()
+    while queue.outstanding():
+        if time.monotonic() >= deadline:
+            return False
+        time.sleep(0.01)
+    return True
+
+
+def init_job_queue(app):
+    # Worker'lar ilk istekte başlar: gunicorn preload'da master'da thread açılmaz,
+    # her worker süreci kendi havuzunu kurar ve önceki çalıştırmadan kalan işleri alır.
+    @app.before_request
+    def _ensure_job_workers():
+        if _pool is None or _pid != os.getpid():
+            start_workers()
+
+    atexit.register(stop_workers)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Inspect or run the local job queue.")
+    parser.add_argument('--drain', action='store_true', help='run all runnable jobs in this process, then exit')
+    parser.add_argument('--retry-dead', action='store_true', help='move dead jobs back to pending')
+    parser.add_argument('--path', default=JOB_QUEUE_PATH)
+    args = parser.parse_args(argv)
+
+    queue = JobQueue(args.path)
+    if args.retry_dead:
+        print(f"Requeued {queue.retry_dead()} dead jobs.")
+    if args.drain:
+        from app import create_app
+        create_app()  # servisleri ve handler kayıtlarını yükler
+        print(f"Ran {drain(queue)} jobs.")
+    print(' '.join(f"{status}={count}" for status, count in queue.stats().items()))
+    for job in queue.dead_jobs():
+        print(f"  dead #{job['id']} {job['name']} ({job['orderingKey']}, {job['attempts']} attempts): {job['lastError']}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,251 @@
+# File: flask_api/app/utils/logging_config.py
+"""
+Uygulama genelinde yapılandırılmış loglama.
+
+    from app.utils.logging_config import get_logger
+    logger = get_logger(__name__)
+    logger.debug("Fetched %d transactions for user %s", len(items), user_id)
+
+- Seviye LOG_LEVEL ile belirlenir (varsayılan INFO). Mesajlar %-argümanlarıyla
+  verilir; seviye kapalıysa string/dict formatlama hiç yapılmaz.
+- LOG_ASYNC=1 (varsayılan): kayıtlar bir kuyruğa atılır, stdout'a yazma ayrı
+  bir thread'de (QueueListener) yapılır; istek thread'i I/O beklemez.
+- LOG_SAMPLE_RATE: DEBUG/INFO kayıtlarının ne kadarının tutulacağı (0-1).
+  WARNING ve üstü her zaman yazılır.
+- LOG_FORMAT=json|text. Her kayıt istek kimliğini (X-Request-ID) taşır.
+"""
+import atexit
+import contextvars
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import random
+import sys
+import time
+import uuid
+from flask import g, request
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson yoksa stdlib json kullanılır
+    orjson = None
+
+LOGGER_NAMESPACE = 'app'
+LOG_LEVEL = os.getenv('LOG_LEVEL', 'INFO').upper()
+LOG_FORMAT = os.getenv('LOG_FORMAT', 'json').lower()
+LOG_ASYNC = os.getenv('LOG_ASYNC', '1') == '1'
+LOG_SAMPLE_RATE = float(os.getenv('LOG_SAMPLE_RATE', '1.0'))
+LOG_QUEUE_SIZE = int(os.getenv('LOG_QUEUE_SIZE', '10000'))
+REQUEST_ID_HEADER = 'X-Request-ID'
+
+# Havuz thread'lerine (concurrency.submit) context kopyasıyla taşınır
+request_id_var = contextvars.ContextVar('request_id', default=None)
+
+# Kayıt üzerinde standart olarak bulunan alanlar; geri kalanı `extra` ile
+# verilmiş yapılandırılmış alanlardır.
+_RESERVED_ATTRS = set(vars(logging.LogRecord('', 0, '', 0, '', (), None))) | {'message', 'asctime', 'request_id'}
+
+_listener = None
+_queue_handler = None
+_stream_handler = None
+_configured = False
+
+
+def get_logger(name):
+    """`app.` altında bir logger döner (ör. app.services.transaction_service)."""
+    if not _configured:
+        # Import sırasında log yazan modüller için (create_app'ten önce)
+        configure_logging()
+    if not name.startswith(LOGGER_NAMESPACE + '.') and name != LOGGER_NAMESPACE:
+        name = f"{LOGGER_NAMESPACE}.{name}"
+    return logging.getLogger(name)
+
+
+def current_request_id():
+    return request_id_var.get()
+
+
+class RequestIdFilter(logging.Filter):
+    def filter(self, record):
+        record.request_id = request_id_var.get()
+        return True
+
+
+class SamplingFilter(logging.Filter):
+    """WARNING altındaki kayıtların `rate` oranını tutar."""
+
+    def __init__(self, rate):
+        super().__init__()
+        self.rate = max(0.0, min(1.0, rate))
+
+    def filter(self, record):
+        if record.levelno >= logging.WARNING or self.rate >= 1.0:
+            return True
+        return random.random() < self.rate
+
+
+class JsonFormatter(logging.Formatter):
+    """Tek satır JSON: ts, level, logger, msg, requestId, `extra` alanları, exc."""
+
+    def __init__(self):
+        super().__init__()
+        self._second = None
+        self._second_text = ''
+
+    def _timestamp(self, created):
+        # Aynı saniyedeki kayıtlar için strftime tekrar çağrılmaz
+        second = int(created)
+        if second != self._second:
+            self._second = second
+            self._second_text = time.strftime('%Y-%m-%dT%H:%M:%S', time.gmtime(second))
+        return f"{self._second_text}.{int((created - second) * 1000):03d}Z"
+
+    def format(self, record):
+        payload = {
+            'ts': self._timestamp(record.created),
+            'level': record.levelname,
+            'logger': record.name,
+            'msg': record.getMessage(),
+        }
+        if getattr(record, 'request_id', None):
+            payload['requestId'] = record.request_id
+        for key in record.__dict__.keys() - _RESERVED_ATTRS:
+            if not key.startswith('_'):
+                payload[key] = record.__dict__[key]
+        if record.exc_info:
+            payload['exc'] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            # Kuyruktan gelen kayıtlarda traceback önceden metne çevrilmiştir
+            payload['exc'] = record.exc_text
+        if orjson is not None:
+            return orjson.dumps(payload, default=str).decode('utf-8')
+        return json.dumps(payload, ensure_ascii=False, default=str)
+
+
+class _PreformattingQueueHandler(logging.handlers.QueueHandler):
+    """
+    Mesaj ve traceback istek thread'inde metne çevrilir (args'lar sonradan
+    değişebilir); JSON'a dönüştürme ve yazma listener thread'inde yapılır.
+    Kuyruk doluysa kayıt düşürülür, istek beklemez.
+    """
+
+    def prepare(self, record):
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            # Kuyruk doluysa istek bekletilmez, kayıt düşürülür
+            pass
+
+
+class _QueueListener(logging.handlers.QueueListener):
+    def enqueue_sentinel(self):
+        # Kuyruk dolu olsa bile durdurma sinyali kaybolmasın (bekleyerek eklenir)
+        self.queue.put(self._sentinel)
+
+
+def _build_formatter():
+    if LOG_FORMAT == 'text':
+        return logging.Formatter('%(asctime)s %(levelname)s [%(request_id)s] %(name)s: %(message)s')
+    return JsonFormatter()
+
+
+def _start_listener():
+    global _listener
+    if _queue_handler is None:
+        return
+    _listener = _QueueListener(_queue_handler.queue, _stream_handler)
+    _listener.start()
+
+
+def _stop_listener():
+    global _listener
+    if _listener is not None:
+        try:
+            _listener.stop()
+        finally:
+            _listener = None
+
+
+def configure_logging(level=None, async_mode=None, sample_rate=None, stream=None):
+    """
+    `app` logger'ını yapılandırır. Tekrar çağrılırsa önceki handler'lar
+    kaldırılıp yeniden kurulur (benchmark ve testler farklı ayarları dener).
+    """
+    global _queue_handler, _stream_handler, _configured
+    level = (level or LOG_LEVEL).upper()
+    async_mode = LOG_ASYNC if async_mode is None else async_mode
+    sample_rate = LOG_SAMPLE_RATE if sample_rate is None else sample_rate
+
+    # Kullanılmayan kayıt alanları hesaplanmaz: çağıran dosya/satır (stack
+    # taraması), thread/process adları. Kayıt başına maliyetin önemli kısmı bunlar.
+    logging._srcfile = None
+    logging.logThreads = False
+    logging.logProcesses = False
+    logging.logMultiprocessing = False
+
+    root = logging.getLogger(LOGGER_NAMESPACE)
+    _stop_listener()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    _queue_handler = None
+
+    _stream_handler = logging.StreamHandler(stream or sys.stdout)
+    _stream_handler.setFormatter(_build_formatter())
+
+    if async_mode:
+        _queue_handler = _PreformattingQueueHandler(queue.Queue(maxsize=LOG_QUEUE_SIZE))
+        handler = _queue_handler
+        _start_listener()
+    else:
+        handler = _stream_handler
+
+    # Örnekleme önce: düşürülecek kayıt için başka iş yapılmaz
+    if sample_rate < 1.0:
+        handler.addFilter(SamplingFilter(sample_rate))
+    handler.addFilter(RequestIdFilter())
+    root.addHandler(handler)
+    root.setLevel(level)
+    root.propagate = False
+
+    if not _configured:
+        atexit.register(_stop_listener)
+        if hasattr(os, 'register_at_fork'):
+            # Gunicorn fork'undan sonra listener thread'i çocukta yoktur;
+            # her worker kendi listener'ını başlatır.
+            os.register_at_fork(after_in_child=_start_listener)
+        _configured = True
+    return root
+
+
+def init_logging(app):
+    """Logger'ları yapılandırır ve her isteğe bir istek kimliği atar."""
+    if not _configured:
+        configure_logging()
+
+    @app.before_request
+    def assign_request_id():
+        # İstemci/proxy bir kimlik gönderdiyse onu kullan (log'ları uçtan uca bağlamak için)
+        request_id = request.headers.get(REQUEST_ID_HEADER) or uuid.uuid4().hex
+        g.request_id = request_id
+        request_id_var.set(request_id)
+
+    @app.teardown_request
+    def clear_request_id(exc):
+        request_id_var.set(None)
+
+    @app.after_request
+    def add_request_id_header(response):
+        request_id = g.get('request_id')
+        if request_id:
+            response.headers[REQUEST_ID_HEADER] = request_id
+        return response
@@ -0,0 +1,119 @@
+# File: flask_api/app/utils/market_data.py
+import os
+import threading
+import time
+import pandas as pd
+import yfinance as yf
+from .async_support import _gevent_patched
+from .logging_config import get_logger
+
+logger = get_logger(__name__)
+
+# Son fiyatların ve kurun süreç içinde tutulacağı süre (saniye).
+QUOTE_CACHE_TTL = float(os.getenv('QUOTE_CACHE_TTL_SECONDS', '60'))
+FX_CACHE_TTL = float(os.getenv('FX_CACHE_TTL_SECONDS', '300'))
+USDTRY_SYMBOL = "USDTRY=X"
+USDTRY_FALLBACK = 38.5
+
+# symbol -> (fiyat ya da None, alındığı an). None: piyasa kapalı / veri yok.
+_quotes = {}
+_usdtry = {'rate': None, 'fetchedAt': 0.0}
+_lock = threading.Lock()
+
+
+def download(*args, **kwargs):
+    """
+    `yf.download` sarmalayıcısı. gevent worker'larında yfinance'in HTTP
+    istemcisi (curl_cffi) hub'ı bloklamasın diye çağrı gevent'in gerçek
+    thread havuzunda yapılır; diğer greenlet'ler bu sırada çalışmaya devam eder.
+    """
+    if _gevent_patched():
+        import gevent
+        return gevent.get_hub().threadpool.apply(yf.download, args, kwargs)
+    return yf.download(*args, **kwargs)
+
+
+def _extract_closes(price_data, symbols):
+    """yf.download çıktısından her sembolün son kapanış fiyatını çıkarır."""
+    prices = {}
+    if price_data is None or price_data.empty:
+        return prices
+    close_prices_df = price_data.get('Close')
+    if close_prices_df is None:
+        return prices
+    for symbol in symbols:
+        if isinstance(close_prices_df, pd.Series):
+            price_series = close_prices_df.dropna()
+        elif isinstance(close_prices_df, pd.DataFrame) and symbol in close_prices_df.columns:
+            price_series = close_prices_df[symbol].dropna()
+        else:
+            continue
+        if not price_series.empty:
+            prices[symbol] = float(price_series.iloc[-1])
+    return prices
+
+
+def get_latest_prices(symbols):
+    """
+    Sembollerin son fiyatlarını döner; TTL içindeki fiyatlar önbellekten gelir,
+    eksik olanlar tek bir `yf.download` çağrısıyla toplu çekilir.
+    Fiyatı bulunamayan semboller sonuçta yer almaz.
+    """
+    now = time.monotonic()
+    result, missing = {}, []
+    with _lock:
+        for symbol in symbols:
+            entry = _quotes.get(symbol)
+            if entry and now - entry[1] < QUOTE_CACHE_TTL:
+                if entry[0] is not None:
+                    result[symbol] = entry[0]
+            else:
+                missing.append(symbol)
+
+    if missing:
+        try:
+            fetched = _extract_closes(download(missing, period="1d", progress=False), missing)
+        except Exception as e:
+            logger.warning("MARKET_DATA: Price fetch failed for %s: %s", missing, e)
+            return result
+        fetched_at = time.monotonic()
+        with _lock:
+            for symbol in missing:
+                _quotes[symbol] = (fetched.get(symbol), fetched_at)
+        result.update(fetched)
+    return result
+
+
+def get_usdtry_rate():
+    """USD/TRY kuru. Çekilemezse son bilinen kur, o da yoksa sabit yedek değer döner."""
+    with _lock:
+        rate = _usdtry['rate']
+        if rate is not None and time.monotonic() - _usdtry['fetchedAt'] < FX_CACHE_TTL:
+            return rate
+    try:
+        data = download(USDTRY_SYMBOL, period="1d", interval="1h", progress=False)
+        if not data.empty:
+            rate = float(data["Close"].iloc[-1].squeeze())
+            with _lock:
+                _usdtry['rate'] = rate
+                _usdtry['fetchedAt'] = time.monotonic()
+            return rate
+    except Exception as e:
+        logger.warning("MARKET_DATA: USDTRY fetch failed: %s. Using fallback.", e)
+    return rate if rate is not None else USDTRY_FALLBACK
+
+
+def warm_up(symbols=()):
+    """Kur ve verilen sembollerin fiyatlarını önceden önbelleğe alır (ör. worker fork'undan önce)."""
+    started = time.perf_counter()
+    rate = get_usdtry_rate()
+    prices = get_latest_prices(list(symbols)) if symbols else {}
+    logger.info("MARKET_DATA: Warmed up USDTRY=%s and %s quotes in %.0fms.",
+                rate, len(prices), (time.perf_counter() - started) * 1000)
+
+
+def clear_cache():
+    with _lock:
+        _quotes.clear()
+        _usdtry['rate'] = None
+        _usdtry['fetchedAt'] = 0.0
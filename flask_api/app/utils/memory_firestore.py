@@ -0,0 +1,633 @@
+# File: flask_api/app/utils/memory_firestore.py
+"""
+Firestore istemcisinin süreç içi (in-memory) karşılığı.
+
+Servislerin kullandığı API alt kümesini destekler: collection/document
+referansları, where (FieldFilter dahil) / order_by / limit / start_after
+sorguları, collection group sorguları, get_all, batch, transaction
+(`firestore.transactional` ile uyumlu) ve Increment / ArrayUnion /
+ArrayRemove / SERVER_TIMESTAMP / DELETE_FIELD dönüşümleri.
+
+Kimlik bilgisi gerektirmeden uygulamayı çalıştırmak (FIRESTORE_BACKEND=memory)
+ve benchmark'lar için kullanılır. İsteğe bağlı olarak her round trip'e
+yapay gecikme eklenebilir (MEMORY_FIRESTORE_LATENCY_MS).
+"""
+import copy
+import functools
+import os
+import random
+import string
+import threading
+import time
+from datetime import datetime, timezone
+
+try:
+    from google.cloud.firestore_v1 import transforms as _transforms
+except ImportError:  # pragma: no cover - firebase-admin kurulu değilse
+    _transforms = None
+
+try:
+    from google.api_core.exceptions import (Aborted as _Aborted, AlreadyExists as _AlreadyExists,
+                                            InvalidArgument as _InvalidArgument)
+except ImportError:  # pragma: no cover
+    class _Aborted(Exception):
+        pass
+
+    class _AlreadyExists(Exception):
+        pass
+
+    class _InvalidArgument(Exception):
+        pass
+
+# Firestore'un disjunctive operatörlerde kabul ettiği en fazla değer sayısı
+_DISJUNCTION_LIMIT = 30
+
+
+ASCENDING = 'ASCENDING'
+DESCENDING = 'DESCENDING'
+_MISSING = object()
+
+
+def _auto_id():
+    alphabet = string.ascii_letters + string.digits
+    return ''.join(random.choice(alphabet) for _ in range(20))
+
+
+def _is_sentinel(value, name):
+    return _transforms is not None and value is getattr(_transforms, name, _MISSING)
+
+
+def _get_field(data, field_path):
+    if field_path == '__name__':
+        return _MISSING
+    current = data
+    for part in field_path.split('.'):
+        if not isinstance(current, dict) or part not in current:
+            return _MISSING
+        current = current[part]
+    return current
+
+
+def _set_field(data, field_path, value):
+    parts = field_path.split('.')
+    current = data
+    for part in parts[:-1]:
+        if not isinstance(current.get(part), dict):
+            current[part] = {}
+        current = current[part]
+    current[parts[-1]] = value
+
+
+def _delete_field(data, field_path):
+    parts = field_path.split('.')
+    current = data
+    for part in parts[:-1]:
+        current = current.get(part)
+        if not isinstance(current, dict):
+            return
+    current.pop(parts[-1], None)
+
+
+def _apply_value(data, field_path, value):
+    """Tek bir alanı (dönüşümleri uygulayarak) yazar."""
+    kind = type(value).__name__
+    if _is_sentinel(value, 'DELETE_FIELD'):
+        _delete_field(data, field_path)
+    elif _is_sentinel(value, 'SERVER_TIMESTAMP'):
+        _set_field(data, field_path, datetime.now(timezone.utc))
+    elif kind == 'Increment':
+        current = _get_field(data, field_path)
+        base = current if isinstance(current, (int, float)) and not isinstance(current, bool) else 0
+        _set_field(data, field_path, base + value.value)
+    elif kind == 'ArrayUnion':
+        current = _get_field(data, field_path)
+        result = list(current) if isinstance(current, list) else []
+        for item in value.values:
+            if item not in result:
+                result.append(item)
+        _set_field(data, field_path, result)
+    elif kind == 'ArrayRemove':
+        current = _get_field(data, field_path)
+        result = [item for item in (current if isinstance(current, list) else []) if item not in value.values]
+        _set_field(data, field_path, result)
+    else:
+        _set_field(data, field_path, copy.deepcopy(value))
+
+
+def _merge_into(target, source, prefix=''):
+    for key, value in source.items():
+        path = f'{prefix}{key}'
+        if isinstance(value, dict) and value:
+            existing = _get_field(target, path)
+            if not isinstance(existing, dict):
+                _set_field(target, path, {})
+            _merge_into(target, value, prefix=f'{path}.')
+        else:
+            _apply_value(target, path, value)
+
+
+def _type_rank(value):
+    # Firestore'un tipler arası sıralamasının sadeleştirilmiş hali
+    if value is None:
+        return 0
+    if isinstance(value, bool):
+        return 1
+    if isinstance(value, (int, float)):
+        return 2
+    if isinstance(value, datetime):
+        return 3
+    if isinstance(value, str):
+        return 4
+    if isinstance(value, list):
+        return 6
+    if isinstance(value, dict):
+        return 7
+    return 5
+
+
+def _sort_key(value):
+    return (_type_rank(value), value if _type_rank(value) in (1, 2, 3, 4) else str(value))
+
+
+def _compare(left, op, right):
+    if op == '==':
+        return left == right
+    if op == '!=':
+        return left != right and left is not None
+    if op == 'in':
+        return left in right
+    if op == 'not-in':
+        return left not in right and left is not None
+    if op == 'array-contains':
+        return isinstance(left, list) and right in left
+    if op == 'array-contains-any':
+        return isinstance(left, list) and any(item in left for item in right)
+    if _type_rank(left) != _type_rank(right):
+        return False
+    if op == '<':
+        return left < right
+    if op == '<=':
+        return left <= right
+    if op == '>':
+        return left > right
+    if op == '>=':
+        return left >= right
+    raise ValueError(f"Unsupported operator: {op}")
+
+
+class MemoryDocumentSnapshot:
+    def __init__(self, reference, data, update_time=None):
+        self.reference = reference
+        self._data = data
+        self.update_time = update_time
+        self.create_time = update_time
+        self.read_time = datetime.now(timezone.utc)
+
+    @property
+    def id(self):
+        return self.reference.id
+
+    @property
+    def exists(self):
+        return self._data is not None
+
+    def to_dict(self):
+        return copy.deepcopy(self._data) if self._data is not None else None
+
+    def get(self, field_path):
+        value = _get_field(self._data or {}, field_path)
+        if value is _MISSING:
+            raise KeyError(field_path)
+        return copy.deepcopy(value)
+
+
+class MemoryDocumentReference:
+    def __init__(self, client, path):
+        self._client = client
+        self.path = path
+
+    def __eq__(self, other):
+        return isinstance(other, MemoryDocumentReference) and other.path == self.path
+
+    def __hash__(self):
+        return hash(self.path)
+
+    def __repr__(self):
+        return f'<MemoryDocumentReference {self.path}>'
+
+    @property
+    def id(self):
+        return self.path.rsplit('/', 1)[-1]
+
+    @property
+    def parent(self):
+        return MemoryCollectionReference(self._client, self.path.rsplit('/', 1)[0])
+
+    def collection(self, collection_id):
+        return MemoryCollectionReference(self._client, f'{self.path}/{collection_id}')
+
+    def get(self, field_paths=None, transaction=None, **kwargs):
+        self._client._round_trip()
+        with self._client._lock:
+            data, version, update_time = self._client._read(self.path)
+        if transaction is not None:
+            transaction._record_read(self.path, version)
+        return MemoryDocumentSnapshot(self, data, update_time)
+
+    def set(self, document_data, merge=False):
+        self._client._round_trip()
+        self._client._commit_writes([('set', self.path, document_data, merge)])
+
+    def create(self, document_data):
+        self._client._round_trip()
+        self._client._commit_writes([('create', self.path, document_data, False)])
+
+    def update(self, field_updates, **kwargs):
+        self._client._round_trip()
+        self._client._commit_writes([('update', self.path, field_updates, False)])
+
+    def delete(self, **kwargs):
+        self._client._round_trip()
+        self._client._commit_writes([('delete', self.path, None, False)])
+
+
+class MemoryQuery:
+    def __init__(self, client, collection_path=None, collection_id=None, all_descendants=False,
+                 filters=(), orders=(), limit=None, limit_to_last=False, cursor=None):
+        self._client = client
+        self._collection_path = collection_path
+        self._collection_id = collection_id or (collection_path.rsplit('/', 1)[-1] if collection_path else None)
+        self._all_descendants = all_descendants
+        self._filters = tuple(filters)
+        self._orders = tuple(orders)
+        self._limit = limit
+        self._cursor = cursor
+
+    def _copy(self, **changes):
+        params = dict(
+            collection_path=self._collection_path, collection_id=self._collection_id,
+            all_descendants=self._all_descendants, filters=self._filters, orders=self._orders,
+            limit=self._limit, cursor=self._cursor
+        )
+        params.update(changes)
+        return MemoryQuery(self._client, **params)
+
+    def where(self, field_path=None, op_string=None, value=None, *, filter=None):
+        if filter is not None:
+            field_path, op_string, value = filter.field_path, filter.op_string, filter.value
+        if op_string in ('in', 'not-in', 'array-contains-any') and len(value) > _DISJUNCTION_LIMIT:
+            raise _InvalidArgument(f"'{op_string}' filters support a maximum of {_DISJUNCTION_LIMIT} elements "
+                                   f"in the value array (got {len(value)}).")
+        return self._copy(filters=self._filters + ((field_path, op_string, value),))
+
+    def order_by(self, field_path, direction=ASCENDING):
+        return self._copy(orders=self._orders + ((field_path, direction),))
+
+    def limit(self, count):
+        return self._copy(limit=count)
+
+    def select(self, field_paths):
+        return self
+
+    def start_after(self, document_fields_or_snapshot):
+        return self._copy(cursor=('after', document_fields_or_snapshot))
+
+    def start_at(self, document_fields_or_snapshot):
+        return self._copy(cursor=('at', document_fields_or_snapshot))
+
+    @property
+    def shape(self):
+        """Sorgunun indeks doğrulaması için yapısal özeti."""
+        return {
+            'collectionGroup': self._collection_id,
+            'allDescendants': self._all_descendants,
+            'filters': tuple((f, op) for f, op, _ in self._filters),
+            'orders': self._orders,
+        }
+
+    def _matches(self, data):
+        for field_path, op, value in self._filters:
+            field_value = _get_field(data, field_path)
+            if field_value is _MISSING:
+                return False
+            if not _compare(field_value, op, value):
+                return False
+        return True
+
+    def _effective_orders(self):
+        orders = list(self._orders)
+        ordered_fields = {field for field, _ in orders}
+        # Eşitsizlik filtresi olan alan, açık sıralama yoksa ilk sıralama alanıdır
+        for field, op, _ in self._filters:
+            if op in ('<', '<=', '>', '>=', '!=', 'not-in') and field not in ordered_fields:
+                orders.insert(0, (field, ASCENDING))
+                ordered_fields.add(field)
+        last_direction = orders[-1][1] if orders else ASCENDING
+        orders.append(('__name__', last_direction))
+        return orders
+
+    def _row_key(self, path, data, orders):
+        key = []
+        for field, direction in orders:
+            value = path if field == '__name__' else _get_field(data, field)
+            key.append((_sort_key(value), direction))
+        return key
+
+    def _execute(self, transaction=None):
+        self._client._round_trip()
+        self._client._check_query(self)
+        orders = self._effective_orders()
+        with self._client._lock:
+            rows = []
+            for path, data, version in self._client._scan(self._collection_path, self._collection_id,
+                                                          self._all_descendants):
+                if not self._matches(data):
+                    continue
+                if any(field != '__name__' and _get_field(data, field) is _MISSING for field, _ in orders):
+                    continue
+                rows.append((path, copy.deepcopy(data), version))
+
+        def compare_rows(a, b):
+            for (left, direction), (right, _) in zip(self._row_key(a[0], a[1], orders),
+                                                     self._row_key(b[0], b[1], orders)):
+                if left == right:
+                    continue
+                result = -1 if left < right else 1
+                return -result if direction == DESCENDING else result
+            return 0
+
+        rows.sort(key=functools.cmp_to_key(compare_rows))
+
+        if self._cursor is not None:
+            mode, anchor = self._cursor
+            if isinstance(anchor, MemoryDocumentSnapshot):
+                anchor_row = (anchor.reference.path, anchor.to_dict() or {}, None)
+            else:
+                anchor_row = (None, anchor, None)
+            anchor_key = self._row_key(anchor_row[0], anchor_row[1], orders)
+            if anchor_row[0] is None:
+                anchor_key = anchor_key[:-1]
+
+            def after_anchor(row):
+                row_key = self._row_key(row[0], row[1], orders)[:len(anchor_key)]
+                for (left, direction), (right, _) in zip(row_key, anchor_key):
+                    if left == right:
+                        continue
+                    return (left > right) != (direction == DESCENDING)
+                return mode == 'at'
+
+            rows = [row for row in rows if after_anchor(row)]
+
+        if self._limit is not None:
+            rows = rows[:self._limit]
+
+        snapshots = []
+        for path, data, version in rows:
+            if transaction is not None:
+                transaction._record_read(path, version)
+            snapshots.append(MemoryDocumentSnapshot(MemoryDocumentReference(self._client, path), data))
+        return snapshots
+
+    def stream(self, transaction=None, **kwargs):
+        return iter(self._execute(transaction=transaction))
+
+    def get(self, transaction=None, **kwargs):
+        return self._execute(transaction=transaction)
+
+
+class MemoryCollectionReference(MemoryQuery):
+    def __init__(self, client, path):
+        super().__init__(client, collection_path=path)
+        self.path = path
+
+    @property
+    def id(self):
+        return self.path.rsplit('/', 1)[-1]
+
+    @property
+    def parent(self):
+        if '/' not in self.path:
+            return None
+        return MemoryDocumentReference(self._client, self.path.rsplit('/', 1)[0])
+
+    def document(self, document_id=None):
+        return MemoryDocumentReference(self._client, f'{self.path}/{document_id or _auto_id()}')
+
+    def add(self, document_data, document_id=None):
+        ref = self.document(document_id)
+        ref.create(document_data)
+        return datetime.now(timezone.utc), ref
+
+    def list_documents(self, page_size=None):
+        with self._client._lock:
+            paths = [path for path, _, _ in self._client._scan(self.path, None, False)]
+        return [MemoryDocumentReference(self._client, path) for path in paths]
+
+
+class MemoryWriteBatch:
+    def __init__(self, client):
+        self._client = client
+        self._writes = []
+
+    def __len__(self):
+        return len(self._writes)
+
+    def set(self, reference, document_data, merge=False):
+        self._writes.append(('set', reference.path, document_data, merge))
+
+    def create(self, reference, document_data):
+        self._writes.append(('create', reference.path, document_data, False))
+
+    def update(self, reference, field_updates, **kwargs):
+        self._writes.append(('update', reference.path, field_updates, False))
+
+    def delete(self, reference, **kwargs):
+        self._writes.append(('delete', reference.path, None, False))
+
+    def commit(self, **kwargs):
+        if len(self._writes) > 500:
+            raise ValueError("A batch can contain at most 500 writes.")
+        self._client._round_trip()
+        self._client._commit_writes(self._writes)
+        self._writes = []
+        return []
+
+
+class MemoryTransaction(MemoryWriteBatch):
+    """
+    `firestore.transactional` dekoratörünün beklediği özel arayüzü uygular.
+    Okunan dökümanların sürümleri commit anında kontrol edilir; araya başka
+    bir yazma girdiyse `Aborted` fırlatılır ve dekoratör işlemi yeniden dener.
+    """
+
+    def __init__(self, client, max_attempts=5, read_only=False):
+        super().__init__(client)
+        self._max_attempts = max_attempts
+        self._read_only = read_only
+        self._id = None
+        self._read_versions = {}
+
+    @property
+    def in_progress(self):
+        return self._id is not None
+
+    @property
+    def id(self):
+        return self._id
+
+    def _record_read(self, path, version):
+        self._read_versions.setdefault(path, version)
+
+    def _clean_up(self):
+        self._writes = []
+        self._read_versions = {}
+        self._id = None
+
+    def _begin(self, retry_id=None):
+        if self.in_progress:
+            raise ValueError("Transaction already in progress.")
+        self._id = _auto_id().encode()
+
+    def _rollback(self):
+        self._clean_up()
+
+    def _commit(self):
+        if not self.in_progress:
+            raise ValueError("Transaction not in progress.")
+        self._client._round_trip()
+        try:
+            self._client._commit_writes(self._writes, expected_versions=self._read_versions)
+        finally:
+            self._clean_up()
+        return []
+
+    def get(self, ref_or_query, **kwargs):
+        if isinstance(ref_or_query, MemoryDocumentReference):
+            return iter([ref_or_query.get(transaction=self)])
+        return ref_or_query.stream(transaction=self)
+
+    def get_all(self, references, **kwargs):
+        return self._client.get_all(references, transaction=self)
+
+
+class MemoryFirestoreClient:
+    def __init__(self, latency_ms=None, query_validator=None):
+        if latency_ms is None:
+            latency_ms = float(os.getenv('MEMORY_FIRESTORE_LATENCY_MS', '0'))
+        self._latency = latency_ms / 1000.0
+        self._lock = threading.RLock()
+        # doküman yolu -> (veri, sürüm, güncelleme zamanı)
+        self._docs = {}
+        # koleksiyon yolu -> {doküman yolu: None}; ekleme sırasını korur
+        self._collections = {}
+        self._version = 0
+        self.query_validator = query_validator
+
+    # --- dahili yardımcılar ---
+
+    def _round_trip(self):
+        if self._latency > 0:
+            time.sleep(self._latency)
+
+    def _check_query(self, query):
+        if self.query_validator is not None:
+            self.query_validator(query.shape)
+
+    def _read(self, path):
+        entry = self._docs.get(path)
+        if entry is None:
+            return None, 0, None
+        data, version, update_time = entry
+        return copy.deepcopy(data), version, update_time
+
+    def _scan(self, collection_path, collection_id, all_descendants):
+        if all_descendants:
+            for coll_path, members in self._collections.items():
+                if coll_path.rsplit('/', 1)[-1] == collection_id:
+                    for path in members:
+                        yield path, self._docs[path][0], self._docs[path][1]
+        else:
+            for path in self._collections.get(collection_path, {}):
+                yield path, self._docs[path][0], self._docs[path][1]
+
+    def _commit_writes(self, writes, expected_versions=None):
+        with self._lock:
+            if expected_versions:
+                for path, version in expected_versions.items():
+                    current = self._docs.get(path)
+                    if (current[1] if current else 0) != version:
+                        raise _Aborted(f"Document {path} changed during transaction.")
+
+            staged = {}
+            for op, path, payload, merge in writes:
+                if path in staged:
+                    current = staged[path]
+                else:
+                    entry = self._docs.get(path)
+                    current = copy.deepcopy(entry[0]) if entry else None
+
+                if op == 'delete':
+                    staged[path] = None
+                elif op == 'create':
+                    if current is not None:
+                        raise _AlreadyExists(f"Document already exists: {path}")
+                    data = {}
+                    _merge_into(data, payload)
+                    staged[path] = data
+                elif op == 'set':
+                    data = current if (merge and current is not None) else {}
+                    if merge:
+                        _merge_into(data, payload)
+                    else:
+                        for key, value in payload.items():
+                            _apply_value(data, key, value)
+                    staged[path] = data
+                elif op == 'update':
+                    if current is None:
+                        raise ValueError(f"No document to update: {path}")
+                    for key, value in payload.items():
+                        _apply_value(current, key, value)
+                    staged[path] = current
+
+            now = datetime.now(timezone.utc)
+            for path, data in staged.items():
+                self._version += 1
+                collection_path = path.rsplit('/', 1)[0]
+                if data is None:
+                    self._docs.pop(path, None)
+                    self._collections.get(collection_path, {}).pop(path, None)
+                else:
+                    self._docs[path] = (data, self._version, now)
+                    self._collections.setdefault(collection_path, {})[path] = None
+
+    # --- genel API ---
+
+    def collection(self, *path):
+        return MemoryCollectionReference(self, '/'.join(path))
+
+    def document(self, *path):
+        return MemoryDocumentReference(self, '/'.join(path))
+
+    def collection_group(self, collection_id):
+        return MemoryQuery(self, collection_id=collection_id, all_descendants=True)
+
+    def batch(self):
+        return MemoryWriteBatch(self)
+
+    def transaction(self, max_attempts=5, read_only=False):
+        return MemoryTransaction(self, max_attempts=max_attempts, read_only=read_only)
+
+    def get_all(self, references, field_paths=None, transaction=None, **kwargs):
+        self._round_trip()
+        snapshots = []
+        with self._lock:
+            for ref in references:
+                data, version, update_time = self._read(ref.path)
+                if transaction is not None:
+                    transaction._record_read(ref.path, version)
+                snapshots.append(MemoryDocumentSnapshot(ref, data, update_time))
+        return snapshots
+
+    def document_count(self):
+        with self._lock:
+            return len(self._docs)
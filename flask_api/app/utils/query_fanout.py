@@ -0,0 +1,40 @@
+# File: flask_api/app/utils/query_fanout.py
+from concurrent.futures import as_completed
+from google.cloud.firestore_v1.base_query import FieldFilter
+from .concurrency import submit
+
+# Firestore'un `in` / `array-contains-any` operatörlerinde izin verdiği en fazla değer sayısı
+FIRESTORE_IN_LIMIT = 30
+
+
+def chunked(values, size=FIRESTORE_IN_LIMIT):
+    values = list(values)
+    return [values[i:i + size] for i in range(0, len(values), size)]
+
+
+def stream_in(query, field, values, chunk_size=FIRESTORE_IN_LIMIT):
+    """
+    `field in values` sorgusunu Firestore limitine göre parçalara böler, parçaları
+    eşzamanlı çalıştırır ve biten parçanın sonuçlarını hemen üretir (generator).
+
+    Sonuçların sırası garanti değildir; birden fazla parçada sıralama gerekiyorsa
+    çağıran taraf birleştirdikten sonra sıralamalıdır. Tekrarlanan değerler
+    ayıklanır, aynı döküman iki kez dönmez.
+    """
+    unique_values = list(dict.fromkeys(values))
+    if not unique_values:
+        return
+    chunks = chunked(unique_values, chunk_size)
+    if len(chunks) == 1:
+        yield from query.where(filter=FieldFilter(field, 'in', chunks[0])).stream()
+        return
+
+    futures = [submit(lambda chunk=chunk: list(query.where(filter=FieldFilter(field, 'in', chunk)).stream()))
+               for chunk in chunks]
+    seen = set()
+    for future in as_completed(futures):
+        for snapshot in future.result():
+            path = snapshot.reference.path
+            if path not in seen:
+                seen.add(path)
+                yield snapshot
@@ -0,0 +1,127 @@
+# File: flask_api/app/utils/request_cache.py
+import copy
+from flask import g, has_request_context
+
+
+class RequestDocumentCache:
+    """
+    İstek kapsamlı kimlik haritası (identity map).
+
+    Bir istek boyunca okunan dökümanları yol (path) bazında saklar; aynı
+    döküman tekrar istendiğinde Firestore'a gitmeden önbellekten döner.
+    Bu katmandan yapılan yazmalar önbellekteki kopyaya da uygulanır, böylece
+    "update() sonrası tekrar get()" kalıbı ek okuma maliyeti doğurmaz.
+    """
+
+    def __init__(self):
+        self._docs = {}
+        self._memo = {}
+        self.reads = 0
+        self.writes = 0
+        self.hits = 0
+
+    def get(self, ref):
+        """Dökümanın dict kopyasını döner; yoksa None."""
+        path = ref.path
+        if path in self._docs:
+            self.hits += 1
+        else:
+            snapshot = ref.get()
+            self.reads += 1
+            self._docs[path] = snapshot.to_dict() if snapshot.exists else None
+        data = self._docs[path]
+        return copy.deepcopy(data) if data is not None else None
+
+    def remember(self, snapshot):
+        """Sorgudan gelen bir snapshot'ı önbelleğe ekler (ör. stream() sonuçları)."""
+        self._docs[snapshot.reference.path] = snapshot.to_dict() if snapshot.exists else None
+
+    def update(self, ref, payload):
+        ref.update(payload)
+        self.writes += 1
+        self.apply_local(ref, payload)
+
+    def set(self, ref, data, merge=False):
+        ref.set(data, merge=merge)
+        self.writes += 1
+        if merge:
+            self.apply_local(ref, data, create=True)
+        else:
+            self._docs[ref.path] = copy.deepcopy(data)
+
+    def delete(self, ref):
+        ref.delete()
+        self.writes += 1
+        self._docs[ref.path] = None
+
+    def apply_local(self, ref, payload, create=False):
+        """
+        Başka bir yoldan (batch/transaction) yapılmış bir yazmayı önbelleğe yansıtır.
+        Yerelde hesaplanamayan alanlar (sentinel, iç içe yol) varsa kayıt düşürülür
+        ve bir sonraki okuma Firestore'dan yapılır.
+        """
+        path = ref.path
+        current = self._docs.get(path)
+        if current is None:
+            if not create:
+                self._docs.pop(path, None)
+                return
+            current = {}
+
+        updated = dict(current)
+        for key, value in payload.items():
+            if '.' in key:
+                self._docs.pop(path, None)
+                return
+            increment = getattr(value, 'value', None) if type(value).__name__ == 'Increment' else None
+            if increment is not None:
+                updated[key] = (updated.get(key) or 0) + increment
+            elif type(value).__module__.startswith('google.cloud.firestore'):
+                # SERVER_TIMESTAMP, ArrayUnion vb. yerelde uygulanamaz
+                self._docs.pop(path, None)
+                return
+            else:
+                updated[key] = copy.deepcopy(value)
+        self._docs[path] = updated
+
+    def invalidate(self, ref):
+        self._docs.pop(ref.path, None)
+
+    def memoize(self, key, loader):
+        """İstek boyunca tekrarlanan küçük aramaları (ör. hesap adı → ref) saklar."""
+        if key not in self._memo:
+            self._memo[key] = loader()
+        else:
+            self.hits += 1
+        return self._memo[key]
+
+    def stats(self):
+        return {'reads': self.reads, 'writes': self.writes, 'cacheHits': self.hits}
+
+
+def get_request_cache():
+    """
+    Aktif isteğin önbelleğini döner. İstek dışında (script, job) her çağrıda
+    yeni ve boş bir önbellek döner; yani davranış önbelleksiz okumaya eşittir.
+    """
+    if not has_request_context():
+        return RequestDocumentCache()
+    cache = g.get('_document_cache')
+    if cache is None:
+        cache = RequestDocumentCache()
+        g._document_cache = cache
+    return cache
+
+
+def init_request_cache(app):
+    """
+    Her yanıta önbellekten karşılanan okuma sayısını ekler. Toplam okuma/yazma
+    sayıları firestore_metrics tarafından X-Firestore-* başlıklarıyla verilir.
+    """
+
+    @app.after_request
+    def add_document_cache_headers(response):
+        cache = g.get('_document_cache')
+        if cache is not None:
+            response.headers['X-Document-Cache-Hits'] = str(cache.stats()['cacheHits'])
+        return response
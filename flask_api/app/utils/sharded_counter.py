@@ -0,0 +1,151 @@
+# File: flask_api/app/utils/sharded_counter.py
+import os
+import random
+import threading
+import time
+from datetime import datetime, timezone
+from firebase_admin import firestore
+
+# Okunan toplamın süreç içinde ne kadar süre önbellekte tutulacağı (saniye).
+COUNTER_CACHE_TTL = float(os.getenv('COUNTER_CACHE_TTL_SECONDS', '2'))
+
+
+class ShardedCounter:
+    """
+    Tek bir dökümandaki sayısal alanı N alt dökümana (shard) bölerek tutar.
+
+    Yazmalar rastgele bir shard'a `Increment` olarak gider, böylece aynı
+    kullanıcıya ait eşzamanlı yazmalar tek dökümanda sıraya girmez. Okuma,
+    ana dökümandaki taban değer ile tüm shard'ların toplamıdır:
+
+        toplam = parent[field] + sum(shard[field] for shard in shards)
+
+    Ana dökümandaki alan eski (shard öncesi) veriler ve doğrudan atanan
+    değerler için taban olarak kalır.
+    """
+
+    _cache = {}
+    _cache_lock = threading.Lock()
+
+    def __init__(self, client, parent_ref, field, num_shards, shard_collection='shards', shard_fields=None):
+        self.client = client
+        self.parent_ref = parent_ref
+        self.field = field
+        self.num_shards = max(int(num_shards), 1)
+        self.shard_collection = shard_collection
+        # Shard dökümanlarına eklenecek sabit alanlar (ör. collection group sorguları için userId)
+        self.shard_fields = shard_fields or {}
+
+    @property
+    def cache_key(self):
+        return f"{self.parent_ref.path}#{self.field}"
+
+    def shard_ref(self, index):
+        return self.parent_ref.collection(self.shard_collection).document(str(index))
+
+    def shard_refs(self):
+        return [self.shard_ref(i) for i in range(self.num_shards)]
+
+    def increment(self, amount, writer=None):
+        """
+        Rastgele bir shard'ı `amount` kadar artırır. `writer` verilirse
+        (transaction veya batch) yazma onun üzerinden yapılır ve commit
+        çağırana bırakılır.
+        """
+        shard_ref = self.shard_ref(random.randrange(self.num_shards))
+        updated_at = datetime.now(timezone.utc).isoformat()
+        payload = {
+            **self.shard_fields,
+            self.field: firestore.Increment(amount),
+            'updatedAt': updated_at
+        }
+        if writer is not None:
+            writer.set(shard_ref, payload, merge=True)
+            # Commit henüz olmadı; önbellekteki toplam artık güvenilir değil
+            self.invalidate()
+        else:
+            shard_ref.set(payload, merge=True)
+            self._adjust_cached(amount, updated_at)
+
+    def get_total(self, transaction=None, use_cache=True):
+        """
+        Taban değer + shard toplamını tek bir get_all round trip'i ile okur.
+        Transaction içinde okunuyorsa önbellek kullanılmaz.
+        """
+        return self.get_total_and_updated_at(transaction, use_cache)[0]
+
+    def get_total_and_updated_at(self, transaction=None, use_cache=True):
+        """
+        (toplam, en son updatedAt) — updatedAt ana döküman ve shard'lar arasında
+        en yenisidir; hiçbiri yoksa None.
+        """
+        if transaction is None and use_cache:
+            cached = self._get_cached()
+            if cached is not None:
+                return cached
+
+        refs = [self.parent_ref] + self.shard_refs()
+        if transaction is not None:
+            snapshots = list(self.client.get_all(refs, transaction=transaction))
+        else:
+            snapshots = list(self.client.get_all(refs))
+
+        total, updated_at = 0.0, None
+        for snapshot in snapshots:
+            if snapshot.exists:
+                data = snapshot.to_dict() or {}
+                total += float(data.get(self.field, 0.0) or 0.0)
+                if data.get('updatedAt') and (updated_at is None or data['updatedAt'] > updated_at):
+                    updated_at = data['updatedAt']
+
+        if transaction is None:
+            self._set_cached(total, updated_at)
+        return total, updated_at
+
+    def reset(self, value, writer):
+        """
+        Toplamı doğrudan `value` yapar: taban değeri yazar, shard'ları siler.
+        """
+        writer.set(self.parent_ref, {
+            self.field: float(value),
+            'updatedAt': datetime.now(timezone.utc).isoformat()
+        }, merge=True)
+        for shard_ref in self.shard_refs():
+            writer.delete(shard_ref)
+        self.invalidate()
+
+    @staticmethod
+    def sum_shards_by_parent(shard_docs, field):
+        """Bir collection group sorgusundan dönen shard'ları ana döküman id'sine göre toplar."""
+        totals = {}
+        for doc in shard_docs:
+            parent_id = doc.reference.parent.parent.id
+            totals[parent_id] = totals.get(parent_id, 0.0) + float((doc.to_dict() or {}).get(field, 0.0) or 0.0)
+        return totals
+
+    # --- süreç içi toplam önbelleği ---
+
+    def _get_cached(self):
+        if COUNTER_CACHE_TTL <= 0:
+            return None
+        with ShardedCounter._cache_lock:
+            entry = ShardedCounter._cache.get(self.cache_key)
+        if entry and entry[2] > time.monotonic():
+            return entry[0], entry[1]
+        return None
+
+    def _set_cached(self, value, updated_at):
+        if COUNTER_CACHE_TTL <= 0:
+            return
+        with ShardedCounter._cache_lock:
+            ShardedCounter._cache[self.cache_key] = (value, updated_at, time.monotonic() + COUNTER_CACHE_TTL)
+
+    def _adjust_cached(self, amount, updated_at):
+        with ShardedCounter._cache_lock:
+            entry = ShardedCounter._cache.get(self.cache_key)
+            if entry:
+                ShardedCounter._cache[self.cache_key] = (entry[0] + amount, max(entry[1] or '', updated_at), entry[2])
+
+    def invalidate(self):
+        with ShardedCounter._cache_lock:
+            ShardedCounter._cache.pop(self.cache_key, None)
@@ -0,0 +1,44 @@
+# File: flask_api/app/utils/sync_tombstones.py
+import os
+from datetime import datetime, timedelta, timezone
+from . import firebase_config
+
+# Fiziksel olarak silinen (hard delete) dökümanların izleri. /api/sync bu
+# kayıtlar sayesinde istemciye "şu döküman silindi" bilgisini iletebilir.
+TOMBSTONES_COLLECTION = 'sync_tombstones'
+# Silme izleri (tombstone'lar ve soft-delete edilmiş kayıtlar) bu süre sonunda
+# temizlenir (bkz. app/jobs/purge_deleted.py). Daha eski bir imleçle gelen
+# senkron silmeleri göremeyeceği için tam senkrona döner.
+RETENTION_DAYS = int(os.getenv('TOMBSTONE_RETENTION_DAYS', '90'))
+
+
+def retention_cutoff(retention_days=None, now=None):
+    """Bu andan (ISO) önce silinen kayıtların izi tutulmaz."""
+    now = now or datetime.now(timezone.utc)
+    days = RETENTION_DAYS if retention_days is None else retention_days
+    return (now - timedelta(days=days)).isoformat()
+
+
+def tombstone_ref(collection, doc_id):
+    # Aynı döküman ikinci kez silinirse yeni kayıt açılmaz, mevcut iz güncellenir
+    return firebase_config.db.collection(TOMBSTONES_COLLECTION).document(f"{collection}_{doc_id}")
+
+
+def record(user_id, collection, doc_id, writer=None):
+    """
+    `collection`/`doc_id` dökümanının silindiğini kaydeder. `writer` verilirse
+    (transaction veya batch) yazma onun üzerinden yapılır.
+    """
+    now = datetime.now(timezone.utc).isoformat()
+    payload = {
+        'userId': user_id,
+        'collection': collection,
+        'docId': doc_id,
+        'deletedAt': now,
+        'updatedAt': now
+    }
+    ref = tombstone_ref(collection, doc_id)
+    if writer is not None:
+        writer.set(ref, payload)
+    else:
+        ref.set(payload)
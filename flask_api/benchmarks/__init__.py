@@ -0,0 +1,7 @@
+import os
+
+# Benchmark'lar in-memory Firestore ile çalışır. Ortam, `app` içindeki hiçbir
+# modül import edilmeden ayarlanmalı: job_queue JOB_QUEUE_PATH'i import anında
+# seçer, aksi halde kuyruk instance/job_queue.sqlite3'e yazılır ve önceki
+# çalıştırmalardan kalan işler yeni (boş) veritabanına karşı tekrar oynatılır.
+os.environ.setdefault('FIRESTORE_BACKEND', 'memory')
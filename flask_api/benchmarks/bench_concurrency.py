@@ -0,0 +1,115 @@
+# File: flask_api/benchmarks/bench_concurrency.py
+"""
+Yavaş dış bağımlılıklar altında tek worker'ın eşzamanlı istek kapasitesi.
+
+Sahte yfinance ve Gemini sabit gecikmeyle yanıt verir, in-memory Firestore
+her round trip'te bekler. Aynı anda --requests adet istek gönderilir ve
+tamamlanma süresi ölçülür: gthread worker thread sayısı kadar isteği
+paralel taşırken gevent worker hepsini greenlet'lerle birlikte bekletir.
+
+    python -m benchmarks.bench_concurrency --requests 200 --delay-ms 300
+"""
+import argparse
+import http.client
+import json
+import signal
+import subprocess
+import sys
+import threading
+import time
+
+from .bench_serving import start_server
+
+SCENARIOS = {
+    'portfolio': ('GET', '/api/investments/portfolio?userId=bench-user-0000', None),
+    'analysis': ('GET', '/api/investments/analysis/AAPL', None),
+    'parse-text': ('POST', '/api/ai/parse-text',
+                   {'text': 'markete 250 tl, kahveye 85 tl, maaş 42000 tl, taksi 140 tl'}),
+}
+WORKER_MODES = {
+    'gthread': {'GUNICORN_WORKER_CLASS': 'gthread', 'GUNICORN_THREADS': 4},
+    'gevent': {'GUNICORN_WORKER_CLASS': 'gevent'},
+}
+
+
+def _burst(port, method, path, body, count):
+    barrier = threading.Barrier(count)
+    latencies, errors = [], []
+    lock = threading.Lock()
+    payload = json.dumps(body) if body is not None else None
+    headers = {'Content-Type': 'application/json'} if body is not None else {}
+
+    def fire():
+        conn = http.client.HTTPConnection('127.0.0.1', port, timeout=120)
+        barrier.wait()
+        started = time.perf_counter()
+        try:
+            conn.request(method, path, body=payload, headers=headers)
+            response = conn.getresponse()
+            response.read()
+            ok = response.status < 500
+        except (OSError, http.client.HTTPException):
+            ok = False
+        elapsed = (time.perf_counter() - started) * 1000
+        conn.close()
+        with lock:
+            (latencies if ok else errors).append(elapsed)
+
+    threads = [threading.Thread(target=fire) for _ in range(count)]
+    started = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    wall = time.perf_counter() - started
+    latencies.sort()
+    pick = lambda pct: latencies[min(len(latencies) - 1, int(pct / 100 * len(latencies)))] if latencies else 0.0
+    return {'ok': len(latencies), 'errors': len(errors), 'wallSeconds': round(wall, 2),
+            'requestsPerSecond': round(len(latencies) / wall, 1),
+            'p50Ms': round(pick(50), 1), 'p99Ms': round(pick(99), 1)}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--requests', type=int, default=200, help='concurrent requests per burst')
+    parser.add_argument('--delay-ms', type=float, default=300.0, help='yfinance / Gemini stub delay')
+    parser.add_argument('--latency-ms', type=float, default=20.0, help='Firestore round-trip latency')
+    parser.add_argument('--modes', default='gthread,gevent')
+    parser.add_argument('--scenarios', default=','.join(SCENARIOS))
+    parser.add_argument('--port', type=int, default=5065)
+    parser.add_argument('--json', help='write results to this file')
+    args = parser.parse_args(argv)
+
+    results = {}
+    for offset, mode in enumerate(args.modes.split(',')):
+        env = {'WEB_CONCURRENCY': 1, 'BENCH_USERS': 1, 'BENCH_TRANSACTIONS': 200,
+               'MEMORY_FIRESTORE_LATENCY_MS': args.latency_ms,
+               'BENCH_MARKET_DELAY_MS': args.delay_ms, 'BENCH_LLM_DELAY_MS': args.delay_ms,
+               # Önbellekler kapalı: her istek yavaş bağımlılığa gider
+               'QUOTE_CACHE_TTL_SECONDS': 0, 'FX_CACHE_TTL_SECONDS': 0, 'MARKET_DATA_WARMUP': 0,
+               'GUNICORN_TIMEOUT': 300, **WORKER_MODES[mode]}
+        port = args.port + offset
+        proc = start_server('production', port, env)
+        try:
+            for name in args.scenarios.split(','):
+                method, path, body = SCENARIOS[name]
+                result = _burst(port, method, path, body, args.requests)
+                results.setdefault(mode, {})[name] = result
+                print(f"{mode:<8} {name:<11} {result['ok']:>4} ok {result['errors']:>3} err  "
+                      f"wall {result['wallSeconds']:>7.2f}s  {result['requestsPerSecond']:>7.1f} req/s  "
+                      f"p50 {result['p50Ms']:>8.1f}ms  p99 {result['p99Ms']:>8.1f}ms")
+        finally:
+            proc.send_signal(signal.SIGTERM)
+            try:
+                proc.wait(timeout=30)
+            except subprocess.TimeoutExpired:
+                proc.kill()
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,210 @@
+# File: flask_api/benchmarks/bench_endpoints.py
+"""
+Tüm API uç noktaları için gecikme (p50/p99) ve Firestore round trip
+benchmark'ı. In-memory Firestore üzerinde sentetik kullanıcılarla çalışır;
+kimlik bilgisi veya ağ erişimi gerektirmez.
+
+Kullanım (flask_api dizininden):
+    python -m benchmarks.bench_endpoints --users 5 --transactions 3000
+    python -m benchmarks.bench_endpoints --json results.json
+    python -m benchmarks.bench_endpoints --baseline results.json   # regresyonda exit 1
+
+--latency-ms her Firestore round trip'ine yapay gecikme ekler; böylece
+round trip sayısındaki artışlar gecikmeye de yansır.
+"""
+import argparse
+import io
+import json
+import os
+import random
+import statistics
+import sys
+import time
+from contextlib import redirect_stdout
+from datetime import datetime, timezone, timedelta
+
+os.environ.setdefault('FIRESTORE_BACKEND', 'memory')
+
+from app import create_app
+from app.utils.memory_firestore import MemoryFirestoreClient
+from .seed import seed_dataset
+from .stubs import install_market_data_stub
+
+
+def _percentile(values, pct):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, int(round(pct / 100 * (len(ordered) - 1)))))
+    return ordered[index]
+
+
+def build_scenarios(users, rng):
+    """(isim, method, url, json gövdesi) üreten fabrikalar. Her çağrıda rastgele bir kullanıcı seçilir."""
+    today = datetime.now(timezone.utc).date()
+    month_ago = (today - timedelta(days=30)).isoformat()
+    year_ago = (today - timedelta(days=365)).isoformat()
+
+    def pick():
+        return rng.choice(users)
+
+    def new_tx(u):
+        return {'userId': u['userId'], 'type': 'expense', 'category': 'Kahve', 'amount': 42.5,
+                'date': today.isoformat(), 'account': u['accounts'][0]['name'], 'description': 'Benchmark kahve'}
+
+    return [
+        ('GET /api/accounts', lambda u: ('GET', f"/api/accounts?userId={u['userId']}", None)),
+        ('POST /api/accounts', lambda u: ('POST', '/api/accounts', {
+            'userId': u['userId'], 'accountName': f"Bench {rng.randrange(10**6)}", 'accountType': 'bank', 'currency': 'try'})),
+        ('GET /api/transactions (30d)', lambda u: ('GET', f"/api/transactions?userId={u['userId']}", None)),
+        ('GET /api/transactions (1y)', lambda u: ('GET', f"/api/transactions?userId={u['userId']}&startDate={year_ago}&endDate={today.isoformat()}", None)),
+        ('POST /api/transactions', lambda u: ('POST', '/api/transactions', new_tx(u))),
+        ('PUT /api/transactions/<id>', lambda u: ('PUT', f"/api/transactions/{rng.choice(u['transactionIds'])}", {'amount': round(rng.uniform(10, 500), 2)})),
+        ('DELETE /api/transactions/<id>', lambda u: ('DELETE', f"/api/transactions/{u['transactionIds'].pop()}?userId={u['userId']}", None)),
+        ('GET /api/categories', lambda u: ('GET', f"/api/categories?userId={u['userId']}", None)),
+        ('PUT /api/categories/<id>', lambda u: ('PUT', f"/api/categories/{rng.choice(u['categoryIds'])}", {'userId': u['userId'], 'iconId': f"icon-{rng.randrange(10)}"})),
+        ('GET /api/budgets', lambda u: ('GET', f"/api/budgets?userId={u['userId']}", None)),
+        ('POST /api/budgets', lambda u: ('POST', '/api/budgets', {'userId': u['userId'], 'category': 'Market', 'limitAmount': 3000})),
+        ('GET /api/savings/balance', lambda u: ('GET', f"/api/savings/balance?userId={u['userId']}", None)),
+        ('GET /api/savings/allocations', lambda u: ('GET', f"/api/savings/allocations?userId={u['userId']}&startDate={month_ago}", None)),
+        ('GET /api/savings/goals', lambda u: ('GET', f"/api/savings/goals?userId={u['userId']}", None)),
+        ('GET /api/savings/goals/projections', lambda u: ('GET', f"/api/savings/goals/projections?userId={u['userId']}", None)),
+        ('POST /api/savings/goals/<id>/allocate', lambda u: ('POST', f"/api/savings/goals/{rng.choice(u['goalIds'])}/allocate", {'userId': u['userId'], 'amount': 1})),
+        ('GET /api/home', lambda u: ('GET', f"/api/home?userId={u['userId']}", None)),
+        ('GET /api/analytics/dashboard', lambda u: ('GET', f"/api/analytics/dashboard?userId={u['userId']}", None)),
+        ('GET /api/investments/portfolio', lambda u: ('GET', f"/api/investments/portfolio?userId={u['userId']}", None)),
+        ('GET /api/investments/transactions', lambda u: ('GET', f"/api/investments/transactions?userId={u['userId']}", None)),
+        ('POST /api/investments/transactions', lambda u: ('POST', '/api/investments/transactions', {
+            'userId': u['userId'], 'accountId': u['investmentAccountIds'][0], 'assetSymbol': 'THYAO.IS', 'type': 'buy',
+            'quantity': 1, 'pricePerUnit': 250.0, 'date': today.isoformat()})),
+        ('GET /api/investments/analysis/<symbol>', lambda u: ('GET', '/api/investments/analysis/AAPL', None)),
+        ('GET /api/users/<uid>/profile', lambda u: ('GET', f"/api/users/{u['userId']}/profile", None)),
+        ('PUT /api/users/<uid>/profile', lambda u: ('PUT', f"/api/users/{u['userId']}/profile", {'fullName': 'Bench Updated'})),
+        ('GET /api/finance-tests/items', lambda u: ('GET', '/api/finance-tests/items', None)),
+        ('GET /api/ai/recommendations/budget', lambda u: ('GET', f"/api/ai/recommendations/budget?userId={u['userId']}&category=Market", None)),
+    ], pick
+
+
+def setup_app(num_users, transactions, seed, latency_ms=0.0):
+    """In-memory Firestore ile uygulamayı kurar ve sentetik veriyi yükler."""
+    client = MemoryFirestoreClient(latency_ms=0)
+
+    with redirect_stdout(io.StringIO()):
+        app = create_app(firestore_client=client)
+    install_market_data_stub()
+
+    seed_started = time.perf_counter()
+    users = seed_dataset(client, num_users=num_users, transactions_per_user=transactions, seed=seed)
+    # Önceki kurulumun (başka istemcinin) süreç içi önbellekleri kullanılmasın.
+    # Servis modülleri db'yi import anında bağladığından import create_app'ten sonra.
+    from app.services import finance_test_item_bank, budget_recommendation_service
+    finance_test_item_bank.invalidate()
+    budget_recommendation_service.clear_cache()
+    print(f"Seeded {num_users} users / {client.document_count()} documents in {time.perf_counter() - seed_started:.1f}s",
+          file=sys.stderr)
+    client._latency = latency_ms / 1000.0
+    return app, client, users
+
+
+def run(args):
+    rng = random.Random(args.seed)
+    app, client, users = setup_app(args.users, args.transactions, args.seed, args.latency_ms)
+
+    scenarios, pick = build_scenarios(users, rng)
+    http = app.test_client()
+    results = {}
+    quiet = io.StringIO()
+
+    for name, factory in scenarios:
+        if args.only and args.only not in name:
+            continue
+        timings, reads, writes, queries, statuses = [], [], [], [], {}
+        for i in range(args.warmup + args.iterations):
+            method, url, body = factory(pick())
+            started = time.perf_counter()
+            with redirect_stdout(quiet):
+                response = http.open(url, method=method, json=body)
+            elapsed = (time.perf_counter() - started) * 1000
+            quiet.seek(0)
+            quiet.truncate()
+            if i < args.warmup:
+                continue
+            timings.append(elapsed)
+            reads.append(int(response.headers.get('X-Firestore-Reads', 0)))
+            writes.append(int(response.headers.get('X-Firestore-Writes', 0)))
+            queries.append(int(response.headers.get('X-Firestore-Queries', 0)))
+            statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+
+        results[name] = {
+            'iterations': len(timings),
+            'p50Ms': round(_percentile(timings, 50), 3),
+            'p99Ms': round(_percentile(timings, 99), 3),
+            'meanMs': round(statistics.fmean(timings), 3),
+            'reads': round(statistics.fmean(reads), 2),
+            'writes': round(statistics.fmean(writes), 2),
+            'queries': round(statistics.fmean(queries), 2),
+            'statuses': {str(k): v for k, v in sorted(statuses.items())},
+        }
+    return results
+
+
+def print_table(results):
+    header = f"{'endpoint':<42} {'p50 ms':>9} {'p99 ms':>9} {'reads':>8} {'writes':>7} {'queries':>8}  status"
+    print(header)
+    print('-' * len(header))
+    for name, r in results.items():
+        statuses = ','.join(f"{k}x{v}" for k, v in r['statuses'].items())
+        print(f"{name:<42} {r['p50Ms']:>9.2f} {r['p99Ms']:>9.2f} {r['reads']:>8.1f} {r['writes']:>7.1f} {r['queries']:>8.1f}  {statuses}")
+
+
+def compare_to_baseline(results, baseline, tolerance):
+    """Round trip artışları kesin, gecikme artışları tolerans ile regresyon sayılır."""
+    regressions = []
+    for name, current in results.items():
+        previous = baseline.get(name)
+        if not previous:
+            continue
+        for key in ('reads', 'writes', 'queries'):
+            if current[key] > previous[key] + 0.5:
+                regressions.append(f"{name}: {key} {previous[key]} -> {current[key]}")
+        if current['p50Ms'] > previous['p50Ms'] * (1 + tolerance) and current['p50Ms'] - previous['p50Ms'] > 1.0:
+            regressions.append(f"{name}: p50 {previous['p50Ms']}ms -> {current['p50Ms']}ms")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--users', type=int, default=5)
+    parser.add_argument('--transactions', type=int, default=3000, help='transactions per user')
+    parser.add_argument('--iterations', type=int, default=50)
+    parser.add_argument('--warmup', type=int, default=5)
+    parser.add_argument('--latency-ms', type=float, default=0.0, help='simulated Firestore round-trip latency')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--only', help='only run endpoints whose name contains this text')
+    parser.add_argument('--json', help='write results to this file')
+    parser.add_argument('--baseline', help='compare with a previous --json output and fail on regressions')
+    parser.add_argument('--tolerance', type=float, default=0.25, help='allowed relative p50 slowdown')
+    args = parser.parse_args(argv)
+
+    results = run(args)
+    print_table(results)
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2, ensure_ascii=False)
+
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as f:
+            baseline = json.load(f)
+        regressions = compare_to_baseline(results, baseline, args.tolerance)
+        if regressions:
+            print("\nPerformance regressions:")
+            for line in regressions:
+                print(f"  - {line}")
+            return 1
+        print("\nNo regressions against baseline.")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,122 @@
+# File: flask_api/benchmarks/bench_export.py
+"""
+Dışa aktarım (/api/export) kodlayıcılarının verimi ve bellek kullanımı.
+
+Satırlar Firestore yerine sayfa sayfa üretilir (tembel), böylece ölçülen
+şey sadece kodlama + zip maliyetidir; hiçbir anda bellekte bir sayfadan
+(Parquet'te bir row group'tan) fazlası bulunmamalıdır. Her biçim için
+satır/sn, çıktı boyutu ve süreç tepe belleğindeki (ru_maxrss) artış
+raporlanır. --http ile aynı akış bellek-içi Firestore üzerinden test
+istemcisiyle de ölçülür.
+
+    python -m benchmarks.bench_export --rows 1000000
+    python -m benchmarks.bench_export --rows 200000 --http 5000
+"""
+import argparse
+import io
+import json
+import random
+import resource
+import sys
+import time
+from contextlib import redirect_stdout
+
+EXPORT_FORMATS = ('ndjson', 'csv', 'parquet')
+
+_CATEGORIES = ['Market', 'Kira', 'Ulaşım', 'Sağlık', 'Eğlence', 'Faturalar', 'Maaş']
+
+
+def _synthetic_pages(rows, seed, page_size):
+    """`rows` işlemi `page_size`'lık sayfalar halinde üreten pages(source)."""
+    def pages(source):
+        rng = random.Random(seed)
+        produced = 0
+        while produced < rows:
+            size = min(page_size, rows - produced)
+            page = []
+            for i in range(produced, produced + size):
+                day = f"2020-{1 + i % 12:02d}-{1 + i % 28:02d}"
+                page.append({
+                    'id': f"tx{i:012d}", 'userId': 'bench-user', 'date': day,
+                    'type': 'income' if i % 9 == 0 else 'expense',
+                    'category': _CATEGORIES[i % len(_CATEGORIES)],
+                    'amount': round(rng.uniform(5, 5000), 2), 'account': 'Nakit',
+                    'description': f"İşlem {i}", 'isNeed': bool(i % 2), 'emotion': None,
+                    'incomeAllocationPct': None, 'createdAt': f"{day}T12:00:00+00:00",
+                    'updatedAt': f"{day}T12:00:00+00:00", 'isDeleted': False,
+                })
+            produced += size
+            yield page
+    return pages
+
+
+def _max_rss_mb():
+    # Linux'ta KB cinsinden
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def _measure(open_chunks, rows):
+    rss_before = _max_rss_mb()
+    started = time.perf_counter()
+    total = largest = 0
+    for chunk in open_chunks():
+        total += len(chunk)
+        largest = max(largest, len(chunk))
+    elapsed = time.perf_counter() - started
+    return {
+        'rows': rows, 'seconds': round(elapsed, 3), 'rowsPerSec': round(rows / elapsed) if elapsed else None,
+        'megabytes': round(total / 1e6, 2), 'largestChunkKB': round(largest / 1024, 1),
+        'peakRssGrowthMB': round(_max_rss_mb() - rss_before, 1),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=1_000_000)
+    parser.add_argument('--format', action='append', dest='formats', choices=EXPORT_FORMATS)
+    parser.add_argument('--http', type=int, default=0, metavar='TRANSACTIONS',
+                        help='also stream a seeded user with this many transactions through the test client')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--json', help='write results to this file')
+    args = parser.parse_args(argv)
+
+    quiet = io.StringIO()
+    if args.http:
+        from .bench_endpoints import setup_app
+        with redirect_stdout(quiet):
+            app, _, users = setup_app(1, args.http, args.seed)
+    # Servis modülü db'yi import anında bağladığından import setup_app'ten sonra.
+    from app.services.export_service import ExportService, EXPORT_PAGE_SIZE
+
+    formats = [f for f in (args.formats or EXPORT_FORMATS)
+               if f != 'parquet' or ExportService.parquet_available()]
+    results = {}
+    for fmt in formats:
+        pages = _synthetic_pages(args.rows, args.seed, EXPORT_PAGE_SIZE)
+        results[f"encode:{fmt}"] = _measure(lambda: ExportService.encode(fmt, ['transactions'], pages), args.rows)
+
+    if args.http:
+        http = app.test_client()
+        user_id = users[0]['userId']
+        rows = sum(len(page) for page in ExportService.pages(user_id, 'transactions'))
+        for fmt in formats:
+            url = f"/api/export?userId={user_id}&format={fmt}&collections=transactions"
+            # Test istemcisi ilk parçayı get() içinde üretir; süreye istek de dahil
+            with redirect_stdout(quiet):
+                results[f"http:{fmt}"] = _measure(lambda: http.get(url, buffered=False).response, rows)
+
+    header = f"{'run':<18} {'rows':>9} {'sec':>8} {'rows/s':>10} {'MB':>8} {'chunk KB':>9} {'RSS +MB':>8}"
+    print(header)
+    print('-' * len(header))
+    for name, r in results.items():
+        print(f"{name:<18} {r['rows']:>9} {r['seconds']:>8.2f} {r['rowsPerSec'] or 0:>10} "
+              f"{r['megabytes']:>8.2f} {r['largestChunkKB']:>9.1f} {r['peakRssGrowthMB']:>8.1f}")
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,147 @@
+# File: flask_api/benchmarks/bench_logging.py
+"""
+Loglama yapılandırmasının istek başına maliyeti.
+
+Aynı istek karışımı farklı log ayarlarıyla çalıştırılır; log'lar gerçek bir
+dosyaya yazılır (stdout'a yazan eski print davranışına en yakın durum):
+
+  debug-sync   her mesaj formatlanıp istek thread'inde yazılır (eski print'ler gibi)
+  debug-async  her mesaj formatlanır, yazma listener thread'inde
+  info-async   varsayılan: hot path debug mesajları hiç formatlanmaz
+  off          loglama kapalı (alt sınır)
+
+Ayrıca sadece log çağrıları (POST /api/transactions'ın yazdığı üç mesaj) eski
+print() satırlarıyla karşılaştırılır; uçtan uca sürede gürültüde kaybolan fark
+burada mikro saniye cinsinden görünür.
+
+    python -m benchmarks.bench_logging --requests 2000
+"""
+import argparse
+import gc
+import os
+import random
+import tempfile
+import time
+
+from app.utils import logging_config
+from .bench_endpoints import setup_app
+
+CONFIGS = [
+    ('debug-sync', dict(level='DEBUG', async_mode=False)),
+    ('debug-async', dict(level='DEBUG', async_mode=True)),
+    ('info-async', dict(level='INFO', async_mode=True)),
+    ('off', dict(level='CRITICAL', async_mode=False)),
+]
+
+
+def _request_mix(users, rng):
+    # Loglaması yoğun yazma + okuma uçları
+    def make(user):
+        uid = user['userId']
+        return rng.choice([
+            ('POST', '/api/transactions', {
+                'userId': uid, 'type': 'expense', 'amount': round(rng.uniform(10, 500), 2),
+                'category': 'Market', 'account': user['accounts'][0]['name'], 'date': '2025-01-15',
+                'description': 'Bench market alışverişi ' + 'x' * 200
+            }),
+            ('GET', f'/api/transactions?userId={uid}', None),
+            ('GET', f'/api/accounts?userId={uid}', None),
+            ('GET', f'/api/categories?userId={uid}', None),
+            ('PUT', f'/api/users/{uid}/profile', {'fullName': 'Bench Updated', 'bio': 'y' * 200}),
+        ])
+    return make
+
+
+def _run(http, users, make, requests, rng):
+    durations = []
+    for _ in range(requests):
+        method, url, body = make(rng.choice(users))
+        started = time.perf_counter()
+        http.open(url, method=method, json=body)
+        durations.append((time.perf_counter() - started) * 1000)
+    durations.sort()
+    return sum(durations) / len(durations), durations[len(durations) // 2]
+
+
+def _measure(args, options):
+    # Her ölçüm aynı seed'le kurulmuş taze veriyle başlar (POST'lar veriyi büyütür)
+    app, _, users = setup_app(args.users, args.transactions, args.seed)
+    http = app.test_client()
+    with tempfile.NamedTemporaryFile('w', suffix='.log', delete=False) as log_file:
+        path = log_file.name
+    with open(path, 'w', buffering=1) as stream:
+        logging_config.configure_logging(stream=stream, **options)
+        rng = random.Random(args.seed)
+        make = _request_mix(users, rng)
+        _run(http, users, make, 50, rng)  # ısınma
+        gc.collect()
+        mean_ms, p50_ms = _run(http, users, make, args.requests, rng)
+        logging_config.configure_logging(level='CRITICAL', async_mode=False)  # kuyruğu boşalt
+    size = os.path.getsize(path)
+    os.unlink(path)
+    return mean_ms, p50_ms, size / (args.requests + 50)
+
+
+def _hot_path_cost(options, iterations):
+    """POST /api/transactions'ın log satırlarının çağrı başına maliyeti (µs)."""
+    payload = {'userId': 'bench-user-0001', 'type': 'expense', 'amount': 120.5, 'category': 'Market',
+               'account': 'Nakit', 'date': '2025-01-15', 'description': 'Bench market alışverişi ' + 'x' * 200}
+    with tempfile.TemporaryFile('w') as stream:
+        if options is None:
+            started = time.perf_counter()
+            for i in range(iterations):
+                print(f"POST /api/transactions received data: {payload}", file=stream, flush=True)
+                print(f"TRANSACTION_SERVICE: Created transaction with ID tx{i}", file=stream, flush=True)
+                print(f"BALANCE_SERVICE: Account 'acc1' balance updated by {-payload['amount']}.", file=stream, flush=True)
+            return (time.perf_counter() - started) * 1e6 / iterations
+
+        logging_config.configure_logging(stream=stream, **options)
+        logger = logging_config.get_logger('benchmarks.hot_path')
+        started = time.perf_counter()
+        for i in range(iterations):
+            logger.debug("POST /api/transactions received data: %s", payload)
+            logger.debug("TRANSACTION_SERVICE: Created transaction with ID %s", f"tx{i}")
+            logger.debug("BALANCE_SERVICE: Account '%s' balance updated by %s.", 'acc1', -payload['amount'])
+        elapsed = time.perf_counter() - started
+        logging_config.configure_logging(level='CRITICAL', async_mode=False)
+        return elapsed * 1e6 / iterations
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--users', type=int, default=3)
+    parser.add_argument('--transactions', type=int, default=300)
+    parser.add_argument('--requests', type=int, default=2000)
+    parser.add_argument('--rounds', type=int, default=3)
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args(argv)
+
+    samples = {name: [] for name, _ in CONFIGS}
+    for _ in range(args.rounds):
+        # Yapılandırmalar her turda sırayla çalışır; ısınma/GC etkisi dağılır
+        for name, options in CONFIGS:
+            samples[name].append(_measure(args, options))
+
+    print(f"{'config':<14}{'mean ms':>10}{'p50 ms':>10}{'log bytes/req':>16}")
+    print('-' * 50)
+    p50s = {}
+    for name, runs in samples.items():
+        # En iyi tur: gürültü (GC, zamanlayıcı) sadece yukarı doğru etkiler
+        mean_ms = min(r[0] for r in runs)
+        p50_ms = min(r[1] for r in runs)
+        p50s[name] = p50_ms
+        print(f"{name:<14}{mean_ms:>10.3f}{p50_ms:>10.3f}{runs[0][2]:>16.0f}")
+
+    print(f"\ninfo-async vs debug-sync (p50): {p50s['debug-sync'] - p50s['info-async']:.3f} ms/request saved "
+          f"(best of {args.rounds} rounds)")
+
+    iterations = 20000
+    print(f"\nhot path log calls only (3 lines per request, {iterations} requests)")
+    print(f"{'config':<14}{'µs/request':>12}")
+    print('-' * 26)
+    for name, options in [('print (legacy)', None)] + CONFIGS:
+        print(f"{name:<14}{_hot_path_cost(options, iterations):>12.2f}")
+
+
+if __name__ == '__main__':
+    main()
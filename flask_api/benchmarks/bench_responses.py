@@ -0,0 +1,87 @@
+# File: flask_api/benchmarks/bench_responses.py
+"""
+Uç nokta başına JSON serileştirme maliyeti ve kablodaki byte sayısı.
+
+Her GET uç noktasının yanıt gövdesi bir kez alınır, ardından:
+  - stdlib (Flask varsayılanı) ve orjson sağlayıcısıyla serileştirme süresi,
+  - sıkıştırmasız / gzip / br boyutları,
+  - aynı ETag ile tekrar istendiğinde 304 dönüp dönmediği
+ölçülür.
+
+    python -m benchmarks.bench_responses --transactions 3000
+"""
+import argparse
+import io
+import json
+import random
+import sys
+import time
+from contextlib import redirect_stdout
+
+from flask.json.provider import DefaultJSONProvider
+
+from app.utils import http_response
+from .bench_endpoints import build_scenarios, setup_app
+
+
+def _time_dumps(provider, obj, repeat):
+    started = time.perf_counter()
+    for _ in range(repeat):
+        provider.dumps(obj, separators=(",", ":"))
+    return (time.perf_counter() - started) * 1000 / repeat
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--users', type=int, default=2)
+    parser.add_argument('--transactions', type=int, default=3000)
+    parser.add_argument('--repeat', type=int, default=20)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--json', help='write results to this file')
+    args = parser.parse_args(argv)
+
+    app, _, users = setup_app(args.users, args.transactions, args.seed)
+    scenarios, _ = build_scenarios(users, random.Random(args.seed))
+    stdlib_provider = DefaultJSONProvider(app)
+    fast_provider = http_response.FastJSONProvider(app) if http_response.orjson else None
+    http = app.test_client()
+    quiet = io.StringIO()
+
+    results = {}
+    for name, factory in scenarios:
+        method, url, body = factory(users[0])
+        if method != 'GET':
+            continue
+        with redirect_stdout(quiet):
+            response = http.get(url, headers={'Accept-Encoding': 'identity'})
+            if response.status_code != 200 or response.mimetype != 'application/json':
+                continue
+            etag = response.headers.get('ETag')
+            revalidated = http.get(url, headers={'If-None-Match': etag}).status_code if etag else None
+        obj = response.get_json()
+        raw = json.dumps(obj, separators=(",", ":"), sort_keys=True).encode('utf-8')
+        results[name] = {
+            'stdlibMs': round(_time_dumps(stdlib_provider, obj, args.repeat), 3),
+            'orjsonMs': round(_time_dumps(fast_provider, obj, args.repeat), 3) if fast_provider else None,
+            'identityBytes': len(response.data),
+            'gzipBytes': len(http_response.compress_body(raw, 'gzip')),
+            'brBytes': len(http_response.compress_body(raw, 'br')) if http_response.brotli else None,
+            'revalidationStatus': revalidated,
+        }
+
+    header = f"{'endpoint':<40} {'stdlib ms':>10} {'orjson ms':>10} {'bytes':>9} {'gzip':>8} {'br':>8} {'ETag':>5}"
+    print(header)
+    print('-' * len(header))
+    fmt = lambda v, spec: format(v, spec) if v is not None else '-'
+    for name, r in results.items():
+        print(f"{name:<40} {r['stdlibMs']:>10.3f} {fmt(r['orjsonMs'], '>10.3f')} {r['identityBytes']:>9} "
+              f"{r['gzipBytes']:>8} {fmt(r['brBytes'], '>8')} {fmt(r['revalidationStatus'], '>5')}")
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,160 @@
+# File: flask_api/benchmarks/bench_serving.py
+"""
+Geliştirme sunucusu (Werkzeug) ile production modu (Gunicorn, gunicorn.conf.py)
+arasında saniyedeki istek sayısı karşılaştırması.
+
+Her mod ayrı bir süreçte benchmarks.serving_app ile başlatılır, ardından
+--concurrency adet keep-alive bağlantısı --duration saniye boyunca
+uç noktalara istek atar.
+
+    python -m benchmarks.bench_serving --duration 10 --concurrency 32 --latency-ms 5
+"""
+import argparse
+import http.client
+import json
+import os
+import signal
+import subprocess
+import sys
+import threading
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+FLASK_API_DIR = os.path.dirname(BENCH_DIR)
+
+PATHS = [
+    "/api/accounts?userId=bench-user-0000",
+    "/api/transactions?userId=bench-user-0001",
+    "/api/budgets?userId=bench-user-0002",
+    "/api/savings/goals?userId=bench-user-0000",
+    "/api/users/bench-user-0001/profile",
+    "/api/investments/portfolio?userId=bench-user-0002",
+]
+
+
+def start_server(mode, port, extra_env=None):
+    """benchmarks.serving_app'i geliştirme sunucusu ('dev') ya da Gunicorn ile başlatır ve hazır olmasını bekler."""
+    env = dict(os.environ, FIRESTORE_BACKEND='memory', PORT=str(port),
+               GUNICORN_BIND=f"127.0.0.1:{port}", GUNICORN_ACCESS_LOG='',
+               GUNICORN_LOG_LEVEL='warning', PYTHONWARNINGS='ignore')
+    env.update({k: str(v) for k, v in (extra_env or {}).items()})
+    if mode == 'dev':
+        cmd = [sys.executable, '-m', 'benchmarks.serving_app']
+    else:
+        cmd = [sys.executable, '-m', 'gunicorn', '-c', 'gunicorn.conf.py', 'benchmarks.serving_app:app']
+    proc = subprocess.Popen(cmd, cwd=FLASK_API_DIR, env=env,
+                            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+    deadline = time.time() + 60
+    while time.time() < deadline:
+        try:
+            conn = http.client.HTTPConnection('127.0.0.1', port, timeout=2)
+            conn.request('GET', '/hello')
+            if conn.getresponse().status == 200:
+                return proc
+        except OSError:
+            time.sleep(0.2)
+    proc.kill()
+    raise RuntimeError(f"{mode} server did not start on port {port}")
+
+
+def _load(port, duration, concurrency):
+    stop_at = time.perf_counter() + duration
+    counts = {'ok': 0, 'error': 0}
+    latencies = []
+    lock = threading.Lock()
+
+    def worker(offset):
+        conn = http.client.HTTPConnection('127.0.0.1', port, timeout=30)
+        i = offset
+        local_ok, local_err, local_lat = 0, 0, []
+        while time.perf_counter() < stop_at:
+            path = PATHS[i % len(PATHS)]
+            i += 1
+            started = time.perf_counter()
+            try:
+                conn.request('GET', path)
+                response = conn.getresponse()
+                response.read()
+                if response.status < 500:
+                    local_ok += 1
+                else:
+                    local_err += 1
+                if response.getheader('Connection', '').lower() == 'close':
+                    conn.close()
+                    conn = http.client.HTTPConnection('127.0.0.1', port, timeout=30)
+            except (OSError, http.client.HTTPException):
+                local_err += 1
+                conn.close()
+                conn = http.client.HTTPConnection('127.0.0.1', port, timeout=30)
+            local_lat.append((time.perf_counter() - started) * 1000)
+        conn.close()
+        with lock:
+            counts['ok'] += local_ok
+            counts['error'] += local_err
+            latencies.extend(local_lat)
+
+    threads = [threading.Thread(target=worker, args=(n,)) for n in range(concurrency)]
+    started = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - started
+    latencies.sort()
+    pick = lambda pct: latencies[min(len(latencies) - 1, int(pct / 100 * len(latencies)))] if latencies else 0.0
+    return {
+        'requests': counts['ok'], 'errors': counts['error'],
+        'requestsPerSecond': round(counts['ok'] / elapsed, 1),
+        'p50Ms': round(pick(50), 2), 'p99Ms': round(pick(99), 2),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--duration', type=float, default=10.0)
+    parser.add_argument('--concurrency', type=int, default=32)
+    parser.add_argument('--latency-ms', type=float, default=5.0, help='simulated Firestore round-trip latency')
+    parser.add_argument('--transactions', type=int, default=1000, help='seeded transactions per user')
+    parser.add_argument('--workers', type=int, help='override WEB_CONCURRENCY for production mode')
+    parser.add_argument('--threads', type=int, help='override GUNICORN_THREADS for production mode')
+    parser.add_argument('--modes', default='dev,production')
+    parser.add_argument('--port', type=int, default=5055)
+    parser.add_argument('--json', help='write results to this file')
+    args = parser.parse_args(argv)
+
+    results = {}
+    for offset, mode in enumerate(args.modes.split(',')):
+        port = args.port + offset
+        env = {'MEMORY_FIRESTORE_LATENCY_MS': args.latency_ms, 'BENCH_USERS': 3,
+               'BENCH_TRANSACTIONS': args.transactions}
+        if args.workers:
+            env['WEB_CONCURRENCY'] = args.workers
+        if args.threads:
+            env['GUNICORN_THREADS'] = args.threads
+        proc = start_server(mode, port, env)
+        try:
+            _load(port, min(2.0, args.duration), args.concurrency)  # ısınma
+            results[mode] = _load(port, args.duration, args.concurrency)
+        finally:
+            proc.send_signal(signal.SIGTERM)
+            try:
+                proc.wait(timeout=30)
+            except subprocess.TimeoutExpired:
+                proc.kill()
+        r = results[mode]
+        print(f"{mode:<12} {r['requestsPerSecond']:>9.1f} req/s  p50 {r['p50Ms']:>8.2f}ms  "
+              f"p99 {r['p99Ms']:>8.2f}ms  errors {r['errors']}")
+
+    if 'dev' in results and 'production' in results and results['dev']['requestsPerSecond']:
+        ratio = results['production']['requestsPerSecond'] / results['dev']['requestsPerSecond']
+        print(f"production / dev throughput: {ratio:.2f}x")
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
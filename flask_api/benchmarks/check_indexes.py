@@ -0,0 +1,128 @@
+# File: flask_api/benchmarks/check_indexes.py
+"""
+Index kapsama kontrolü: firestore.indexes.json QUERY_REGISTRY ile güncel mi ve
+uygulamanın gerçekten attığı her sorgu manifestte karşılanıyor mu?
+
+Benchmark senaryoları ve filtreli liste/senkron akışları, manifestle kurulan
+IndexValidator takılı in-memory Firestore üzerinde çalıştırılır. Karşılanmayan
+sorgu şekli varsa (production'da FailedPrecondition olurdu) exit 1.
+
+    python -m benchmarks.check_indexes
+"""
+import argparse
+import io
+import random
+import sys
+from contextlib import redirect_stdout
+from datetime import datetime, timezone, timedelta
+
+from app.utils import firestore_indexes, job_queue
+from app.jobs import compact_transactions, purge_deleted, rebuild_search_index, rebuild_tax_lots
+from .bench_endpoints import setup_app, build_scenarios
+
+
+def _extra_requests(user):
+    """Senaryolarda olmayan isteğe bağlı filtre kombinasyonları ve bakiye defteri akışı."""
+    uid = user['userId']
+    today = datetime.now(timezone.utc).date()
+    month_ago = (today - timedelta(days=30)).isoformat()
+    account = user['accounts'][0]['name']
+    account_id = user['accounts'][0]['id']
+    investment_account = user['investmentAccountIds'][0]
+    return [
+        ('GET', f"/api/transactions?userId={uid}&type=expense", None),
+        ('GET', f"/api/transactions?userId={uid}&account={account}", None),
+        ('GET', f"/api/transactions?userId={uid}&type=income&account={account}", None),
+        ('GET', f"/api/categories?userId={uid}&type=expense", None),
+        ('GET', f"/api/savings/allocations?userId={uid}", None),
+        ('GET', f"/api/savings/allocations?userId={uid}&source=manual", None),
+        ('GET', f"/api/savings/allocations?userId={uid}&startDate={month_ago}&endDate={today.isoformat()}&source=auto", None),
+        ('GET', f"/api/investments/transactions?userId={uid}&accountId={investment_account}", None),
+        ('GET', f"/api/investments/transactions?userId={uid}&assetSymbol=THYAO.IS", None),
+        ('GET', f"/api/investments/transactions?userId={uid}&accountId={investment_account}&assetSymbol=THYAO.IS", None),
+        ('PUT', f"/api/investments/holdings/{user['holdingIds'][0]}", {'quantity': 3, 'averageCost': 100.0}),
+        ('DELETE', f"/api/investments/holdings/{user['holdingIds'][-1]}", None),
+        ('GET', f"/api/accounts/{account_id}/balance?userId={uid}&asOf={month_ago}", None),
+        ('GET', f"/api/accounts/{account_id}/balance?userId={uid}", None),
+        ('POST', '/api/transactions', {'userId': uid, 'type': 'expense', 'category': 'Market', 'amount': 25.0,
+                                       'date': (today - timedelta(days=90)).isoformat(), 'account': account}),
+        ('GET', f"/api/accounts/net-worth?userId={uid}&months=6", None),
+        ('GET', f"/api/export?userId={uid}&format=csv", None),
+        ('GET', f"/api/transactions/search?userId={uid}&q=market", None),
+        ('GET', f"/api/transactions/search?userId={uid}&q=hekim&mode=substring", None),
+        ('GET', f"/api/transactions/search?userId={uid}&q=market&mode=term", None),
+        ('GET', f"/api/investments/realized-gains?userId={uid}", None),
+        ('GET', f"/api/investments/realized-gains?userId={uid}&accountId={investment_account}&year={today.year}", None),
+    ]
+
+
+def _sync_flow(http, user):
+    """Tam senkron, araya bir yazma, ardından delta senkron (imleç + tombstone sorguları)."""
+    uid = user['userId']
+    full = http.get(f"/api/sync?userId={uid}").get_json()
+    http.post('/api/transactions', json={
+        'userId': uid, 'type': 'expense', 'category': 'Kahve', 'amount': 10.0,
+        'date': datetime.now(timezone.utc).date().isoformat(), 'account': user['accounts'][0]['name']})
+    http.delete(f"/api/transactions/{user['transactionIds'].pop()}?userId={uid}")
+    http.post('/api/budgets', json={'userId': uid, 'category': 'Market', 'limitAmount': 2500})
+    return http.get(f"/api/sync?userId={uid}&since={full['token']}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--users', type=int, default=2)
+    parser.add_argument('--transactions', type=int, default=200)
+    parser.add_argument('--iterations', type=int, default=5, help='requests per scenario')
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args(argv)
+
+    failures = []
+    if firestore_indexes.main(['--check']) != 0:
+        failures.append("firestore.indexes.json is out of date")
+
+    app, client, users = setup_app(args.users, args.transactions, args.seed)
+    validator = firestore_indexes.IndexValidator(strict=False)
+    client.query_validator = validator
+    http = app.test_client()
+    rng = random.Random(args.seed)
+    scenarios, pick = build_scenarios(users, rng)
+    # Okumalar arşiv bucket'ları + canlı sorgu birleşimiyle de denensin; temizlik ve index sorguları da kontrol edilsin
+    compact_transactions.run()
+    purge_deleted.run()
+    rebuild_search_index.run()
+    rebuild_tax_lots.run()
+
+    requests = 0
+    with redirect_stdout(io.StringIO()):
+        for _, factory in scenarios:
+            for _ in range(args.iterations):
+                method, url, body = factory(pick())
+                # Akış yanıtları (export) da sonuna kadar okunsun
+                http.open(url, method=method, json=body, buffered=True)
+                requests += 1
+        for user in users:
+            for method, url, body in _extra_requests(user):
+                # Akış yanıtları (export) da sonuna kadar okunsun
+                http.open(url, method=method, json=body, buffered=True)
+                requests += 1
+            _sync_flow(http, user)
+            requests += 6
+        # Arka plan işlerinin sorguları da kontrol edilsin
+        if not job_queue.wait_idle():
+            failures.append("background jobs did not finish")
+
+    print(f"Ran {requests} requests with the index validator installed.")
+    if validator.violations:
+        failures.extend(f"query not covered by firestore.indexes.json: {shape}" for shape in validator.violations)
+
+    if failures:
+        print("\nIndex check failed:")
+        for line in failures:
+            print(f"  - {line}")
+        return 1
+    print("All issued query shapes are covered by firestore.indexes.json.")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,247 @@
+# File: flask_api/benchmarks/seed.py
+"""
+Benchmark'lar için gerçekçi sentetik kullanıcı verisi üretir.
+
+Her kullanıcı için: profil, normal ve yatırım hesapları, kategoriler, bütçeler,
+tasarruf hedefleri, gelirlerden otomatik tasarruf tahsisleri, binlerce
+gelir/gider işlemi ve yatırım işlemleri + holding'ler. Veriler doğrudan
+istemciye batch'ler halinde yazılır; hesap bakiyeleri işlemlerle tutarlıdır.
+"""
+import random
+from datetime import datetime, timezone, timedelta
+
+EXPENSE_CATEGORIES = ["Market", "Yemek/Restoran", "Kahve", "Ulaşım", "Fatura", "Kira Gideri",
+                      "Giyim", "Eğlence", "Sağlık", "Eğitim", "Diğer"]
+INCOME_CATEGORIES = ["Maaş", "Freelance", "Ek Gelir"]
+EMOTIONS = ["Nötr", "Mutlu", "Stresli", "Üzgün", "Heyecanlı"]
+DESCRIPTIONS = {
+    "Market": ["Migros alışverişi", "BİM haftalık", "Şok market", "A101 temizlik"],
+    "Yemek/Restoran": ["Öğle yemeği", "Akşam yemeği dışarıda", "Yemeksepeti siparişi"],
+    "Kahve": ["Starbucks latte", "Kahve Dünyası", "Türk kahvesi"],
+    "Ulaşım": ["İstanbulkart dolum", "Taksi", "Benzin", "Uber"],
+    "Fatura": ["Elektrik faturası", "Doğalgaz faturası", "İnternet faturası", "Netflix aboneliği", "Spotify"],
+    "Kira Gideri": ["Ev kirası"],
+    "Giyim": ["Zara tişört", "LC Waikiki pantolon", "Ayakkabı"],
+    "Eğlence": ["Sinema bileti", "Konser", "Steam oyun"],
+    "Sağlık": ["Eczane", "Diş hekimi"],
+    "Eğitim": ["Udemy kursu", "Kitap"],
+    "Diğer": ["Hediye", "Bağış"],
+    "Maaş": ["Maaş ödemesi"],
+    "Freelance": ["Freelance proje ödemesi"],
+    "Ek Gelir": ["Kira geliri", "Temettü"],
+}
+SYMBOLS = {"TRY": ["THYAO.IS", "ASELS.IS", "BIMAS.IS", "GARAN.IS"], "USD": ["AAPL", "MSFT", "NVDA", "BTC-USD"]}
+BATCH_SIZE = 400
+
+
+def _iso(dt):
+    return dt.isoformat()
+
+
+class _BatchWriter:
+    def __init__(self, client):
+        self.client = client
+        self.batch = client.batch()
+        self.pending = 0
+        self.total = 0
+
+    def set(self, ref, data):
+        self.batch.set(ref, data)
+        self.pending += 1
+        self.total += 1
+        if self.pending >= BATCH_SIZE:
+            self.flush()
+
+    def flush(self):
+        if self.pending:
+            self.batch.commit()
+            self.batch = self.client.batch()
+            self.pending = 0
+
+
+def seed_finance_test_items(client, writer=None):
+    own_writer = writer is None
+    writer = writer or _BatchWriter(client)
+    items = []
+    scales = [('FO', 6), ('FWB', 5), ('RT', 5), ('FCAP', 4)]
+    for scale, count in scales:
+        for i in range(count):
+            item_id = f"{scale}{i + 1}"
+            item = {'itemId': item_id, 'scale': scale, 'text': f"{scale} soru {i + 1}",
+                    'reverseScored': scale != 'FO' and i % 3 == 2}
+            if scale == 'FO':
+                item['choices'] = ['a', 'b', 'c', 'd']
+                item['correctChoice'] = 'b'
+            items.append(item)
+            writer.set(client.collection('FinanceTestItems').document(item_id), item)
+    if own_writer:
+        writer.flush()
+    return items
+
+
+def seed_user(client, user_index, transactions_per_user=3000, months=24, rng=None, writer=None):
+    """Tek bir sentetik kullanıcı üretir ve benchmark'ın kullanacağı kimlikleri döner."""
+    rng = rng or random.Random(user_index)
+    own_writer = writer is None
+    writer = writer or _BatchWriter(client)
+    now = datetime.now(timezone.utc)
+    user_id = f"bench-user-{user_index:04d}"
+
+    writer.set(client.collection('users').document(user_id), {
+        'fullName': f"Benchmark User {user_index}", 'username': f"bench{user_index}",
+        'email': f"bench{user_index}@example.com", 'birthDate': '1995-05-17',
+        'profileIconId': 'icon-1', 'riskProfile': None,
+        'createdAt': _iso(now), 'updatedAt': _iso(now)
+    })
+
+    # --- hesaplar ---
+    regular_accounts = []
+    for name, account_type, initial in (("Nakit", "cash", 2500.0), ("Ziraat Vadesiz", "bank", 18000.0),
+                                        ("Kredi Kartı", "credit_card", 0.0)):
+        ref = client.collection('user_accounts').document()
+        regular_accounts.append({'ref': ref, 'id': ref.id, 'name': name, 'type': account_type,
+                                 'initial': initial, 'balance': initial})
+
+    # --- kategoriler ---
+    category_ids = []
+    for category_type, names in (("expense", EXPENSE_CATEGORIES), ("income", INCOME_CATEGORIES)):
+        for name in names:
+            ref = client.collection('user_defined_categories').document()
+            category_ids.append(ref.id)
+            writer.set(ref, {'userId': user_id, 'categoryName': name, 'categoryType': category_type,
+                             'iconId': 'default_category_icon', 'subcategories': [], 'isArchived': False,
+                             'createdAt': _iso(now), 'updatedAt': _iso(now)})
+
+    # --- gelir/gider işlemleri ---
+    start_day = (now - timedelta(days=months * 30)).date()
+    total_days = (now.date() - start_day).days
+    transaction_ids = []
+    savings_total = 0.0
+    for i in range(transactions_per_user):
+        day = start_day + timedelta(days=rng.randrange(total_days + 1))
+        created = datetime(day.year, day.month, day.day, rng.randrange(24), rng.randrange(60),
+                           rng.randrange(60), tzinfo=timezone.utc)
+        is_income = rng.random() < 0.08
+        account = rng.choice(regular_accounts[:2]) if is_income else rng.choice(regular_accounts)
+        if is_income:
+            category = rng.choice(INCOME_CATEGORIES)
+            amount = round(rng.uniform(3000, 45000), 2)
+            allocation_pct = rng.choice([None, 5, 10, 20])
+        else:
+            category = rng.choice(EXPENSE_CATEGORIES)
+            amount = round(rng.lognormvariate(5.0, 0.9), 2)
+            allocation_pct = None
+
+        ref = client.collection('transactions').document()
+        tx = {
+            'userId': user_id, 'type': 'income' if is_income else 'expense', 'category': category,
+            'amount': amount, 'date': day.isoformat(), 'account': account['name'],
+            'description': rng.choice(DESCRIPTIONS[category]),
+            'isNeed': rng.random() < 0.6, 'emotion': rng.choice(EMOTIONS),
+            'isDeleted': rng.random() < 0.02,
+            'createdAt': _iso(created), 'updatedAt': _iso(created)
+        }
+        if allocation_pct:
+            tx['incomeAllocationPct'] = allocation_pct
+        writer.set(ref, tx)
+        transaction_ids.append(ref.id)
+
+        if tx['isDeleted']:
+            continue
+        allocated = round(amount * allocation_pct / 100, 2) if allocation_pct else 0.0
+        account['balance'] += (amount - allocated) if is_income else -amount
+        if allocated > 0:
+            savings_total += allocated
+            writer.set(client.collection('savings_allocations').document(), {
+                'userId': user_id, 'transactionId': ref.id, 'amount': allocated, 'date': day.isoformat(),
+                'source': 'auto', 'createdAt': _iso(created)
+            })
+
+    for account in regular_accounts:
+        writer.set(account['ref'], {
+            'userId': user_id, 'accountName': account['name'], 'accountType': account['type'],
+            'initialBalance': account['initial'], 'currentBalance': round(account['balance'], 2),
+            'currency': 'TRY', 'isArchived': False, 'createdAt': _iso(now), 'updatedAt': _iso(now)
+        })
+
+    # --- bütçeler (içinde bulunulan ay) ---
+    for category in EXPENSE_CATEGORIES[:6]:
+        writer.set(client.collection('budgets').document(), {
+            'userId': user_id, 'category': category, 'limitAmount': float(rng.choice([1000, 2500, 5000])),
+            'period': 'monthly', 'isAuto': False, 'year': now.year, 'month': now.month,
+            'createdAt': _iso(now), 'updatedAt': _iso(now)
+        })
+
+    # --- hedefler ---
+    goal_ids = []
+    goal_funds = 0.0
+    for title, target, months_ahead in (("Tatil", 30000.0, 8), ("Acil Durum Fonu", 60000.0, 18),
+                                        ("Yeni Telefon", 25000.0, 5)):
+        current = round(min(savings_total * 0.15, target * 0.5), 2)
+        goal_funds += current
+        ref = client.collection('savings_goals').document()
+        goal_ids.append(ref.id)
+        writer.set(ref, {
+            'userId': user_id, 'title': title, 'targetAmount': target, 'currentAmount': current,
+            'targetDate': (now.date() + timedelta(days=30 * months_ahead)).isoformat(),
+            'isActive': True, 'createdAt': _iso(now)
+        })
+    writer.set(client.collection('user_savings_balances').document(user_id), {
+        'totalSavingsBalance': round(savings_total - goal_funds, 2), 'updatedAt': _iso(now)
+    })
+
+    # --- yatırım hesapları, işlemleri ve holding'ler ---
+    holding_ids = []
+    investment_account_ids = []
+    for currency, name, category in (("TRY", "Borsa İstanbul", "Hisse Senedi"), ("USD", "ABD Hisseleri", "Yabancı Hisse")):
+        acc_ref = client.collection('user_accounts').document()
+        investment_account_ids.append(acc_ref.id)
+        writer.set(acc_ref, {
+            'userId': user_id, 'accountName': name, 'accountType': 'investment', 'category': category,
+            'initialBalance': 0.0, 'currentBalance': 0.0, 'currency': currency, 'isArchived': False,
+            'totalRealizedPL': 0.0, 'createdAt': _iso(now), 'updatedAt': _iso(now)
+        })
+        for symbol in SYMBOLS[currency]:
+            quantity = 0.0
+            cost = 0.0
+            for _ in range(rng.randrange(3, 12)):
+                day = start_day + timedelta(days=rng.randrange(total_days + 1))
+                qty = round(rng.uniform(1, 50), 4)
+                price = round(rng.uniform(20, 400), 2)
+                quantity += qty
+                cost += qty * price
+                writer.set(client.collection('investment_transactions').document(), {
+                    'userId': user_id, 'accountId': acc_ref.id, 'assetSymbol': symbol, 'type': 'buy',
+                    'quantity': qty, 'pricePerUnit': price, 'totalAmount': qty * price,
+                    'date': day.isoformat(), 'createdAt': _iso(now)
+                })
+            hold_ref = client.collection('holdings').document()
+            holding_ids.append(hold_ref.id)
+            writer.set(hold_ref, {
+                'userId': user_id, 'accountId': acc_ref.id, 'assetSymbol': symbol,
+                'quantity': quantity, 'averageCost': cost / quantity,
+                'createdAt': _iso(now), 'updatedAt': _iso(now)
+            })
+
+    if own_writer:
+        writer.flush()
+
+    return {
+        'userId': user_id,
+        'accounts': [{'id': a['id'], 'name': a['name']} for a in regular_accounts],
+        'investmentAccountIds': investment_account_ids,
+        'categoryIds': category_ids,
+        'goalIds': goal_ids,
+        'holdingIds': holding_ids,
+        'transactionIds': transaction_ids,
+    }
+
+
+def seed_dataset(client, num_users=5, transactions_per_user=3000, months=24, seed=42):
+    rng = random.Random(seed)
+    writer = _BatchWriter(client)
+    seed_finance_test_items(client, writer)
+    users = [seed_user(client, i, transactions_per_user, months, random.Random(rng.random()), writer)
+             for i in range(num_users)]
+    writer.flush()
+    return users
@@ -0,0 +1,30 @@
+# File: flask_api/benchmarks/serving_app.py
+"""
+Sunucu benchmark'ları için WSGI giriş noktası: in-memory Firestore'u
+sentetik veriyle doldurur ve yfinance'i yerel sağlayıcıyla değiştirir.
+
+    gunicorn -c gunicorn.conf.py benchmarks.serving_app:app
+    python -m benchmarks.serving_app            # geliştirme sunucusu
+
+BENCH_USERS / BENCH_TRANSACTIONS veri boyutunu, MEMORY_FIRESTORE_LATENCY_MS
+her Firestore round trip'inin, BENCH_MARKET_DELAY_MS ve BENCH_LLM_DELAY_MS
+de yfinance ve Gemini çağrılarının simüle edilen gecikmesini belirler.
+"""
+import os
+
+from app import create_app
+from app.utils.memory_firestore import MemoryFirestoreClient
+from .seed import seed_dataset
+from .stubs import install_market_data_stub, install_llm_stub
+
+client = MemoryFirestoreClient(latency_ms=0)
+app = create_app(firestore_client=client)
+install_market_data_stub(float(os.getenv('BENCH_MARKET_DELAY_MS', '0')) / 1000.0)
+install_llm_stub(float(os.getenv('BENCH_LLM_DELAY_MS', '0')) / 1000.0)
+users = seed_dataset(client, num_users=int(os.getenv('BENCH_USERS', '3')),
+                     transactions_per_user=int(os.getenv('BENCH_TRANSACTIONS', '1000')))
+client._latency = float(os.getenv('MEMORY_FIRESTORE_LATENCY_MS', '0')) / 1000.0
+
+
+if __name__ == '__main__':
+    app.run(host='127.0.0.1', port=int(os.getenv('PORT', '5000')), debug=False)
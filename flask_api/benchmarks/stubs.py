@@ -0,0 +1,85 @@
+# File: flask_api/benchmarks/stubs.py
+"""
+Benchmark'larda ağ bağımlılıklarını (yfinance) deterministik yerel
+karşılıklarıyla değiştirir; ölçülen süre sadece uygulamanın kendi işidir.
+"""
+import time
+import numpy as np
+import pandas as pd
+
+
+class FakeYFinance:
+    """`yf.download` ile aynı şekilde (MultiIndex kolonlu) fiyat verisi döner."""
+
+    def __init__(self, delay_seconds=0.0):
+        self.delay_seconds = delay_seconds
+        self.calls = 0
+
+    def download(self, tickers, period="1d", interval="1d", progress=False, **kwargs):
+        self.calls += 1
+        if self.delay_seconds:
+            time.sleep(self.delay_seconds)
+        symbols = [tickers] if isinstance(tickers, str) else list(tickers)
+        rows = 90 * 7 if period == "90d" else 8
+        index = pd.date_range(end=pd.Timestamp.now(tz="UTC").floor("h"), periods=rows, freq="h")
+        frames = {}
+        for symbol in symbols:
+            base = 38.5 if symbol == "USDTRY=X" else 50 + (sum(map(ord, symbol)) % 300)
+            rng = np.random.default_rng(sum(map(ord, symbol)))
+            close = base * np.exp(np.cumsum(rng.normal(0, 0.004, rows)))
+            frames[("Open", symbol)] = close * 0.999
+            frames[("High", symbol)] = close * 1.003
+            frames[("Low", symbol)] = close * 0.997
+            frames[("Close", symbol)] = close
+            frames[("Volume", symbol)] = rng.integers(1_000, 100_000, rows).astype(float)
+        df = pd.DataFrame(frames, index=index)
+        df.columns = pd.MultiIndex.from_tuples(df.columns, names=["Price", "Ticker"])
+        return df
+
+
+def install_market_data_stub(delay_seconds=0.0):
+    """Uygulamanın kullandığı yfinance modülünü sahte sağlayıcıyla değiştirir."""
+    from app.utils import market_data
+    fake = FakeYFinance(delay_seconds)
+    market_data.yf = fake
+    market_data.clear_cache()
+    return fake
+
+
+class _FakeLLMResponse:
+    def __init__(self, text):
+        self.text = text
+
+
+class FakeGeminiModel:
+    """`generate_content` / `generate_content_async` yanıtlarını sabit gecikmeyle taklit eder."""
+
+    def __init__(self, delay_seconds=0.0):
+        self.delay_seconds = delay_seconds
+        self.calls = 0
+
+    def _answer(self, prompt):
+        self.calls += 1
+        text = prompt.rsplit('İşlem Metni:', 1)[-1].lower()
+        is_income = any(word in text for word in ('maaş', 'gelir', 'freelance'))
+        return _FakeLLMResponse('{"kategori": "%s", "tip": "%s"}' % (
+            "Maaş" if is_income else "Market", "gelir" if is_income else "gider"))
+
+    def generate_content(self, prompt, **kwargs):
+        if self.delay_seconds:
+            time.sleep(self.delay_seconds)
+        return self._answer(prompt)
+
+    async def generate_content_async(self, prompt, **kwargs):
+        import asyncio
+        if self.delay_seconds:
+            await asyncio.sleep(self.delay_seconds)
+        return self._answer(prompt)
+
+
+def install_llm_stub(delay_seconds=0.0):
+    """ai_service'in Gemini modelini sahte modelle değiştirir."""
+    from app.services import ai_service
+    fake = FakeGeminiModel(delay_seconds)
+    ai_service.llm_model = fake
+    return fake
@@ -0,0 +1,101 @@
+# File: flask_api/gunicorn.conf.py
+"""
+Production sunucu ayarları. Tüm değerler ortam değişkenleriyle değiştirilebilir:
+
+    gunicorn -c gunicorn.conf.py run:app
+    SERVER_MODE=production python run.py      # aynı ayarlarla
+
+Graceful reload: `kill -HUP <master pid>` yeni worker'ları başlatır, eskiler
+elindeki istekleri GUNICORN_GRACEFUL_TIMEOUT süresi içinde bitirir.
+"""
+import multiprocessing
+import os
+import sys
+import tempfile
+
+bind = os.getenv('GUNICORN_BIND', f"0.0.0.0:{os.getenv('PORT', '5000')}")
+
+# İstekler çoğunlukla Firestore / yfinance / Gemini'yi bekleyerek geçtiği için
+# process başına birden fazla thread (gthread) kullanılır.
+workers = int(os.getenv('WEB_CONCURRENCY', str(multiprocessing.cpu_count() * 2 + 1)))
+threads = int(os.getenv('GUNICORN_THREADS', '4'))
+worker_class = os.getenv('GUNICORN_WORKER_CLASS', 'gthread')
+
+# /metrics sayaçları process başınadır; birden fazla worker'da her worker
+# kendi sayaçlarını bu dizine yazar ve /metrics hepsinin toplamını döner
+# (bkz. app/utils/firestore_metrics.py). Dizin sunucu başlarken temizlenir.
+if workers > 1:
+    os.environ.setdefault('METRICS_MULTIPROC_DIR',
+                          os.path.join(tempfile.gettempdir(), f"flask_api_metrics_{os.getpid()}"))
+
+# GUNICORN_WORKER_CLASS=gevent: tek worker yüzlerce yavaş isteği (Firestore,
+# yfinance, Gemini beklemesi) greenlet'lerle eşzamanlı taşır.
+worker_connections = int(os.getenv('GUNICORN_WORKER_CONNECTIONS', '1000'))
+_is_gevent = worker_class == 'gevent'
+
+# Uygulama master'da bir kez yüklenir; fork sonrası worker'lar import edilmiş
+# modülleri ve ısıtılmış piyasa verisi önbelleğini copy-on-write paylaşır.
+# gevent'te monkey patch worker içinde yapıldığından varsayılan olarak kapalıdır.
+preload_app = os.getenv('GUNICORN_PRELOAD', '0' if _is_gevent else '1') == '1'
+
+keepalive = int(os.getenv('GUNICORN_KEEPALIVE', '5'))
+timeout = int(os.getenv('GUNICORN_TIMEOUT', '60'))
+graceful_timeout = int(os.getenv('GUNICORN_GRACEFUL_TIMEOUT', '30'))
+
+# Uzun yaşayan worker'larda bellek birikmesine karşı periyodik yeniden başlatma
+max_requests = int(os.getenv('GUNICORN_MAX_REQUESTS', '2000'))
+max_requests_jitter = int(os.getenv('GUNICORN_MAX_REQUESTS_JITTER', '200'))
+
+accesslog = os.getenv('GUNICORN_ACCESS_LOG', '-') or None
+errorlog = '-'
+loglevel = os.getenv('GUNICORN_LOG_LEVEL', 'info')
+
+
+def on_starting(server):
+    # Önceki çalışmanın sayaç dosyaları bu çalışmaya eklenmesin
+    directory = os.getenv('METRICS_MULTIPROC_DIR')
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+        for name in os.listdir(directory):
+            if name.startswith('metrics'):
+                os.remove(os.path.join(directory, name))
+
+
+def when_ready(server):
+    # Fork'tan önce master'da bir kez çalışır. Firebase create_app içinde
+    # (preload) başlatıldı; burada sadece ağ isteği gerektiren önbellekler
+    # ısıtılır. Firestore'a fork öncesi RPC atılmaz, gRPC kanalları her
+    # worker'da ilk kullanımda açılır.
+    if not preload_app:
+        return
+    if os.getenv('MARKET_DATA_WARMUP', '1') != '1':
+        return
+    from app.utils import market_data
+    symbols = [s.strip().upper() for s in os.getenv('MARKET_WARMUP_SYMBOLS', '').split(',') if s.strip()]
+    try:
+        market_data.warm_up(symbols)
+    except Exception as e:
+        server.log.warning(f"Market data warmup failed: {e}")
+
+
+def post_fork(server, worker):
+    server.log.info(f"Worker {worker.pid} started ({worker_class}, {threads} threads).")
+
+
+def worker_exit(server, worker):
+    # Çıkan worker'ın son sayaçları dosyaya yazılır; sonraki /metrics onları arşive ekler
+    firestore_metrics = sys.modules.get('app.utils.firestore_metrics')
+    if firestore_metrics is not None:
+        firestore_metrics.flush(force=True)
+
+
+def post_worker_init(worker):
+    # gevent worker'ı monkey patch'i init sırasında uygular; Firestore'un gRPC
+    # kanalları da cooperative çalışsın diye ilk RPC'den önce gevent moduna alınır.
+    # Bloklayan C kütüphaneleri (yfinance/curl_cffi, async view event loop'ları)
+    # gevent'in thread havuzunda çalışır; havuz boyutu eşzamanlılığı sınırlar.
+    if _is_gevent:
+        import gevent
+        from grpc.experimental import gevent as grpc_gevent
+        grpc_gevent.init_gevent()
+        gevent.get_hub().threadpool.maxsize = int(os.getenv('GEVENT_THREADPOOL_SIZE', '64'))
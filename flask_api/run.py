@@ -4,8 +4,32 @@ import os
 
 app = create_app()
 
+
+def run_production():
+    # Gunicorn'u gunicorn.conf.py ayarlarıyla, bu süreçte zaten oluşturulmuş
+    # uygulama ile başlatır (`gunicorn -c gunicorn.conf.py run:app` ile aynı).
+    from gunicorn.app.base import Application
+
+    class ProductionServer(Application):
+        def init(self, parser, opts, args):
+            return None
+
+        def load_config(self):
+            self.load_config_from_file(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'gunicorn.conf.py'))
+
+        def load(self):
+            return app
+
+    ProductionServer().run()
+
+
 if __name__ == '__main__':
-    # Debug mode can be set via FLASK_DEBUG in .env or here
-    debug_mode = os.getenv('FLASK_DEBUG', '0') == '1' 
-    print(f"Starting Flask app in debug_mode: {debug_mode}")
-    app.run(host='0.0.0.0', port=5000, debug=debug_mode)
\ No newline at end of file
+    # SERVER_MODE=production: Gunicorn (çoklu worker/thread). Aksi halde geliştirme sunucusu.
+    if os.getenv('SERVER_MODE', 'development') == 'production':
+        print("Starting Flask app with Gunicorn (production mode)")
+        run_production()
+    else:
+        # Debug mode can be set via FLASK_DEBUG in .env or here
+        debug_mode = os.getenv('FLASK_DEBUG', '0') == '1'
+        print(f"Starting Flask app in debug_mode: {debug_mode}")
+        app.run(host='0.0.0.0', port=5000, debug=debug_mode)
@@ -93,6 +93,10 @@ def seed_data():
         doc_ref = items_collection.document(item['id'])
         batch.set(doc_ref, item)
     
+    # API süreçleri madde bankasını önbellekte tutar; sürüm artınca yeniden yüklerler
+    batch.set(db.collection('app_meta').document('finance_test_items'),
+              {'version': firestore.Increment(1), 'itemCount': len(test_items)}, merge=True)
+
     batch.commit()
     print(f"Başarıyla {len(test_items)} adet test maddesi Firestore'a eklendi.")
 